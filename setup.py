@@ -19,8 +19,10 @@ from __future__ import unicode_literals
 import io
 import os
 import re
+import sys
 
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 
 __author__ = 'Cedric Zhuang'
 
@@ -53,6 +55,20 @@ def read_requirements(filename):
         return f.read().splitlines()
 
 
+# modules using the syntax of python 3.5+
+PY35_MODULES = [('storops.unity', 'async_client')]
+
+
+class BuildPy(build_py):
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info < (3, 5):
+            modules = [(pkg, module, filename)
+                       for pkg, module, filename in modules
+                       if (pkg, module) not in PY35_MODULES]
+        return modules
+
+
 def get_description():
     return 'Python API for VNX and Unity.'
 
@@ -88,6 +104,7 @@ setup(
         'Topic :: Utilities',
         'License :: OSI Approved :: Apache Software License',
     ],
+    cmdclass={'build_py': BuildPy},
     install_requires=read_requirements('requirements.txt'),
     tests_require=read_requirements('test-requirements.txt')
 )
@@ -18,6 +18,7 @@ from __future__ import unicode_literals
 import sys
 import logging
 
+from storops.lib.parser import ParserConfigFactory
 from storops.lib.thinclone_helper import TCHelper  # noqa
 from storops.unity.enums import *  # noqa
 from storops.unity.resource.system import UnitySystem  # noqa
@@ -46,3 +47,19 @@ def disable_log():
     logger.setLevel(logging.NOTSET)
     logger.handlers = []
     return logger
+
+
+def enable_parser_cache(folder=None):
+    """Save the parsers built from `parser_configs.yaml` to disk.
+
+    Parsers are loaded from the cache on next start instead of being built
+    from the yaml configurations again.  The cache is rebuilt when the
+    configuration files are changed.
+
+    :param folder: cache folder, default to `~/.storops/parser_cache`.
+    """
+    ParserConfigFactory.enable_pickle_cache(folder)
+
+
+def disable_parser_cache():
+    ParserConfigFactory.disable_pickle_cache()
@@ -0,0 +1,329 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import unicode_literals
+
+import fnmatch
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+_url_pattern = re.compile(
+    r'^/api/(?P<category>instances|types)/(?P<type>[^/?]+)'
+    r'(?:/(?P<sub>[^/?]+))?')
+
+
+def get_resource_key(url):
+    """ get the resource key of an Unity REST url.
+
+    `/api/instances/<type>/<id>...` returns `(<type>, <id>)`.
+    `/api/types/<type>/instances...` and `/api/types/<type>/action/...`
+    returns `(<type>, None)`.  Other urls return None.
+
+    :param url: url without the host part.
+    :return: tuple of resource type and id.
+    """
+    ret = None
+    match = _url_pattern.match(url)
+    if match is not None:
+        category, type_name, sub = match.group('category', 'type', 'sub')
+        if category == 'instances':
+            if sub is not None:
+                ret = (type_name, sub)
+        elif sub in ('instances', 'action'):
+            ret = (type_name, None)
+    return ret
+
+
+def is_type_action(url):
+    """ whether the url is an action of a type, like `createLun`. """
+    match = _url_pattern.match(url)
+    return (match is not None and
+            match.group('category', 'sub') == ('types', 'action'))
+
+
+# types whose instances are changed by the requests to another type
+RELATED_TYPES = {
+    'storageResource': ('lun', 'filesystem', 'consistencyGroup',
+                        'nfsShare', 'cifsShare', 'snap'),
+    'lun': ('storageResource', 'snap'),
+    'filesystem': ('storageResource', 'nfsShare', 'cifsShare', 'snap'),
+    'snap': ('storageResource', 'lun', 'filesystem'),
+    'host': ('hostInitiator', 'hostIPPort', 'hostLUN'),
+    'hostInitiator': ('host', 'hostInitiatorPath'),
+}
+
+
+def get_path(url):
+    return url.split('?', 1)[0]
+
+
+def _get_size(result):
+    try:
+        resp, _ = result
+        ret = len(resp.text or '')
+    except (TypeError, ValueError, AttributeError):
+        ret = 0
+    return ret
+
+
+class _CacheEntry(object):
+    __slots__ = ('result', 'expire_at', 'size', 'key')
+
+    def __init__(self, result, expire_at, size, key):
+        self.result = result
+        self.expire_at = expire_at
+        self.size = size
+        self.key = key
+
+
+class ResponseCache(object):
+    """ LRU cache of the responses of `HTTPClient.get`.
+
+    Sample:
+
+        cache = ResponseCache(ttl=5, max_entries=2000,
+                              max_bytes=64 * 1024 * 1024,
+                              ttl_rules=[('*/metricRealTimeQuery/*', 1),
+                                         ('/api/types/*/instances', 5),
+                                         ('/api/types/*', 3600)])
+
+    :param ttl: default seconds to live of an entry.  0 means entries are
+        not cached except matched by a `ttl_rules`.
+    :param max_entries: max count of the entries, None means no limit.
+    :param max_bytes: max total size of the response text, None means no
+        limit.
+    :param ttl_rules: list of (pattern, ttl) tuple.  The pattern is a
+        shell style pattern (see `fnmatch`) matching the path of the url
+        without query string.  The first matched rule wins.
+    """
+
+    def __init__(self, ttl=0, max_entries=1000, max_bytes=None,
+                 ttl_rules=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        if ttl_rules is None:
+            ttl_rules = []
+        self.ttl_rules = [(re.compile(fnmatch.translate(pattern)), seconds)
+                          for pattern, seconds in ttl_rules]
+        self._init_entries()
+
+    def _init_entries(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # resource key -> set of cached url
+        self._index = {}
+        self._bytes = 0
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __getstate__(self):
+        # only the configurations are pickled, cached responses are not.
+        return {'ttl': self.ttl,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_rules': self.ttl_rules}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_entries()
+
+    def get_ttl(self, url):
+        path = get_path(url)
+        for pattern, seconds in self.ttl_rules:
+            if pattern.match(path):
+                return seconds
+        return self.ttl
+
+    @property
+    def generation(self):
+        """ counter increased each time entries are invalidated.
+
+        Response got before an invalidation may be out of date, pass the
+        generation got before the request to `put` to skip them.
+        """
+        return self._generation
+
+    def get(self, url, default=None):
+        with self._lock:
+            entry = self._entries.get(url, None)
+            if entry is not None and entry.expire_at <= time.time():
+                self._remove(url)
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                ret = default
+            else:
+                # move to the end as the most recently used
+                self._entries[url] = self._entries.pop(url)
+                self.hits += 1
+                ret = entry.result
+        return ret
+
+    def put(self, url, result, generation=None):
+        ttl = self.get_ttl(url)
+        if ttl <= 0:
+            return False
+
+        size = _get_size(result)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                log.debug('cache invalidated during the request, '
+                          'skip: {}'.format(url))
+                return False
+
+            if url in self._entries:
+                self._remove(url)
+            key = get_resource_key(url)
+            self._entries[url] = _CacheEntry(result, time.time() + ttl,
+                                             size, key)
+            self._bytes += size
+            if key is not None:
+                self._index.setdefault(key, set()).add(url)
+            self._evict()
+        return True
+
+    def _evict(self):
+        def is_full():
+            return ((self.max_entries is not None and
+                     len(self._entries) > self.max_entries) or
+                    (self.max_bytes is not None and
+                     self._bytes > self.max_bytes))
+
+        while self._entries and is_full():
+            url = next(iter(self._entries))
+            self._remove(url)
+            self.evictions += 1
+
+    def _remove(self, url):
+        entry = self._entries.pop(url)
+        self._bytes -= entry.size
+        if entry.key is not None:
+            urls = self._index.get(entry.key)
+            urls.discard(url)
+            if not urls:
+                del self._index[entry.key]
+
+    def invalidate(self, url):
+        """ invalidate entries affected by a change request to the url.
+
+        The instance and the instance list of the resource type are
+        invalidated, so are all the instances of the `RELATED_TYPES`.  The
+        actions of a type, like `storageResource/action/createLun`, may
+        change any type and invalidate all the entries.
+
+        :param url: url of the POST/PUT/DELETE request.
+        :return: count of the removed entries.
+        """
+        key = get_resource_key(url)
+        if key is None:
+            return 0
+        if is_type_action(url):
+            return self.invalidate_all()
+
+        type_name, obj_id = key
+        keys = [(type_name, None)]
+        if obj_id is not None:
+            keys.append(key)
+        return self.invalidate_resource(
+            *keys, related_types=RELATED_TYPES.get(type_name, ()))
+
+    def invalidate_resource(self, *keys, **kwargs):
+        """ invalidate the cached responses of the resources.
+
+        :param keys: tuple of resource type and id.  id None means the
+            instance list of the type.
+        :param related_types: types of which the instances and the
+            instance lists are all invalidated.
+        :return: count of the removed entries.
+        """
+        related_types = kwargs.get('related_types', ())
+        count = 0
+        with self._lock:
+            self._generation += 1
+            keys = set(keys)
+            if related_types:
+                keys.update(key for key in self._index
+                            if key[0] in related_types)
+            for key in keys:
+                for url in list(self._index.get(key, ())):
+                    self._remove(url)
+                    count += 1
+            self.invalidations += count
+        if count:
+            log.debug('{} cache entries invalidated for {}.'.format(
+                count, keys))
+        return count
+
+    def invalidate_all(self):
+        """ invalidate all the entries.
+
+        :return: count of the removed entries.
+        """
+        with self._lock:
+            count = len(self._entries)
+            self.invalidations += count
+            self._clear()
+        if count:
+            log.debug('all {} cache entries invalidated.'.format(count))
+        return count
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._generation += 1
+        self._entries.clear()
+        self._index.clear()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        return self._bytes
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -19,14 +19,18 @@ from __future__ import unicode_literals
 import copy
 import json
 import logging
+import socket
 import time
 
 import requests
 import six
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE
 from requests.exceptions import RequestException
+from requests.packages.urllib3.connection import HTTPConnection
 from retryz import retry
 
 from storops.connection import exceptions
+from storops.connection.cache import ResponseCache
 
 log = logging.getLogger(__name__)
 
@@ -39,10 +43,60 @@ def _wait_callback(tried):
     return 2 ** (tried - 1)
 
 
+def get_keep_alive_socket_options():
+    """ socket options to probe the idle connections in the pool.
+
+    TCP keep-alive makes sure the pooled connections are not silently
+    dropped by the firewalls between the client and the array.
+    """
+    ret = list(HTTPConnection.default_socket_options)
+    ret.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    for name, value in (('TCP_KEEPIDLE', 60),
+                        ('TCP_KEEPINTVL', 10),
+                        ('TCP_KEEPCNT', 6)):
+        if hasattr(socket, name):
+            ret.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return ret
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """ http adapter with configurable pool and socket options.
+
+    The connections, and thus the TLS sessions, are kept alive in the pool
+    and reused by the following requests.  With `pool_block`, the
+    requests wait for a free connection instead of opening a new one
+    which is discarded after use when the pool is full.
+    """
+    __attrs__ = HTTPAdapter.__attrs__ + ['_socket_options']
+
+    def __init__(self, pool_size=None, pool_block=False,
+                 socket_options=None):
+        if pool_size is None:
+            pool_size = DEFAULT_POOLSIZE
+        self._socket_options = socket_options
+        super(PooledHTTPAdapter, self).__init__(pool_connections=pool_size,
+                                                pool_maxsize=pool_size,
+                                                pool_block=pool_block)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self._socket_options is not None:
+            kwargs['socket_options'] = self._socket_options
+        super(PooledHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+
+    @property
+    def pool_size(self):
+        return self._pool_maxsize
+
+    @property
+    def pool_block(self):
+        return self._pool_block
+
+
 class HTTPClient(object):
     def __init__(self, base_url, headers, insecure=False, auth=None,
                  timeout=None, retries=None, ca_cert_path=None,
-                 cache_interval=0):
+                 cache_interval=0, response_cache=None, pool_size=None,
+                 pool_block=False, keep_alive=True):
         self.base_url = base_url
         if retries is None:
             retries = 2
@@ -51,8 +105,18 @@ class HTTPClient(object):
             insecure, auth, timeout, ca_cert_path)
         self.headers = headers
         self.session = requests.session()
-        self.cache_interval = cache_interval
-        self.cache_dict = {}
+        if keep_alive:
+            socket_options = get_keep_alive_socket_options()
+        else:
+            socket_options = None
+        self.adapter = PooledHTTPAdapter(pool_size=pool_size,
+                                         pool_block=pool_block,
+                                         socket_options=socket_options)
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        if response_cache is None:
+            response_cache = ResponseCache(ttl=cache_interval)
+        self.response_cache = response_cache
 
     def __del__(self):
         self.session.close()
@@ -129,31 +193,50 @@ class HTTPClient(object):
     def _cs_request_with_retries(self, url, method, **kwargs):
         return self.request(url, method, **kwargs)
 
-    def get(self, url, **kwargs):
-        if self.cache_interval <= 0:
+    @property
+    def cache_interval(self):
+        return self.response_cache.ttl
+
+    @cache_interval.setter
+    def cache_interval(self, value):
+        self.response_cache.ttl = value
+
+    def get(self, url, use_cache=True, **kwargs):
+        cache = self.response_cache
+        if not use_cache or cache.get_ttl(url) <= 0:
             result = self._cs_request(url, 'GET', **kwargs)
         else:
-            current = time.time()
-            if url in self.cache_dict.keys() and (
-                    current - self.cache_dict.get(url)[
-                    0] < self.cache_interval):
-                result = self.cache_dict[url][1]
+            result = cache.get(url)
+            if result is not None:
                 log.debug('Read response from cache, URL: {}'.format(url))
             else:
+                generation = cache.generation
                 result = self._cs_request(url, 'GET', **kwargs)
-                current = time.time()
-                log.debug('Write response to cache, URL: {}'.format(url))
-                self.cache_dict[url] = (current, result)
+                if self._is_success(result):
+                    log.debug('Write response to cache, URL: {}'.format(url))
+                    cache.put(url, result, generation)
         return result
 
+    @staticmethod
+    def _is_success(result):
+        resp, _ = result
+        status_code = getattr(resp, 'status_code', None)
+        return status_code is None or status_code < 400
+
+    def _cs_change_request(self, url, method, **kwargs):
+        try:
+            return self._cs_request(url, method, **kwargs)
+        finally:
+            self.response_cache.invalidate(url)
+
     def post(self, url, **kwargs):
-        return self._cs_request(url, 'POST', **kwargs)
+        return self._cs_change_request(url, 'POST', **kwargs)
 
     def put(self, url, **kwargs):
-        return self._cs_request(url, 'PUT', **kwargs)
+        return self._cs_change_request(url, 'PUT', **kwargs)
 
     def delete(self, url, **kwargs):
-        return self._cs_request(url, 'DELETE', **kwargs)
+        return self._cs_change_request(url, 'DELETE', **kwargs)
 
     @classmethod
     def log_request(cls, url, method, data=None):
@@ -186,4 +269,8 @@ class HTTPClient(object):
             cls._debug_print_json(resp.text, 'RESP BODY:')
 
     def update_headers(self, headers):
-        self.headers.update(headers)
+        # replace instead of update in place so that the requests sending
+        # in other threads never see a dictionary changing size.
+        new_headers = dict(self.headers)
+        new_headers.update(headers)
+        self.headers = new_headers
@@ -19,6 +19,7 @@ from __future__ import unicode_literals
 import functools
 import logging
 import pipes
+import threading
 
 import six
 from retryz import retry
@@ -36,9 +37,18 @@ LOG = logging.getLogger(__name__)
 def require_csrf_token(func):
     @functools.wraps(func)
     def decorator(self, url, **kwargs):
+        sent = {}
+
+        def _request():
+            sent['version'] = self.csrf_token_version
+            return func(self, url, **kwargs)
+
+        def _refresh():
+            self._update_csrf_token(sent.get('version'))
+
         wrapped = retry(on_error=self._http_authentication_error,
-                        on_retry=self._update_csrf_token)(func)
-        return wrapped(self, url, **kwargs)
+                        on_retry=_refresh)(_request)
+        return wrapped()
 
     return decorator
 
@@ -54,7 +64,8 @@ class UnityRESTConnector(object):
     }
 
     def __init__(self, host, port=443, user='admin', password='',
-                 verify=False, retries=None, cache_interval=0):
+                 verify=False, retries=None, cache_interval=0,
+                 response_cache=None, pool_size=None, pool_block=False):
         base_url = 'https://{host}:{port}'.format(host=host, port=port)
 
         insecure = False
@@ -69,7 +80,21 @@ class UnityRESTConnector(object):
                                              insecure=insecure,
                                              retries=retries,
                                              ca_cert_path=ca_cert_path,
-                                             cache_interval=cache_interval)
+                                             cache_interval=cache_interval,
+                                             response_cache=response_cache,
+                                             pool_size=pool_size,
+                                             pool_block=pool_block)
+        self._csrf_lock = threading.Lock()
+        self.csrf_token_version = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_csrf_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._csrf_lock = threading.Lock()
 
     def get(self, url, **kwargs):
         return self.http_client.get(url, **kwargs)
@@ -86,11 +111,21 @@ class UnityRESTConnector(object):
     def delete(self, url, **kwargs):
         return self.http_client.delete(url, **kwargs)
 
-    def _update_csrf_token(self):
-        path_user = '/api/types/user/instances'
-        resp, body = self.get(path_user)
-        headers = {'emc-csrf-token': resp.headers['emc-csrf-token']}
-        self.http_client.update_headers(headers)
+    def _update_csrf_token(self, version=None):
+        """ retrieve a new csrf token.
+
+        :param version: version of the token rejected by the system.  Skip
+            the update if the token is already refreshed by other threads.
+        """
+        with self._csrf_lock:
+            if version is not None and version != self.csrf_token_version:
+                LOG.debug('csrf token is already updated.')
+                return
+            path_user = '/api/types/user/instances'
+            resp, body = self.get(path_user, use_cache=False)
+            headers = {'emc-csrf-token': resp.headers['emc-csrf-token']}
+            self.http_client.update_headers(headers)
+            self.csrf_token_version += 1
 
 
 class XMLAPIConnector(object):
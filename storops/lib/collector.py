@@ -0,0 +1,324 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" collector of the metrics of many systems.
+
+The `MetricCollector` schedules the perf stats collections of the
+registered systems on a bounded pool of workers.  The metrics of each
+collection are published as `MetricBatch` to the sinks by one publisher
+thread, which groups the batches to reduce the disk writes.
+"""
+from __future__ import unicode_literals
+
+import csv
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import six
+from six.moves import queue
+
+from storops.lib.common import assure_folder, daemon, get_local_folder
+from storops.lib.metric_file import FORMAT_BLOCK, FORMAT_CSV, \
+    MetricsFileWriter
+from storops.lib.scheduler import CollectionScheduler
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+# put in the queue to stop the publisher thread
+_STOP = object()
+
+
+class MetricBatch(object):
+    """ metrics of one resource list collected at one time.
+    """
+
+    def __init__(self, name, timestamp, columns):
+        """ create the batch.
+
+        :param name: name of the batch, like `10.244.211.30_VNXLun`.
+        :param timestamp: seconds since epoch.
+        :param columns: `OrderedDict` of the column name and values.
+        """
+        self.name = name
+        self.timestamp = timestamp
+        self.columns = columns
+
+    @classmethod
+    def from_rsc_list(cls, rsc_list, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        name = os.path.basename(rsc_list.get_default_metric_file_prefix())
+        return cls(name, timestamp, rsc_list.get_metrics_columns())
+
+    def __len__(self):
+        if self.columns:
+            ret = len(next(iter(self.columns.values())))
+        else:
+            ret = 0
+        return ret
+
+    def __repr__(self):
+        return '<MetricBatch {} {} rows at {}>'.format(
+            self.name, len(self), self.timestamp)
+
+
+class MetricSink(object):
+    """ receive the published metric batches.
+    """
+
+    def publish(self, batches):
+        """ publish the batches.
+
+        :param batches: list of `MetricBatch`.
+        """
+        raise NotImplementedError('should publish the metric batches.')
+
+    def close(self):
+        pass
+
+
+class CallbackSink(MetricSink):
+    """ call the function with each batch.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def publish(self, batches):
+        for batch in batches:
+            self.callback(batch)
+
+
+class QueueSink(MetricSink):
+    """ put each batch to the queue.
+    """
+
+    def __init__(self, the_queue=None):
+        if the_queue is None:
+            the_queue = queue.Queue()
+        self.queue = the_queue
+
+    def publish(self, batches):
+        for batch in batches:
+            self.queue.put(batch)
+
+
+class FileSink(MetricSink):
+    """ write the batches to the metric files.
+
+    The batches of the same resource list are written to the same file one
+    after another.
+    """
+
+    def __init__(self, folder=None, fmt=None, **kwargs):
+        """ create the sink.
+
+        :param folder: folder of the files, default to `~/.storops`.
+        :param fmt: `block` for the rotated columnar metric files, `csv`
+            for the csv files.  Default to `block`.
+        :param kwargs: options of the `MetricsFileWriter`.
+        """
+        if folder is None:
+            folder = get_local_folder()
+        if fmt is None:
+            fmt = FORMAT_BLOCK
+        if fmt not in (FORMAT_BLOCK, FORMAT_CSV):
+            raise ValueError('unsupported metric persist format: {}.'.format(
+                fmt))
+        self.folder = folder
+        self.fmt = fmt
+        self.writer_options = kwargs
+
+    def publish(self, batches):
+        by_name = OrderedDict()
+        for batch in batches:
+            by_name.setdefault(batch.name, []).append(batch)
+        assure_folder(self.folder)
+        for name, group in by_name.items():
+            prefix = os.path.join(self.folder, name)
+            if self.fmt == FORMAT_CSV:
+                self._write_csv(prefix + '.csv', group)
+            else:
+                writer = MetricsFileWriter(prefix, **self.writer_options)
+                writer.write_all((batch.columns, batch.timestamp)
+                                 for batch in group)
+
+    @staticmethod
+    def _write_csv(filename, batches):
+        is_new = not os.path.exists(filename)
+        mode = 'ab' if six.PY2 else 'a'
+        kwargs = {} if six.PY2 else {'newline': ''}
+        with io.open(filename, mode, **kwargs) as f:
+            writer = csv.writer(f)
+            for batch in batches:
+                header = list(batch.columns.keys())
+                if is_new:
+                    writer.writerow(header)
+                    is_new = False
+                writer.writerows(zip(*[batch.columns[name]
+                                       for name in header]))
+
+
+class MetricCollector(object):
+    """ collect the metrics of many systems.
+
+    The collections are run by the workers of one `CollectionScheduler`.
+    The metrics are published to the sinks by one publisher thread, up to
+    `batch_size` batches or every `flush_interval` seconds.
+    """
+
+    def __init__(self, sinks=None, max_workers=8, flush_interval=5,
+                 batch_size=100):
+        """ create the collector.
+
+        :param sinks: list of `MetricSink`.
+        :param max_workers: number of collections run at the same time.
+        :param flush_interval: seconds to wait for more batches.
+        :param batch_size: max number of batches published at once.
+        """
+        self.scheduler = CollectionScheduler(max_workers=max_workers)
+        self.sinks = list(sinks) if sinks else []
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._systems = []
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._publisher = None
+        self.published = 0
+        self.errors = 0
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    @property
+    def systems(self):
+        return list(self._systems)
+
+    def register(self, system, rsc_clz_list=None, **kwargs):
+        """ collect the perf stats of the system.
+
+        The collection is the one of `system.enable_perf_stats`, scheduled
+        by the collector.  The metrics are published to the sinks instead of
+        persisted by the system.
+
+        :param system: `VNXSystem` or `UnitySystem`.
+        :param rsc_clz_list: resource classes to collect.
+        :param kwargs: other options of `enable_perf_stats`, like
+            `interval` and `max_interval`.
+        """
+        system.enable_perf_stats(rsc_clz_list=rsc_clz_list,
+                                 scheduler=self.scheduler, **kwargs)
+        system.enable_persist_perf_stats(sink=self._put)
+        with self._lock:
+            if system not in self._systems:
+                self._systems.append(system)
+            if self._publisher is None:
+                self._publisher = daemon(self._publish_loop)
+
+    def unregister(self, system):
+        with self._lock:
+            if system in self._systems:
+                self._systems.remove(system)
+        system.disable_persist_perf_stats()
+        system.disable_perf_stats()
+
+    def get_stats(self):
+        """ collection stats of all the systems.
+        """
+        return self.scheduler.get_stats()
+
+    def _put(self, batch):
+        self._queue.put(batch)
+
+    def _get_batches(self, timeout):
+        """ get the batches to publish at once.
+
+        :return: list of batches, and whether the publisher should stop.
+        """
+        ret = []
+        try:
+            batch = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return ret, False
+        deadline = time.time() + self.flush_interval
+        while batch is not _STOP:
+            ret.append(batch)
+            remaining = deadline - time.time()
+            if len(ret) >= self.batch_size or remaining <= 0:
+                return ret, False
+            try:
+                batch = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return ret, False
+        return ret, True
+
+    def _publish_loop(self):
+        stopped = False
+        while not stopped:
+            batches, stopped = self._get_batches(None)
+            self._publish(batches)
+
+    def _publish(self, batches):
+        if not batches:
+            return
+        with self._publish_lock:
+            for sink in self.sinks:
+                try:
+                    sink.publish(batches)
+                except Exception:
+                    self.errors += 1
+                    log.exception('failed to publish metrics to {}.'.format(
+                        sink))
+            self.published += len(batches)
+
+    def flush(self):
+        """ publish the batches in the queue now.
+        """
+        batches = []
+        while True:
+            try:
+                batch = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if batch is _STOP:
+                # leave it to the publisher thread
+                self._queue.put(batch)
+                break
+            batches.append(batch)
+        self._publish(batches)
+
+    def close(self):
+        """ unregister all the systems and publish the remaining batches.
+
+        The publisher thread publishes the batches it holds and exits
+        before the sinks are closed.
+        """
+        for system in self.systems:
+            self.unregister(system)
+        with self._lock:
+            publisher, self._publisher = self._publisher, None
+        if publisher is not None:
+            self._queue.put(_STOP)
+            publisher.join()
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
@@ -239,6 +239,92 @@ class Dict(dict):
         return ret
 
 
+class _LazyValue(object):
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+
+
+class LazyDict(Dict):
+    """ `Dict` with values calculated on the first access.
+
+    The value set by `set_lazy` is calculated when it's read the first time
+    and replaced by the result.  The operations on all the values, like
+    `items` and `==`, calculate all of them.
+
+    On python 2, `dict(d)`, `{}.update(d)` and `**d` copy the values
+    without calling the methods of the subclass, and get the placeholders
+    of the values not calculated yet.  Call `evaluate_all` before them.
+    """
+
+    def set_lazy(self, key, func, *args):
+        """ set the value to `func(*args)` when it's read. """
+        dict.__setitem__(self, key, _LazyValue(func, args))
+
+    def is_evaluated(self, key):
+        return not isinstance(dict.get(self, key), _LazyValue)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, _LazyValue):
+            value = value.func(*value.args)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            ret = self[key]
+        else:
+            ret = default
+        return ret
+
+    def evaluate_all(self):
+        for key in dict.keys(self):
+            self[key]
+        return self
+
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def keys(self):
+        return dict.keys(self)
+
+    def items(self):
+        return dict.items(self.evaluate_all())
+
+    def values(self):
+        return dict.values(self.evaluate_all())
+
+    def iteritems(self):
+        return dict.iteritems(self.evaluate_all())
+
+    def itervalues(self):
+        return dict.itervalues(self.evaluate_all())
+
+    def pop(self, key, *args):
+        if key in self:
+            self[key]
+        return dict.pop(self, key, *args)
+
+    def copy(self):
+        return Dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, LazyDict):
+            other.evaluate_all()
+        return dict.__eq__(self.evaluate_all(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return dict.__repr__(self.evaluate_all())
+
+
 cache = cachez.cache
 instance_cache = cachez.instance_cache
 clear_instance_cache = cachez.clear_instance_cache
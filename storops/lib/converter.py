@@ -203,11 +203,13 @@ def to_time_delta(value):
     return timedelta(hours=hours, minutes=minutes, seconds=seconds)
 
 
-def _to_enum(enum_class):
-    def _enum_converter(value):
-        return enum_class.parse(value)
+def _parse_enum(enum_class, value):
+    return enum_class.parse(value)
+
 
-    return _enum_converter
+def _to_enum(enum_class):
+    # use partial instead of closure so that the converter is picklable
+    return partial(_parse_enum, enum_class)
 
 
 to_sp_enum = _to_enum(enums.VNXSPEnum)
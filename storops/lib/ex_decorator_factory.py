@@ -19,6 +19,16 @@ import logging
 
 import six
 
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 __author__ = 'Cedric Zhuang'
 
 log = logging.getLogger(__name__)
@@ -69,14 +79,24 @@ class ExceptionListDecoratorFactory(object):
             exception_list = []
         self.exception_list = exception_list
         self.default = default_exception
+        self._classifier = None
 
     def clz_decorator(self):
         def decorator(clz):
             self.exception_list.append(clz)
+            self._classifier = None
             return clz
 
         return decorator
 
+    @property
+    def classifier(self):
+        classifier = self._classifier
+        if classifier is None or not classifier.is_valid(self.exception_list):
+            classifier = ExceptionClassifier(self.exception_list)
+            self._classifier = classifier
+        return classifier
+
     def get_exception(self, output, default=None):
         if default is not None:
             ret = default
@@ -84,18 +104,164 @@ class ExceptionListDecoratorFactory(object):
             ret = self.default
 
         if output:
-            for clz in self.exception_list:
-                msg = clz.get_error_message()
-                if isinstance(msg, (tuple, list, set)):
-                    found = any(m in output for m in msg)
-                elif isinstance(msg, six.string_types):
-                    found = msg in output
-                elif hasattr(msg, 'search'):
-                    found = msg.search(output) is not None
-                else:
-                    raise ValueError('{} is not a valid message.'.format(msg))
-
-                if found:
-                    ret = clz
+            clz = self.classifier.classify(output)
+            if clz is not None:
+                ret = clz
+        return ret
+
+
+class ExceptionClassifier(object):
+    """ compiled form of an exception list.
+
+    The error message of every exception class is retrieved and compiled
+    only once.  Literal messages (and hex error codes) are merged into
+    one Aho-Corasick automaton when `pyahocorasick` is available.
+    Regex messages are guarded by their literal prefix so that the
+    regex is only evaluated when the output may match.
+
+    The first registered exception class that matches wins, which is the
+    same as checking the exception list one by one.
+    """
+
+    def __init__(self, exception_list):
+        self._exception_list = list(exception_list)
+        # entry: (index, class, literals, regex, regex guard)
+        self._entries = []
+        self._automaton = None
+
+        for index, clz in enumerate(self._exception_list):
+            msg = clz.get_error_message()
+            if isinstance(msg, (tuple, list, set)):
+                entry = (index, clz, tuple(msg), None, None)
+            elif isinstance(msg, six.string_types):
+                entry = (index, clz, (msg,), None, None)
+            elif hasattr(msg, 'search'):
+                entry = (index, clz, (), msg, get_regex_guard(msg))
+            else:
+                raise ValueError('{} is not a valid message.'.format(msg))
+            self._entries.append(entry)
+
+        if ahocorasick is not None:
+            self._automaton = self._build_automaton()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def is_automaton_enabled(self):
+        return self._automaton is not None
+
+    def is_valid(self, exception_list):
+        """ check whether the classifier is compiled from the list.
+
+        :param exception_list: the exception list.
+        :return: False if classes are added after the compilation.
+        """
+        return len(exception_list) == len(self._exception_list)
+
+    def _build_automaton(self):
+        automaton = ahocorasick.Automaton()
+        for index, _, literals, _, _ in self._entries:
+            for literal in literals:
+                if literal and literal not in automaton:
+                    # keep the index of the first registered class
+                    automaton.add_word(literal, index)
+        if len(automaton) > 0:
+            automaton.make_automaton()
+        else:
+            automaton = None
+        return automaton
+
+    def _search_literal(self, output):
+        ret = None
+        for _, index in self._automaton.iter(output):
+            if ret is None or index < ret:
+                ret = index
+                if ret == 0:
                     break
         return ret
+
+    def classify(self, output):
+        """ find the first exception class matches the output.
+
+        :param output: the output text.
+        :return: the exception class or None if nothing matches.
+        """
+        if self._automaton is not None:
+            ret = self._classify_by_automaton(output)
+        else:
+            ret = self._classify_by_scan(output)
+        return ret
+
+    def _classify_by_automaton(self, output):
+        ret = None
+        found = self._search_literal(output)
+        folded = None
+        for index, clz, _, regex, guard in self._entries:
+            if found is not None and index >= found:
+                ret = self._entries[found][1]
+                break
+            if regex is None:
+                continue
+            if guard is not None:
+                if folded is None:
+                    folded = casefold(output)
+                if guard not in folded:
+                    continue
+            if regex.search(output) is not None:
+                ret = clz
+                break
+        return ret
+
+    def _classify_by_scan(self, output):
+        ret = None
+        folded = None
+        for index, clz, literals, regex, guard in self._entries:
+            if regex is None:
+                found = any(m in output for m in literals)
+            else:
+                if guard is not None:
+                    if folded is None:
+                        folded = casefold(output)
+                    if guard not in folded:
+                        continue
+                found = regex.search(output) is not None
+            if found:
+                ret = clz
+                break
+        return ret
+
+
+def casefold(text):
+    if hasattr(text, 'casefold'):
+        ret = text.casefold()
+    else:
+        ret = text.lower()
+    return ret
+
+
+def get_regex_guard(regex):
+    """ get the literal prefix of the regex.
+
+    The prefix is case folded so that it could be used to filter
+    output for case insensitive regex.
+
+    :param regex: compiled regex.
+    :return: the case folded literal prefix or None if the prefix
+        is too short to be useful.
+    """
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except Exception:  # noqa
+        return None
+
+    chars = []
+    for op, av in parsed:
+        if op != sre_parse.LITERAL:
+            break
+        chars.append(six.unichr(av))
+    prefix = ''.join(chars)
+    if len(prefix) > 1:
+        ret = casefold(prefix)
+    else:
+        ret = None
+    return ret
@@ -0,0 +1,165 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" cache of the outputs of the list commands.
+
+The outputs are grouped by the kind of resources listed, like `lun` or
+`sg`.  Each group has a version, increased when a command changes the
+resources of the group.  An output is reused if it's not older than
+`max_age` seconds and its version is the current one of its group.
+
+Only one thread runs a command at the same time.  The other threads asking
+for the same output wait for it.
+"""
+from __future__ import unicode_literals
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+
+class _Flight(object):
+    """ a command being run for the threads waiting for its output.
+    """
+
+    def __init__(self):
+        self.done = False
+        self.value = None
+        self.error = None
+
+
+class ListCache(object):
+    def __init__(self, max_age=None):
+        """ create the cache.
+
+        :param max_age: seconds the outputs are reused.  None or 0 to
+            disable the cache.
+        """
+        self.max_age = max_age
+        self._entries = {}
+        self._versions = {}
+        self._flights = {}
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    @property
+    def enabled(self):
+        return bool(self.max_age)
+
+    def get_version(self, group):
+        with self._cond:
+            return self._versions.get(group, 0)
+
+    @contextmanager
+    def fresh(self):
+        """ run the commands of current thread instead of reusing outputs.
+
+        The commands already running are still waited.  The outputs are
+        cached for the other threads.
+        """
+        depth = getattr(self._local, 'fresh', 0)
+        self._local.fresh = depth + 1
+        try:
+            yield self
+        finally:
+            self._local.fresh = depth
+
+    def _is_fresh(self):
+        return getattr(self._local, 'fresh', 0) > 0
+
+    def get(self, group, key, fetch):
+        """ get the output of a list command.
+
+        :param group: kind of resources listed by the command.
+        :param key: hashable key of the command, like its arguments.
+        :param fetch: callable without parameter to run the command.
+        :return: the output, cached or fetched.
+        """
+        if not self.enabled:
+            return fetch()
+
+        with self._cond:
+            version = self._versions.get(group, 0)
+            entry = self._entries.get((group, key))
+            if entry is not None and not self._is_fresh():
+                entry_version, timestamp, value = entry
+                if (entry_version == version and
+                        time.time() - timestamp <= self.max_age):
+                    self.hits += 1
+                    return value
+
+            flight_key = (group, key, version)
+            flight = self._flights.get(flight_key)
+            if flight is not None:
+                self.shared += 1
+                while not flight.done:
+                    self._cond.wait()
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+
+            self.misses += 1
+            flight = _Flight()
+            self._flights[flight_key] = flight
+
+        try:
+            flight.value = fetch()
+        except Exception as ex:
+            flight.error = ex
+            raise
+        finally:
+            with self._cond:
+                flight.done = True
+                del self._flights[flight_key]
+                # changed while running, the output may be stale.
+                if (flight.error is None and
+                        self._versions.get(group, 0) == version):
+                    self._entries[(group, key)] = (version, time.time(),
+                                                   flight.value)
+                self._cond.notify_all()
+        return flight.value
+
+    def invalidate(self, *groups):
+        """ drop the outputs of the groups.
+
+        :param groups: groups changed.  Default to all of them.
+        """
+        with self._cond:
+            if not groups:
+                groups = set(self._versions.keys())
+                groups.update(group for group, _ in self._entries.keys())
+            for group in groups:
+                self._versions[group] = self._versions.get(group, 0) + 1
+            self._entries = {(group, key): entry
+                             for (group, key), entry in self._entries.items()
+                             if group not in groups}
+            log.debug('list cache of {} invalidated.'.format(
+                ', '.join(sorted(groups))))
+
+    def get_stats(self):
+        with self._cond:
+            return {'max_age': self.max_age,
+                    'entries': len(self._entries),
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'shared': self.shared}
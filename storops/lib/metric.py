@@ -13,17 +13,33 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
-from __future__ import unicode_literals
+from __future__ import unicode_literals, division
 
+import logging
+import math
 import os
+import threading
+import warnings
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
 
 import yaml
 
-from storops.lib.common import RepeatedTimer, cache
+from storops.lib.collector import MetricBatch
+from storops.lib.common import cache, try_import
+from storops.lib.metric_file import FORMAT_BLOCK, FORMAT_CSV, \
+    MetricsFileWriter
 from storops.lib.resource import ResourceList
+from storops.lib.scheduler import get_scheduler
 
 __author__ = 'Cedric Zhuang'
 
+log = logging.getLogger(__name__)
+
+np = try_import('numpy')
+
+NaN = float('nan')
+
 
 class MetricCounterRecords(object):
     """ Data structure to save metric counter in memory
@@ -34,18 +50,16 @@ class MetricCounterRecords(object):
         if maximum is None:
             maximum = 2
         self._maximum_len = maximum
-        self._records = []
+        self._records = deque(maxlen=maximum)
 
     def add_results(self, result):
         self.enabled = True
         if result is not None:
-            self._records.insert(0, result)
-            while len(self._records) > self._maximum_len:
-                self._records.pop()
+            self._records.appendleft(result)
 
     def reset(self):
         self.enabled = False
-        self._records = []
+        self._records = deque(maxlen=self._maximum_len)
 
     def __len__(self):
         return len(self._records)
@@ -67,19 +81,346 @@ class MetricCounterRecords(object):
         return ret
 
 
+def _to_float(value):
+    try:
+        ret = float(value)
+    except (TypeError, ValueError):
+        ret = NaN
+    return ret
+
+
+def _percentile(values, q):
+    """ percentile with linear interpolation, same as NumPy's default. """
+    values = sorted(v for v in values if not math.isnan(v))
+    if not values:
+        return NaN
+    pos = (len(values) - 1) * q / 100
+    low = int(math.floor(pos))
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def _column_stats(column):
+    values = [v for v in column if not math.isnan(v)]
+    if values:
+        ret = {'min': min(values),
+               'max': max(values),
+               'avg': sum(values) / len(values),
+               'p95': _percentile(values, 95)}
+    else:
+        ret = {'min': NaN, 'max': NaN, 'avg': NaN, 'p95': NaN}
+    return ret
+
+
+class _CounterSeries(object):
+    """ values of one counter path, a row for each record.
+
+    The rows are kept in a `depth x ids` NumPy array, or lists when NumPy
+    is not available.  The columns are only reallocated when new ids
+    show up, or when the ids absent from all the kept records are
+    dropped.
+    """
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.ids = []
+        self.positions = {}
+        # id -> number of the latest record having the id
+        self.last_seen = {}
+        self.last_put = None
+        if np is not None:
+            self.values = np.full((depth, 0), NaN)
+        else:
+            self.values = [[] for _ in range(depth)]
+
+    def _add_ids(self, new_ids):
+        for _id in new_ids:
+            self.positions[_id] = len(self.ids)
+            self.ids.append(_id)
+        padding = len(new_ids)
+        if np is not None:
+            self.values = np.hstack(
+                [self.values, np.full((self.depth, padding), NaN)])
+        else:
+            for row in self.values:
+                row.extend([NaN] * padding)
+
+    def _drop_ids(self, count):
+        """ drop the ids not in the latest `depth` records. """
+        oldest = count - self.depth
+        keep = [i for i, _id in enumerate(self.ids)
+                if self.last_seen[_id] > oldest]
+        if len(keep) == len(self.ids):
+            return
+        for _id in self.ids:
+            if self.last_seen[_id] <= oldest:
+                del self.last_seen[_id]
+        self.ids = [self.ids[i] for i in keep]
+        self.positions = {_id: i for i, _id in enumerate(self.ids)}
+        if np is not None:
+            self.values = self.values[:, keep]
+        else:
+            self.values = [[row[i] for i in keep] for row in self.values]
+
+    def put(self, slot, values, count):
+        """ put the values of the record `count` to the slot. """
+        new_ids = [k for k in values if k not in self.positions]
+        if new_ids:
+            self._add_ids(new_ids)
+        row = [NaN] * len(self.ids)
+        for k, v in values.items():
+            row[self.positions[k]] = _to_float(v)
+            self.last_seen[k] = count
+        self.values[slot] = row
+        self.last_put = count
+        self._drop_ids(count)
+
+    def clear(self, slot, count):
+        """ clear the slot for the record `count` without the path. """
+        self.values[slot] = [NaN] * len(self.ids)
+        self._drop_ids(count)
+
+    def is_expired(self, count):
+        """ whether the path is absent from the latest records. """
+        return self.last_put <= count - self.depth
+
+    def take(self, slots):
+        if np is not None:
+            ret = self.values[slots]
+        else:
+            ret = [self.values[slot] for slot in slots]
+        return ret
+
+    @property
+    def nbytes(self):
+        if np is not None:
+            ret = self.values.nbytes
+        else:
+            ret = 8 * self.depth * len(self.ids)
+        return ret
+
+
+class CounterHistory(object):
+    """ ring buffer of the numeric counters of the latest records.
+
+    Each record is flattened to `{path: {id: value}}` by its
+    `get_counters` method.  Only the latest `depth` records are kept, the
+    oldest one is overwritten by the new one.  The ids and paths absent
+    from all the kept records are dropped, so the memory is bounded by
+    `depth` and the number of ids in the kept records.
+    """
+
+    def __init__(self, depth=60):
+        if depth < 2:
+            raise ValueError('depth should be at least 2.')
+        self.depth = depth
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._timestamps = [None] * self.depth
+            self._count = 0
+            self._series = {}
+
+    def __getstate__(self):
+        ret = self.__dict__.copy()
+        del ret['_lock']
+        return ret
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._count, self.depth)
+
+    def add(self, timestamp, counters):
+        """ add the counters of a record.
+
+        :param timestamp: `datetime` of the record.
+        :param counters: dict of path to dict of id and value.
+        """
+        with self._lock:
+            count = self._count
+            slot = count % self.depth
+            self._timestamps[slot] = timestamp
+            for path, values in counters.items():
+                series = self._series.get(path)
+                if series is None:
+                    series = _CounterSeries(self.depth)
+                    self._series[path] = series
+                series.put(slot, values, count)
+            for path, series in list(self._series.items()):
+                if path not in counters:
+                    series.clear(slot, count)
+                    if series.is_expired(count):
+                        del self._series[path]
+            self._count += 1
+
+    def add_record(self, record):
+        """ add a record which has the `get_counters` method. """
+        timestamp = getattr(record, 'timestamp', None)
+        if timestamp is None:
+            timestamp = datetime.now()
+        self.add(timestamp, record.get_counters())
+
+    def paths(self):
+        return sorted(self._series.keys())
+
+    def ids(self, path):
+        series = self._series.get(path)
+        return [] if series is None else list(series.ids)
+
+    def timestamps(self, window=None):
+        return [self._timestamps[slot] for slot in self._get_slots(window)]
+
+    @property
+    def nbytes(self):
+        """ bytes used by the counter values. """
+        return sum(series.nbytes for series in self._series.values())
+
+    def _get_slots(self, window=None):
+        """ slots of the records in the window, the oldest first.
+
+        :param window: number of the latest intervals as int, or the
+            time span as `timedelta`.  Default to all the records.
+        """
+        count = len(self)
+        slots = [(self._count - count + i) % self.depth
+                 for i in range(count)]
+        if window is None:
+            ret = slots
+        elif isinstance(window, timedelta):
+            if slots:
+                since = self._timestamps[slots[-1]] - window
+                ret = [slot for slot in slots
+                       if self._timestamps[slot] >= since]
+            else:
+                ret = slots
+        else:
+            if window < 1:
+                raise ValueError('window should be at least 1.')
+            ret = slots[-(window + 1):]
+        return ret
+
+    def _seconds(self, slots):
+        timestamps = [self._timestamps[slot] for slot in slots]
+        return [(t1 - t0).total_seconds()
+                for t0, t1 in zip(timestamps[:-1], timestamps[1:])]
+
+    def _get(self, path, window):
+        with self._lock:
+            series = self._series.get(path)
+            slots = self._get_slots(window)
+            if series is None or len(slots) < 2:
+                ret = None, None, None
+            else:
+                ret = (list(series.ids), series.take(slots),
+                       self._seconds(slots))
+        return ret
+
+    def values(self, path):
+        """ the latest value of each id of the path. """
+        with self._lock:
+            series = self._series.get(path)
+            slots = self._get_slots()
+            if series is None or not slots:
+                ret = {}
+            else:
+                row = series.take(slots[-1:])[0]
+                ret = dict(zip(series.ids, [float(v) for v in row]))
+        return ret
+
+    def rate(self, path, window=None):
+        """ increase per second of the counter over the window.
+
+        :param path: path of the counter.
+        :param window: number of the latest intervals, or a `timedelta`.
+        :return: dict of id and rate, empty if less than two records.
+        """
+        ids, rows, seconds = self._get(path, window)
+        if ids is None:
+            return {}
+        total = sum(seconds)
+        if np is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rates = (rows[-1] - rows[0]) / total
+            rates[~np.isfinite(rates)] = NaN
+            rates = rates.tolist()
+        else:
+            rates = [self._div(last - first, total)
+                     for first, last in zip(rows[0], rows[-1])]
+        return dict(zip(ids, rates))
+
+    @staticmethod
+    def _div(op1, op2):
+        return op1 / op2 if op2 else NaN
+
+    def stats(self, path, window=None, rate=True):
+        """ min, max, average and 95th percentile in the window.
+
+        :param path: path of the counter.
+        :param window: number of the latest intervals, or a `timedelta`.
+        :param rate: calculate the stats of the rates of each interval if
+            True, or the stats of the counter values if False.
+        :return: dict of id and dict of the stats: min, max, avg and p95.
+        """
+        ids, rows, seconds = self._get(path, window)
+        if ids is None:
+            return {}
+        if np is not None:
+            if rate:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    rows = np.diff(rows, axis=0) / np.array(
+                        seconds, dtype=float)[:, np.newaxis]
+                rows[~np.isfinite(rows)] = NaN
+            with warnings.catch_warnings():
+                # all NaN columns
+                warnings.simplefilter('ignore', RuntimeWarning)
+                columns = {'min': np.nanmin(rows, axis=0),
+                           'max': np.nanmax(rows, axis=0),
+                           'avg': np.nanmean(rows, axis=0),
+                           'p95': np.nanpercentile(rows, 95, axis=0)}
+            ret = {_id: {name: float(column[i])
+                         for name, column in columns.items()}
+                   for i, _id in enumerate(ids)}
+        else:
+            if rate:
+                rows = [[self._div(v1 - v0, dt)
+                         for v0, v1 in zip(row0, row1)]
+                        for row0, row1, dt in zip(rows[:-1], rows[1:],
+                                                  seconds)]
+            ret = {_id: _column_stats([row[i] for row in rows])
+                   for i, _id in enumerate(ids)}
+        return ret
+
+
 class PerfManager(object):
     def __init__(self):
         self.metric_collector = None
         self._rsc_list_2 = None
+        self._persist_format = FORMAT_BLOCK
+        self._persist_options = {}
+        self._persist_sink = None
         self._rsc_clz_list = None
         self.metric_counter_records = MetricCounterRecords()
+        self.counter_history = None
 
     def persist_rsc_list_metrics(self):
         persist_rsc_list = self.get_persist_rsc_list()
         if self.prev_counter and persist_rsc_list:
             for rsc_list in persist_rsc_list:
                 rsc_list.update()
-                rsc_list.persist_metric_data()
+                self._persist_rsc_list(rsc_list)
+
+    def _persist_rsc_list(self, rsc_list):
+        if self._persist_sink is not None:
+            self._persist_sink(MetricBatch.from_rsc_list(rsc_list))
+        elif self._persist_format == FORMAT_CSV:
+            rsc_list.persist_metric_data()
+        else:
+            rsc_list.persist_metric_block(**self._persist_options)
 
     def _is_perf_monitored(self, rsc):
         if self._rsc_clz_list is not None:
@@ -101,25 +442,81 @@ class PerfManager(object):
             ret = []
         return ret
 
-    def enable_perf_metric(self, interval, callback, rsc_clz_list=None):
+    def enable_perf_metric(self, interval, callback, rsc_clz_list=None,
+                           name=None, scheduler=None, **kwargs):
+        """ collect the metric record periodically.
+
+        The collection is run by the shared `CollectionScheduler`.  It never
+        overlaps with itself, and the interval adapts to the duration of the
+        collection.
+
+        :param interval: seconds between two collections.  0 to collect
+            manually.
+        :param callback: function returns the metric record.
+        :param rsc_clz_list: resource classes monitored.
+        :param name: name of the collection in the logs and stats.
+        :param scheduler: the `CollectionScheduler`, default to the one
+            shared by the process.
+        :param kwargs: options of the `CollectionJob`, like `min_interval`,
+            `max_interval` and `adaptive`.
+        """
         self._rsc_clz_list = rsc_clz_list
 
         def f():
-            self.metric_counter_records.add_results(callback())
-            self.persist_rsc_list_metrics()
+            self._collect(callback)
 
         if self.metric_counter_records.enabled:
             self.disable_perf_metric()
 
         self.metric_counter_records.enabled = True
         if interval > 0:
-            self.metric_collector = RepeatedTimer(interval, f)
-            self.metric_collector.start()
+            if name is None:
+                name = '{}-{:x}'.format(type(self).__name__, id(self))
+            if scheduler is None:
+                scheduler = get_scheduler()
+            self.metric_collector = scheduler.add(name, f, interval,
+                                                  **kwargs)
+
+    def _collect(self, callback):
+        record = callback()
+        if record is None:
+            # no new sample, do not persist the previous metrics again.
+            log.debug('no new metric record, skip the persistence.')
+            return
+        self.add_metric_record(record)
+        self.persist_rsc_list_metrics()
 
     def disable_perf_metric(self):
         if self.metric_collector:
             self.metric_collector.stop()
+            self.metric_collector = None
         self.metric_counter_records.reset()
+        if self.counter_history is not None:
+            self.counter_history.reset()
+
+    def get_perf_collection_stats(self):
+        """ stats of the periodical collection.
+
+        :return: dict of the interval, runs, skipped ticks, durations and
+            lags, None if the collection is not scheduled.
+        """
+        if self.metric_collector is None:
+            ret = None
+        else:
+            ret = self.metric_collector.get_stats()
+        return ret
+
+    def enable_counter_history(self, depth=60):
+        """ keep the counters of the latest records for the history stats.
+
+        :param depth: number of records to keep.
+        :return: the `CounterHistory`.
+        """
+        self.counter_history = CounterHistory(depth)
+        return self.counter_history
+
+    def disable_counter_history(self):
+        self.counter_history = None
 
     def is_perf_metric_enabled(self, rsc=None):
         ret = self.metric_counter_records.enabled
@@ -138,14 +535,37 @@ class PerfManager(object):
     def __del__(self):
         self.disable_perf_metric()
 
-    def persist_perf_stats(self, perf_rsc_list):
+    def persist_perf_stats(self, perf_rsc_list, fmt=None, sink=None,
+                           **kwargs):
+        """ persist the metrics of the resource lists after each collection.
+
+        :param perf_rsc_list: resource lists to persist, None to stop.
+        :param fmt: `block` for the rotated columnar metric files, `csv`
+            for the csv files.  Default to `block`.
+        :param sink: function takes in the `MetricBatch` of each resource
+            list.  The metrics are passed to it instead of written to files.
+        :param kwargs: options of the `MetricsFileWriter`, like `rotation`
+            and `max_files`.
+        """
+        if fmt is None:
+            fmt = FORMAT_BLOCK
+        if fmt not in (FORMAT_BLOCK, FORMAT_CSV):
+            raise ValueError('unsupported metric persist format: {}.'.format(
+                fmt))
         self._rsc_list_2 = perf_rsc_list
+        self._persist_format = fmt
+        self._persist_options = kwargs
+        self._persist_sink = sink
 
     def is_perf_stats_persisted(self):
         return self._rsc_list_2 is not None and len(self._rsc_list_2) > 0
 
     def add_metric_record(self, record):
         self.metric_counter_records.add_results(record)
+        history = self.counter_history
+        if (history is not None and record is not None and
+                hasattr(record, 'get_counters')):
+            history.add_record(record)
 
 
 class MetricConfigList(object):
@@ -229,6 +649,37 @@ class CalculatorMetaInfo(object):
                                   'return the calculated metric value.')
 
 
+class MetricsFrame(object):
+    """ metric values of a list of resources, one column for each metric.
+
+    The value of the resource at `index[i]` is the i-th element of each
+    column.
+    """
+
+    def __init__(self, index, columns):
+        self.index = list(index)
+        self.columns = OrderedDict(columns)
+
+    @property
+    def names(self):
+        return list(self.columns.keys())
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def rows(self):
+        """ iterate the values by resource.
+
+        :return: generator of (resource, list of values) tuple.
+        """
+        columns = list(self.columns.values())
+        for i, rsc in enumerate(self.index):
+            yield rsc, [column[i] for column in columns]
+
+
 class MetricsDumper(object):
     def __init__(self, rsc_list, dft_hdr=None, dft_hdr_cb=None):
         if dft_hdr is None:
@@ -269,10 +720,32 @@ class MetricsDumper(object):
             ret = rsc.get(name)
         return ret
 
+    def _get_metrics_frame(self):
+        get_frame = getattr(self._rsc_list, 'get_metrics_frame', None)
+        if get_frame is None or not self.metric_names:
+            ret = None
+        else:
+            ret = get_frame(self.metric_names)
+        return ret
+
     def get_metrics_csv_data(self, sep=None):
         if sep is None:
             sep = ','
-        return '\n'.join(sep.join(self.data_line(r)) for r in self._rsc_list)
+        frame = self._get_metrics_frame()
+        if frame is None:
+            lines = (self.data_line(r) for r in self._rsc_list)
+        else:
+            lines = (self._frame_line(rsc, values)
+                     for rsc, values in frame.rows())
+        return '\n'.join(sep.join(line) for line in lines)
+
+    def _frame_line(self, rsc, values):
+        if self._dft_hdr_cb is not None:
+            metrics = self._dft_hdr_cb(rsc)
+        else:
+            metrics = []
+        metrics += [str(value) for value in values]
+        return metrics
 
     def get_metrics_csv_header(self, sep=None):
         if sep is None:
@@ -291,3 +764,42 @@ class MetricsDumper(object):
         with open(filename, 'a+') as f:
             f.write(to_write)
             f.write('\n')
+
+    def get_metrics_columns(self):
+        """ header and metric values of the resources by column.
+
+        The metric values are kept as they are instead of formatted as
+        strings.
+
+        :return: `OrderedDict` of column name and values.
+        """
+        frame = self._get_metrics_frame()
+        if frame is None:
+            rsc_list = list(self._rsc_list)
+            metrics = [(name, [self.get_attr(rsc, name) for rsc in rsc_list])
+                       for name in self.metric_names]
+        else:
+            rsc_list = frame.index
+            metrics = frame.columns.items()
+
+        ret = OrderedDict()
+        if self._dft_hdr_cb is not None:
+            rows = [self._dft_hdr_cb(rsc) for rsc in rsc_list]
+            for i, name in enumerate(self._dft_hdr):
+                ret[name] = [row[i] for row in rows]
+        ret.update(metrics)
+        return ret
+
+    def persist_metric_block(self, prefix=None, timestamp=None, **kwargs):
+        """ append the metrics to the columnar metric files.
+
+        :param prefix: path prefix of the metric files.
+        :param timestamp: timestamp of the sample, default to now.
+        :param kwargs: options of the `MetricsFileWriter`, like `rotation`,
+            `compress_level` and `max_files`.
+        :return: name of the file written.
+        """
+        if prefix is None:
+            raise ValueError('prefix should not be none.')
+        writer = MetricsFileWriter(prefix, **kwargs)
+        return writer.write(self.get_metrics_columns(), timestamp)
@@ -0,0 +1,484 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" columnar binary files for the persisted metrics.
+
+Each sample batch, the metrics of a resource list at one time, is appended
+to the file as one block::
+
+    block  := magic(4s) | flags(B) | timestamp(<d) | size(<I) | body
+    body   := zlib(meta_size(<I) | meta | float64 columns)
+    meta   := {"rows": n, "columns": [{"name": .., "type": "f8"|"str"}]}
+
+The numeric columns are stored as little endian float64 one after the
+other.  The text columns, like the resource names, are kept in the meta.
+
+The files are rotated by the block timestamp.  One file holds the blocks of
+one period and is named `<prefix>_<period start in UTC>.smf`.
+"""
+from __future__ import unicode_literals
+
+import calendar
+import csv
+import io
+import json
+import logging
+import numbers
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import six
+
+from storops.lib.common import assure_folder, try_import
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+np = try_import('numpy')
+
+FILE_EXT = '.smf'
+SAMPLE_TIME = 'sample_time'
+
+FORMAT_CSV = 'csv'
+FORMAT_BLOCK = 'block'
+
+_MAGIC = b'SMF1'
+_HEADER = struct.Struct(str('<4sBdI'))
+_SIZE = struct.Struct(str('<I'))
+_FLAG_ZLIB = 0x01
+_TIME_FORMAT = '%Y%m%dT%H%M%S'
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_epoch(value):
+    if value is None:
+        ret = None
+    elif isinstance(value, datetime):
+        if value.tzinfo is not None:
+            utc = value.replace(tzinfo=None) - value.utcoffset()
+            ret = (utc - _EPOCH).total_seconds()
+        else:
+            ret = time.mktime(value.timetuple()) + value.microsecond / 1e6
+    else:
+        ret = float(value)
+    return ret
+
+
+def _to_seconds(value):
+    if isinstance(value, timedelta):
+        ret = value.total_seconds()
+    else:
+        ret = float(value)
+    if ret <= 0:
+        raise ValueError('rotation should be greater than 0.')
+    return ret
+
+
+def _to_bytes(values):
+    if sys.byteorder == 'big':
+        values = array(str('d'), values)
+        values.byteswap()
+    if six.PY2:
+        ret = values.tostring()
+    else:
+        ret = values.tobytes()
+    return ret
+
+
+def _from_bytes(data):
+    ret = array(str('d'))
+    if six.PY2:
+        ret.fromstring(data)
+    else:
+        ret.frombytes(data)
+    if sys.byteorder == 'big':
+        ret.byteswap()
+    return ret
+
+
+def _encode_numeric(column):
+    """ float64 bytes of the column, None if the column is not numeric.
+    """
+    if np is not None and isinstance(column, np.ndarray):
+        if column.dtype.kind in 'biuf':
+            ret = column.astype('<f8').tobytes()
+        else:
+            ret = _encode_numeric(column.tolist())
+    else:
+        values = array(str('d'))
+        for value in column:
+            if value is None:
+                value = float('nan')
+            elif (isinstance(value, six.string_types) or
+                  not isinstance(value, numbers.Number)):
+                return None
+            values.append(value)
+        ret = _to_bytes(values)
+    return ret
+
+
+def _to_text(value):
+    if value is None:
+        ret = None
+    elif isinstance(value, six.text_type):
+        ret = value
+    elif isinstance(value, bytes):
+        ret = value.decode('utf-8')
+    else:
+        ret = six.text_type(value)
+    return ret
+
+
+def encode_block(columns, timestamp, compress_level=6):
+    """ encode the columns to one block.
+
+    :param columns: dict of column name and the values.  All the columns
+        should have the same length.
+    :param timestamp: timestamp of the sample in seconds since epoch.
+    :param compress_level: zlib compress level, 0 to disable the compression.
+    :return: bytes of the block.
+    """
+    rows = None
+    meta_columns = []
+    chunks = []
+    for name, column in columns.items():
+        if rows is None:
+            rows = len(column)
+        elif len(column) != rows:
+            raise ValueError('column {} has {} rows, expected {}.'.format(
+                name, len(column), rows))
+        data = _encode_numeric(column)
+        if data is None:
+            meta_columns.append({'name': name, 'type': 'str',
+                                 'values': [_to_text(v) for v in column]})
+        else:
+            meta_columns.append({'name': name, 'type': 'f8'})
+            chunks.append(data)
+    meta = json.dumps({'rows': rows or 0, 'columns': meta_columns},
+                      separators=(',', ':')).encode('utf-8')
+    body = b''.join([_SIZE.pack(len(meta)), meta] + chunks)
+    if compress_level:
+        flags = _FLAG_ZLIB
+        body = zlib.compress(body, compress_level)
+    else:
+        flags = 0
+    return _HEADER.pack(_MAGIC, flags, timestamp, len(body)) + body
+
+
+def decode_block(flags, body):
+    """ decode the body of a block.
+
+    :return: `OrderedDict` of column name and values.  The numeric columns
+        are numpy arrays if numpy is installed, otherwise `array('d')`.
+    """
+    if flags & _FLAG_ZLIB:
+        body = zlib.decompress(body)
+    meta_size, = _SIZE.unpack_from(body)
+    offset = _SIZE.size + meta_size
+    meta = json.loads(body[_SIZE.size:offset].decode('utf-8'))
+    rows = meta['rows']
+    ret = OrderedDict()
+    for column in meta['columns']:
+        if column['type'] == 'f8':
+            end = offset + rows * 8
+            if np is not None:
+                ret[column['name']] = np.frombuffer(
+                    body, dtype='<f8', count=rows, offset=offset)
+            else:
+                ret[column['name']] = _from_bytes(body[offset:end])
+            offset = end
+        else:
+            ret[column['name']] = column['values']
+    return ret
+
+
+class MetricsFileWriter(object):
+    """ append the sample batches to the rotated metric files.
+
+    The writer keeps no file open, so it could be created for every
+    write and shared between the threads of the same process.
+    """
+
+    def __init__(self, prefix, rotation=None, compress_level=6,
+                 max_files=None):
+        """ create the writer.
+
+        :param prefix: path prefix of the files, like
+            `~/.storops/10.244.211.30_VNXLun`.
+        :param rotation: `timedelta` or seconds covered by one file, default
+            to one day.
+        :param compress_level: zlib compress level, 0 to disable.
+        :param max_files: number of files to keep, older files are removed
+            when a new file is created.  Default to keep all of them.
+        """
+        if rotation is None:
+            rotation = timedelta(days=1)
+        self.prefix = prefix
+        self.rotation = _to_seconds(rotation)
+        self.compress_level = compress_level
+        self.max_files = max_files
+
+    def get_filename(self, timestamp):
+        start = timestamp - timestamp % self.rotation
+        return '{}_{}{}'.format(
+            self.prefix, time.strftime(_TIME_FORMAT, time.gmtime(start)),
+            FILE_EXT)
+
+    def write(self, columns, timestamp=None):
+        """ append one sample batch.
+
+        :param columns: dict of column name and values.
+        :param timestamp: `datetime` or seconds since epoch of the sample,
+            default to now.
+        :return: name of the file written.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        else:
+            timestamp = _to_epoch(timestamp)
+        block = encode_block(columns, timestamp, self.compress_level)
+        filename = self.get_filename(timestamp)
+        self._append(filename, block)
+        return filename
+
+    def write_all(self, samples):
+        """ append the sample batches, each file is opened once.
+
+        :param samples: iterable of (columns, timestamp) tuple.
+        :return: names of the files written.
+        """
+        blocks = OrderedDict()
+        for columns, timestamp in samples:
+            if timestamp is None:
+                timestamp = time.time()
+            else:
+                timestamp = _to_epoch(timestamp)
+            block = encode_block(columns, timestamp, self.compress_level)
+            blocks.setdefault(self.get_filename(timestamp), []).append(block)
+
+        for filename, file_blocks in blocks.items():
+            self._append(filename, b''.join(file_blocks))
+        return list(blocks.keys())
+
+    def _append(self, filename, data):
+        folder = os.path.dirname(filename)
+        if folder:
+            assure_folder(folder)
+        is_new = not os.path.exists(filename)
+        # one write call for the blocks, readers ignore a torn tail.
+        with open(filename, 'ab') as f:
+            f.write(data)
+        if is_new:
+            self._purge()
+
+    def _purge(self):
+        if self.max_files is None:
+            return
+        files = list_files(self.prefix)
+        for filename in files[:max(len(files) - self.max_files, 0)]:
+            try:
+                os.remove(filename)
+            except OSError as ex:
+                log.warning('failed to remove metric file {}: {}'.format(
+                    filename, ex))
+
+
+def list_files(prefix):
+    """ metric files of the prefix, sorted by time.
+    """
+    folder, base = os.path.split(prefix)
+    folder = folder or os.curdir
+    if not os.path.isdir(folder):
+        return []
+    ret = []
+    for name in os.listdir(folder):
+        filename = os.path.join(folder, name)
+        if (name.startswith(base + '_') and name.endswith(FILE_EXT) and
+                _get_file_start(prefix, filename) is not None):
+            ret.append(filename)
+    return sorted(ret)
+
+
+def _get_file_start(prefix, filename):
+    stamp = filename[len(prefix) + 1:-len(FILE_EXT)]
+    try:
+        ret = calendar.timegm(time.strptime(stamp, _TIME_FORMAT))
+    except ValueError:
+        ret = None
+    return ret
+
+
+def iter_file_blocks(filename, start=None, end=None):
+    """ iterate the blocks in one file.
+
+    Blocks out of the time range are skipped without decompressing them.
+
+    :return: generator of (timestamp, columns) tuple.
+    """
+    with open(filename, 'rb') as f:
+        while True:
+            header = f.read(_HEADER.size)
+            if not header:
+                break
+            if len(header) < _HEADER.size:
+                log.warning('truncated block header in {}.'.format(filename))
+                break
+            magic, flags, timestamp, size = _HEADER.unpack(header)
+            if magic != _MAGIC:
+                log.warning('bad block in {}, stop reading.'.format(filename))
+                break
+            if ((start is not None and timestamp < start) or
+                    (end is not None and timestamp >= end)):
+                f.seek(size, io.SEEK_CUR)
+                continue
+            body = f.read(size)
+            if len(body) < size:
+                log.warning('truncated block in {}.'.format(filename))
+                break
+            yield timestamp, decode_block(flags, body)
+
+
+class MetricsFileReader(object):
+    """ read the metrics persisted by `MetricsFileWriter`.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def files(self, start=None, end=None):
+        """ files which may contain the blocks of the time range.
+        """
+        start = _to_epoch(start)
+        end = _to_epoch(end)
+        files = list_files(self.prefix)
+        starts = [_get_file_start(self.prefix, f) for f in files]
+        ret = []
+        for i, filename in enumerate(files):
+            if end is not None and starts[i] >= end:
+                break
+            if (start is not None and i + 1 < len(files) and
+                    starts[i + 1] <= start):
+                continue
+            ret.append(filename)
+        return ret
+
+    def blocks(self, start=None, end=None):
+        """ iterate the blocks of the time range.
+
+        :param start: `datetime` or seconds since epoch, inclusive.
+        :param end: `datetime` or seconds since epoch, exclusive.
+        :return: generator of (timestamp, columns) tuple.
+        """
+        for filename in self.files(start, end):
+            for block in iter_file_blocks(filename, _to_epoch(start),
+                                          _to_epoch(end)):
+                yield block
+
+    def read(self, start=None, end=None, names=None):
+        """ read the samples of the time range.
+
+        The blocks are concatenated row by row.  Column missing in a block
+        is filled with NaN, or None for the text columns.
+
+        :param start: `datetime` or seconds since epoch, inclusive.
+        :param end: `datetime` or seconds since epoch, exclusive.
+        :param names: column names to read, default to all the columns.
+        :return: `OrderedDict` of column name and values.  The first column,
+            `sample_time`, is the timestamp of the block of each row.  The
+            numeric columns are numpy arrays if numpy is installed,
+            otherwise `array('d')`.  The text columns are lists.
+        """
+        blocks = []
+        types = OrderedDict()
+        for timestamp, columns in self.blocks(start, end):
+            if names is not None:
+                columns = OrderedDict((name, columns[name])
+                                      for name in names if name in columns)
+            blocks.append((timestamp, columns))
+            for name, column in columns.items():
+                if name not in types or types[name]:
+                    types[name] = not isinstance(column, list)
+        if names is not None:
+            types = OrderedDict((name, types[name])
+                                for name in names if name in types)
+
+        ret = OrderedDict()
+        ret[SAMPLE_TIME] = self._concat(
+            [[timestamp] * self._rows(columns)
+             for timestamp, columns in blocks], True)
+        for name, numeric in types.items():
+            chunks = []
+            for _, columns in blocks:
+                column = columns.get(name)
+                rows = self._rows(columns)
+                if column is None:
+                    column = [float('nan') if numeric else None] * rows
+                elif not numeric and not isinstance(column, list):
+                    column = list(column)
+                chunks.append(column)
+            ret[name] = self._concat(chunks, numeric)
+        return ret
+
+    @staticmethod
+    def _rows(columns):
+        return len(next(iter(columns.values()))) if columns else 0
+
+    @staticmethod
+    def _concat(chunks, numeric):
+        if numeric and np is not None:
+            if chunks:
+                ret = np.concatenate([np.asarray(c, dtype=float)
+                                      for c in chunks])
+            else:
+                ret = np.array([], dtype=float)
+        elif numeric:
+            ret = array(str('d'))
+            for chunk in chunks:
+                ret.extend(chunk)
+        else:
+            ret = []
+            for chunk in chunks:
+                ret.extend(chunk)
+        return ret
+
+    def export_csv(self, filename, start=None, end=None, names=None,
+                   sep=None):
+        """ export the samples of the time range to a csv file.
+
+        :return: number of rows exported.
+        """
+        if sep is None:
+            sep = ','
+        columns = self.read(start, end, names)
+        header = list(columns.keys())
+        times = columns[SAMPLE_TIME]
+        mode = 'wb' if six.PY2 else 'w'
+        kwargs = {} if six.PY2 else {'newline': ''}
+        with open(filename, mode, **kwargs) as f:
+            writer = csv.writer(f, delimiter=str(sep))
+            writer.writerow(header)
+            for i in range(len(times)):
+                row = [datetime.fromtimestamp(times[i]).isoformat(str(' '))]
+                row += [columns[name][i] for name in header[1:]]
+                writer.writerow(row)
+        return len(times)
@@ -16,17 +16,21 @@
 from __future__ import unicode_literals
 
 import glob
+import hashlib
 import inspect
 import logging
 import os
+import pickle
 import re
+import sys
+import threading
 
 import six
 
 import yaml
 
 from storops.lib.common import cache, instance_cache, Enum, \
-    get_clz_from_module, EnumList
+    get_clz_from_module, EnumList, get_local_folder, assure_folder
 from storops.lib import converter as cvt
 import storops.lib.resource
 
@@ -172,6 +176,22 @@ class PropDescriptor(PropMapper):
 
     re_flags = re.MULTILINE | re.IGNORECASE
 
+    @property
+    @instance_cache
+    def line_key(self):
+        """ lower case label to look up the line of the property.
+
+        Only available for the plain labels ending with the only colon,
+        like `Name:`.  None for the others.
+        """
+        label = self.label
+        if (self.is_regex or self.end_pattern is not None or
+                not label.endswith(':') or label.count(':') > 1):
+            ret = None
+        else:
+            ret = label.lower()
+        return ret
+
     @property
     @instance_cache
     def pattern(self):
@@ -207,6 +227,7 @@ class OutputParser(object):
     def __init__(self):
         self._property_map = {}
         self.resource_name = ''
+        self.shown_keys = []
 
     @property
     def data_src(self):
@@ -267,7 +288,43 @@ class OutputParser(object):
 
     def init_from_config(self, config):
         # do any customized initialization from config in child class
-        pass
+        # after calling this one.
+        self.shown_keys = config.shown_keys
+
+    def get_projection(self, fields):
+        """ descriptors and options to retrieve the fields only.
+
+        :param fields: keys of the properties.
+        :return: tuple of the descriptors of the fields and the index, and
+            the sorted options to show them.  The options are None if some
+            of the fields could not be shown by options.
+        """
+        keys = tuple(sorted(set(key.lower() for key in fields)))
+        return self._get_projection(keys)
+
+    @instance_cache
+    def _get_projection(self, keys):
+        for key in keys:
+            if not self.has_property_key(key):
+                raise ValueError('property {} not found in {}.'.format(
+                    key, getattr(self, 'resource_class_name', None)))
+
+        index = self.index_property
+        properties = sorted((p for p in self.properties
+                             if p.key in keys or p is index),
+                            key=lambda p: p.sequence)
+        options = set()
+        for p in properties:
+            if p is index or p.key in self.shown_keys:
+                continue
+            elif p.option is None:
+                options = None
+                break
+            else:
+                options.update(p.option.split())
+        if options is not None:
+            options = sorted(options)
+        return tuple(properties), options
 
     @property
     @instance_cache
@@ -299,16 +356,156 @@ class OutputParser(object):
                       if p.option is not None)
 
     def __getattr__(self, item):
-        if item in self._property_map.keys():
-            ret = self._property_map[item]
+        # `_property_map` is not available when unpickling
+        property_map = self.__dict__.get('_property_map', None)
+        if property_map is not None and item in property_map:
+            ret = property_map[item]
         else:
             ret = super(OutputParser, self).__getattribute__(item)
         return ret
 
 
+def _yaml_loader():
+    return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def _find_module_name(clz):
+    for name, module in list(sys.modules.items()):
+        if (name.startswith('storops') and
+                getattr(module, clz.__name__, None) is clz):
+            return name
+    return None
+
+
+class _ParserPickler(pickle.Pickler):
+    """ pickler of the parsers.
+
+    Enum classes mixed with `JsonPrinter` are marked as unpicklable by the
+    enum module (their `__module__` is `<unknown>`).  Save them as
+    reference of module and class name.
+    """
+
+    def persistent_id(self, obj):
+        ret = None
+        if inspect.isclass(obj) and obj.__module__ == '<unknown>':
+            module_name = _find_module_name(obj)
+            if module_name is None:
+                raise pickle.PicklingError(
+                    'cannot find module of {}.'.format(obj.__name__))
+            ret = 'class:{}:{}'.format(module_name, obj.__name__)
+        return ret
+
+
+class _ParserUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        _, module_name, clz_name = pid.split(':')
+        ret = get_clz_from_module(module_name, clz_name)
+        if ret is None:
+            raise pickle.UnpicklingError(
+                'cannot find {} in {}.'.format(clz_name, module_name))
+        return ret
+
+
+class ParserPickleCache(object):
+    """ on-disk cache of the parsers built from one config file.
+
+    The file name contains the hash of the config file and of the sources
+    of the parser modules, the cache version and the python version.  Any
+    change of them, like an upgrade of storops, results in a new cache
+    file.  Broken or incompatible cache is ignored and rebuilt.
+    """
+    version = 2
+
+    def __init__(self, folder=None):
+        if folder is None:
+            folder = os.path.join(get_local_folder(), 'parser_cache')
+        self.folder = folder
+
+    @staticmethod
+    @cache
+    def get_source_digest(module_name):
+        """ hash of the source of a module, empty if not available. """
+        module = sys.modules[module_name]
+        filename = getattr(module, '__file__', None)
+        try:
+            with open(filename, 'rb') as f:
+                ret = hashlib.sha1(f.read()).hexdigest()
+        except (IOError, OSError, TypeError):
+            ret = ''
+        return ret
+
+    @classmethod
+    def get_module_names(cls, factory):
+        """ modules defining the classes of the pickled parsers. """
+        return sorted({__name__, cvt.__name__, type(factory).__module__})
+
+    def get_filename(self, factory):
+        sha1 = hashlib.sha1(factory.read_config_bytes())
+        for module_name in self.get_module_names(factory):
+            sha1.update(self.get_source_digest(module_name).encode('utf-8'))
+        digest = sha1.hexdigest()
+        name = '{}_{}_v{}_py{}{}.pickle'.format(
+            factory.__class__.__name__, digest[:16], self.version,
+            *sys.version_info[:2])
+        return os.path.join(self.folder, name)
+
+    def load(self, factory):
+        filename = self.get_filename(factory)
+        ret = None
+        if os.path.exists(filename):
+            try:
+                with open(filename, 'rb') as f:
+                    ret = _ParserUnpickler(f).load()
+                log.debug('parsers loaded from {}.'.format(filename))
+            except Exception as ex:  # noqa
+                log.info('failed to load parser cache {}, rebuild it.  '
+                         'error: {}'.format(filename, ex))
+        return ret
+
+    def dump(self, factory, parsers):
+        filename = self.get_filename(factory)
+        assure_folder(self.folder)
+        tmp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        try:
+            with open(tmp_filename, 'wb') as f:
+                _ParserPickler(f, pickle.HIGHEST_PROTOCOL).dump(parsers)
+            # rename is atomic, other processes never see a partial file.
+            os.rename(tmp_filename, filename)
+            log.debug('parsers saved to {}.'.format(filename))
+        except Exception as ex:  # noqa
+            log.info('failed to save parser cache {}.  '
+                     'error: {}'.format(filename, ex))
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+
+
 class ParserConfigFactory(object):
     config_filename = 'parser_configs.yaml'
 
+    # `ParserPickleCache` shared by all factories, disabled by default.
+    pickle_cache = None
+
+    # parsed content of each config file, read only once per process.
+    _configs = {}
+    _configs_lock = threading.Lock()
+
+    def __init__(self):
+        self._parsers = {}
+        self._parsers_lock = threading.RLock()
+        self._pickle_loaded = False
+
+    @classmethod
+    def enable_pickle_cache(cls, folder=None):
+        """ save built parsers to disk and load them on next start.
+
+        :param folder: cache folder, default to `~/.storops/parser_cache`.
+        """
+        ParserConfigFactory.pickle_cache = ParserPickleCache(folder)
+
+    @classmethod
+    def disable_pickle_cache(cls):
+        ParserConfigFactory.pickle_cache = None
+
     @classmethod
     def get_parser_clz(cls, data_src):
         raise NotImplementedError('get_base_clz not implemented.')
@@ -328,6 +525,15 @@ class ParserConfigFactory(object):
         return '.'.join(names)
 
     def get(self, name):
+        with self._parsers_lock:
+            self._load_pickle_cache()
+            parser = self._parsers.get(name, None)
+            if parser is None:
+                parser = self._build(name)
+                self._parsers[name] = parser
+        return parser
+
+    def _build(self, name):
         config = self.get_config(name)
 
         parser = self._get_parser_instance(config)
@@ -337,6 +543,21 @@ class ParserConfigFactory(object):
         parser.resource_class_name = name
         return parser
 
+    def _load_pickle_cache(self):
+        cache_store = self.pickle_cache
+        if self._pickle_loaded or cache_store is None:
+            return
+
+        self._pickle_loaded = True
+        parsers = cache_store.load(self)
+        if parsers is not None:
+            parsers.update(self._parsers)
+            self._parsers = parsers
+        else:
+            for name in self._read_configs():
+                self.get(name)
+            cache_store.dump(self, self._parsers)
+
     def _get_parser_instance(self, config):
         base_clz = self.get_parser_clz(config.data_src)
         parser = base_clz()
@@ -354,10 +575,23 @@ class ParserConfigFactory(object):
                 name, self.config_filename))
         return ParserConfig(all_configs[name])
 
+    def get_config_path(self):
+        return os.path.join(self.get_folder(), self.config_filename)
+
+    def read_config_bytes(self):
+        with open(self.get_config_path(), 'rb') as f:
+            return f.read()
+
     def _read_configs(self):
-        filename = os.path.join(self.get_folder(), self.config_filename)
-        with open(filename, 'r') as stream:
-            ret = yaml.load(stream)
+        filename = self.get_config_path()
+        ret = self._configs.get(filename, None)
+        if ret is None:
+            with self._configs_lock:
+                ret = self._configs.get(filename, None)
+                if ret is None:
+                    ret = yaml.load(self.read_config_bytes(),
+                                    Loader=_yaml_loader())
+                    self._configs[filename] = ret
         return ret
 
     @instance_cache
@@ -457,9 +691,10 @@ class ParserConfig(object):
     def __init__(self, inputs):
         self.data_src = inputs.get('data_src', None)
         self.name = inputs.get('name', None)
-        self._properties = inputs.get('properties', None)
-        if self._properties is None:
-            self._properties = []
+        # copy the list, the config dict is shared in the process.
+        self._properties = list(inputs.get('properties', None) or [])
+        # keys of the properties shown without any option.
+        self.shown_keys = list(inputs.get('shown_keys', None) or [])
 
     @property
     def properties(self):
@@ -15,13 +15,18 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import logging
+import time
 from datetime import datetime, timedelta
+from multiprocessing.pool import ThreadPool
 
 import storops.exception as ex
-from storops.lib.common import JsonPrinter, clear_instance_cache
+from storops.lib.common import JsonPrinter, clear_instance_cache, LazyDict
 
 __author__ = 'Cedric Zhuang'
 
+log = logging.getLogger(__name__)
+
 
 class Resource(JsonPrinter):
     def __init__(self):
@@ -53,7 +58,14 @@ class Resource(JsonPrinter):
 
     @property
     def parsed_resource(self):
-        return self._parsed_resource
+        """ all the parsed properties, calculated if not yet.
+
+        Use `_parsed_resource` internally to keep the properties lazy.
+        """
+        ret = self._parsed_resource
+        if isinstance(ret, LazyDict):
+            ret.evaluate_all()
+        return ret
 
     @clear_instance_cache
     def update(self, data=None):
@@ -231,12 +243,15 @@ class ResourceList(Resource):
         else:
             parsed_list = self._parse_raw(data)
 
+        self._list.extend(self._iter_items(parsed_list))
+        return self
+
+    def _iter_items(self, parsed_list):
         for i in parsed_list:
             item = self._get_resource_instance()
             item.update(i)
             if self._filter(item):
-                self._list.append(item)
-        return self
+                yield item
 
     def _apply_filter(self):
         result = []
@@ -325,6 +340,8 @@ class ResourceListCollection(object):
         else:
             self._items = {}
         self.timestamp = datetime.now()
+        # seconds taken to update each resource list, by resource class
+        self.timings = {}
 
     def add_rsc_list(self, rsc_list):
         if not hasattr(rsc_list, 'get_resource_class'):
@@ -353,11 +370,52 @@ class ResourceListCollection(object):
     def __len__(self):
         return len(self._items)
 
-    def update(self):
-        for rsc_list in self.get_rsc_list_collection():
-            rsc_list.update()
+    def update(self, max_workers=None):
+        """ update all the resource lists.
+
+        :param max_workers: number of resource lists updated at the same
+            time.  Default to update them one after another.
+        :return: the collection itself.
+        """
+        rsc_list_collection = self._get_update_order()
+        if max_workers is None or max_workers <= 1:
+            for rsc_list in rsc_list_collection:
+                self._update_rsc_list(rsc_list)
+        elif rsc_list_collection:
+            pool = ThreadPool(min(max_workers, len(rsc_list_collection)))
+            try:
+                pool.map(self._update_rsc_list, rsc_list_collection)
+            finally:
+                pool.close()
         self.timestamp = datetime.now()
         return self
 
+    def _get_update_order(self):
+        return list(self.get_rsc_list_collection())
+
+    def _update_rsc_list(self, rsc_list):
+        start = time.time()
+        self._do_update_rsc_list(rsc_list)
+        seconds = time.time() - start
+        clz = rsc_list.get_resource_class()
+        self.timings[clz] = seconds
+        log.debug('{} updated in {:.3f} seconds.'.format(
+            clz.__name__, seconds))
+
+    def _do_update_rsc_list(self, rsc_list):
+        rsc_list.update()
+
     def delta_seconds(self, other):
         return (self.timestamp - other.timestamp).total_seconds()
+
+    def get_counters(self):
+        """ numeric counters of the resource lists.
+
+        :return: dict of counter path to dict of resource id and value.
+        """
+        ret = {}
+        for rsc_list in self.get_rsc_list_collection():
+            get_counters = getattr(rsc_list, 'get_counters', None)
+            if get_counters is not None:
+                ret.update(get_counters())
+        return ret
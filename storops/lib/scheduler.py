@@ -0,0 +1,299 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" scheduler of the periodical metric collections.
+
+All the collections of the process share one scheduler thread.  Each run of
+a job is executed in its own thread, or by a bounded pool of workers, so a
+slow array does not delay the others.  A job never runs concurrently with
+itself.  The ticks passed while it's running are skipped, and the next run
+is aligned to the phase of the job.
+
+The interval of a job follows the average duration of the runs, between the
+bounds of the job, so that the collection keeps up with a slow array
+without sending it back to back commands.  The first runs of the jobs are
+spread over the interval to avoid synchronized bursts.
+"""
+from __future__ import unicode_literals, division
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from six.moves import queue
+
+from storops.lib.common import daemon
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+# fractional part of the multiples spreads the phases evenly
+_GOLDEN_RATIO = 0.6180339887498949
+
+
+class CollectionJob(object):
+    """ a job run periodically by the `CollectionScheduler`.
+    """
+
+    def __init__(self, scheduler, name, function, interval,
+                 min_interval=None, max_interval=None, adaptive=True,
+                 load=0.8, smoothing=0.3):
+        """ create the job.
+
+        :param scheduler: the `CollectionScheduler` of the job.
+        :param name: name of the job in the logs and stats.
+        :param function: callable without parameter.
+        :param interval: seconds between two runs.
+        :param min_interval: lower bound of the adapted interval, default to
+            `interval`.  Set it below `interval` to collect the fast arrays
+            more often.
+        :param max_interval: upper bound of the adapted interval, default to
+            4 times of `interval`.
+        :param adaptive: whether to adapt the interval to the durations.
+        :param load: target ratio of the duration to the interval.
+        :param smoothing: weight of the latest duration in the average.
+        """
+        if interval <= 0:
+            raise ValueError('interval should be greater than 0.')
+        if min_interval is None:
+            min_interval = interval
+        if max_interval is None:
+            max_interval = interval * 4
+        if not min_interval <= interval <= max_interval:
+            raise ValueError('interval {} is out of the bounds [{}, {}].'
+                             .format(interval, min_interval, max_interval))
+        self._scheduler = scheduler
+        self.name = name
+        self.function = function
+        self.base_interval = interval
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.adaptive = adaptive
+        self.load = load
+        self.smoothing = smoothing
+
+        self.next_run = None
+        self.is_running = False
+        self.is_stopped = False
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_duration = None
+        self.avg_duration = None
+        self.max_duration = 0.0
+        self.last_lag = None
+        self.max_lag = 0.0
+        self.last_error = None
+
+    def stop(self):
+        """ stop the job.  The running run is not interrupted.
+        """
+        self._scheduler.remove(self)
+
+    def _run(self, scheduled):
+        start = time.time()
+        self.last_lag = max(start - scheduled, 0.0)
+        self.max_lag = max(self.max_lag, self.last_lag)
+        try:
+            self.function()
+        except Exception as ex:
+            self.errors += 1
+            self.last_error = ex
+            log.exception('collection {} failed.'.format(self.name))
+        finally:
+            self._on_finished(scheduled, time.time() - start)
+
+    def _on_finished(self, scheduled, duration):
+        self.runs += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        if self.avg_duration is None:
+            self.avg_duration = duration
+        else:
+            self.avg_duration += self.smoothing * (
+                duration - self.avg_duration)
+        if self.adaptive:
+            self._adapt()
+        if duration > self.interval:
+            log.warning('collection {} took {:.3f} seconds, longer than '
+                        'the interval {:.3f} seconds.'.format(
+                            self.name, duration, self.interval))
+        self._scheduler.finished(self, scheduled)
+
+    def _adapt(self):
+        interval = self.avg_duration / self.load
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        if interval != self.interval:
+            log.info('interval of collection {} changes from {:.3f} to '
+                     '{:.3f} seconds.'.format(self.name, self.interval,
+                                              interval))
+            self.interval = interval
+
+    def get_next_run(self, scheduled, now):
+        """ next run time after a run scheduled at `scheduled`.
+
+        The ticks passed while running are skipped.
+        """
+        ret = scheduled + self.interval
+        if ret <= now:
+            missed = int((now - ret) // self.interval) + 1
+            self.skipped += missed
+            ret += missed * self.interval
+        return ret
+
+    def get_stats(self):
+        """ stats of the job.
+
+        :return: dict of the stats.  The durations and lags are in seconds.
+        """
+        return {'name': self.name,
+                'interval': self.interval,
+                'base_interval': self.base_interval,
+                'running': self.is_running,
+                'runs': self.runs,
+                'skipped': self.skipped,
+                'errors': self.errors,
+                'last_duration': self.last_duration,
+                'avg_duration': self.avg_duration,
+                'max_duration': self.max_duration,
+                'last_lag': self.last_lag,
+                'max_lag': self.max_lag,
+                'next_run': self.next_run}
+
+    def __repr__(self):
+        return '<CollectionJob {} every {:.3f}s>'.format(self.name,
+                                                         self.interval)
+
+
+class CollectionScheduler(object):
+    """ run the `CollectionJob` periodically.
+    """
+
+    def __init__(self, max_workers=None):
+        """ create the scheduler.
+
+        :param max_workers: number of the worker threads running the jobs.
+            Default to run each job in a new thread.
+        """
+        self._jobs = []
+        self._heap = []
+        self._cond = threading.Condition()
+        self._counter = itertools.count()
+        self._phases = itertools.count(1)
+        self._thread = None
+        self.max_workers = max_workers
+        self._runs = queue.Queue()
+        self._workers = []
+
+    def add(self, name, function, interval, phase=None, **kwargs):
+        """ schedule a job.
+
+        :param name: name of the job.
+        :param function: callable without parameter.
+        :param interval: seconds between two runs.
+        :param phase: seconds before the first run.  Default to spread the
+            jobs over the interval.
+        :param kwargs: other options of the `CollectionJob`.
+        :return: the `CollectionJob`.
+        """
+        job = CollectionJob(self, name, function, interval, **kwargs)
+        if phase is None:
+            phase = (next(self._phases) * _GOLDEN_RATIO % 1) * interval
+        with self._cond:
+            self._jobs.append(job)
+            self._push(job, time.time() + phase)
+            if self._thread is None:
+                self._thread = daemon(self._loop)
+            self._cond.notify()
+        return job
+
+    def remove(self, job):
+        with self._cond:
+            job.is_stopped = True
+            if job in self._jobs:
+                self._jobs.remove(job)
+            self._cond.notify()
+
+    @property
+    def jobs(self):
+        with self._cond:
+            return list(self._jobs)
+
+    def get_stats(self):
+        """ stats of all the jobs.
+
+        :return: list of the stats dict of each job.
+        """
+        return [job.get_stats() for job in self.jobs]
+
+    def _push(self, job, when):
+        job.next_run = when
+        heapq.heappush(self._heap, (when, next(self._counter), job))
+
+    def finished(self, job, scheduled):
+        with self._cond:
+            job.is_running = False
+            if not job.is_stopped:
+                self._push(job, job.get_next_run(scheduled, time.time()))
+                self._cond.notify()
+
+    def _loop(self):
+        with self._cond:
+            while self._jobs or self._heap:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                when, _, job = self._heap[0]
+                now = time.time()
+                if job.is_stopped:
+                    heapq.heappop(self._heap)
+                elif when > now:
+                    self._cond.wait(when - now)
+                else:
+                    heapq.heappop(self._heap)
+                    job.is_running = True
+                    self._dispatch(job, when)
+            self._thread = None
+
+    def _dispatch(self, job, when):
+        if self.max_workers is None:
+            daemon(job._run, when)
+        else:
+            if len(self._workers) < self.max_workers:
+                self._workers.append(daemon(self._work))
+            self._runs.put((job, when))
+
+    def _work(self):
+        while True:
+            job, when = self._runs.get()
+            job._run(when)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """ the scheduler shared by the collections of the process.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = CollectionScheduler()
+        return _scheduler
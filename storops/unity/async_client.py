@@ -0,0 +1,320 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" asyncio client of the unity rest api.
+
+The client requires python 3.5+ and the `aiohttp` package.  It shares the
+url, filter and body helpers of `UnityClient`, and returns the same
+`RestResponse`.
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import json
+import logging
+import ssl
+
+from storops.connection import exceptions
+from storops.connection.client import HTTPClient, _wait_callback
+from storops.connection.connector import UnityRESTConnector
+from storops.exception import UnityResourceNotFoundError, \
+    UnityResourceNotSupportedError
+from storops.lib.common import try_import
+from storops.unity.client import UnityClient
+from storops.unity.resource import UnityResourceList
+from storops.unity.resource.type_resource import UnityType
+from storops.unity.resp import RestResponse
+
+aiohttp = try_import('aiohttp')
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+
+class AsyncResponse(object):
+    """ the response of aiohttp after the body is read. """
+
+    def __init__(self, resp, text):
+        self.status_code = resp.status
+        self.headers = resp.headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncUnityClient(object):
+    """ asyncio client of one unity system.
+
+    At most `max_concurrency` requests are sent to the system at the same
+    time.  Use it as an async context manager or call `close` to release
+    the connections.
+    """
+
+    def __init__(self, ip, username, password, port=443, verify=False,
+                 retries=None, timeout=None, max_concurrency=8):
+        if aiohttp is None:
+            raise ImportError('aiohttp is required by AsyncUnityClient.')
+        self.ip = ip
+        self.base_url = 'https://{host}:{port}'.format(host=ip, port=port)
+        self.username = username
+        self.password = password
+        self.verify = verify
+        if retries is None:
+            retries = 2
+        self.retries = retries
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.headers = dict(UnityRESTConnector.HEADERS)
+        self.csrf_token_version = 0
+        self._session = None
+        self._csrf_lock = None
+        self._type_fields = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_ssl(self):
+        if isinstance(self.verify, bool):
+            ret = None if self.verify else False
+        else:
+            ret = ssl.create_default_context(cafile=self.verify)
+        return ret
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             ssl=self._get_ssl())
+            # unity is usually accessed by ip, allow the cookies for it.
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                auth=aiohttp.BasicAuth(self.username, self.password),
+                cookie_jar=aiohttp.CookieJar(unsafe=True),
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def request(self, url, method, body=None):
+        full_url = self.base_url + url
+        data = json.dumps(body) if body else None
+        session = self._get_session()
+        tried = 0
+        while True:
+            tried += 1
+            HTTPClient.log_request(full_url, method, data)
+            try:
+                async with session.request(method, full_url, data=data,
+                                           headers=self.headers) as resp:
+                    resp = AsyncResponse(resp, await resp.text())
+                break
+            except aiohttp.ClientError:
+                if tried > self.retries:
+                    raise
+                await asyncio.sleep(_wait_callback(tried))
+
+        ret = None
+        if resp.text:
+            try:
+                ret = resp.json()
+            except ValueError:
+                pass
+
+        if resp.status_code == 401:
+            raise exceptions.from_response(resp, method, full_url)
+        return resp, ret
+
+    async def _request_with_csrf_token(self, url, method, body=None):
+        version = self.csrf_token_version
+        try:
+            return await self.request(url, method, body=body)
+        except exceptions.HTTPClientError as ex:
+            # noinspection PyProtectedMember
+            if not UnityRESTConnector._http_authentication_error(ex):
+                raise
+        await self._update_csrf_token(version)
+        return await self.request(url, method, body=body)
+
+    async def _update_csrf_token(self, version=None):
+        if self._csrf_lock is None:
+            self._csrf_lock = asyncio.Lock()
+        async with self._csrf_lock:
+            if version is not None and version != self.csrf_token_version:
+                return
+            resp, _ = await self.request('/api/types/user/instances', 'GET')
+            self.headers = dict(self.headers)
+            self.headers['emc-csrf-token'] = resp.headers['emc-csrf-token']
+            self.csrf_token_version += 1
+
+    async def rest_get(self, url, fields=None, **params):
+        if fields is None:
+            fields = []
+        params['fields'] = ','.join(map(str, sorted(fields)))
+        url = UnityClient.assemble_url(url, **params)
+        return RestResponse(await self.request(url, 'GET'))
+
+    async def rest_post(self, url, body=None, **params):
+        url = UnityClient.assemble_url(url, **params)
+        return RestResponse(
+            await self._request_with_csrf_token(url, 'POST', body=body))
+
+    async def rest_delete(self, url, body=None, **params):
+        url = UnityClient.assemble_url(url, **params)
+        return RestResponse(
+            await self._request_with_csrf_token(url, 'DELETE', body=body))
+
+    async def _get_type_fields(self, type_name):
+        ret = self._type_fields.get(type_name)
+        if ret is None:
+            unity_type = UnityType(_id=type_name)
+            url = '/api/types/{}'.format(type_name)
+            resp = await self.rest_get(url, fields=UnityType._fields)
+            try:
+                resp.raise_if_err()
+            except UnityResourceNotFoundError:
+                log.info('Resource type [{}] is not supported.'.format(
+                    type_name))
+                raise UnityResourceNotSupportedError(
+                    "Resource is not supported.")
+            ret = unity_type.update(resp).fields
+            self._type_fields[type_name] = ret
+        return ret
+
+    async def get_fields(self, type_name, base_fields=None,
+                         nested_fields=None):
+        if base_fields is None:
+            base_fields = await self._get_type_fields(type_name)
+        return UnityClient.merge_fields(base_fields, nested_fields)
+
+    async def get_all(self, type_name, base_fields=None, the_filter=None,
+                      nested_fields=None, per_page=None):
+        """Get all resources of the type.
+
+        The first page is retrieved with the entry count, then all the
+        remaining pages are retrieved concurrently.
+
+        :param nested_fields: nested resource fields
+        :param base_fields: fields of this resource
+        :param the_filter: dictionary of filter like `{'name': 'abc'}`
+        :param type_name: Resource type. For example, pool, lun, nasServer.
+        :param per_page: number of entries per page.
+        :return: the response with entries of all pages.
+        """
+        try:
+            fields = await self.get_fields(type_name, base_fields,
+                                           nested_fields)
+        except UnityResourceNotSupportedError:
+            return RestResponse(inputs="")
+        the_filter = UnityClient.dict_to_filter_string(the_filter)
+
+        url = '/api/types/{}/instances'.format(type_name)
+
+        def _get_page(page=None, **params):
+            return self.rest_get(url, fields=fields, filter=the_filter,
+                                 per_page=per_page, page=page, **params)
+
+        ret = await _get_page(with_entrycount='true')
+        pages = UnityClient.get_remaining_pages(ret)
+        resp = ret
+        if pages:
+            responses = await asyncio.gather(
+                *[_get_page(page) for page in pages])
+            for resp in responses:
+                ret.entries.extend(resp.entries)
+        while resp.has_next_page:
+            resp = await _get_page(resp.next_page)
+            ret.entries.extend(resp.entries)
+        return ret
+
+    async def get(self, type_name, obj_id, base_fields=None,
+                  nested_fields=None):
+        """Get the resource by resource id.
+
+        :param nested_fields: nested resource fields.
+        :param type_name: Resource type. For example, pool, lun, nasServer.
+        :param obj_id: Resource id
+        :param base_fields: Resource fields to return
+        :return: the response of the resource.
+        """
+        try:
+            base_fields = await self.get_fields(type_name, base_fields,
+                                                nested_fields)
+        except UnityResourceNotSupportedError:
+            return RestResponse(inputs="")
+        url = '/api/instances/{}/{}'.format(type_name, obj_id)
+        return await self.rest_get(url, fields=base_fields)
+
+    async def post(self, type_name, **kwargs):
+        url = '/api/types/{}/instances'.format(type_name)
+        url_params = UnityClient.pop_async_params(kwargs)
+        body = UnityClient.make_body(kwargs)
+        return await self.rest_post(url, body, **url_params)
+
+    async def action(self, type_name, obj_id, action, **kwargs):
+        base_url = '/api/instances/{}/{}/action/{}'
+        url = base_url.format(type_name, obj_id, action)
+        url_params = UnityClient.pop_async_params(kwargs)
+        body = UnityClient.make_body(kwargs, allow_empty=True)
+        return await self.rest_post(url, body, **url_params)
+
+    async def modify(self, type_name, obj_id, **kwargs):
+        return await self.action(type_name, obj_id, 'modify', **kwargs)
+
+    async def type_action(self, type_name, action, **kwargs):
+        url = '/api/types/{}/action/{}'.format(type_name, action)
+        url_params = UnityClient.pop_async_params(kwargs)
+        body = UnityClient.make_body(kwargs)
+        return await self.rest_post(url, body, **url_params)
+
+    async def delete(self, type_name, _id, **kwargs):
+        url = '/api/instances/{}/{}'.format(type_name, _id)
+        url_params = {'compact': True}
+        url_params.update(UnityClient.pop_async_params(kwargs))
+        body = UnityClient.make_body(kwargs)
+        return await self.rest_delete(url, body, **url_params)
+
+    async def update(self, rsc):
+        """ retrieve and parse the properties of a resource or a list.
+
+        The same fields and filters as the synchronous `update` are used.
+        The `cli` of the resource is kept for the properties retrieved
+        later.
+
+        :param rsc: unity resource or unity resource list.
+        :return: the updated resource.
+        """
+        if isinstance(rsc, UnityResourceList):
+            # noinspection PyProtectedMember
+            the_filter, nested_obj = rsc._get_query_args()
+            nested_fields = nested_obj.query_fields if nested_obj else None
+            # noinspection PyProtectedMember
+            resp = await self.get_all(rsc.resource_class,
+                                      the_filter=the_filter,
+                                      nested_fields=nested_fields,
+                                      per_page=rsc._per_page)
+        else:
+            nested_obj = rsc.build_nested_properties_obj()
+            nested_fields = nested_obj.query_fields if nested_obj else None
+            resp = await self.get(rsc.resource_class, rsc.get_id(),
+                                  nested_fields=nested_fields)
+            rsc.set_preloaded_properties(nested_obj)
+        return rsc.update(resp)
@@ -0,0 +1,160 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+
+class UnityBatch(object):
+    """ queue of unity rest operations executed with bounded parallelism.
+
+    Each queued operation returns a `concurrent.futures.Future` which
+    resolves to the `RestResponse` of the operation.  The operations are
+    executed when `execute` is called or when leaving the `with` block.
+
+    With `use_job`, the workers only submit the operations as array jobs.
+    The jobs are tracked by the `job_tracker` of the client, so the number
+    of jobs running on the array is not bounded by `max_workers`.
+    """
+
+    def __init__(self, cli, max_workers=8, use_job=False, **job_options):
+        self._cli = cli
+        self.max_workers = max_workers
+        self.use_job = use_job
+        self.job_options = job_options
+        self._operations = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.execute()
+        else:
+            self.cancel()
+
+    def __len__(self):
+        return len(self._operations)
+
+    def submit(self, func, *args, **kwargs):
+        """ queue any callable, like a method of a resource.
+
+        :return: future of the return value of the callable.
+        """
+        return self._queue(func, args, kwargs)
+
+    def _queue(self, func, args, kwargs, is_job=False):
+        future = Future()
+        self._operations.append((future, func, args, kwargs, is_job))
+        return future
+
+    def _submit_rest(self, func, *args, **kwargs):
+        if self.use_job:
+            kwargs['async'] = True
+            return self._queue(self._start_job, (func,) + args, kwargs,
+                               is_job=True)
+        else:
+            return self.submit(func, *args, **kwargs)
+
+    def _start_job(self, func, *args, **kwargs):
+        """ submit the operation as a job.
+
+        :return: the response, and the future of the job tracker or None
+            if the operation completes without a job.
+        """
+        resp = func(*args, **kwargs)
+        resp.raise_if_err()
+        job_future = None
+        if resp.job_id is not None:
+            job_future = self._cli.job_tracker.track(resp,
+                                                     **self.job_options)
+        return resp, job_future
+
+    @staticmethod
+    def _chain_job(future, resp, job_future):
+        def _done(f):
+            ex = f.exception()
+            if ex is not None:
+                future.set_exception(ex)
+            else:
+                future.set_result(resp)
+
+        job_future.add_done_callback(_done)
+
+    def post(self, type_name, **kwargs):
+        return self._submit_rest(self._cli.post, type_name, **kwargs)
+
+    def action(self, type_name, obj_id, action, **kwargs):
+        return self._submit_rest(self._cli.action, type_name, obj_id,
+                                 action, **kwargs)
+
+    def modify(self, type_name, obj_id, **kwargs):
+        return self.action(type_name, obj_id, 'modify', **kwargs)
+
+    def type_action(self, type_name, action, **kwargs):
+        return self._submit_rest(self._cli.type_action, type_name, action,
+                                 **kwargs)
+
+    def delete(self, type_name, _id, **kwargs):
+        return self._submit_rest(self._cli.delete, type_name, _id,
+                                 **kwargs)
+
+    @classmethod
+    def _run(cls, future, func, args, kwargs, is_job=False):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            ret = func(*args, **kwargs)
+        except Exception as ex:  # noqa
+            log.debug('batch operation {} failed.'.format(
+                getattr(func, '__name__', func)))
+            future.set_exception(ex)
+            return
+
+        if is_job:
+            resp, job_future = ret
+            if job_future is not None:
+                # resolved by the job tracker, the worker is not held
+                cls._chain_job(future, resp, job_future)
+                return
+            ret = resp
+        future.set_result(ret)
+
+    def execute(self):
+        """ execute all the queued operations and wait for them.
+
+        :return: list of the futures in the queued order.
+        """
+        operations, self._operations = self._operations, []
+        if operations:
+            workers = max(1, min(self.max_workers, len(operations)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for operation in operations:
+                    executor.submit(self._run, *operation)
+        futures = [operation[0] for operation in operations]
+        # wait for the jobs
+        wait(futures)
+        return futures
+
+    def cancel(self):
+        operations, self._operations = self._operations, []
+        for operation in operations:
+            operation[0].cancel()
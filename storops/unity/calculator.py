@@ -15,26 +15,147 @@
 #    under the License.
 from __future__ import unicode_literals, division
 
+import copy
 import inspect
+import numbers
 import os
 import sys
+import threading
+import weakref
 
 import six
 
-from storops.lib.common import cache, all_not_none
+from storops.lib.common import cache, all_not_none, try_import
 from storops.lib.metric import CalculatorMetaInfo, MetricConfigParser, \
-    MetricConfigList
+    MetricConfigList, MetricsFrame
 
 __author__ = 'Cedric Zhuang'
 
+np = try_import('numpy')
+
+
+def np_func(func):
+    """ the NumPy function, None if NumPy is not available. """
+    if np is None:
+        ret = None
+    elif callable(func):
+        ret = func
+    else:
+        ret = getattr(np, func)
+    return ret
+
+
+class IdIndex(object):
+    """ sorted ids of `IdValues`.
+
+    The index is shared by all the `IdValues` with the same ids, so that
+    the values of the previous and the current samples are aligned
+    without looking up the ids.
+    """
+    _instances = weakref.WeakValueDictionary()
+    _lock = threading.Lock()
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.positions = {k: i for i, k in enumerate(ids)}
+
+    @classmethod
+    def get(cls, ids):
+        ids = tuple(sorted(ids))
+        with cls._lock:
+            ret = cls._instances.get(ids)
+            if ret is None:
+                ret = cls(ids)
+                cls._instances[ids] = ret
+        return ret
+
+    def union(self, other):
+        if other is self:
+            ret = self
+        else:
+            ret = IdIndex.get(set(self.ids).union(other.ids))
+        return ret
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getstate__(self):
+        return {'ids': self.ids}
+
+    def __setstate__(self, state):
+        self.__init__(state['ids'])
+
+
+def _is_array(values):
+    return np is not None and isinstance(values, np.ndarray)
+
+
+def _is_number(value):
+    return (isinstance(value, numbers.Number) and
+            not isinstance(value, bool))
+
+
+def _vector_div(op1, op2):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = np.true_divide(op1, op2)
+    ret = np.where(np.equal(op2, 0), IdValues.NaN, ret)
+    return np.where(np.equal(op1, 0), 0.0, ret)
+
 
 class IdValues(object):
+    """ values of the resources, indexed by the resource id.
+
+    The values are kept in a NumPy array ordered by the `IdIndex` when
+    NumPy is available and all values are numbers.  Otherwise, they are
+    kept in a list and calculated one by one.  Both have the same
+    semantic as the scalar `_add`, `_mul` and `_div`.
+    """
     NaN = float('nan')
 
     def __init__(self, data=None):
         if data is None:
             data = {}
-        self._data = data
+        index = IdIndex.get(data.keys())
+        self._set_values(index, [data[k] for k in index.ids])
+
+    @classmethod
+    def from_values(cls, index, values):
+        """ create from the values ordered by the index.
+
+        :param index: the `IdIndex`.
+        :param values: values in the same order of `index.ids`.
+        """
+        ret = cls.__new__(cls)
+        ret._set_values(index, values)
+        return ret
+
+    def _set_values(self, index, values):
+        if np is not None and not _is_array(values):
+            array = np.array(values)
+            if array.dtype.kind in 'iuf':
+                values = array
+        self._index = index
+        self._values = values
+
+    def _value_list(self):
+        if _is_array(self._values):
+            ret = self._values.tolist()
+        else:
+            ret = self._values
+        return ret
+
+    def _align(self, index, defaults):
+        """ values ordered by another index, missing ones are defaults. """
+        if index is self._index:
+            ret = self._values
+        elif _is_array(self._values):
+            ret = np.full(len(index), defaults,
+                          dtype=np.result_type(self._values, defaults))
+            positions = [index.positions[k] for k in self._index.ids]
+            ret[positions] = self._values
+        else:
+            ret = [self.get(k, defaults) for k in index.ids]
+        return ret
 
     def __sub__(self, other):
         if other is None:
@@ -51,7 +172,11 @@ class IdValues(object):
         return ret
 
     def __neg__(self):
-        return IdValues({k: -v for k, v in self._data.items()})
+        if _is_array(self._values):
+            values = -self._values
+        else:
+            values = [-v for v in self._values]
+        return self.from_values(self._index, values)
 
     @staticmethod
     def _add(op1, op2):
@@ -68,20 +193,46 @@ class IdValues(object):
             defaults = 0
             op = self._add
 
-            ret = self._apply_op(defaults, op, other)
+            ret = self._apply_op(defaults, op, other, np_op=np_func('add'))
         else:
             ret = self.copy()
         return ret
 
-    def _apply_op(self, defaults, op, other):
+    def _apply_op(self, defaults, op, other, np_op=None, reverse=False):
         if isinstance(other, IdValues):
-            keys = self.keys_union(other)
-            ret = IdValues(
-                {k: op(self.get(k, defaults), other.get(k, defaults))
-                 for k in keys})
+            index = self._index.union(other._index)
+            values = self._align(index, defaults)
+            other_values = other._align(index, defaults)
         else:
-            ret = IdValues({k: op(v, other)
-                            for k, v in self._data.items()})
+            index = self._index
+            values = self._values
+            other_values = other
+
+        if reverse:
+            values, other_values = other_values, values
+
+        if (np_op is not None and
+                (_is_array(values) or _is_number(values)) and
+                (_is_array(other_values) or _is_number(other_values))):
+            ret = np_op(values, other_values)
+        else:
+            ret = [op(v1, v2) for v1, v2 in
+                   zip(*self._broadcast(values, other_values))]
+        return self.from_values(index, ret)
+
+    @staticmethod
+    def _broadcast(op1, op2):
+        ret = []
+        size = None
+        for op in (op1, op2):
+            if isinstance(op, (list, tuple)) or _is_array(op):
+                size = len(op)
+        for op in (op1, op2):
+            if _is_array(op):
+                op = op.tolist()
+            elif not isinstance(op, (list, tuple)):
+                op = [op] * size
+            ret.append(op)
         return ret
 
     def keys_union(self, other):
@@ -104,11 +255,12 @@ class IdValues(object):
         return r
 
     def __div__(self, other):
-        return self._apply_op(self.NaN, self._div, other)
+        return self._apply_op(self.NaN, self._div, other,
+                              np_op=np_func(_vector_div))
 
     def __rtruediv__(self, other):
-        return IdValues({k: self._div(other, v)
-                         for k, v in self._data.items()})
+        return self._apply_op(self.NaN, self._div, other,
+                              np_op=np_func(_vector_div), reverse=True)
 
     def __rdiv__(self, other):
         return self.__rtruediv__(other)
@@ -125,7 +277,8 @@ class IdValues(object):
 
     def __mul__(self, other):
         if other is not None:
-            ret = self._apply_op(1, self._mul, other)
+            ret = self._apply_op(1, self._mul, other,
+                                 np_op=np_func('multiply'))
         else:
             ret = self.copy()
         return ret
@@ -134,25 +287,37 @@ class IdValues(object):
         return self.__mul__(other)
 
     def copy(self):
-        return IdValues({k: v for k, v in self._data.items()})
+        return self.from_values(self._index, copy.copy(self._values))
 
     def __len__(self):
-        return len(self._data)
+        return len(self._index)
 
     def __getitem__(self, item):
-        return self._data.get(item, self.NaN)
+        return self.get(item, self.NaN)
 
     def keys(self):
-        return self._data.keys()
+        return self._index.ids
 
     def get(self, k, default=None):
-        return self._data.get(k, default)
+        pos = self._index.positions.get(k)
+        if pos is None:
+            ret = default
+        else:
+            ret = self._values[pos]
+            if _is_array(self._values):
+                ret = ret.item()
+        return ret
 
     def set(self, k, v):
-        self._data[k] = v
+        data = self.to_dict()
+        data[k] = v
+        self.__init__(data)
+
+    def to_dict(self):
+        return dict(zip(self._index.ids, self._value_list()))
 
     def __str__(self):
-        return '{}({})'.format(self.__class__.__name__, self._data)
+        return '{}({})'.format(self.__class__.__name__, self.to_dict())
 
     def __repr__(self):
         return str(self)
@@ -304,7 +469,8 @@ def sp_hit_ratio(path, prev, curr):
 @metric_calculator
 def sp_fact(path, _, curr):
     path = only_one_path(path)
-    return curr.by_path(path).sp_values
+    # the values are cached by the query result
+    return curr.by_path(path).sp_values.copy()
 
 
 def _sp_pct(path, curr, prev):
@@ -326,7 +492,8 @@ def _sp_pct(path, curr, prev):
 @metric_calculator
 def sp_sum_values(path, _, curr):
     path = only_one_path(path)
-    return curr.by_path(path).sp_sum_values
+    # the values are cached by the query result
+    return curr.by_path(path).sp_sum_values.copy()
 
 
 @metric_calculator
@@ -542,7 +709,12 @@ class UnityMetricConfigParser(MetricConfigParser):
 
     @classmethod
     def get_config(cls, name):
-        name = cls._get_clz_name(name)
+        return cls._get_config_list(cls._get_clz_name(name))
+
+    @classmethod
+    @cache
+    def _get_config_list(cls, name):
+        # the config list is read only, share it between the lookups
         return UnityMetricConfigList(cls._read_configs().get(name))
 
     @classmethod
@@ -555,19 +727,117 @@ class UnityMetricConfigParser(MetricConfigParser):
                 for path in config.paths()]
 
 
+def _ref(obj):
+    return None if obj is None else weakref.ref(obj)
+
+
+def _deref(ref):
+    return None if ref is None else ref()
+
+
+class _MetricValuesCache(object):
+    """ metric values calculated from one pair of counter records. """
+
+    def __init__(self, prev, curr, on_released=None):
+        self._prev = _ref(prev)
+        if on_released is None:
+            self._curr = _ref(curr)
+        else:
+            self._curr = weakref.ref(curr, lambda _: on_released(self))
+        self.values = {}
+
+    def is_for(self, prev, curr):
+        return _deref(self._prev) is prev and _deref(self._curr) is curr
+
+
 class UnityCalculatorMetaInfo(CalculatorMetaInfo):
+    def __init__(self, use_cache=True):
+        super(UnityCalculatorMetaInfo, self).__init__()
+        # calculate the metric of all resources once for each counter pair
+        self.use_cache = use_cache
+        # keyed by the identity of the latest record, so the systems do not
+        # evict each other.  The records are not hashable before parsed.
+        self._values_cache = {}
+        self._values_cache_lock = threading.Lock()
+
     def get_config_parser(self):
         return UnityMetricConfigParser()
 
-    def get_metric_value(self, clz, metric_name, cli, obj=None):
+    @staticmethod
+    def _check_cli(cli):
         if not hasattr(cli, 'curr_counter'):
             raise ValueError('cli should has "curr_counter" attribute.')
         if not hasattr(cli, 'prev_counter'):
             raise ValueError('cli should has "prev_counter" attribute.')
 
+    def _get_values_cache(self, prev, curr):
+        key = id(curr)
+        values_cache = self._values_cache
+
+        def _released(cache):
+            # called by the gc, may be in the locked section already
+            if values_cache.get(key) is cache:
+                values_cache.pop(key, None)
+
+        with self._values_cache_lock:
+            ret = values_cache.get(key)
+            if ret is None or not ret.is_for(prev, curr):
+                ret = _MetricValuesCache(prev, curr, _released)
+                values_cache[key] = ret
+        return ret
+
+    def get_metric_values(self, clz, metric_name, cli):
+        """ get the metric values of all the resources.
+
+        The values are calculated once for the latest counters of the cli.
+        The returned `IdValues` is shared, do not modify it.
+
+        :param clz: resource class or class name.
+        :param metric_name: name of the metric.
+        :param cli: the cli with `prev_counter` and `curr_counter`.
+        :return: `IdValues` of the metric.
+        """
+        self._check_cli(cli)
+        prev = cli.prev_counter
+        curr = cli.curr_counter
         config = self.get_config(clz).get_metric_config(metric_name)
-        return config.calculator(config.paths, cli.prev_counter,
-                                 cli.curr_counter, obj)
+        if not self.use_cache or curr is None:
+            return config.calculator(config.paths, prev, curr)
+
+        cache = self._get_values_cache(prev, curr)
+        key = (self._metric_config._get_clz_name(clz), metric_name)
+        ret = cache.values.get(key)
+        if ret is None:
+            ret = config.calculator(config.paths, prev, curr)
+            cache.values[key] = ret
+        return ret
+
+    def get_metric_value(self, clz, metric_name, cli, obj=None):
+        values = self.get_metric_values(clz, metric_name, cli)
+        if obj is None:
+            ret = values.copy()
+        else:
+            ret = values[obj]
+        return ret
+
+    def get_metrics_frame(self, clz, cli, rsc_list, names=None):
+        """ get the metrics of all resources in the list.
+
+        :param clz: resource class or class name.
+        :param cli: the cli with `prev_counter` and `curr_counter`.
+        :param rsc_list: list of resources.
+        :param names: metric names, default to all the metrics.
+        :return: `MetricsFrame` of the resources.
+        """
+        if names is None:
+            names = self.get_metric_names(clz)
+        items = list(rsc_list)
+        ids = [item.get_id() for item in items]
+        columns = []
+        for name in names:
+            values = self.get_metric_values(clz, name, cli)
+            columns.append((name, [values[_id] for _id in ids]))
+        return MetricsFrame(items, columns)
 
     def get_all_paths(self, clz_list=None):
         if clz_list is not None:
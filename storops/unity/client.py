@@ -16,7 +16,9 @@
 from __future__ import unicode_literals
 
 import logging
+import math
 from functools import wraps
+from multiprocessing.pool import ThreadPool
 
 import six
 
@@ -26,7 +28,9 @@ from storops.connection.connector import UnityRESTConnector
 from storops.exception import UnityResourceNotSupportedError
 from storops.lib.common import instance_cache, EnumList
 from storops.lib.metric import PerfManager
+from storops.unity.batch import UnityBatch
 from storops.unity.enums import UnityEnum, UnityEnumList
+from storops.unity.job_tracker import UnityJobTracker
 from storops.unity.resource import UnityResource, UnityResourceList
 from storops.unity.resp import RestResponse
 
@@ -49,38 +53,155 @@ def wrap_not_supported(func):
 
 class UnityClient(PerfManager):
     def __init__(self, ip, username, password, port=443, verify=False,
-                 retries=None, cache_interval=0):
+                 retries=None, cache_interval=0, response_cache=None,
+                 page_workers=1, pool_size=None, pool_block=False):
         super(UnityClient, self).__init__()
         self.ip = ip
+        self.page_workers = page_workers
         self._rest = UnityRESTConnector(ip, port=port, user=username,
                                         password=password,
                                         verify=verify,
                                         retries=retries,
-                                        cache_interval=cache_interval)
+                                        cache_interval=cache_interval,
+                                        response_cache=response_cache,
+                                        pool_size=pool_size,
+                                        pool_block=pool_block)
         self._system_version = None
+        self.job_tracker = UnityJobTracker(self)
 
     @wrap_not_supported
     def get_all(self, type_name, base_fields=None, the_filter=None,
-                nested_fields=None):
+                nested_fields=None, per_page=None, page_workers=None,
+                use_cache=True):
         """Get the resource by resource id.
 
         :param nested_fields: nested resource fields
         :param base_fields: fields of this resource
         :param the_filter: dictionary of filter like `{'name': 'abc'}`
         :param type_name: Resource type. For example, pool, lun, nasServer.
+        :param per_page: number of entries per page.  Use the default page
+            size of the system if not specified.
+        :param page_workers: number of threads used to fetch the pages
+            after the first one.  Default to the `page_workers` of the
+            client.  Pages are retrieved one by one if it's 1.
+        :param use_cache: whether to read the pages from the response
+            cache.  Set to False for the states changing quickly.
         :return: List of resource class objects
         """
         fields = self.get_fields(type_name, base_fields, nested_fields)
         the_filter = self.dict_to_filter_string(the_filter)
+        if page_workers is None:
+            page_workers = self.page_workers
 
         url = '/api/types/{}/instances'.format(type_name)
 
-        resp = self.rest_get(url, fields=fields, filter=the_filter)
-        ret = resp
+        if page_workers is not None and page_workers > 1:
+            ret = self._get_all_pages_parallel(
+                url, fields, the_filter, per_page, page_workers, use_cache)
+        else:
+            ret = self._get_all_pages(url, fields, the_filter, per_page,
+                                      use_cache)
+        return ret
+
+    def _get_all_pages(self, url, fields, the_filter, per_page,
+                       use_cache=True):
+        ret = self.rest_get(url, fields=fields, filter=the_filter,
+                            per_page=per_page, use_cache=use_cache)
+        return self._get_next_pages(ret, ret, url, fields, the_filter,
+                                    per_page, use_cache)
+
+    def _get_next_pages(self, ret, resp, url, fields, the_filter, per_page,
+                        use_cache=True):
+        for resp in self._iter_next_pages(resp, url, fields, the_filter,
+                                          per_page, use_cache):
+            ret.entries.extend(resp.entries)
+        return ret
+
+    def _iter_next_pages(self, resp, url, fields, the_filter, per_page,
+                         use_cache=True):
         while resp.has_next_page:
             resp = self.rest_get(url, fields=fields, filter=the_filter,
-                                 page=resp.next_page)
+                                 per_page=per_page, page=resp.next_page,
+                                 use_cache=use_cache)
+            yield resp
+
+    def _get_all_pages_parallel(self, url, fields, the_filter, per_page,
+                                page_workers, use_cache=True):
+        """ retrieve the first page with the entry count, then the rest.
+
+        The remaining pages are retrieved concurrently through the same
+        session and appended to the entries in the page order.
+        """
+        ret = self.rest_get(url, fields=fields, filter=the_filter,
+                            per_page=per_page, with_entrycount='true',
+                            use_cache=use_cache)
+        pages = self.get_remaining_pages(ret)
+        if not pages:
+            return self._get_next_pages(ret, ret, url, fields, the_filter,
+                                        per_page, use_cache)
+
+        def _get_page(page):
+            return self.rest_get(url, fields=fields, filter=the_filter,
+                                 per_page=per_page, page=page,
+                                 use_cache=use_cache)
+
+        pool = ThreadPool(min(page_workers, len(pages)))
+        try:
+            responses = pool.map(_get_page, pages)
+        finally:
+            pool.close()
+        for resp in responses:
             ret.entries.extend(resp.entries)
+
+        # pick up the entries created after the count is retrieved
+        return self._get_next_pages(ret, responses[-1], url, fields,
+                                    the_filter, per_page, use_cache)
+
+    def iter_pages(self, type_name, base_fields=None, the_filter=None,
+                   nested_fields=None, per_page=None):
+        """Get the resources page by page.
+
+        Next page is only requested after the previous one is consumed.
+
+        :param nested_fields: nested resource fields
+        :param base_fields: fields of this resource
+        :param the_filter: dictionary of filter like `{'name': 'abc'}`
+        :param type_name: Resource type. For example, pool, lun, nasServer.
+        :param per_page: number of entries per page.
+        :return: generator of the response of each page
+        """
+        try:
+            fields = self.get_fields(type_name, base_fields, nested_fields)
+        except UnityResourceNotSupportedError:
+            return
+        the_filter = self.dict_to_filter_string(the_filter)
+
+        url = '/api/types/{}/instances'.format(type_name)
+
+        resp = self.rest_get(url, fields=fields, filter=the_filter,
+                             per_page=per_page)
+        yield resp
+        for resp in self._iter_next_pages(resp, url, fields, the_filter,
+                                          per_page):
+            yield resp
+
+    @staticmethod
+    def get_remaining_pages(resp):
+        """ get the numbers of the pages after the first one.
+
+        :param resp: response of the first page, retrieved with the
+            entry count.
+        :return: list of page numbers.  Empty if the entry count is not
+            available.
+        """
+        count = resp.entry_count
+        page_size = len(resp.entries)
+        if not resp.has_next_page or count is None or page_size == 0:
+            ret = []
+        else:
+            first = resp.next_page
+            page_count = int(math.ceil(float(count) / page_size))
+            ret = list(range(first, first + page_count - 1))
         return ret
 
     @classmethod
@@ -96,7 +217,9 @@ class UnityClient(PerfManager):
                 r = '{} eq {}'.format(k, v)
             return r
 
-        if the_filter:
+        if isinstance(the_filter, six.string_types):
+            ret = the_filter
+        elif the_filter:
             items = []
             for key in sorted(the_filter.keys()):
                 value = the_filter[key]
@@ -116,12 +239,12 @@ class UnityClient(PerfManager):
             ret = None
         return ret
 
-    def rest_get(self, url, fields=None, **params):
+    def rest_get(self, url, fields=None, use_cache=True, **params):
         if fields is None:
             fields = []
         params['fields'] = ','.join(map(str, sorted(fields)))
         url = self.assemble_url(url, **params)
-        return RestResponse(self._rest.get(url))
+        return RestResponse(self._rest.get(url, use_cache=use_cache))
 
     def rest_post(self, url, body=None, files=None, **params):
         url = self.assemble_url(url, **params)
@@ -156,6 +279,11 @@ class UnityClient(PerfManager):
         else:
             unity_type = self._get_type_resource(type_name)
             ret = unity_type.fields
+        return self.merge_fields(ret, nested_fields)
+
+    @staticmethod
+    def merge_fields(base_fields, nested_fields=None):
+        ret = base_fields
         if nested_fields is not None:
             if isinstance(nested_fields, six.text_type):
                 nested_fields = tuple([nested_fields])
@@ -181,18 +309,14 @@ class UnityClient(PerfManager):
 
     def post(self, type_name, **kwargs):
         url = '/api/types/{}/instances'.format(type_name)
+        url_params = self.pop_async_params(kwargs)
         body = self.make_body(kwargs)
-        return self.rest_post(url, body)
+        return self.rest_post(url, body, **url_params)
 
     def action(self, type_name, obj_id, action, **kwargs):
         base_url = '/api/instances/{}/{}/action/{}'
         url = base_url.format(type_name, obj_id, action)
-        url_params = {}
-        if 'async' in kwargs:
-            async = kwargs['async']
-            del kwargs['async']
-            if async:
-                url_params['timeout'] = 0
+        url_params = self.pop_async_params(kwargs)
         body = self.make_body(kwargs, allow_empty=True)
         return self.rest_post(url, body, **url_params)
 
@@ -201,20 +325,31 @@ class UnityClient(PerfManager):
 
     def type_action(self, type_name, action, **kwargs):
         url = '/api/types/{}/action/{}'.format(type_name, action)
+        url_params = self.pop_async_params(kwargs)
         body = self.make_body(kwargs)
-        return self.rest_post(url, body)
+        return self.rest_post(url, body, **url_params)
 
     def delete(self, type_name, _id, **kwargs):
         url = '/api/instances/{}/{}'.format(type_name, _id)
         url_params = {'compact': True}
-        if 'async' in kwargs:
-            async = kwargs['async']
-            del kwargs['async']
-            if async:
-                url_params['timeout'] = 0
+        url_params.update(self.pop_async_params(kwargs))
         body = self.make_body(kwargs)
         return self.rest_delete(url, body, **url_params)
 
+    @staticmethod
+    def pop_async_params(kwargs):
+        """ pop the `async` option and convert it to the url parameters.
+
+        :param kwargs: keyword arguments of the request, `async` is removed.
+        :return: url parameters.
+        """
+        ret = {}
+        if 'async' in kwargs:
+            async = kwargs.pop('async')
+            if async:
+                ret['timeout'] = 0
+        return ret
+
     @classmethod
     def _is_empty(cls, value):
         if isinstance(value, (dict, tuple, list)) and len(value) == 0:
@@ -244,6 +379,26 @@ class UnityClient(PerfManager):
             ret = value
         return ret
 
+    def batch(self, max_workers=8, use_job=False, **job_options):
+        """ queue the rest operations and execute them together.
+
+        Use it as a context manager, the operations are executed when
+        exiting the context::
+
+            with cli.batch() as b:
+                futures = [b.delete('lun', _id) for _id in lun_ids]
+            responses = [f.result() for f in futures]
+
+        :param max_workers: max operations executed at the same time.
+        :param use_job: submit the operations as jobs (`timeout=0`) and
+            resolve the futures when the jobs complete.
+        :param job_options: `timeout` of the jobs, the jobs are polled by
+            the `job_tracker` of the client.
+        :return: `UnityBatch` instance.
+        """
+        return UnityBatch(self, max_workers=max_workers, use_job=use_job,
+                          **job_options)
+
     def set_system_version(self, version):
         self._system_version = version
 
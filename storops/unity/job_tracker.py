@@ -0,0 +1,217 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, wait
+
+from storops.exception import JobTimeoutException
+from storops.unity.resource.job import UnityJob, UnityJobList
+from storops.unity.resp import RestResponse
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+
+class _TrackedJob(object):
+    def __init__(self, job_id, deadline):
+        self.job_id = job_id
+        self.deadline = deadline
+        self.future = Future()
+        # the job on the array could not be cancelled by the future
+        self.future.set_running_or_notify_cancel()
+
+
+class UnityJobTracker(object):
+    """ track the async jobs of a system with one polling loop.
+
+    All the outstanding jobs are queried by one filtered request per tick
+    instead of polling each job individually.  The tick interval starts
+    from `min_interval` and grows by `backoff` every tick no job
+    finishes, up to `max_interval`.  It is reset when a job finishes or a
+    new job is tracked.
+
+    The polling thread is started when a job is tracked and exits when
+    there is no outstanding job.  The callbacks of the futures are called
+    in the polling thread.
+
+    The job queries bypass the response cache of the client, the states of
+    the jobs are always read from the system.
+    """
+
+    def __init__(self, cli, min_interval=0.5, max_interval=10, backoff=2,
+                 max_ids_per_query=50):
+        self._cli = cli
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_ids_per_query = max_ids_per_query
+        self._init_state()
+
+    def _init_state(self):
+        self._jobs = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._interval = self.min_interval
+        self._next_poll = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in ('_jobs', '_cond', '_thread', '_interval', '_next_poll'):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._jobs)
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @staticmethod
+    def _get_job_id(job):
+        if isinstance(job, UnityJob):
+            ret = job.get_id()
+        elif isinstance(job, RestResponse):
+            job.raise_if_err()
+            ret = job.job_id
+        else:
+            ret = job
+        if ret is None:
+            raise ValueError('job id is not available in {}.'.format(job))
+        return ret
+
+    def track(self, job, timeout=3600, callback=None):
+        """ track the job until it completes.
+
+        :param job: `UnityJob`, the `RestResponse` of an async request or
+            the job id.
+        :param timeout: seconds to wait before `JobTimeoutException` is
+            set to the future.
+        :param callback: called with the future when the job completes.
+        :return: future of the job.  The result is the `UnityJob` or the
+            `JobStateError` raised if the job failed.
+        """
+        job_id = self._get_job_id(job)
+        with self._cond:
+            tracked = self._jobs.get(job_id)
+            if tracked is None:
+                now = time.time()
+                next_poll = now + self.min_interval
+                if self._jobs:
+                    next_poll = min(self._next_poll, next_poll)
+                self._next_poll = next_poll
+                self._interval = self.min_interval
+                tracked = _TrackedJob(job_id, now + timeout)
+                self._jobs[job_id] = tracked
+                self._start()
+                self._cond.notify()
+        if callback is not None:
+            tracked.future.add_done_callback(callback)
+        return tracked.future
+
+    def wait(self, timeout=None):
+        """ wait for all the outstanding jobs.
+
+        :param timeout: seconds to wait.
+        :return: the `done` and `not_done` sets of the futures.
+        """
+        with self._cond:
+            futures = [tracked.future for tracked in self._jobs.values()]
+        return wait(futures, timeout=timeout)
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name='UnityJobTracker-{}'.format(
+                    getattr(self._cli, 'ip', '')))
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._jobs:
+                        self._thread = None
+                        return
+                    remaining = self._next_poll - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                jobs = list(self._jobs.values())
+
+            finished = self.poll(jobs)
+
+            with self._cond:
+                for tracked in finished:
+                    self._jobs.pop(tracked.job_id, None)
+                if finished:
+                    self._interval = self.min_interval
+                else:
+                    self._interval = min(self._interval * self.backoff,
+                                         self.max_interval)
+                self._next_poll = time.time() + self._interval
+
+    def _query(self, job_ids):
+        ret = {}
+        for i in range(0, len(job_ids), self.max_ids_per_query):
+            ids = job_ids[i:i + self.max_ids_per_query]
+            resp = self._cli.get_all('job', the_filter={'id': ids},
+                                     use_cache=False)
+            jobs = UnityJobList(cli=self._cli)
+            jobs.update(resp)
+            for job in jobs:
+                ret[job.get_id()] = job
+        return ret
+
+    def poll(self, jobs):
+        """ query the jobs once and resolve the futures of finished jobs.
+
+        :param jobs: list of the tracked jobs.
+        :return: list of the finished jobs.
+        """
+        finished = []
+        try:
+            found = self._query([tracked.job_id for tracked in jobs])
+        except Exception as e:  # noqa
+            log.warning('failed to query the jobs: {}'.format(e))
+            found = {}
+
+        now = time.time()
+        for tracked in jobs:
+            job = found.get(tracked.job_id)
+            try:
+                done = job is not None and job.check_errors()
+            except Exception as e:  # noqa
+                tracked.future.set_exception(e)
+                finished.append(tracked)
+                continue
+            if done:
+                tracked.future.set_result(job)
+                finished.append(tracked)
+            elif now > tracked.deadline:
+                tracked.future.set_exception(JobTimeoutException())
+                finished.append(tracked)
+        return finished
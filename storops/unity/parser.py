@@ -19,7 +19,7 @@ import logging
 import re
 import six
 
-from storops.lib.common import cache
+from storops.lib.common import LazyDict, cache
 from storops.lib.parser import ParserConfigFactory, OutputParser
 
 __author__ = 'Cedric Zhuang'
@@ -71,24 +71,31 @@ class UnityRestParser(OutputParser):
         if properties is None:
             properties = self.properties
 
-        ret = {}
+        ret = LazyDict()
         for p in properties:
             if isinstance(obj, list):
                 log.error('cannot parse list: {}.  '
                           'a list converter must be specified.'.format(obj))
                 continue
             if p.label in obj.keys():
-                value = p.convert(obj[p.label])
+                subtree = None
                 if preloaded_props is not None and isinstance(
                         preloaded_props, NestedProperties):
                     subtree = preloaded_props.get_child_subtree(p.key)
-                    if (subtree is not None and
-                            hasattr(value, 'set_preloaded_properties')):
-                        value.set_preloaded_properties(subtree)
-                ret[p.key] = value
+                ret.set_lazy(p.key, self._convert, p, obj[p.label], subtree)
+        return ret
+
+    @staticmethod
+    def _convert(p, value, subtree=None):
+        """ convert the value when it's read the first time. """
+        ret = p.convert(value)
+        if (subtree is not None and
+                hasattr(ret, 'set_preloaded_properties')):
+            ret.set_preloaded_properties(subtree)
         return ret
 
     def init_from_config(self, config):
+        super(UnityRestParser, self).init_from_config(config)
         self.name = config.name
 
 
@@ -23,6 +23,7 @@ from storops.exception import NoIndexException, UnityResourceNotFoundError, \
 from storops.lib.common import clear_instance_cache, instance_cache, \
     get_local_folder
 from storops.lib.metric import MetricsDumper
+from storops.lib.metric_file import MetricsFileReader
 from storops.lib.resource import Resource, ResourceList
 from storops.unity import parser
 from storops.unity.calculator import calculators
@@ -103,7 +104,7 @@ class UnityResource(Resource):
                 # Return False when only id is parsed besides the
                 # preloaded properties
                 other = (
-                    set(self.parsed_resource.keys()) -
+                    set(self._parsed_resource.keys()) -
                     set(self.get_preloaded_prop_keys())
                 )
                 ret = not (
@@ -112,7 +113,7 @@ class UnityResource(Resource):
                     len(self.get_preloaded_prop_keys()) > 1)
             else:
                 # Return False when only id is parsed
-                ret = not (self.parsed_resource is None or
+                ret = not (self._parsed_resource is None or
                            (len(self._parsed_resource) == 1 and
                             len(self.property_names()) > 1))
         return ret
@@ -273,10 +274,11 @@ class UnityAttributeResource(UnityResource):
 
 
 class UnityResourceList(UnityResource, ResourceList):
-    def __init__(self, cli=None, **the_filter):
+    def __init__(self, cli=None, per_page=None, **the_filter):
         UnityResource.__init__(self, cli=cli)
         ResourceList.__init__(self)
         self._rsc_filter = the_filter
+        self._per_page = per_page
 
     @classmethod
     def get_resource_class(cls):
@@ -295,6 +297,41 @@ class UnityResourceList(UnityResource, ResourceList):
         return ret
 
     def _get_raw_resource(self):
+        the_filter, nested_obj = self._get_query_args()
+        nested_fields = nested_obj.query_fields if nested_obj else None
+        res = self._cli.get_all(
+            self.resource_class, the_filter=the_filter,
+            nested_fields=nested_fields, per_page=self._per_page)
+        self.set_preloaded_properties(nested_obj)
+        return res
+
+    def iter_pages(self):
+        """ retrieve the resources page by page.
+
+        Only one page of resources is kept in memory at any time.  The
+        filter and nested properties are the same as `update`.  Note that
+        the resources are not added to this list.
+
+        :return: generator of the resources list of each page.
+        """
+        the_filter, nested_obj = self._get_query_args()
+        nested_fields = nested_obj.query_fields if nested_obj else None
+        pages = self._cli.iter_pages(
+            self.resource_class, the_filter=the_filter,
+            nested_fields=nested_fields, per_page=self._per_page)
+        for resp in pages:
+            yield list(self._iter_items(self._parse_raw(resp)))
+
+    def stream(self):
+        """ retrieve the resources one by one, page by page.
+
+        :return: generator of the resources.
+        """
+        for page in self.iter_pages():
+            for item in page:
+                yield item
+
+    def _get_query_args(self):
         the_filter = {}
         _parser = self._get_parser()
         for k, v in self._rsc_filter.items():
@@ -312,12 +349,7 @@ class UnityResourceList(UnityResource, ResourceList):
                 label = k
             the_filter[label] = v
         nested_obj = self.get_resource_class().build_nested_properties_obj()
-        nested_fields = nested_obj.query_fields if nested_obj else None
-        res = self._cli.get_all(
-            self.resource_class, the_filter=the_filter,
-            nested_fields=nested_fields)
-        self.set_preloaded_properties(nested_obj)
-        return res
+        return the_filter, nested_obj
 
     def set_cli(self, cli):
         super(UnityResourceList, self).set_cli(cli)
@@ -368,9 +400,67 @@ class UnityResourceList(UnityResource, ResourceList):
             filename = self.get_default_metric_csv_filename()
         return self._metrics_dumper.persist_metric_data(filename)
 
+    def persist_metric_block(self, prefix=None, **kwargs):
+        """ append the metrics to the columnar metric files.
+
+        :param prefix: path prefix of the files, default to
+            `~/.storops/<ip>_<resource class>`.
+        :param kwargs: options of the `MetricsFileWriter`.
+        :return: name of the file written.
+        """
+        if prefix is None:
+            prefix = self.get_default_metric_file_prefix()
+        return self._metrics_dumper.persist_metric_block(prefix, **kwargs)
+
+    def read_persisted_metrics(self, start=None, end=None, names=None,
+                               prefix=None):
+        """ read the metrics persisted by `persist_metric_block`.
+
+        :param start: `datetime` or seconds since epoch, inclusive.
+        :param end: `datetime` or seconds since epoch, exclusive.
+        :param names: column names to read, default to all.
+        :param prefix: path prefix of the files.
+        :return: `OrderedDict` of column name and values.
+        """
+        if prefix is None:
+            prefix = self.get_default_metric_file_prefix()
+        return MetricsFileReader(prefix).read(start, end, names)
+
     def get_metrics_csv(self, sep=None):
         return self._metrics_dumper.get_metrics_csv(sep=sep)
 
+    def get_metrics_columns(self):
+        return self._metrics_dumper.get_metrics_columns()
+
+    def get_metrics_frame(self, names=None):
+        """ get the metrics of all the resources in the list.
+
+        Each metric is calculated once for all the resources instead of
+        once for each resource.
+
+        :param names: metric names, default to all the metrics.
+        :return: `MetricsFrame` of the resources.
+        """
+        if not self._cli.is_perf_metric_enabled(self):
+            raise UnityPerfMonNotEnabledError()
+        return calculators.get_metrics_frame(
+            self.clz_name, self._cli, self, names)
+
+    def get_metrics(self, names=None):
+        """ get the metrics of all the resources in the list.
+
+        :param names: metric names, default to all the metrics.
+        :return: dict of resource id to the dict of metric name and value.
+        """
+        frame = self.get_metrics_frame(names)
+        return {rsc.get_id(): dict(zip(frame.names, values))
+                for rsc, values in frame.rows()}
+
+    def get_default_metric_file_prefix(self):
+        folder = get_local_folder()
+        name = '{}_{}'.format(self._cli.ip, self.resource_class_name)
+        return os.path.join(folder, name)
+
     def get_default_metric_csv_filename(self):
         folder = get_local_folder()
         name = '{}_{}.csv'.format(self._cli.ip, self.resource_class_name)
@@ -255,6 +255,11 @@ class UnityCifsShareAceList(UnityResourceList):
         resp.raise_if_err()
         return resp.first_content['cifsShareACEs']
 
+    def iter_pages(self):
+        # ACEs are retrieved by an action in one response
+        yield list(self._iter_items(
+            self._parse_raw(self._get_raw_resource())))
+
     @property
     def sid_list(self):
         return [ace.sid for ace in self]
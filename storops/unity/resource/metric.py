@@ -15,12 +15,28 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import logging
+import threading
+from collections import OrderedDict
+
+from dateutil import tz
+
 from storops.lib.common import instance_cache, clear_instance_cache
 from storops.unity.calculator import IdValues
 from storops.unity.resource import UnityResource, UnityResourceList
 
 __author__ = 'Cedric Zhuang'
 
+log = logging.getLogger(__name__)
+
+
+def _to_rest_time(value):
+    """ format the time like `2016-11-18T03:45:00.000Z`. """
+    if value.tzinfo is not None:
+        value = value.astimezone(tz.tzutc())
+    return '{}.{:03d}Z'.format(value.strftime('%Y-%m-%dT%H:%M:%S'),
+                               value.microsecond // 1000)
+
 
 class UnityMetric(UnityResource):
     pass
@@ -35,20 +51,7 @@ class UnityMetricList(UnityResourceList):
 class UnityMetricRealTimeQuery(UnityResource):
     @classmethod
     def get_query_list(cls, cli, interval, paths):
-        queries = UnityMetricRealTimeQueryList(cli=cli, interval=interval)
-        queries.sort_by_path()
-        paths = set(paths)
-        id_list = []
-        for query in queries:
-            query_paths = set(query.paths)
-            if query_paths.intersection(paths):
-                id_list.append(query.get_id())
-                paths -= query_paths
-        if paths:
-            id_list.append(
-                cls.create(cli, interval, sorted(list(paths))).get_id())
-            queries.update()
-        return queries.set_id_list(id_list)
+        return UnityMetricQueryManager(cli, interval).get_query_list(paths)
 
     @classmethod
     def create(cls, cli, interval, paths):
@@ -103,22 +106,235 @@ class UnityMetricRealTimeQueryList(UnityResourceList):
         return ret
 
 
+class UnityMetricQueryManager(object):
+    """ keep the real-time queries covering the paths of a collection.
+
+    The queries covering the paths are found once and cached.  The queries
+    are listed again only when the paths change or a result fetch fails,
+    so that a collection only fetches the results of the queries.
+
+    Each fetch only retrieves the samples newer than the last fetched ones
+    of the query.
+
+    The paths are covered by the minimal set of existing queries.  The
+    uncovered paths are merged with the paths of the queries created by
+    the manager into one new query.  The created queries not used any
+    more are deleted.
+    """
+
+    def __init__(self, cli, interval, max_idle=3):
+        """ create the manager.
+
+        :param cli: the unity client.
+        :param interval: interval of the queries.
+        :param max_idle: number of collections without new samples before
+            the queries are listed again.
+        """
+        self._cli = cli
+        self.interval = interval
+        self.max_idle = max_idle
+        self._paths = None
+        self._queries = []
+        self._cursors = {}
+        self._idle = 0
+        self._paths_of = {}
+        self._owned = set()
+        self._lock = threading.Lock()
+        self.list_count = 0
+        self.create_count = 0
+        self.delete_count = 0
+
+    @property
+    def query_ids(self):
+        return [query.get_id() for query in self._queries]
+
+    def get_query_list(self, paths):
+        """ queries covering the paths.
+
+        :param paths: the metric paths.
+        :return: `UnityMetricRealTimeQueryList` of the queries.
+        """
+        with self._lock:
+            self._assure_queries(frozenset(paths))
+            ret = UnityMetricRealTimeQueryList(
+                cli=self._cli, interval=self.interval,
+                id_list=self.query_ids)
+            ret._list = list(self._queries)
+        return ret
+
+    def get_query_result(self, paths):
+        """ new results of the paths.
+
+        Only the samples after the last fetched ones are retrieved, and
+        the latest sample of each path is returned.  The queries are
+        refreshed and the results fetched again once if any query fails to
+        return the results.
+
+        :param paths: the metric paths.
+        :return: `UnityMetricQueryResultList` of the paths, `None` if some
+            query has no new sample or no query covers the paths.
+        """
+        paths = frozenset(paths)
+        with self._lock:
+            self._assure_queries(paths)
+            queries = list(self._queries)
+        try:
+            ret = self._fetch(queries, paths)
+        except Exception as ex:
+            log.info('failed to get the results of the metric queries {}: '
+                     '{}.  refresh the queries.'.format(
+                         [q.get_id() for q in queries], ex))
+            with self._lock:
+                self._refresh(paths)
+                queries = list(self._queries)
+            ret = self._fetch(queries, paths)
+        return ret
+
+    def invalidate(self):
+        """ list the queries again at the next collection. """
+        with self._lock:
+            self._paths = None
+
+    def _fetch(self, queries, paths):
+        results = []
+        for query in queries:
+            query_id = query.get_id()
+            result = UnityMetricQueryResultList(
+                cli=self._cli, query_id=query_id,
+                since=self._cursors.get(query_id))
+            if len(result) == 0:
+                # keep the samples of the queries aligned.
+                self._on_idle(query_id)
+                return None
+            results.append((query_id, result))
+
+        self._idle = 0
+        ret = None
+        for query_id, result in results:
+            self._cursors[query_id] = result.latest_timestamp
+            result.latest().filtered_by_path(paths)
+            if ret is None:
+                ret = result
+            else:
+                ret.merge(result)
+        return ret
+
+    def _on_idle(self, query_id):
+        self._idle += 1
+        if self._idle >= self.max_idle:
+            log.info('no new result of metric query {} in {} collections.  '
+                     'refresh the queries.'.format(query_id, self._idle))
+            self._idle = 0
+            self.invalidate()
+
+    def _assure_queries(self, paths):
+        if paths != self._paths:
+            self._refresh(paths)
+
+    def _refresh(self, paths):
+        queries = UnityMetricRealTimeQueryList(
+            cli=self._cli, interval=self.interval)
+        queries.update()
+        self.list_count += 1
+        self._paths_of = {q.get_id(): frozenset(q.paths) for q in queries}
+        self._owned &= set(self._paths_of)
+
+        chosen = self._cover(queries, paths)
+        covered = set()
+        for query in chosen:
+            covered |= self._paths_of[query.get_id()]
+        missing = paths - covered
+        if missing:
+            chosen = self._merge_missing(chosen, paths, missing)
+        self._collect_garbage(queries, chosen)
+        in_use = set(q.get_id() for q in chosen)
+        self._cursors = {k: v for k, v in self._cursors.items()
+                         if k in in_use}
+        self._queries = chosen
+        self._paths = paths
+
+    def _cover(self, queries, paths):
+        """ greedy minimal set of the queries covering the paths.
+
+        Each round takes the query covering most of the remaining paths,
+        the query of the manager, then the smaller one first.
+        """
+        ret = []
+        remaining = set(paths)
+        candidates = list(queries)
+        while remaining and candidates:
+            def key(q):
+                query_paths = self._paths_of[q.get_id()]
+                return (len(query_paths & remaining),
+                        q.get_id() in self._owned,
+                        -len(query_paths))
+
+            best = max(candidates, key=key)
+            best_paths = self._paths_of[best.get_id()]
+            if not best_paths & remaining:
+                break
+            ret.append(best)
+            candidates.remove(best)
+            remaining -= best_paths
+        return ret
+
+    def _merge_missing(self, chosen, paths, missing):
+        owned = set(q.get_id() for q in chosen if q.get_id() in self._owned)
+        new_paths = set(missing)
+        for query_id in owned:
+            new_paths |= self._paths_of[query_id] & paths
+        query = UnityMetricRealTimeQuery.create(
+            self._cli, self.interval, sorted(new_paths))
+        self.create_count += 1
+        self._paths_of[query.get_id()] = frozenset(new_paths)
+        self._owned.add(query.get_id())
+        return [q for q in chosen if q.get_id() not in owned] + [query]
+
+    def _collect_garbage(self, queries, chosen):
+        in_use = set(q.get_id() for q in chosen)
+        for query in queries:
+            query_id = query.get_id()
+            if query_id in self._owned and query_id not in in_use:
+                try:
+                    query.delete()
+                    self.delete_count += 1
+                except Exception as ex:
+                    log.info('failed to delete metric query {}: {}.'.format(
+                        query_id, ex))
+                self._owned.discard(query_id)
+                self._paths_of.pop(query_id, None)
+
+    def get_stats(self):
+        """ numbers of the rest calls about the queries. """
+        return {'queries': self.query_ids,
+                'lists': self.list_count,
+                'creates': self.create_count,
+                'deletes': self.delete_count}
+
+
 class UnityMetricQueryResult(UnityResource):
     @instance_cache
     def sum_sp(self):
         return sum(self.numeric_values)
 
     @property
-    @instance_cache
     def numeric_values(self):
+        return list(self._sp_numeric_values.values())
+
+    @property
+    @instance_cache
+    def _sp_numeric_values(self):
+        """ numeric values of each sp, the strings are converted once. """
         if self.values is None:
-            ret = []
+            ret = OrderedDict()
         else:
-            ret = [IdValues({k: int(v) for k, v in value.items()})
-                   for value in self.values.values()]
+            ret = OrderedDict(
+                (sp, IdValues({k: int(v) for k, v in value.items()}))
+                for sp, value in self.values.items())
         return ret
 
     @property
+    @instance_cache
     def sp_values(self):
         if self.values is None:
             ret = IdValues()
@@ -127,6 +343,7 @@ class UnityMetricQueryResult(UnityResource):
         return ret
 
     @property
+    @instance_cache
     def sp_sum_values(self):
         """
         return sp level values
@@ -163,6 +380,7 @@ class UnityMetricQueryResult(UnityResource):
         return ret
 
     @property
+    @instance_cache
     def sum_sp_values(self):
         """
         return system level values (spa + spb)
@@ -191,9 +409,8 @@ class UnityMetricQueryResult(UnityResource):
         if self.values is None:
             ret = IdValues()
         else:
-            ret = sum([IdValues(
-                {k: int(v) * int(other.values[key]) for k, v in value.items()})
-                for key, value in self.values.items()])
+            ret = sum(value * int(other.values[key]) for key, value in
+                      self._sp_numeric_values.items())
         return ret
 
     def combine_sp_values(self, other):
@@ -219,6 +436,21 @@ class UnityMetricQueryResult(UnityResource):
                                       in self.values.items()}.values())})
         return ret
 
+    def get_counters(self):
+        """ values of the counter summed over the sps.
+
+        The values of the sp level counters are returned as is.
+
+        :return: dict of id and value.
+        """
+        if not self.values:
+            ret = {}
+        elif any(isinstance(v, dict) for v in self.values.values()):
+            ret = self.sum_sp().to_dict()
+        else:
+            ret = self.sp_values.to_dict()
+        return ret
+
     def diff_timestamp(self, other):
         if other is None:
             ret = None
@@ -235,8 +467,15 @@ class UnityMetricQueryResult(UnityResource):
 
 
 class UnityMetricQueryResultList(UnityResourceList):
-    def __init__(self, cli=None, **the_filter):
+    def __init__(self, cli=None, since=None, **the_filter):
+        """ results of the metric queries.
+
+        :param cli: the unity client.
+        :param since: only retrieve the samples after this time.
+        :param the_filter: filter of the results, like `query_id`.
+        """
         super(UnityMetricQueryResultList, self).__init__(cli, **the_filter)
+        self._since = since
         self._path_result_map = {}
 
     @classmethod
@@ -246,14 +485,61 @@ class UnityMetricQueryResultList(UnityResourceList):
     @clear_instance_cache
     def update(self, data=None):
         super(UnityMetricQueryResultList, self).update(data)
+        self._index()
+
+    def _get_raw_resource(self):
+        if self._since is None:
+            return super(UnityMetricQueryResultList, self)._get_raw_resource()
+        the_filter, _ = self._get_query_args()
+        conditions = [self._cli.dict_to_filter_string(the_filter),
+                      'timestamp gt "{}"'.format(_to_rest_time(self._since))]
+        return self._cli.get_all(
+            self.resource_class,
+            the_filter=' and '.join(c for c in conditions if c),
+            per_page=self._per_page)
+
+    def _index(self):
+        """ map the path to the latest sample of the path. """
         self._path_result_map = {}
+        for r in self._list or []:
+            self._add_to_index(r)
+
+    def _add_to_index(self, result):
+        existing = self._path_result_map.get(result.path)
+        if (existing is None or existing.timestamp is None or
+                result.timestamp is None or
+                result.timestamp >= existing.timestamp):
+            self._path_result_map[result.path] = result
 
     def by_path(self, path):
-        if not self._path_result_map:
-            for r in self:
-                self._path_result_map[r.path] = r
+        if self._list is None:
+            self.update()
         return self._path_result_map.get(path)
 
+    @property
+    def timestamp(self):
+        if len(self) == 0:
+            ret = None
+        else:
+            ret = self[0].timestamp
+        return ret
+
+    @property
+    def latest_timestamp(self):
+        """ timestamp of the latest sample, `None` if no result. """
+        if len(self) == 0:
+            ret = None
+        else:
+            ret = max(r.timestamp for r in self)
+        return ret
+
+    def get_counters(self):
+        """ numeric counters of the results.
+
+        :return: dict of counter path to dict of id and value.
+        """
+        return {result.path: result.get_counters() for result in self}
+
     def diff_seconds(self, other):
         if other is None or len(other) == 0 or len(self) == 0:
             ret = None
@@ -263,13 +549,24 @@ class UnityMetricQueryResultList(UnityResourceList):
 
     def filtered_by_path(self, paths=None):
         if paths is not None:
+            paths = set(paths)
             self._list = [q for q in self if q.path in paths]
+            self._index()
+        return self
+
+    def latest(self):
+        """ only keep the latest sample of each path. """
+        if self._list is None:
+            self.update()
+        self._list = [r for r in self._list
+                      if self._path_result_map.get(r.path) is r]
         return self
 
     def merge(self, other):
         if other is not None:
-            my_paths = self.path
-            to_add = [r for r in other if r.path not in my_paths]
             if self._list is None:
-                self._list = []
-            self._list.extend(to_add)
+                self.update()
+            for r in other:
+                if r.path not in self._path_result_map:
+                    self._list.append(r)
+                    self._add_to_index(r)
@@ -35,7 +35,8 @@ from storops.unity.resource.host import UnityHost, UnityHostList, \
     UnityHostIpPortList, UnityHostInitiatorList
 from storops.unity.resource.interface import UnityFileInterfaceList
 from storops.unity.resource.lun import UnityLunList
-from storops.unity.resource.metric import UnityMetricRealTimeQuery
+from storops.unity.resource.metric import UnityMetricRealTimeQuery, \
+    UnityMetricQueryManager
 from storops.unity.resource.nas_server import UnityNasServerList
 from storops.unity.resource.nfs_server import UnityNfsServerList
 from storops.unity.resource.nfs_share import UnityNfsShareList
@@ -60,12 +61,17 @@ LOG = logging.getLogger(__name__)
 class UnitySystem(UnitySingletonResource):
     def __init__(self, host=None, username=None, password=None,
                  port=443, cli=None, verify=False, retries=None,
-                 cache_interval=0):
+                 cache_interval=0, response_cache=None, page_workers=1,
+                 pool_size=None, pool_block=False):
         super(UnitySystem, self).__init__(cli=cli)
         if cli is None:
             self._cli = UnityClient(host, username, password, port,
                                     verify=verify, retries=retries,
-                                    cache_interval=cache_interval)
+                                    cache_interval=cache_interval,
+                                    response_cache=response_cache,
+                                    page_workers=page_workers,
+                                    pool_size=pool_size,
+                                    pool_block=pool_block)
         else:
             self._cli = cli
 
@@ -431,29 +437,23 @@ class UnitySystem(UnitySingletonResource):
                                    name=name,
                                    **filters)
 
-    def enable_perf_stats(self, interval=None, rsc_clz_list=None):
+    def enable_perf_stats(self, interval=None, rsc_clz_list=None, **kwargs):
         if interval is None:
             interval = 60
         if rsc_clz_list is None:
             rsc_list_collection = self._default_rsc_list_with_perf_stats()
             rsc_clz_list = ResourceList.get_rsc_clz_list(rsc_list_collection)
 
-        def get_real_time_query_list():
-            paths = calculators.get_all_paths(rsc_clz_list)
-            return UnityMetricRealTimeQuery.get_query_list(
-                self._cli, interval, paths=paths)
+        paths = calculators.get_all_paths(rsc_clz_list)
+        manager = UnityMetricQueryManager(self._cli, interval)
 
         def f():
-            query_list = get_real_time_query_list()
-            if query_list:
-                paths = calculators.get_all_paths(rsc_clz_list)
-                ret = query_list.get_query_result(paths)
-            else:
-                ret = None
-            return ret
-
-        queries = get_real_time_query_list()
-        self._cli.enable_perf_metric(interval, f, rsc_clz_list)
+            return manager.get_query_result(paths)
+
+        queries = manager.get_query_list(paths)
+        self._cli.enable_perf_metric(interval, f, rsc_clz_list,
+                                     name='unity {}'.format(self._cli.ip),
+                                     **kwargs)
         return queries
 
     def disable_perf_stats(self):
@@ -462,6 +462,9 @@ class UnitySystem(UnitySingletonResource):
     def is_perf_stats_enabled(self):
         return self._cli.is_perf_metric_enabled()
 
+    def get_perf_collection_stats(self):
+        return self._cli.get_perf_collection_stats()
+
     def get_metric_query_result(self, query_id):
         return UnityMetricRealTimeQuery(
             cli=self._cli, _id=query_id).get_query_result()
@@ -469,9 +472,26 @@ class UnitySystem(UnitySingletonResource):
     def add_metric_record(self, record):
         self._cli.add_metric_record(record)
 
-    def enable_persist_perf_stats(self):
+    def enable_counter_history(self, depth=60):
+        return self._cli.enable_counter_history(depth)
+
+    def disable_counter_history(self):
+        self._cli.disable_counter_history()
+
+    @property
+    def counter_history(self):
+        return self._cli.counter_history
+
+    def enable_persist_perf_stats(self, fmt=None, **kwargs):
+        """ persist the metrics after each collection.
+
+        :param fmt: `block` for the rotated columnar metric files,
+            `csv` for the csv files.  Default to `block`.
+        :param kwargs: options of the metric files, like `rotation` and
+            `max_files`.
+        """
         rsc_list = self._default_rsc_list_with_perf_stats()
-        self._cli.persist_perf_stats(rsc_list)
+        self._cli.persist_perf_stats(rsc_list, fmt, **kwargs)
 
     def disable_persist_perf_stats(self):
         self._cli.persist_perf_stats(None)
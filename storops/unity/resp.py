@@ -80,6 +80,10 @@ class RestResponse(object):
     def is_ok(self):
         return not self.has_error()
 
+    @property
+    def entry_count(self):
+        return self.body.get('entryCount')
+
     @property
     def has_next_page(self):
         return self.next_page is not None
@@ -130,6 +134,11 @@ class RestResponse(object):
             ex_clz = get_rest_exception(self.error_code)
             raise ex_clz(self.error)
 
+    @property
+    def job_id(self):
+        """ id of the job created by the async request. """
+        return self.body.get('id')
+
     @property
     @instance_cache
     def job(self):
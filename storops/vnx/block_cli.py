@@ -17,6 +17,8 @@ from __future__ import unicode_literals
 
 import functools
 import logging
+import threading
+from contextlib import contextmanager
 from multiprocessing.pool import ThreadPool
 
 import six
@@ -26,7 +28,8 @@ import storops.vnx.resource.system
 from storops import exception as ex
 from storops.exception import OptionMissingError
 from storops.lib.common import check_int, text_var, int_var, enum_var, \
-    yes_no_var, list_var
+    yes_no_var, list_var, WeightedAverage
+from storops.lib.list_cache import ListCache
 from storops.lib.metric import PerfManager
 from storops.vnx.enums import VNXSPEnum, VNXTieringEnum, VNXProvisionEnum, \
     VNXMigrationRate, VNXCompressionRate, \
@@ -75,6 +78,50 @@ def command(f):
     return func_wrapper
 
 
+def list_command(group):
+    """ indicate it's a command listing the resources of the group.
+
+    The output is reused from the list cache of the client if it's enabled.
+
+    :param group: kind of the resources listed, like `lun`.
+    """
+
+    def decorator(f):
+        @functools.wraps(f)
+        def func_wrapper(self, *argv, **kwargs):
+            ip = kwargs.pop('ip', None)
+            commands = _get_commands(f, self, *argv, **kwargs)
+            return self.list_cache.get(
+                group, tuple(commands),
+                functools.partial(self.execute, commands, ip=ip))
+
+        return func_wrapper
+
+    return decorator
+
+
+def invalidates(*groups):
+    """ indicate the command changes the resources of the groups.
+
+    The outputs of the groups in the list cache are dropped after the
+    command, even if it fails.
+
+    :param groups: kinds of the resources changed, like `lun` and `sg`.
+    """
+
+    def decorator(f):
+        @functools.wraps(f)
+        def func_wrapper(self, *argv, **kwargs):
+            try:
+                return f(self, *argv, **kwargs)
+            finally:
+                self.list_cache.invalidate(*groups)
+
+        return func_wrapper
+
+    return decorator
+
+
 def duel_command(f):
     """ indicate it's a command need to be called on both SP
 
@@ -93,7 +140,7 @@ def duel_command(f):
 class CliClient(PerfManager):
     def __init__(self, ip=None, username=None, password=None, scope=None,
                  sec_file=None, timeout=None, heartbeat_interval=None,
-                 naviseccli=None):
+                 naviseccli=None, transport=None):
         super(CliClient, self).__init__()
         if heartbeat_interval is None:
             heartbeat_interval = 60
@@ -106,15 +153,22 @@ class CliClient(PerfManager):
             sec_file=sec_file,
             interval=heartbeat_interval,
             timeout=timeout,
-            naviseccli=naviseccli)
+            naviseccli=naviseccli,
+            transport=transport)
         self._heart_beat.add(VNXSPEnum.SP_A, ip)
         self._system_version = None
+        # SP ip preferred by the commands of each thread
+        self._preferred_ip = {}
+        # `WeightedAverage` of the measured seconds of each kind of command
+        self._latencies = {}
+        # outputs of the list commands, disabled by default
+        self.list_cache = ListCache()
 
     def persist_rsc_list_metrics(self):
         persist_rsc_list = self.get_persist_rsc_list()
         if self.prev_counter and persist_rsc_list:
             for rsc_list in persist_rsc_list:
-                rsc_list.persist_metric_data()
+                self._persist_rsc_list(rsc_list)
 
     def get_persist_rsc_list(self):
         if self.curr_counter is not None:
@@ -173,15 +227,17 @@ class CliClient(PerfManager):
     def get_domain(self):
         return 'domain -list'
 
-    @command
-    def get_pool(self, name=None, pool_id=None):
-        cmd = 'storagepool -list -all'.split()
+    @list_command('pool')
+    def get_pool(self, name=None, pool_id=None, options=None):
+        cmd = 'storagepool -list'.split()
+        cmd += ['-all'] if options is None else options
         cmd += self._get_id_name_opt(pool_id, name, allow_empty=True)
         return cmd
 
-    @command
-    def get_lun(self, name=None, lun_id=None, lun_type=None):
-        cmd = 'lun -list -all'.split()
+    @list_command('lun')
+    def get_lun(self, name=None, lun_id=None, lun_type=None, options=None):
+        cmd = 'lun -list'.split()
+        cmd += ['-all'] if options is None else options
         cmd += self._get_lun_opt(lun_id, name, lun_type, allow_empty=True)
         return cmd
 
@@ -192,7 +248,7 @@ class CliClient(PerfManager):
         cmd.append('-detail')
         return cmd
 
-    @command
+    @list_command('port')
     def get_sp_port(self):
         return 'port -list -sp -all'
 
@@ -212,12 +268,15 @@ class CliClient(PerfManager):
 
         return cmd
 
-    @command
-    def get_sg(self, name=None, engineering=False):
+    @list_command('sg')
+    def get_sg(self, name=None, engineering=False, options=None):
         cmd = ['storagegroup']
         if engineering:
             cmd.append('-messner')
-        cmd += '-list -host -iscsiAttributes'.split()
+        cmd.append('-list')
+        if options is None:
+            options = '-host -iscsiAttributes'.split()
+        cmd += options
         cmd += text_var('-gname', name)
         return cmd
 
@@ -300,6 +359,7 @@ class CliClient(PerfManager):
                                  .format(tier, possible_tiers))
         return ret
 
+    @invalidates('lun', 'pool')
     @command
     def create_pool_lun(self,
                         pool_name=None,
@@ -320,6 +380,7 @@ class CliClient(PerfManager):
             cmd.append('-ignoreThresholds')
         return cmd
 
+    @invalidates('lun')
     @command
     def modify_lun(self,
                    lun_id=None,
@@ -340,6 +401,7 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('lun')
     @command
     def enable_compression(self, lun_id=None, rate=None, pool_id=None,
                            pool_name=None, ignore_thresholds=False):
@@ -353,6 +415,7 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('lun')
     @command
     def disable_compression(self, lun_id, ignore_thresholds=False):
         cmd = ['compression', '-off']
@@ -362,6 +425,7 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('lun')
     @command
     def create_mount_point(self,
                            primary_lun_id=None,
@@ -374,6 +438,7 @@ class CliClient(PerfManager):
                                  lun_name=mount_point_name)
         return cmd
 
+    @invalidates('lun')
     @command
     def attach_snap(self, snap_name, lun_id=None, lun_name=None):
         cmd = ['lun', '-attach']
@@ -381,6 +446,7 @@ class CliClient(PerfManager):
         cmd += text_var('-snapName', snap_name)
         return cmd
 
+    @invalidates('lun')
     @command
     def detach_snap(self, lun_id=None, lun_name=None):
         cmd = ['lun', '-detach']
@@ -388,6 +454,7 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('lun', 'pool', 'sg')
     @command
     def delete_pool_lun(self,
                         lun_id=None,
@@ -406,6 +473,7 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('lun', 'pool')
     @command
     def expand_pool_lun(self, new_size, lun_id=None, lun_name=None,
                         ignore_thresholds=False):
@@ -418,6 +486,7 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('lun', 'pool')
     @command
     def migrate_lun(self, src_id, dst_id, rate=VNXMigrationRate.HIGH):
         cmd = ['migrate', '-start']
@@ -434,6 +503,7 @@ class CliClient(PerfManager):
             cmd += int_var('-source', src_id)
         return cmd
 
+    @invalidates('lun', 'pool')
     @command
     def cancel_migrate_lun(self, src_id):
         if src_id is None:
@@ -443,12 +513,14 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('sg')
     @command
     def create_sg(self, name):
         cmd = ['storagegroup', '-create']
         cmd += text_var('-gname', name)
         return cmd
 
+    @invalidates('sg')
     @command
     def sg_add_hlu(self, sg_name, hlu_id, alu_id):
         cmd = ['storagegroup', '-addhlu']
@@ -458,6 +530,7 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('sg')
     @command
     def sg_delete_hlu(self, sg_name, hlu_id):
         cmd = ['storagegroup', '-removehlu']
@@ -474,14 +547,17 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('sg')
     @command
     def sg_connect_host(self, sg_name, host_name):
         return self._sg_host_op(sg_name, host_name, '-connecthost')
 
+    @invalidates('sg')
     @command
     def sg_disconnect_host(self, sg_name, host_name):
         return self._sg_host_op(sg_name, host_name, '-disconnecthost')
 
+    @invalidates('port')
     @command
     def config_iscsi_ip(self, sp, port_id, ip, netmask, gateway,
                         vport_id=None, vlan_id=None):
@@ -499,6 +575,7 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('port')
     @command
     def delete_iscsi_ip(self, sp, port_id, vport_id=None):
         if vport_id is None:
@@ -511,6 +588,7 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('sg', 'port')
     @command
     def set_path(self, sg_name, hba_uid, sp, port_id,
                  ip, host, vport_id=None):
@@ -526,10 +604,12 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('sg', 'port')
     @command
     def delete_hba(self, hba_uid):
         return ['port', '-removeHBA', '-hbauid', hba_uid, '-o']
 
+    @invalidates('sg')
     @command
     def delete_sg(self, sg_name):
         cmd = ['storagegroup', '-destroy']
@@ -908,7 +988,7 @@ class CliClient(PerfManager):
         cmd += text_var('-name', name)
         return cmd
 
-    @command
+    @list_command('disk')
     def get_disk(self, bus=None, enclosure=None, disk=None):
         cmd = ['getdisk']
         if bus is not None and enclosure is not None and disk is not None:
@@ -927,6 +1007,7 @@ class CliClient(PerfManager):
         cmd += int_var(None, rg_id)
         return cmd
 
+    @invalidates('disk')
     @command
     def create_rg(self, disks=None, rg_id=None, raid_type=None):
         if rg_id is None:
@@ -942,12 +1023,14 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('disk')
     @command
     def delete_rg(self, rg_id):
         cmd = ['removerg']
         cmd += int_var(None, rg_id)
         return cmd
 
+    @invalidates('pool', 'disk')
     @command
     def create_pool(self, name, disks, raid_type=None):
         cmd = ['storagepool', '-create', '-disks']
@@ -957,6 +1040,7 @@ class CliClient(PerfManager):
         cmd.append('-skiprules')
         return cmd
 
+    @invalidates('pool', 'lun', 'disk')
     @command
     def delete_pool(self, name=None, pool_id=None):
         cmd = ['storagepool', '-destroy']
@@ -964,6 +1048,7 @@ class CliClient(PerfManager):
         cmd.append('-o')
         return cmd
 
+    @invalidates('pool')
     @command
     def modify_storage_pool(self, name=None, pool_id=None,
                             new_name=None):
@@ -978,10 +1063,12 @@ class CliClient(PerfManager):
         sp = VNXSPEnum.get_sp_index(sp)
         return 'networkadmin -get -sp {} -all'.format(sp).split()
 
+    @invalidates('disk')
     @duel_command
     def delete_disk(self, disk_index):
         return 'cru_on_off -messner {} 0'.format(disk_index).split()
 
+    @invalidates('disk')
     @duel_command
     def install_disk(self, disk_index):
         return 'cru_on_off -messner {} 1'.format(disk_index).split()
@@ -1152,7 +1239,48 @@ class CliClient(PerfManager):
 
     @property
     def ip(self):
-        return self._heart_beat.get_alive_sp_ip()
+        preferred = self._preferred_ip.get(threading.current_thread().ident)
+        if (preferred is not None and
+                preferred in self._heart_beat.get_all_alive_sps_ip()):
+            ret = preferred
+        else:
+            ret = self._heart_beat.get_alive_sp_ip()
+        return ret
+
+    def get_all_alive_sps_ip(self):
+        return self._heart_beat.get_all_alive_sps_ip()
+
+    def add_latency(self, kind, seconds):
+        """ record the seconds taken by a kind of command.
+
+        :param kind: name of the kind, like `lun_list`.
+        :param seconds: seconds taken by the command.
+        """
+        latency = self._latencies.get(kind)
+        if latency is None:
+            latency = self._latencies.setdefault(kind, WeightedAverage())
+        latency.add(seconds)
+
+    def get_latency(self, kind):
+        """ weighted average seconds of a kind of command.
+
+        :return: None if the kind is never measured.
+        """
+        latency = self._latencies.get(kind)
+        return None if latency is None else latency.value()
+
+    @contextmanager
+    def prefer_sp_ip(self, ip):
+        """ send the commands of current thread to the SP if it's alive.
+
+        :param ip: ip of the SP.
+        """
+        ident = threading.current_thread().ident
+        self._preferred_ip[ident] = ip
+        try:
+            yield self
+        finally:
+            self._preferred_ip.pop(ident, None)
 
     @retry(on_error=ex.VNXSPDownError)
     def execute(self, params, ip=None):
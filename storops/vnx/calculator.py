@@ -19,14 +19,21 @@ import inspect
 import math
 import os
 import sys
+import threading
+import weakref
 from functools import reduce
 
-from storops.lib.common import cache, all_not_none, allow_omit_parentheses
+import six
+
+from storops.lib.common import cache, all_not_none, allow_omit_parentheses, \
+    try_import
 from storops.lib.metric import MetricConfigList, MetricConfigParser, \
-    CalculatorMetaInfo
+    CalculatorMetaInfo, MetricsFrame
 
 __author__ = 'Cedric Zhuang'
 
+np = try_import('numpy')
+
 
 def get_counter(props):
     if isinstance(props, (list, tuple, set)):
@@ -211,6 +218,290 @@ def kb_to_mbps(prev, curr, obj, counters):
     return delta_ps(prev, curr, obj, counters) / 2 ** 10
 
 
+class _ListOps(object):
+    """ column operations on lists with the scalar functions. """
+
+    @staticmethod
+    def column(values):
+        return list(values)
+
+    @staticmethod
+    def _apply(func, op1, op2):
+        if isinstance(op1, list) and isinstance(op2, list):
+            ret = [func(a, b) for a, b in zip(op1, op2)]
+        elif isinstance(op1, list):
+            ret = [func(a, op2) for a in op1]
+        elif isinstance(op2, list):
+            ret = [func(op1, b) for b in op2]
+        else:
+            ret = func(op1, op2)
+        return ret
+
+    def add(self, op1, op2):
+        return self._apply(add, op1, op2)
+
+    def minus(self, op1, op2):
+        return self._apply(minus, op1, op2)
+
+    def mul(self, op1, op2):
+        return self._apply(mul, op1, op2)
+
+    def div(self, op1, op2):
+        return self._apply(div, op1, op2)
+
+    @staticmethod
+    def mask(column, valid):
+        return [v if ok else NaN for v, ok in zip(column, valid)]
+
+    @staticmethod
+    def take(column, rows):
+        return [NaN if row is None else column[row] for row in rows]
+
+    @staticmethod
+    def to_list(column):
+        return list(column)
+
+
+class _NumpyOps(object):
+    """ column operations on NumPy arrays, same semantic as `_ListOps`. """
+
+    @staticmethod
+    def column(values):
+        return np.array([NaN if v is None else v for v in values],
+                        dtype=float)
+
+    @staticmethod
+    def _valid(op):
+        return np.where(np.isnan(op), 0.0, op)
+
+    def add(self, op1, op2):
+        return self._valid(op1) + self._valid(op2)
+
+    @staticmethod
+    def minus(op1, op2):
+        return np.subtract(op1, op2)
+
+    @staticmethod
+    def mul(op1, op2):
+        return np.multiply(op1, op2)
+
+    @staticmethod
+    def div(op1, op2):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ret = np.true_divide(op1, op2)
+            ret = np.where(np.not_equal(op2, 0), ret, NaN)
+            ret = np.where(np.equal(op1, 0), 0.0, ret)
+        return ret
+
+    @staticmethod
+    def mask(column, valid):
+        return np.where(valid, column, NaN)
+
+    @staticmethod
+    def take(column, rows):
+        valid = np.array([row is not None for row in rows], dtype=bool)
+        index = np.array([0 if row is None else row for row in rows],
+                         dtype=int)
+        if len(column) == 0:
+            ret = np.full(len(rows), NaN)
+        else:
+            ret = np.where(valid, column[index], NaN)
+        return ret
+
+    @staticmethod
+    def to_list(column):
+        return column.tolist()
+
+
+def get_column_ops():
+    if np is None:
+        ret = _ListOps()
+    else:
+        ret = _NumpyOps()
+    return ret
+
+
+def v_delta_ps(frame, counters):
+    counter = get_counter(counters)
+    ops = frame.ops
+    ret = ops.minus(frame.curr_counter(counter),
+                    frame.prev_counter(counter))
+    return ops.div(ret, frame.delta_seconds)
+
+
+def v_block_to_mbps(frame, counters):
+    ops = frame.ops
+    return ops.div(ops.mul(v_delta_ps(frame, counters), 512), 2 ** 20)
+
+
+def v_kb_to_mbps(frame, counters):
+    return frame.ops.div(v_delta_ps(frame, counters), 2 ** 10)
+
+
+def v_stats_total(frame, counters):
+    ret = 0
+    for counter in counters:
+        ret = frame.ops.add(ret, frame.value(counter))
+    return ret
+
+
+def v_utilization(frame, counters):
+    busy_prop, idle_prop = counters
+    ops = frame.ops
+    db = ops.minus(frame.curr_counter(busy_prop),
+                   frame.prev_counter(busy_prop))
+    di = ops.minus(frame.curr_counter(idle_prop),
+                   frame.prev_counter(idle_prop))
+    return ops.mul(ops.div(db, ops.add(db, di)), 100)
+
+
+def v_io_size_kb(frame, counters):
+    bw_stats, io_stats = counters
+    ops = frame.ops
+    size_mb = ops.div(frame.value(bw_stats), frame.value(io_stats))
+    return ops.mul(size_mb, 1024)
+
+
+# column version of the instance stats calculators
+_column_calculators = {
+    delta_ps: v_delta_ps,
+    block_to_mbps: v_block_to_mbps,
+    kb_to_mbps: v_kb_to_mbps,
+    stats_total: v_stats_total,
+    utilization: v_utilization,
+    io_size_kb: v_io_size_kb,
+}
+
+
+class VNXMetricFrame(object):
+    """ metrics of all the resources of one class between two records.
+
+    The counters of the resources are packed into columns when first used.
+    Each metric is then evaluated once for all the resources with column
+    operations, using NumPy if it's installed.
+    """
+
+    def __init__(self, config_list, prev_list, curr_list, delta_seconds,
+                 ops=None):
+        if ops is None:
+            ops = get_column_ops()
+        self.ops = ops
+        self._config_list = config_list
+        self._curr_list = curr_list
+        self.items = list(curr_list) if curr_list is not None else []
+        self._rows = {id(item): i for i, item in enumerate(self.items)}
+        self._prev_items = [self._get_prev(prev_list, item)
+                            for item in self.items]
+        self._valid = [item is not None for item in self._prev_items]
+        self.delta_seconds = round_60(delta_seconds)
+        self._curr_counters = {}
+        self._prev_counters = {}
+        self._metrics = {}
+        self._metric_names = set(config_list.metric_names())
+
+    @classmethod
+    def build(cls, config_list, prev, curr, rsc_clz, ops=None):
+        """ build the frame from two `ResourceListCollection`.
+
+        :param config_list: `VNXMetricConfigList` of the resource class.
+        :param prev: previous record.
+        :param curr: current record.
+        :param rsc_clz: resource class.
+        :param ops: column operations, default to NumPy if installed.
+        :return: the metric frame.
+        """
+        return cls(config_list, prev.get_rsc_list(rsc_clz),
+                   curr.get_rsc_list(rsc_clz), curr.delta_seconds(prev),
+                   ops=ops)
+
+    @staticmethod
+    def _get_prev(prev_list, item):
+        if prev_list is None:
+            ret = None
+        else:
+            ret = prev_list.get(item)
+        return ret
+
+    def __len__(self):
+        return len(self.items)
+
+    @staticmethod
+    def _get_counter(item, name):
+        if item is None:
+            ret = None
+        else:
+            # counters are parsed properties, skip the metric lookups of
+            # `__getattr__` when the resource is already parsed.
+            parsed = item._parsed_resource
+            if parsed is not None and name in parsed:
+                ret = parsed[name]
+            else:
+                ret = getattr(item, name)
+        return ret
+
+    def curr_counter(self, name):
+        if name not in self._curr_counters:
+            self._curr_counters[name] = self.ops.column(
+                self._get_counter(item, name) for item in self.items)
+        return self._curr_counters[name]
+
+    def prev_counter(self, name):
+        if name not in self._prev_counters:
+            self._prev_counters[name] = self.ops.column(
+                self._get_counter(item, name) for item in self._prev_items)
+        return self._prev_counters[name]
+
+    def value(self, name):
+        """ values of the metric or the counter of the current record. """
+        if name in self._metric_names:
+            ret = self.metric(name)
+        else:
+            ret = self.curr_counter(name)
+        return ret
+
+    def metric(self, name):
+        if name not in self._metrics:
+            config = self._config_list.get_metric_config(name)
+            calculator = _column_calculators[config.calculator]
+            ret = calculator(self, config.counters)
+            if not isinstance(ret, (int, float)):
+                ret = self.ops.mask(ret, self._valid)
+            else:
+                ret = self.ops.mask([ret] * len(self), self._valid)
+            self._metrics[name] = ret
+        return self._metrics[name]
+
+    def get_row(self, obj):
+        if self._curr_list is None:
+            ret = None
+        else:
+            ret = self._rows.get(id(self._curr_list.get(obj)))
+        return ret
+
+    def get(self, obj, name):
+        """ metric value of one resource.
+
+        :param obj: the resource.
+        :param name: metric name.
+        :return: value, NaN if the resource is not found in both records.
+        """
+        row = self.get_row(obj)
+        if row is None:
+            ret = NaN
+        else:
+            ret = float(self.metric(name)[row])
+        return ret
+
+    def take(self, name, rows):
+        """ metric values of the rows.
+
+        :param name: metric name.
+        :param rows: list of row numbers, None for resources not found.
+        :return: list of values.
+        """
+        return self.ops.to_list(self.ops.take(self.metric(name), rows))
+
+
 @cache
 def _module_functions():
     return dict(inspect.getmembers(sys.modules[__name__]))
@@ -241,11 +532,30 @@ class VNXMetricConfigList(MetricConfigList):
     def init_metric_config(cls, raw_config):
         return VNXMetricConfig(raw_config)
 
+    def counter_names(self):
+        """ names of the counter properties used by the metrics. """
+        names = self.metric_names()
+        ret = set()
+        for name in names:
+            config = self.get_metric_config(name)
+            if config.is_aggregated_stats():
+                continue
+            counters = config.counters
+            if isinstance(counters, six.string_types):
+                counters = [counters]
+            ret.update(c for c in counters if c not in names)
+        return sorted(ret)
+
 
 class VNXMetricConfigParser(MetricConfigParser):
     @classmethod
     def get_config(cls, name):
-        name = cls._get_clz_name(name)
+        return cls._get_config_list(cls._get_clz_name(name))
+
+    @classmethod
+    @cache
+    def _get_config_list(cls, name):
+        # the config list is read only, share it between the lookups
         return VNXMetricConfigList(cls._read_configs().get(name))
 
     @classmethod
@@ -254,22 +564,103 @@ class VNXMetricConfigParser(MetricConfigParser):
 
 
 class VNXCalculatorMetaInfo(CalculatorMetaInfo):
+    def __init__(self, use_frame=True):
+        super(VNXCalculatorMetaInfo, self).__init__()
+        # evaluate the instance stats with `VNXMetricFrame`
+        self.use_frame = use_frame
+        self._frames = weakref.WeakKeyDictionary()
+        self._frames_lock = threading.Lock()
+
     def get_config_parser(self):
         return VNXMetricConfigParser()
 
-    def get_metric_value(self, clz, metric_name, cli, obj=None):
+    def get_counter_names(self, clz):
+        return self.get_config(clz).counter_names()
+
+    @staticmethod
+    def _check_cli(cli):
         if not hasattr(cli, 'curr_counter'):
             raise ValueError('cli should has "curr_counter" attribute.')
         if not hasattr(cli, 'prev_counter'):
             raise ValueError('cli should has "prev_counter" attribute.')
 
+    def get_metric_value(self, clz, metric_name, cli, obj=None):
+        self._check_cli(cli)
+
         config = self.get_config(clz).get_metric_config(metric_name)
         if config.is_aggregated_stats():
             ret = self._get_aggregated_stats(config, obj)
+        elif self.use_frame:
+            frame = self.get_frame(clz, cli, type(obj))
+            if frame is None:
+                ret = NaN
+            else:
+                ret = frame.get(obj, metric_name)
         else:
             ret = self._get_calculated_stats(cli, config, obj)
         return ret
 
+    def get_frame(self, clz, cli, rsc_clz):
+        """ get the metric frame of the latest two records of the cli.
+
+        The frame is built once for each pair of records.
+
+        :param clz: resource class name of the metric configs.
+        :param cli: the cli with `prev_counter` and `curr_counter`.
+        :param rsc_clz: resource class.
+        :return: `VNXMetricFrame`, None if there are less than two records.
+        """
+        prev = cli.prev_counter
+        curr = cli.curr_counter
+        if not all_not_none(prev, curr):
+            return None
+
+        key = (clz, rsc_clz)
+        with self._frames_lock:
+            frames = self._frames.setdefault(curr, {})
+            prev_ref, ret = frames.get(key, (None, None))
+        if prev_ref is None or prev_ref() is not prev:
+            ret = VNXMetricFrame.build(self.get_config(clz), prev, curr,
+                                       rsc_clz)
+            with self._frames_lock:
+                frames[key] = (weakref.ref(prev), ret)
+        return ret
+
+    def get_metrics_frame(self, clz, cli, rsc_list, names=None):
+        """ get the metrics of all resources in the list.
+
+        :param clz: resource class name of the metric configs.
+        :param cli: the cli with `prev_counter` and `curr_counter`.
+        :param rsc_list: list of resources.
+        :param names: metric names, default to all the metrics.
+        :return: `MetricsFrame` of the resources.
+        """
+        self._check_cli(cli)
+        config_list = self.get_config(clz)
+        if names is None:
+            names = config_list.metric_names()
+        items = list(rsc_list)
+        frame = None
+        rows = None
+        columns = []
+        for name in names:
+            config = config_list.get_metric_config(name)
+            if config.is_aggregated_stats() or not self.use_frame:
+                values = [self.get_metric_value(clz, name, cli, item)
+                          for item in items]
+            else:
+                if rows is None:
+                    rsc_clz = rsc_list.get_resource_class()
+                    frame = self.get_frame(clz, cli, rsc_clz)
+                    if frame is not None:
+                        rows = [frame.get_row(item) for item in items]
+                if frame is None:
+                    values = [NaN] * len(items)
+                else:
+                    values = frame.take(name, rows)
+            columns.append((name, values))
+        return MetricsFrame(items, columns)
+
     @staticmethod
     def _get_calculated_stats(cli, config, obj):
         prev = cli.prev_counter
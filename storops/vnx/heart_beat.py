@@ -135,11 +135,13 @@ class NodeInfoMap(object):
 
 class NodeHeartBeat(NaviCommand):
     def __init__(self, username=None, password=None, scope=0,
-                 sec_file=None, interval=60, timeout=30, naviseccli=None):
+                 sec_file=None, interval=60, timeout=30, naviseccli=None,
+                 transport=None):
         super(NodeHeartBeat, self).__init__(username, password, scope,
                                             sec_file=sec_file,
                                             timeout=timeout,
-                                            naviseccli=naviseccli)
+                                            naviseccli=naviseccli,
+                                            transport=transport)
         self._node_map = NodeInfoMap()
         self._interval = interval
         self._heartbeat_thread = None
@@ -222,7 +224,7 @@ class NodeHeartBeat(NaviCommand):
         if not self.is_credential_valid:
             raise ex.VNXCredentialError(
                 'cannot authenticate with user {}.'.format(self._username))
-        out = self.execute_naviseccli(cmd)
+        out = self.execute_naviseccli(cmd, transport=self._transport)
         try:
             ex.check_error(out,
                            ex.VNXSpNotAvailableError,
@@ -0,0 +1,84 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" worker process of `NaviWorkerPoolTransport`.
+
+Read one json request per line from stdin, run the naviseccli command and
+write the output as one json line to stdout.  The worker exits when stdin
+is closed.  When terminated, the running naviseccli is terminated too.
+
+Do not import storops here to keep the worker small.
+"""
+from __future__ import unicode_literals
+
+import json
+import signal
+import sys
+import threading
+from subprocess import Popen, PIPE
+
+__author__ = 'Cedric Zhuang'
+
+_running = []
+
+
+def run(cmd, timeout=None):
+    p = Popen(cmd, bufsize=-1, stdout=PIPE, stderr=PIPE)
+    _running.append(p)
+    timer = None
+    if timeout:
+        timer = threading.Timer(timeout, p.terminate)
+        timer.start()
+    try:
+        out, _ = p.communicate()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        _running.remove(p)
+    if isinstance(out, bytes):
+        out = out.decode('utf-8')
+    return out.strip()
+
+
+def serve(stdin, stdout):
+    while True:
+        line = stdin.readline()
+        if not line:
+            break
+        request = json.loads(line.decode('utf-8'))
+        try:
+            resp = {'output': run(request['cmd'], request.get('timeout'))}
+        except OSError as e:
+            resp = {'error': str(e), 'errno': e.errno}
+        stdout.write((json.dumps(resp) + '\n').encode('utf-8'))
+        stdout.flush()
+
+
+def terminate(signum, frame):
+    for p in list(_running):
+        if p.poll() is None:
+            p.terminate()
+    sys.exit(128 + signum)
+
+
+def main():
+    signal.signal(signal.SIGTERM, terminate)
+    stdin = getattr(sys.stdin, 'buffer', sys.stdin)
+    stdout = getattr(sys.stdout, 'buffer', sys.stdout)
+    serve(stdin, stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -21,7 +21,7 @@ import re
 
 import six
 
-from storops.lib.common import Dict, cache
+from storops.lib.common import Dict, LazyDict, cache
 from storops.lib.parser import OutputParser, PropDescriptor, \
     ParserConfigFactory
 
@@ -62,8 +62,18 @@ def get_vnx_parser(name):
 
 
 class VNXCliParser(OutputParser):
+    """ parser of the naviseccli output.
+
+    By default, the output is scanned line by line once.  The line of a
+    plain label like `Name:` is found by a dict lookup of its label.  Only
+    the properties with `is_regex` or `end_pattern` are searched with their
+    patterns.  Set `single_scan` to False to search the pattern of every
+    property in the output.
+    """
     data_src = 'cli'
 
+    single_scan = True
+
     def _split_by_index(self, output):
         instances = []
 
@@ -89,31 +99,151 @@ class VNXCliParser(OutputParser):
             instances = [output]
         return instances
 
+    def _split_lines_by_index(self, lines):
+        """ split the lines to the lines of each instance.
+
+        Same as `_split_by_index`, but checks the label of the index at the
+        beginning of each line.
+        """
+        index_descriptor = self.index_property
+        if index_descriptor is None:
+            return [lines]
+
+        label = index_descriptor.label.lower()
+        size = len(label)
+        instances = []
+        current = []
+        has_match = False
+        for line in lines:
+            if line.lstrip()[:size].lower() == label:
+                has_match = True
+                if current:
+                    instances.append(current)
+                current = [line]
+            else:
+                current.append(line)
+        if has_match:
+            instances.append(current)
+        return instances
+
+    def _can_scan(self):
+        index_descriptor = self.index_property
+        return self.single_scan and (index_descriptor is None or
+                                     not index_descriptor.is_regex)
+
+    @staticmethod
+    def _get_scan_table(properties):
+        """ how to find each property in the lines.
+
+        :return: list of the property and its lower case label, None if
+            the property is searched with its pattern.  Set of the line
+            keys.  List of the lower case labels without colon at the end.
+        """
+        plan = []
+        keys = set()
+        prefixes = []
+        for p in properties:
+            if p.is_regex or p.end_pattern is not None:
+                key = None
+            elif p.line_key is not None:
+                key = p.line_key
+                keys.add(key)
+            else:
+                key = p.label.lower()
+                prefixes.append(key)
+            plan.append((p, key))
+        return plan, keys, prefixes
+
+    @staticmethod
+    def _scan_lines(lines, keys, prefixes):
+        """ value of the first line of each label.
+
+        :return: dict of the lower case label and the raw value.
+        """
+        ret = {}
+        for line in lines:
+            text = line.lstrip(' \t')
+            pos = text.find(':')
+            if pos >= 0:
+                key = text[:pos + 1].lower()
+                if key in keys and key not in ret:
+                    ret[key] = text[pos + 1:]
+            for prefix in prefixes:
+                if (prefix not in ret and
+                        text[:len(prefix)].lower() == prefix):
+                    ret[prefix] = text[len(prefix):]
+        return ret
+
+    @staticmethod
+    def _search(p, output):
+        """ search the property in the output with its pattern.
+
+        :return: tuple of whether the property is found and its raw value.
+        """
+        matched = re.search(p.pattern, output)
+        if matched is None:
+            ret = False, None
+        else:
+            if len(matched.groups()) == 1:
+                value = matched.group(1)
+                value = value.strip()
+            else:
+                value = matched.groups()
+            ret = True, value
+        return ret
+
+    @staticmethod
+    def _set_value(ret, p, found, value):
+        """ set the value, converted when it's read the first time.
+
+        :return: False if the index is not found.
+        """
+        if found:
+            ret.set_lazy(p.key, p.convert, value)
+        elif p.is_index:
+            return False
+        else:
+            ret[p.key] = None
+        return True
+
+    def _parse_lines(self, lines, table):
+        plan, keys, prefixes = table
+        values = self._scan_lines(lines, keys, prefixes)
+        output = None
+        ret = LazyDict()
+        for p, key in plan:
+            if key is None:
+                if output is None:
+                    output = '\n'.join(lines).strip()
+                found, value = self._search(p, output)
+            else:
+                value = values.get(key)
+                found = value is not None
+                if found:
+                    value = value.strip()
+            if not self._set_value(ret, p, found, value):
+                # index must have a match, skip this invalid input
+                ret = Dict()
+                break
+        return ret
+
     def parse_single(self, output, properties=None):
         if isinstance(output, six.string_types):
             output = output.strip()
-            ret = Dict()
-
             if properties is None:
                 properties = self.properties
 
+            if self.single_scan:
+                return self._parse_lines(output.split('\n'),
+                                         self._get_scan_table(properties))
+
+            ret = LazyDict()
             for p in properties:
-                matched = re.search(p.pattern, output)
-
-                matched_value = None
-                if matched is not None:
-                    if len(matched.groups()) == 1:
-                        value = matched.group(1)
-                        value = value.strip()
-                    else:
-                        value = matched.groups()
-                    value = p.convert(value)
-                    matched_value = value
-                elif p.is_index:
+                found, value = self._search(p, output)
+                if not self._set_value(ret, p, found, value):
                     # index must have a match, skip this invalid input
                     ret = Dict()
                     break
-                ret[p.key] = matched_value
         else:
             ret = output
         return ret
@@ -121,13 +251,33 @@ class VNXCliParser(OutputParser):
     def parse_all(self, output, properties=None):
         if isinstance(output, six.string_types):
             output = output.strip()
-            split_outputs = self._split_by_index(output)
-            instances = self._parse_split_output(split_outputs, properties)
+            if self._can_scan():
+                instances = self._scan_all(output, properties)
+            else:
+                split_outputs = self._split_by_index(output)
+                instances = self._parse_split_output(split_outputs,
+                                                     properties)
             instances = self._merge_instance_with_same_index(instances)
         else:
             instances = output
         return instances
 
+    def _scan_all(self, output, properties):
+        if properties is None:
+            properties = self.properties
+        index_descriptor = self.index_property
+        if (index_descriptor is not None and
+                index_descriptor.index_pattern.search(output) is None):
+            # not the output of this parser, skip the scan.
+            return []
+        table = self._get_scan_table(properties)
+        ret = []
+        for lines in self._split_lines_by_index(output.split('\n')):
+            parsed = self._parse_lines(lines, table)
+            if len(parsed) > 0:
+                ret.append(parsed)
+        return ret
+
     def _merge_instance_with_same_index(self, instances):
         def key_gen(instance):
             str_keys = []
@@ -192,9 +342,8 @@ class VNXXmlApiParser(OutputParser):
         if properties is None:
             properties = self.properties
 
-        ret = {}
+        ret = LazyDict()
         for p in properties:
             if p.label in obj.keys():
-                value = p.convert(obj[p.label])
-                ret[p.key] = value
+                ret.set_lazy(p.key, p.convert, obj[p.label])
         return ret
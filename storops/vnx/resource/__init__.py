@@ -16,13 +16,16 @@
 from __future__ import unicode_literals
 
 import os
+import threading
 from datetime import datetime
 
-from storops.exception import VNXPerMonNotEnabledError
+from storops.exception import VNXPerMonNotEnabledError, NoIndexException
 from storops.lib.common import instance_cache, clear_instance_cache, \
     get_local_folder
 from storops.lib.metric import MetricsDumper
-from storops.lib.resource import Resource, ResourceList
+from storops.lib.metric_file import MetricsFileReader
+from storops.lib.resource import Resource, ResourceList, \
+    ResourceListCollection
 from storops.vnx.calculator import calculators
 from storops.vnx.parsers import get_vnx_parser
 
@@ -158,9 +161,17 @@ def _hdr_cb(rsc):
 
 
 class VNXCliResourceList(VNXCliResource, ResourceList):
-    def __init__(self, cli=None):
+    def __init__(self, cli=None, fields=None):
+        """ create the list.
+
+        :param cli: the client.
+        :param fields: keys of the properties to retrieve.  Default to
+            retrieve all the properties.  Other properties of the items
+            are None.
+        """
         VNXCliResource.__init__(self, cli=cli)
         ResourceList.__init__(self)
+        self._fields = fields
 
         extra_headers = ['timestamp', 'name']
         self._metrics_dumper = MetricsDumper(
@@ -170,9 +181,38 @@ class VNXCliResourceList(VNXCliResource, ResourceList):
 
     def shadow_copy(self, *args, **kwargs):
         ret = VNXCliResource.shadow_copy(self)
+        ret._fields = self._fields
         ret.set_filter(*args, **kwargs)
         return ret
 
+    def _get_fields(self):
+        """ keys of the properties to parse, None for all of them.
+
+        Override to add the properties required by the filter.
+        """
+        return self._fields
+
+    def _get_projection(self):
+        fields = self._get_fields()
+        if fields is None:
+            ret = None
+        else:
+            ret = self._get_parser().get_projection(fields)
+        return ret
+
+    def _get_options(self):
+        """ options of the list command to show the fields only.
+
+        :return: None to show all the properties.
+        """
+        projection = self._get_projection()
+        return None if projection is None else projection[1]
+
+    def _parse_raw(self, data):
+        projection = self._get_projection()
+        properties = None if projection is None else projection[0]
+        return self._get_parser().parse_all(data, properties)
+
     @classmethod
     def _get_parser(cls):
         return get_vnx_parser(cls.get_resource_class().__name__)
@@ -225,6 +265,37 @@ class VNXCliResourceList(VNXCliResource, ResourceList):
             filename = self.get_default_metric_csv_filename()
         return self._metrics_dumper.persist_metric_data(filename)
 
+    def persist_metric_block(self, prefix=None, **kwargs):
+        """ append the metrics to the columnar metric files.
+
+        :param prefix: path prefix of the files, default to
+            `~/.storops/<ip>_<resource class>`.
+        :param kwargs: options of the `MetricsFileWriter`.
+        :return: name of the file written.
+        """
+        if prefix is None:
+            prefix = self.get_default_metric_file_prefix()
+        return self._metrics_dumper.persist_metric_block(prefix, **kwargs)
+
+    def read_persisted_metrics(self, start=None, end=None, names=None,
+                               prefix=None):
+        """ read the metrics persisted by `persist_metric_block`.
+
+        :param start: `datetime` or seconds since epoch, inclusive.
+        :param end: `datetime` or seconds since epoch, exclusive.
+        :param names: column names to read, default to all.
+        :param prefix: path prefix of the files.
+        :return: `OrderedDict` of column name and values.
+        """
+        if prefix is None:
+            prefix = self.get_default_metric_file_prefix()
+        return MetricsFileReader(prefix).read(start, end, names)
+
+    def get_default_metric_file_prefix(self):
+        folder = get_local_folder()
+        name = '{}_{}'.format(self._cli.ip, self.resource_class_name())
+        return os.path.join(folder, name)
+
     def get_default_metric_csv_filename(self):
         folder = get_local_folder()
         name = '{}_{}.csv'.format(self._cli.ip, self.resource_class_name())
@@ -232,3 +303,120 @@ class VNXCliResourceList(VNXCliResource, ResourceList):
 
     def get_metrics_csv(self, sep=None):
         return self._metrics_dumper.get_metrics_csv(sep=sep)
+
+    def get_metrics_columns(self):
+        return self._metrics_dumper.get_metrics_columns()
+
+    def get_counters(self):
+        """ numeric counters used by the metrics of the resources.
+
+        :return: dict of counter path, like "VNXLun.read_requests", to
+            dict of resource index and value.
+        """
+        clz_name = self.resource_class_name()
+        names = calculators.get_counter_names(clz_name)
+        ret = {'{}.{}'.format(clz_name, name): {} for name in names}
+        for item in self:
+            try:
+                index = item.get_index()
+            except NoIndexException:
+                continue
+            parsed = item._parsed_resource or {}
+            for name in names:
+                ret['{}.{}'.format(clz_name, name)][index] = parsed.get(name)
+        return ret
+
+    def get_metrics_frame(self, names=None):
+        """ get the metrics of all the resources in the list.
+
+        All the resources are evaluated together instead of one by one.
+
+        :param names: metric names, default to all the metrics.
+        :return: `MetricsFrame` of the resources.
+        """
+        if not self._cli.is_perf_metric_enabled(self):
+            raise VNXPerMonNotEnabledError()
+        return calculators.get_metrics_frame(
+            self.resource_class_name(), self._cli, self, names)
+
+
+class VNXResourceListCollection(ResourceListCollection):
+    """ resource lists updated concurrently on all the alive SPs.
+
+    Each resource list is assigned to one of the alive SPs.  The lists are
+    spread by the estimated update seconds, so that the SPs get similar
+    loads.  At most `max_per_sp` lists are updated on one SP at the same
+    time.
+    """
+
+    def __init__(self, init_list=None, cli=None, max_per_sp=None,
+                 estimates=None):
+        """ create the collection.
+
+        :param init_list: resource lists in the collection.
+        :param cli: the `CliClient`.
+        :param max_per_sp: number of lists updated on one SP at the same
+            time.  Default to 2.
+        :param estimates: dict of resource class and the estimated update
+            seconds, like the `timings` of the previous collection.
+        """
+        super(VNXResourceListCollection, self).__init__(init_list)
+        if max_per_sp is None:
+            max_per_sp = 2
+        self._cli = cli
+        self.max_per_sp = max_per_sp
+        self.estimates = estimates if estimates is not None else {}
+        # SP ip assigned to each resource class
+        self.sp_ips = {}
+        self._sp_slots = None
+
+    def _assign_sp(self, ips):
+        loads = {ip: 0.0 for ip in ips}
+        self.sp_ips = {}
+        for rsc_list in self._get_update_order():
+            ip = min(ips, key=lambda i: (loads[i], ips.index(i)))
+            self.sp_ips[rsc_list.get_resource_class()] = ip
+            loads[ip] += self._get_estimate(rsc_list)
+
+    def _get_estimate(self, rsc_list):
+        return self.estimates.get(rsc_list.get_resource_class(), 1.0)
+
+    def update(self, max_workers=None):
+        if self._cli is None:
+            ips = []
+        else:
+            ips = sorted(self._cli.get_all_alive_sps_ip())
+        if not ips:
+            return super(VNXResourceListCollection, self).update(max_workers)
+
+        self._assign_sp(ips)
+        self._sp_slots = {ip: threading.BoundedSemaphore(self.max_per_sp)
+                          for ip in ips}
+        if max_workers is None:
+            max_workers = self.max_per_sp * len(ips)
+        try:
+            return super(VNXResourceListCollection, self).update(max_workers)
+        finally:
+            self._sp_slots = None
+
+    def _get_update_order(self):
+        # longest first, the assigned SPs alternate
+        return sorted(self.get_rsc_list_collection(),
+                      key=lambda rsc_list: -self._get_estimate(rsc_list))
+
+    def _do_update_rsc_list(self, rsc_list):
+        ip = self.sp_ips.get(rsc_list.get_resource_class())
+        if ip is None or self._sp_slots is None:
+            self._update_fresh(rsc_list)
+        else:
+            with self._sp_slots[ip]:
+                with self._cli.prefer_sp_ip(ip):
+                    self._update_fresh(rsc_list)
+
+    def _update_fresh(self, rsc_list):
+        # the counters are always collected from the array.
+        if self._cli is None:
+            rsc_list.update()
+        else:
+            with self._cli.list_cache.fresh():
+                rsc_list.update()
@@ -39,8 +39,8 @@ class VNXPoolFeature(VNXCliResource):
 
 
 class VNXPoolList(VNXCliResourceList):
-    def __init__(self, cli=None, system_lun_list=None):
-        super(VNXPoolList, self).__init__(cli)
+    def __init__(self, cli=None, system_lun_list=None, fields=None):
+        super(VNXPoolList, self).__init__(cli, fields)
         self._system_lun_list = system_lun_list
 
     @classmethod
@@ -48,7 +48,8 @@ class VNXPoolList(VNXCliResourceList):
         return VNXPool
 
     def _get_raw_resource(self):
-        return self._cli.get_pool(poll=self.poll)
+        return self._cli.get_pool(options=self._get_options(),
+                                  poll=self.poll)
 
     def _get_resource_instance(self):
         ret = super(VNXPoolList, self)._get_resource_instance()
@@ -123,9 +124,10 @@ class VNXPool(VNXCliResource):
         ex.raise_if_err(ret, default=ex.VNXDeletePoolError)
 
     @classmethod
-    def get(cls, cli, pool_id=None, name=None, system_lun_list=None):
+    def get(cls, cli, pool_id=None, name=None, system_lun_list=None,
+            fields=None):
         if pool_id is None and name is None:
-            ret = VNXPoolList(cli, system_lun_list)
+            ret = VNXPoolList(cli, system_lun_list, fields)
         else:
             ret = VNXPool(pool_id, name, cli, system_lun_list)
         return ret
@@ -15,6 +15,10 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import logging
+import time
+from multiprocessing.pool import ThreadPool
+
 from retryz import retry
 
 import storops.vnx.resource.block_pool
@@ -32,14 +36,34 @@ from storops.vnx.resource.snap import VNXSnap, VNXSnapList
 
 __author__ = 'Cedric Zhuang'
 
+log = logging.getLogger(__name__)
+
 
 class _IsMigratingError(Exception):
     pass
 
 
 class VNXLunList(VNXCliResourceList):
-    def __init__(self, cli=None, lun_type=None, lun_ids=None, pool=None):
-        super(VNXLunList, self).__init__(cli)
+    """ list of the luns.
+
+    With `lun_ids`, the luns are fetched one by one, in parallel on all the
+    alive SPs, if there are no more ids than the targeted threshold.
+    Otherwise all the luns are listed and filtered.
+    """
+
+    # max number of ids to fetch the luns one by one.  None to choose it
+    # from the measured latencies of the commands.
+    targeted_threshold = None
+
+    # threshold used before the latencies are measured.
+    default_targeted_threshold = 8
+
+    # number of the lun commands sent to one SP at the same time.
+    max_per_sp = 2
+
+    def __init__(self, cli=None, lun_type=None, lun_ids=None, pool=None,
+                 fields=None):
+        super(VNXLunList, self).__init__(cli, fields)
         self._lun_type = None
         self._lun_ids = None
         self._pool_name = None
@@ -63,6 +87,12 @@ class VNXLunList(VNXCliResourceList):
             ret = True
         return ret
 
+    def _get_fields(self):
+        ret = super(VNXLunList, self)._get_fields()
+        if ret is not None and self._pool_name is not None:
+            ret = list(ret) + ['pool_name']
+        return ret
+
     @classmethod
     def get_resource_class(cls):
         return VNXLun
@@ -73,7 +103,70 @@ class VNXLunList(VNXCliResourceList):
         return {lun.lun_id: lun for lun in self}
 
     def _get_raw_resource(self):
-        return self._cli.get_lun(lun_type=self._lun_type, poll=self.poll)
+        if self._is_targeted():
+            ret = self._get_raw_resource_by_ids()
+        else:
+            start = time.time()
+            ret = self._cli.get_lun(lun_type=self._lun_type,
+                                    options=self._get_options(),
+                                    poll=self.poll)
+            self._cli.add_latency('lun_list', time.time() - start)
+        return ret
+
+    def _get_sp_ips(self):
+        return sorted(self._cli.get_all_alive_sps_ip())
+
+    def _get_workers(self):
+        return self.max_per_sp * max(len(self._get_sp_ips()), 1)
+
+    def get_targeted_threshold(self):
+        """ max number of ids to fetch the luns one by one.
+
+        The luns are fetched by rounds of the workers.  It's faster than
+        listing all the luns if the rounds take less time than the list.
+        """
+        ret = self.targeted_threshold
+        if ret is None:
+            list_latency = self._cli.get_latency('lun_list')
+            one_latency = self._cli.get_latency('lun_list_one')
+            if list_latency and one_latency:
+                rounds = int(list_latency / one_latency)
+                ret = rounds * self._get_workers()
+            else:
+                ret = self.default_targeted_threshold
+        return ret
+
+    def _get_target_ids(self):
+        return sorted(set(map(VNXLun.get_id, self._lun_ids)))
+
+    def _is_targeted(self):
+        return (self._lun_ids is not None and self._lun_type is None and
+                len(self._get_target_ids()) <= self.get_targeted_threshold())
+
+    def _get_raw_resource_by_ids(self):
+        lun_ids = self._get_target_ids()
+        if not lun_ids:
+            return ''
+        ips = self._get_sp_ips()
+        options = self._get_options()
+
+        def fetch(i):
+            # alternate the SPs
+            ip = ips[i % len(ips)] if ips else None
+            start = time.time()
+            with self._cli.prefer_sp_ip(ip):
+                ret = self._cli.get_lun(lun_id=lun_ids[i], options=options,
+                                        poll=self.poll)
+            self._cli.add_latency('lun_list_one', time.time() - start)
+            return ret
+
+        log.debug('fetch luns {} one by one.'.format(lun_ids))
+        pool = ThreadPool(min(self._get_workers(), len(lun_ids)))
+        try:
+            outputs = pool.map(fetch, range(len(lun_ids)))
+        finally:
+            pool.close()
+        return '\n'.join(outputs)
 
     def get(self, _id):
         if isinstance(_id, VNXLun):
@@ -171,9 +264,10 @@ class VNXLun(VNXCliResource):
 
     @staticmethod
     def get(cli, lun_id=None, name=None, lun_type=None, lun_ids=None,
-            poll=True):
+            poll=True, fields=None):
         if lun_id is None and name is None:
-            ret = VNXLunList(cli=cli, lun_type=lun_type, lun_ids=lun_ids)
+            ret = VNXLunList(cli=cli, lun_type=lun_type, lun_ids=lun_ids,
+                             fields=fields)
         else:
             ret = VNXLun(lun_id, name, cli)
         ret.poll = poll
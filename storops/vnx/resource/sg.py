@@ -55,9 +55,10 @@ class VNXStorageGroup(VNXCliResource):
                                 engineering=True)
 
     @classmethod
-    def get(cls, cli, name=None, system_lun_list=None):
+    def get(cls, cli, name=None, system_lun_list=None, fields=None):
         if name is None:
-            ret = VNXStorageGroupList(cli, system_lun_list=system_lun_list)
+            ret = VNXStorageGroupList(cli, system_lun_list=system_lun_list,
+                                      fields=fields)
         else:
             ret = VNXStorageGroup(name, cli, system_lun_list=system_lun_list)
         return ret
@@ -385,8 +386,8 @@ class VNXStorageGroupList(VNXCliResourceList):
         return VNXStorageGroup
 
     def __init__(self, cli=None, engineering=False, system_lun_list=None,
-                 attached_lun=None):
-        super(VNXStorageGroupList, self).__init__(cli)
+                 attached_lun=None, fields=None):
+        super(VNXStorageGroupList, self).__init__(cli, fields)
         self._sg_map = {}
         self._engineering = engineering
         self._system_lun_list = system_lun_list
@@ -404,6 +405,12 @@ class VNXStorageGroupList(VNXCliResourceList):
             ret = True
         return ret
 
+    def _get_fields(self):
+        ret = super(VNXStorageGroupList, self)._get_fields()
+        if ret is not None and self._attached_lun is not None:
+            ret = list(ret) + ['alu_hlu_map']
+        return ret
+
     def add_sg(self, sg):
         self._sg_map[sg.name] = sg
 
@@ -413,7 +420,8 @@ class VNXStorageGroupList(VNXCliResourceList):
                 sg.detach_alu(lun)
 
     def _get_raw_resource(self):
-        return self._cli.get_sg(poll=self.poll, engineering=self._engineering)
+        return self._cli.get_sg(poll=self.poll, engineering=self._engineering,
+                                options=self._get_options())
 
     @property
     @instance_cache
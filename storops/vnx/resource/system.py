@@ -25,7 +25,7 @@ from retryz import retry
 from storops.exception import VNXDiskUsedError, raise_if_err, \
     VNXSetArrayNameError
 from storops.lib.common import daemon, instance_cache, clear_instance_cache
-from storops.lib.resource import ResourceList, ResourceListCollection
+from storops.lib.resource import ResourceList
 from storops.vnx.resource.host import VNXHost
 from storops.vnx.resource.metric import VNXStats
 from storops.vnx.resource.nfs_share import VNXNfsShare
@@ -54,7 +54,7 @@ from storops.vnx.resource.migration import VNXMigrationSession
 from storops.vnx.resource.ndu import VNXNdu, VNXNduList
 from storops.vnx.resource.nqm import VNXIOClass, VNXIOPolicy
 from storops.vnx.resource.port import VNXConnectionPort, VNXSPPort
-from storops.vnx.resource import VNXCliResource
+from storops.vnx.resource import VNXCliResource, VNXResourceListCollection
 from storops.vnx.resource.rg import VNXRaidGroup
 from storops.vnx.resource.sg import VNXStorageGroup
 from storops.vnx.resource.snap import VNXSnap
@@ -78,7 +78,8 @@ class VNXSystem(VNXCliResource):
                  timeout=None,
                  heartbeat_interval=None,
                  naviseccli=None,
-                 file_username=None, file_password=None):
+                 file_username=None, file_password=None,
+                 transport=None):
         """ initialize a `VNXSystem` instance
 
         The `VNXSystem` instance act as a entry point for all
@@ -97,6 +98,9 @@ class VNXSystem(VNXCliResource):
         username
         :param file_password: password for control station login, default to
         password
+        :param transport: `NaviTransport` used to run the naviseccli
+        commands, like `NaviWorkerPoolTransport`.  Default to run each
+        command in a new process.
         :return: vnx system instance
         """
         super(VNXSystem, self).__init__()
@@ -108,6 +112,7 @@ class VNXSystem(VNXCliResource):
         self._timeout = timeout
         self._hb_interval = heartbeat_interval
         self._naviseccli = naviseccli
+        self._transport = transport
 
         self._file_username = file_username
         self._file_password = file_password
@@ -122,7 +127,7 @@ class VNXSystem(VNXCliResource):
             self._ip,
             self._username, self._password, self._scope, self._sec_file,
             self._timeout, heartbeat_interval=self._hb_interval,
-            naviseccli=self._naviseccli)
+            naviseccli=self._naviseccli, transport=self._transport)
 
     def _init_file_cli(self):
         return VNXNasClient(self.control_station_ip,
@@ -236,20 +241,31 @@ class VNXSystem(VNXCliResource):
         feature = VNXPoolFeature(self._cli)
         return self._update_poll(feature, poll)
 
-    def get_pool(self, name=None, pool_id=None, system_lun_list=None):
+    def get_pool(self, name=None, pool_id=None, system_lun_list=None,
+                 fields=None):
         return VNXPool.get(pool_id=pool_id, name=name, cli=self._cli,
-                           system_lun_list=system_lun_list)
+                           system_lun_list=system_lun_list, fields=fields)
 
-    def get_lun(self, lun_id=None, name=None, lun_type=None):
+    def get_lun(self, lun_id=None, name=None, lun_type=None, fields=None):
+        """ get the lun, or the list of the luns.
+
+        :param lun_id: id of the lun.
+        :param name: name of the lun.
+        :param lun_type: type of the luns in the list.
+        :param fields: keys of the properties to retrieve for the list,
+            like `['name', 'total_capacity_gb']`.  Only the options of
+            them are sent to the array.  Default to all the properties.
+        """
         return VNXLun.get(self._cli, lun_id=lun_id, name=name,
-                          lun_type=lun_type)
+                          lun_type=lun_type, fields=fields)
 
     def get_cg(self, name=None):
         return VNXConsistencyGroup.get(self._cli, name)
 
-    def get_sg(self, name=None, system_lun_list=None):
+    def get_sg(self, name=None, system_lun_list=None, fields=None):
         return VNXStorageGroup.get(self._cli, name,
-                                   system_lun_list=system_lun_list)
+                                   system_lun_list=system_lun_list,
+                                   fields=fields)
 
     def get_snap(self, name=None):
         return VNXSnap.get(self._cli, name)
@@ -530,20 +546,52 @@ class VNXSystem(VNXCliResource):
                 for rsc_list in rsc_list_2
                 if rsc_list.get_resource_class() in rsc_clz_list]
 
-    def collect_perf_record(self, clz_list):
+    def collect_perf_record(self, clz_list, max_per_sp=None):
+        """ update the resource lists with the counters.
+
+        The resource lists are updated concurrently on the alive SPs.
+
+        :param clz_list: resource classes to collect.
+        :param max_per_sp: number of lists updated on one SP at the same
+            time.
+        :return: the `VNXResourceListCollection`.
+        """
         log.info('start collecting counters of vnx {}.'.format(self._ip))
         start = time.time()
         rsc_list_2 = self.get_rsc_list_2(clz_list)
-        record = ResourceListCollection(rsc_list_2)
+        prev = self._cli.curr_counter
+        record = VNXResourceListCollection(
+            rsc_list_2, cli=self._cli, max_per_sp=max_per_sp,
+            estimates=getattr(prev, 'timings', None))
         record.update()
+        timings = ', '.join(
+            '{}: {:.3f}'.format(clz.__name__, seconds)
+            for clz, seconds in sorted(record.timings.items(),
+                                       key=lambda item: -item[1]))
         log.info('end collecting counters of vnx {}.  collection took '
-                 '{:.3f} seconds.'.format(self._ip, time.time() - start))
+                 '{:.3f} seconds.  seconds by list: {}.'.format(
+                     self._ip, time.time() - start, timings))
         return record
 
-    def enable_perf_stats(self, rsc_clz_list=None):
+    def enable_perf_stats(self, rsc_clz_list=None, max_per_sp=None,
+                          interval=None, **kwargs):
+        """ collect the counters of the resource lists periodically.
+
+        :param rsc_clz_list: resource classes to collect.
+        :param max_per_sp: number of lists updated on one SP at the same
+            time.
+        :param interval: seconds between two collections, default to 60.
+        :param kwargs: options of the collection schedule, like
+            `max_interval`, `adaptive` and `scheduler`.
+        :return: the resource lists collected.
+        """
+        if interval is None:
+            interval = 60
         VNXStats.get(self._cli).enable_stats()
-        f = functools.partial(self.collect_perf_record, clz_list=rsc_clz_list)
-        self._cli.enable_perf_metric(60, f, rsc_clz_list)
+        f = functools.partial(self.collect_perf_record, clz_list=rsc_clz_list,
+                              max_per_sp=max_per_sp)
+        self._cli.enable_perf_metric(interval, f, rsc_clz_list,
+                                     name='vnx {}'.format(self._ip), **kwargs)
         return self.get_rsc_list_2(rsc_clz_list)
 
     def disable_perf_stats(self, disable_counter_collection=False):
@@ -554,12 +602,61 @@ class VNXSystem(VNXCliResource):
     def is_perf_stats_enabled(self):
         return self._cli.is_perf_metric_enabled()
 
+    def get_perf_collection_stats(self):
+        return self._cli.get_perf_collection_stats()
+
+    def enable_list_cache(self, max_age=30):
+        """ reuse the outputs of the list commands of the system.
+
+        The lun, pool, storage group, port and disk lists are reused by all
+        the threads for `max_age` seconds.  They are dropped after the
+        commands changing them.  The perf stats collections always read the
+        array.
+
+        :param max_age: seconds the outputs are reused.
+        """
+        if max_age is None or max_age <= 0:
+            raise ValueError('max_age should be greater than 0.')
+        self._cli.list_cache.max_age = max_age
+
+    def disable_list_cache(self):
+        self._cli.list_cache.max_age = None
+        self._cli.list_cache.invalidate()
+
+    def invalidate_list_cache(self, *groups):
+        """ drop the cached outputs of the list commands.
+
+        :param groups: kinds of the lists, like `lun`, `pool`, `sg`, `port`
+            and `disk`.  Default to all of them.
+        """
+        self._cli.list_cache.invalidate(*groups)
+
+    def get_list_cache_stats(self):
+        return self._cli.list_cache.get_stats()
+
     def is_counter_collection_enabled(self):
         return VNXStats.get(self._cli).is_enabled()
 
-    def enable_persist_perf_stats(self):
+    def enable_counter_history(self, depth=60):
+        return self._cli.enable_counter_history(depth)
+
+    def disable_counter_history(self):
+        self._cli.disable_counter_history()
+
+    @property
+    def counter_history(self):
+        return self._cli.counter_history
+
+    def enable_persist_perf_stats(self, fmt=None, **kwargs):
+        """ persist the metrics after each collection.
+
+        :param fmt: `block` for the rotated columnar metric files,
+            `csv` for the csv files.  Default to `block`.
+        :param kwargs: options of the metric files, like `rotation` and
+            `max_files`.
+        """
         rsc_list = self._default_rsc_list_with_perf_stats()
-        self._cli.persist_perf_stats(rsc_list)
+        self._cli.persist_perf_stats(rsc_list, fmt, **kwargs)
 
     def disable_persist_perf_stats(self):
         self._cli.persist_perf_stats(None)
@@ -0,0 +1,82 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of the VNX CLI error classification.
+
+Run with `python -m storops_bench.cli_exception`.
+"""
+from __future__ import print_function, unicode_literals
+
+import six
+
+from storops.exception import _cli_exception_factory
+from storops.lib import ex_decorator_factory
+from storops_bench.utils import read_test_data, measure, report
+
+__author__ = 'Cedric Zhuang'
+
+
+def linear_scan(output, exception_list):
+    """ the original algorithm: check exception classes one by one. """
+    for clz in exception_list:
+        msg = clz.get_error_message()
+        if isinstance(msg, (tuple, list, set)):
+            found = any(m in output for m in msg)
+        elif isinstance(msg, six.string_types):
+            found = msg in output
+        else:
+            found = msg.search(output) is not None
+        if found:
+            return clz
+    return None
+
+
+def main():
+    outputs = [content for _, content in
+               read_test_data('vnx', 'testdata', 'block_output')]
+    exception_list = _cli_exception_factory.exception_list
+
+    automaton = ex_decorator_factory.ExceptionClassifier(exception_list)
+    saved = ex_decorator_factory.ahocorasick
+    try:
+        ex_decorator_factory.ahocorasick = None
+        scan = ex_decorator_factory.ExceptionClassifier(exception_list)
+    finally:
+        ex_decorator_factory.ahocorasick = saved
+
+    for output in outputs:
+        expected = linear_scan(output, exception_list)
+        assert automaton.classify(output) is expected
+        assert scan.classify(output) is expected
+
+    def run(func):
+        return measure(lambda: [func(o) for o in outputs]) / len(outputs)
+
+    rows = [('linear scan',
+             run(lambda o: linear_scan(o, exception_list))),
+            ('compiled scan', run(scan.classify))]
+    if automaton.is_automaton_enabled():
+        rows.append(('compiled automaton', run(automaton.classify)))
+    else:
+        print('pyahocorasick is not installed, skip automaton.')
+
+    avg_size = sum(len(o) for o in outputs) / len(outputs)
+    report('classify {} outputs ({} classes, {:.0f} chars on average), '
+           'cost per output:'.format(len(outputs), len(exception_list),
+                                     avg_size), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" fake naviseccli used by the benchmarks.
+
+The output is read from the test data of `storops_test/vnx`, the same
+files used by the unit tests.  The connection and credential options are
+ignored.  Set `FAKE_NAVISECCLI_LATENCY` to simulate the response time of
+the SP in seconds.
+
+Do not import storops here to keep the start up time close to a small
+binary.
+"""
+from __future__ import print_function, unicode_literals
+
+import io
+import os
+import re
+import sys
+import time
+
+__author__ = 'Cedric Zhuang'
+
+_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                       'storops_test', 'vnx', 'testdata', 'block_output')
+
+_options = {'-h': 1, '-user': 1, '-password': 1, '-scope': 1, '-t': 1,
+            '-secfilepath': 1}
+
+
+def get_filename(args):
+    params = []
+    skip = 0
+    for arg in args:
+        if skip > 0:
+            skip -= 1
+        elif arg in _options:
+            skip = _options[arg]
+        else:
+            params.append(arg)
+    name = re.sub(r"[\\/:]", '_', '_'.join(params))
+    if len(name) >= 200:
+        name = name[:43] + '____' + name[-43:]
+    return '{}.txt'.format(name)
+
+
+def main(args):
+    latency = float(os.environ.get('FAKE_NAVISECCLI_LATENCY', 0))
+    if latency > 0:
+        time.sleep(latency)
+    path = os.path.join(_folder, get_filename(args))
+    if os.path.exists(path):
+        with io.open(path, 'r', encoding='utf-8') as f:
+            sys.stdout.write(f.read())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,112 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of the metric persistence.
+
+The metrics of thousands of LUNs are persisted for a number of samples to
+the csv file and to the columnar metric files, then read back.
+
+Run with `python -m storops_bench.metric_persist`.
+"""
+from __future__ import print_function, unicode_literals
+
+import csv
+import io
+import os
+import random
+import shutil
+import tempfile
+
+from storops.lib.metric import MetricsDumper, MetricsFrame
+from storops.lib.metric_file import MetricsFileReader, list_files, np
+from storops_bench.utils import measure, report
+
+__author__ = 'Cedric Zhuang'
+
+
+class SampleLun(object):
+    def __init__(self, name):
+        self.name = name
+        self.timestamp = '2016-10-01 08:00:00'
+
+
+class SampleLunList(object):
+    def __init__(self, count, names):
+        self.luns = [SampleLun('lun_{}'.format(i)) for i in range(count)]
+        self.names = names
+        self.seed = 0
+
+    def metric_names(self):
+        return self.names
+
+    def __iter__(self):
+        return iter(self.luns)
+
+    def get_metrics_frame(self, names):
+        self.seed += 1
+        rand = random.Random(self.seed)
+        columns = []
+        for name in names:
+            column = [rand.random() * 1000 for _ in self.luns]
+            if np is not None:
+                column = np.array(column)
+            columns.append((name, column))
+        return MetricsFrame(self.luns, columns)
+
+
+def _hdr_cb(rsc):
+    return [rsc.timestamp, rsc.name]
+
+
+def read_csv(filename):
+    with io.open(filename, newline='') as f:
+        rows = list(csv.reader(f))
+    return [[float(v) for v in row[2:]] for row in rows[1:]]
+
+
+def main(count=4000, metrics=25, samples=30):
+    names = ['metric_{}'.format(i) for i in range(metrics)]
+    dumper = MetricsDumper(SampleLunList(count, names),
+                           ['timestamp', 'name'], _hdr_cb)
+    folder = tempfile.mkdtemp(suffix='storops')
+    try:
+        filename = os.path.join(folder, 'lun.csv')
+        prefix = os.path.join(folder, 'lun')
+        timestamps = iter(range(10 ** 9, 10 ** 10, 60))
+
+        rows = [
+            ('persist csv', measure(
+                lambda: dumper.persist_metric_data(filename),
+                number=samples // 3)),
+            ('persist block', measure(
+                lambda: dumper.persist_metric_block(
+                    prefix, timestamp=next(timestamps)),
+                number=samples // 3)),
+            ('read csv', measure(lambda: read_csv(filename), number=1)),
+            ('read block', measure(
+                lambda: MetricsFileReader(prefix).read(), number=1)),
+        ]
+        report('{} metrics of {} luns, {} samples'.format(
+            metrics, count, samples), rows, 'ms')
+
+        block_size = sum(os.path.getsize(f) for f in list_files(prefix))
+        print('  file size: csv {:.1f} MB, block {:.1f} MB'.format(
+            os.path.getsize(filename) / 1e6, block_size / 1e6))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
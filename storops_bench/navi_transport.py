@@ -0,0 +1,90 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of the naviseccli transports.
+
+The commands are sent from several threads to a fake naviseccli which
+prints the test data.  `ballast_mb` of memory is allocated in the
+benchmark process to simulate a large application process, which makes
+forking a new process for every command more expensive.
+
+Run with `python -m storops_bench.navi_transport`.
+"""
+from __future__ import print_function, unicode_literals
+
+import os
+import sys
+import time
+from multiprocessing.pool import ThreadPool
+
+from storops.vnx.navi_command import NaviCommand, NaviTransport, \
+    NaviWorkerPoolTransport
+from storops_bench import fake_naviseccli
+
+__author__ = 'Cedric Zhuang'
+
+
+def get_cmd(ip):
+    return [sys.executable, fake_naviseccli.__file__.replace('.pyc', '.py'),
+            '-h', ip, '-user', 'admin', '-password', 'admin', '-scope', '0',
+            'getagent']
+
+
+def run(transport, threads, commands, ips):
+    def _execute(i):
+        cmd = get_cmd(ips[i % len(ips)])
+        for _ in range(commands):
+            out = NaviCommand.execute(cmd, transport=transport)
+            assert out.startswith('Agent Rev')
+
+    pool = ThreadPool(threads)
+    start = time.time()
+    try:
+        pool.map(_execute, range(threads))
+    finally:
+        pool.close()
+    return threads * commands / (time.time() - start)
+
+
+def main(threads=8, commands=20, ballast_mb=1024, latency=0.05):
+    os.environ['FAKE_NAVISECCLI_LATENCY'] = str(latency)
+    # touch every page so that they are copied on fork
+    ballast = bytearray(ballast_mb * 1024 * 1024)
+    for i in range(0, len(ballast), 4096):
+        ballast[i] = 1
+
+    ips = ['192.168.1.1', '192.168.1.2']
+    worker_pool = NaviWorkerPoolTransport(size=threads)
+    worker_pool.start()
+    transports = (
+        ('new process per command', NaviTransport()),
+        ('new process, 2 per SP', NaviTransport(max_per_sp=2)),
+        ('worker pool of {}'.format(threads), worker_pool),
+        ('worker pool, 2 per SP', NaviWorkerPoolTransport(threads, 2)))
+
+    print('{} threads x {} commands, {} MB process, {:.0f} ms latency'.format(
+        threads, commands, ballast_mb, latency * 1e3))
+    try:
+        for name, transport in transports:
+            throughput = run(transport, threads, commands, ips)
+            print('  {:<26}{:>8.1f} commands/s'.format(name, throughput))
+    finally:
+        for _, transport in transports:
+            transport.close()
+    del ballast
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of the parser configuration loading.
+
+Measures the time from a cold `import storops` to getting the parsers of
+all resources, with and without the on-disk parser cache.  Each sample
+runs in a new process.
+
+Run with `python -m storops_bench.parser_config`.
+"""
+from __future__ import print_function, unicode_literals
+
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from storops_bench.utils import report
+
+__author__ = 'Cedric Zhuang'
+
+_script = '''
+import sys
+import time
+start = time.time()
+from storops.lib.parser import ParserConfigFactory
+if sys.argv[1]:
+    ParserConfigFactory.enable_pickle_cache(sys.argv[1])
+import storops
+from storops.vnx.parsers import get_vnx_parser, _factory_singleton as vnx
+from storops.unity.parser import get_unity_parser, \\
+    _factory_singleton as unity
+imported = time.time()
+get_vnx_parser('VNXLun')
+get_unity_parser('UnityLun')
+first = time.time()
+for name in vnx._read_configs():
+    get_vnx_parser(name)
+for name in unity._read_configs():
+    get_unity_parser(name)
+done = time.time()
+print(imported - start, first - imported, done - imported)
+'''
+
+
+def run(cache_folder, repeat):
+    ret = None
+    for _ in range(repeat):
+        out = subprocess.check_output(
+            [sys.executable, '-c', _script, cache_folder])
+        sample = [float(v) for v in out.split()]
+        if ret is None or sample[1] < ret[1]:
+            ret = sample
+    return ret
+
+
+def main(repeat=5):
+    folder = tempfile.mkdtemp()
+    try:
+        no_cache = run('', repeat)
+        # the first run builds the cache
+        cold_cache = run(folder, 1)
+        warm_cache = run(folder, repeat)
+    finally:
+        shutil.rmtree(folder)
+
+    for title, index in (('import storops', 0),
+                         ('first query (VNXLun + UnityLun)', 1),
+                         ('all parsers', 2)):
+        report(title, [('yaml, no cache', no_cache[index]),
+                       ('yaml, build cache', cold_cache[index]),
+                       ('pickle cache', warm_cache[index])], unit='ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of concurrent requests through one unity connection.
+
+Threads share one `UnityClient` and send requests in bursts to a local
+https server, running in another process, with injected latency.  The
+throughput and the number of connections (TLS handshakes) opened on the
+server side are reported for different pool settings.
+
+Run with `python -m storops_bench.unity_connection`.
+"""
+from __future__ import print_function, unicode_literals
+
+import random
+import time
+from multiprocessing.pool import ThreadPool
+
+import urllib3
+
+from storops.unity.client import UnityClient
+from storops_bench.unity_server import MockUnityServerProcess
+
+__author__ = 'Cedric Zhuang'
+
+
+def run(server, threads, requests, pool_size, pool_block, think):
+    cli = server.connect(UnityClient('127.0.0.1', 'admin', 'pwd',
+                                     pool_size=pool_size,
+                                     pool_block=pool_block))
+    server.stats(reset=True)
+
+    def _query(_):
+        for _ in range(requests):
+            cli.rest_get('/api/types/lun/instances', fields=('id',),
+                         per_page=10)
+            time.sleep(random.uniform(0, think))
+
+    pool = ThreadPool(threads)
+    start = time.time()
+    try:
+        pool.map(_query, range(threads))
+    finally:
+        pool.close()
+    dt = time.time() - start
+    # the connection retrieving the stats is counted too
+    return threads * requests / dt, server.stats()['connections'] - 1
+
+
+def main(latency=0.05, threads=32, requests=20, think=0.2):
+    urllib3.disable_warnings()
+    settings = (('default pool', None, False),
+                ('pool_size=32', 32, False),
+                ('pool_size=10, pool_block', 10, True))
+    with MockUnityServerProcess(100, latency=latency, https=True) as server:
+        print('{} threads x {} requests, {:.0f} ms latency, '
+              'up to {:.0f} ms between requests'.format(
+                  threads, requests, latency * 1e3, think * 1e3))
+        for name, pool_size, pool_block in settings:
+            throughput, connections = run(server, threads, requests,
+                                          pool_size, pool_block, think)
+            print('  {:<26}{:>8.1f} req/s {:>6} connections'.format(
+                name, throughput, connections))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of the unity metric calculation.
+
+The LUN metrics are calculated from two real time query results of
+thousands of LUNs, with `calculators.get_metric_value` for some LUNs and
+with `calculators.get_metrics_frame` for all of them.  The values of the
+LUNs are calculated with NumPy arrays or python lists.
+
+Run with `python -m storops_bench.unity_metrics`.
+"""
+from __future__ import print_function, unicode_literals
+
+import random
+import time
+
+from mock import patch
+
+from storops.unity import calculator
+from storops.unity.calculator import calculators
+from storops.unity.resource.lun import UnityLun
+from storops.unity.resource.metric import UnityMetricQueryResultList
+from storops_bench.utils import measure, report
+
+__author__ = 'Cedric Zhuang'
+
+
+class MetricCli(object):
+    def __init__(self, prev, curr):
+        self.prev_counter = prev
+        self.curr_counter = curr
+
+
+def get_contents(lun_ids, timestamp, seed):
+    rand = random.Random(seed)
+    ret = []
+    for path in calculators.get_all_paths([UnityLun]):
+        if '.lun.*.' in path:
+            values = {sp: {lun_id: str(rand.randint(0, 10 ** 9))
+                           for lun_id in lun_ids}
+                      for sp in ('spa', 'spb')}
+        else:
+            values = {'spa': '512', 'spb': '512'}
+        ret.append({'path': path, 'queryId': 1,
+                    'timestamp': timestamp, 'values': values})
+    return ret
+
+
+def get_query_result(contents):
+    ret = UnityMetricQueryResultList()
+    ret.update(contents)
+    return ret
+
+
+def run(prev, curr, lun_ids, names):
+    # the query results are parsed again for every collection
+    cli = MetricCli(get_query_result(prev), get_query_result(curr))
+    for lun_id in lun_ids:
+        for name in names:
+            calculators.get_metric_value(UnityLun, name, cli, lun_id)
+
+
+def run_frame(prev, curr, luns):
+    cli = MetricCli(get_query_result(prev), get_query_result(curr))
+    return calculators.get_metrics_frame(UnityLun, cli, luns)
+
+
+def measure_per_lun(prev, curr, samples, names):
+    ret = []
+    for use_cache in (False, True):
+        calculators.use_cache = use_cache
+        try:
+            ret.append(measure(lambda: run(prev, curr, samples, names),
+                               number=1))
+        finally:
+            calculators.use_cache = True
+    return ret
+
+
+def main(count=5000, sample=20):
+    lun_ids = ['sv_{}'.format(i) for i in range(count)]
+    names = calculators.get_metric_names(UnityLun)
+    prev = get_contents(lun_ids, '2017-08-16T11:54:00.000Z', 1)
+    curr = get_contents(lun_ids, '2017-08-16T11:55:00.000Z', 2)
+    samples = random.Random(0).sample(lun_ids, sample)
+    luns = [UnityLun(_id=lun_id) for lun_id in lun_ids]
+
+    start = time.time()
+    run(prev, curr, samples, names)
+    print('{} metrics of {} luns calculated in {:.1f} s'.format(
+        len(names), sample, time.time() - start))
+
+    if calculator.np is None:
+        backends = [('python lists', None)]
+    else:
+        backends = [('numpy', None)]
+        backends.append(('python lists', patch(
+            'storops.unity.calculator.np', new=None)))
+    rows = []
+    for backend, patcher in backends:
+        if patcher is not None:
+            patcher.start()
+        try:
+            no_cache, cached = measure_per_lun(prev, curr, samples, names)
+            rows.append(('{}, {} luns, no cache'.format(backend, sample),
+                         no_cache))
+            rows.append(('{}, {} luns'.format(backend, sample), cached))
+            rows.append(('{}, all luns in frame'.format(backend),
+                         measure(lambda: run_frame(prev, curr, luns),
+                                 number=1)))
+        finally:
+            if patcher is not None:
+                patcher.stop()
+    report('{} metrics of {} luns'.format(len(names), count), rows, 'ms')
+
+
+if __name__ == '__main__':
+    main()
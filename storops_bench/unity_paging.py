@@ -0,0 +1,59 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of retrieving all pages of a unity resource list.
+
+A local http server with injected latency plays the unity.  The wall
+clock time of `UnityClient.get_all` is measured for different page
+counts with pages retrieved one by one and concurrently.
+
+Run with `python -m storops_bench.unity_paging`.
+"""
+from __future__ import print_function, unicode_literals
+
+import time
+
+from storops.unity.client import UnityClient
+from storops_bench.unity_server import MockUnityServer
+from storops_bench.utils import report
+
+__author__ = 'Cedric Zhuang'
+
+
+def get_all(server, per_page, page_workers):
+    cli = server.connect(UnityClient('127.0.0.1', 'admin', 'pwd'))
+    start = time.time()
+    resp = cli.get_all('lun', base_fields=('id',), per_page=per_page,
+                       page_workers=page_workers)
+    dt = time.time() - start
+    assert len(resp.entries) == server.count
+    return dt
+
+
+def main(latency=0.05, per_page=100, page_counts=(1, 4, 16, 64),
+         workers=(1, 4, 8)):
+    for page_count in page_counts:
+        with MockUnityServer(per_page * page_count,
+                             latency=latency) as server:
+            rows = []
+            for page_workers in workers:
+                name = 'page_workers={}'.format(page_workers)
+                rows.append((name, get_all(server, per_page, page_workers)))
+        report('{} pages of {} entries, {:.0f} ms latency'.format(
+            page_count, per_page, latency * 1e3), rows, unit='ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" a local http server works like the unity rest api for benchmarks.
+
+Only the instance listing is supported.  Each request sleeps for the
+injected latency before responding.  The server listens on https with a
+self signed certificate if `https` is set, which requires the `openssl`
+command.
+
+`MockUnityServerProcess` runs the server in another process so that the
+client side measurement is not affected by the server threads.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import urlparse, parse_qs
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # clients close the idle connections without notice
+        log.debug('connection from {} closed.'.format(client_address))
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.mock.on_connect()
+
+    def log_message(self, fmt, *args):
+        log.debug(fmt, *args)
+
+    def do_GET(self):
+        server = self.server.mock
+        if self.path.startswith('/stats'):
+            body = server.get_stats(self.path)
+        else:
+            time.sleep(server.latency)
+            body = server.get_body(self.path)
+        body = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def create_ssl_context(folder):
+    cert = os.path.join(folder, 'cert.pem')
+    key = os.path.join(folder, 'key.pem')
+    with open(os.devnull, 'w') as null:
+        subprocess.check_call(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+             '-keyout', key, '-out', cert, '-days', '1',
+             '-subj', '/CN=127.0.0.1'], stdout=null, stderr=null)
+    context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+class MockUnityServer(object):
+    def __init__(self, count, latency=0.05, default_per_page=2000,
+                 https=False):
+        self.count = count
+        self.latency = latency
+        self.default_per_page = default_per_page
+        self.https = https
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._cert_folder = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        scheme = 'https' if self.https else 'http'
+        return '{}://{}:{}'.format(scheme, host, port)
+
+    def on_connect(self):
+        with self._lock:
+            self.connections += 1
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+
+    def get_stats(self, path):
+        ret = {'requests': self.requests, 'connections': self.connections}
+        if 'reset' in parse_qs(urlparse(path).query):
+            self.reset_counters()
+        return ret
+
+    def get_body(self, path):
+        with self._lock:
+            self.requests += 1
+        params = parse_qs(urlparse(path).query)
+        page = int(params.get('page', [1])[0])
+        per_page = int(params.get('per_page', [self.default_per_page])[0])
+        start = (page - 1) * per_page
+        end = min(start + per_page, self.count)
+        links = [{'rel': 'self', 'href': '&page={}'.format(page)}]
+        if end < self.count:
+            links.append({'rel': 'next', 'href': '&page={}'.format(page + 1)})
+        ret = {'entries': [{'content': {'id': 'sv_{}'.format(i)}}
+                           for i in range(start, end)],
+               'links': links}
+        if 'with_entrycount' in params:
+            ret['entryCount'] = self.count
+        return ret
+
+    def start(self):
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.mock = self
+        if self.https:
+            self._cert_folder = tempfile.mkdtemp()
+            context = create_ssl_context(self._cert_folder)
+            self._server.socket = context.wrap_socket(
+                self._server.socket, server_side=True)
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._cert_folder is not None:
+            shutil.rmtree(self._cert_folder)
+            self._cert_folder = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def connect(self, client):
+        """ redirect the unity client to this server. """
+        # noinspection PyProtectedMember
+        client._rest.http_client.base_url = self.base_url
+        return client
+
+
+class MockUnityServerProcess(object):
+    def __init__(self, count, latency=0.05, https=False):
+        self.args = [sys.executable, '-m', __name__,
+                     '--count', str(count), '--latency', str(latency)]
+        if https:
+            self.args.append('--https')
+        self.base_url = None
+        self._process = None
+
+    def start(self):
+        self._process = subprocess.Popen(self.args, stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE)
+        self.base_url = self._process.stdout.readline().decode().strip()
+        return self
+
+    def stop(self):
+        # the server exits when the stdin is closed
+        self._process.stdin.close()
+        self._process.wait()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def stats(self, reset=False):
+        """ get the request and connection count of the server.
+
+        :param reset: reset the counters after reading.
+        :return: dictionary of `requests` and `connections`.
+        """
+        url = '{}/stats'.format(self.base_url)
+        if reset:
+            url += '?reset=1'
+        # use a new connection which is not counted after reset
+        with requests.session() as session:
+            ret = session.get(url, verify=False).json()
+        return ret
+
+    def connect(self, client):
+        """ redirect the unity client to this server. """
+        # noinspection PyProtectedMember
+        client._rest.http_client.base_url = self.base_url
+        return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description='mock unity rest server.')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--https', action='store_true')
+    args = parser.parse_args()
+    with MockUnityServer(args.count, latency=args.latency,
+                         https=args.https) as server:
+        print(server.base_url)
+        sys.stdout.flush()
+        sys.stdin.read()
+
+
+if __name__ == '__main__':
+    main()
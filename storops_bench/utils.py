@@ -0,0 +1,72 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import print_function, unicode_literals
+
+import codecs
+import logging
+import os
+import timeit
+from os.path import dirname, abspath, join
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+
+def test_data_folder(*sub_folders):
+    folder = join(dirname(abspath(__file__)), '..', 'storops_test')
+    return join(folder, *sub_folders)
+
+
+def read_test_data(*sub_folders):
+    """ read all files in the test data folder.
+
+    :param sub_folders: folder relative to `storops_test`.
+    :return: list of (filename, content) tuple sorted by name.
+    """
+    folder = test_data_folder(*sub_folders)
+    ret = []
+    for name in sorted(os.listdir(folder)):
+        with codecs.open(join(folder, name), 'r', 'utf-8') as f:
+            ret.append((name, f.read()))
+    return ret
+
+
+def measure(func, number=10, repeat=3):
+    """ measure the best average seconds of calling `func`.
+
+    :param func: callable without parameter.
+    :param number: calls in each repeat.
+    :param repeat: repeat times.
+    :return: seconds per call.
+    """
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def report(title, rows, unit='us'):
+    """ print the benchmark result as a table.
+
+    :param title: title of the result.
+    :param rows: list of (name, seconds) tuple.
+    :param unit: unit of the output, could be `s`, `ms` or `us`.
+    """
+    factor = {'s': 1, 'ms': 1e3, 'us': 1e6}[unit]
+    print(title)
+    width = max([len(name) for name, _ in rows] + [4])
+    for name, seconds in rows:
+        print('  {name:<{width}}  {value:>12.3f} {unit}'.format(
+            name=name, width=width, value=seconds * factor, unit=unit))
@@ -0,0 +1,100 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of the VNX counter collection.
+
+The resource lists collected by the perf stats are updated one after
+another, and concurrently on two SPs with `VNXResourceListCollection`.
+The naviseccli commands are replaced by sleeps.  Each SP runs at most two
+commands at the same time, slower when more commands are sent to it.
+
+Run with `python -m storops_bench.vnx_collect`.
+"""
+from __future__ import print_function, unicode_literals
+
+import threading
+import time
+
+from mock import patch
+
+from storops.lib.resource import ResourceListCollection
+from storops.vnx.block_cli import CliClient
+from storops.vnx.enums import VNXSPEnum
+from storops.vnx.resource import VNXResourceListCollection
+from storops.vnx.resource.block_pool import VNXPoolList
+from storops.vnx.resource.disk import VNXDiskList
+from storops.vnx.resource.lun import VNXLunList
+from storops.vnx.resource.port import VNXSPPortList
+from storops.vnx.resource.sg import VNXStorageGroupList
+from storops_bench.utils import measure, report
+
+__author__ = 'Cedric Zhuang'
+
+# seconds of the commands, the luns and disks take most of the time
+LATENCY = {'lun': 1.2, 'getdisk': 0.6, 'storagepool': 0.3,
+           'storagegroup': 0.4, 'port': 0.2}
+
+
+class FakeSp(object):
+    def __init__(self):
+        self.slots = threading.Semaphore(2)
+
+    def run(self, params):
+        name = [p for p in params if not p.startswith('-')][0]
+        with self.slots:
+            time.sleep(LATENCY.get(name, 0.1))
+        return ''
+
+
+def get_cli():
+    with patch('storops.vnx.heart_beat.NodeHeartBeat._init_security_level'):
+        cli = CliClient('10.0.0.1', heartbeat_interval=0)
+    cli._heart_beat.update_by_ip('10.0.0.1', available=True)
+    cli._heart_beat.add(VNXSPEnum.SP_B, '10.0.0.2', available=True)
+    return cli
+
+
+def get_rsc_list_2(cli):
+    return [clz(cli) for clz in (VNXLunList, VNXDiskList, VNXSPPortList,
+                                 VNXPoolList, VNXStorageGroupList)]
+
+
+def main():
+    cli = get_cli()
+    sps = {'10.0.0.1': FakeSp(), '10.0.0.2': FakeSp()}
+
+    def do(ip, params):
+        return sps[ip].run(params)
+
+    with patch.object(cli, 'do', side_effect=do):
+        rows = [('one after another', measure(
+            lambda: ResourceListCollection(get_rsc_list_2(cli)).update(),
+            number=1, repeat=2))]
+        record = VNXResourceListCollection(get_rsc_list_2(cli), cli=cli)
+        record.update()
+        rows.append(('concurrent on 2 sps', measure(
+            lambda: VNXResourceListCollection(
+                get_rsc_list_2(cli), cli=cli).update(),
+            number=1, repeat=2)))
+        rows.append(('concurrent, balanced by timings', measure(
+            lambda: VNXResourceListCollection(
+                get_rsc_list_2(cli), cli=cli,
+                estimates=record.timings).update(),
+            number=1, repeat=2)))
+    report('update {} resource lists'.format(len(LATENCY)), rows, 's')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of the VNX metric evaluation.
+
+Dump all the metrics of thousands of LUNs to csv, with the metrics
+evaluated one by one, and evaluated together by `VNXMetricFrame` with
+python lists or NumPy arrays.
+
+Run with `python -m storops_bench.vnx_metrics`.
+"""
+from __future__ import print_function, unicode_literals
+
+import re
+import time
+from datetime import timedelta
+
+from mock import patch
+
+from storops.lib.resource import ResourceListCollection
+from storops.vnx.block_cli import CliClient
+from storops.vnx.calculator import calculators, np, _ListOps
+from storops.vnx.resource.lun import VNXLunList
+from storops_bench.utils import measure, report, test_data_folder
+
+__author__ = 'Cedric Zhuang'
+
+
+def _read_lun(name):
+    path = test_data_folder('vnx', 'testdata', 'block_output', name)
+    with open(path) as f:
+        text = f.read()
+    # the first lun of the output
+    return text.split('\n\n')[0]
+
+
+def _number(match, factor):
+    return '{}{}'.format(match.group(1), int(match.group(2)) * factor)
+
+
+def get_lun_list(cli, name, count):
+    template = _read_lun(name)
+    pattern = re.compile(r'^((?:Read|Write|Blocks|Busy|Idle|Implicit|'
+                         r'Explicit)[^:]*:\s+)(\d+)$', re.MULTILINE)
+    items = []
+    for i in range(count):
+        text = re.sub(pattern, lambda m: _number(m, i % 7 + 1), template)
+        text = re.sub(r'^LOGICAL UNIT NUMBER \d+',
+                      'LOGICAL UNIT NUMBER {}'.format(i), text, flags=re.M)
+        text = re.sub(r'^Name:  .*$', 'Name:  LUN {}'.format(i), text,
+                      flags=re.M)
+        items.append(text)
+    return VNXLunList(cli=cli).update('\n\n'.join(items))
+
+
+def get_cli(count):
+    with patch('storops.vnx.heart_beat.NodeHeartBeat._init_security_level'):
+        cli = CliClient('10.0.0.1', heartbeat_interval=0)
+    prev = ResourceListCollection(
+        [get_lun_list(cli, 'lun_-list_-all_t0.txt', count)])
+    curr = ResourceListCollection(
+        [get_lun_list(cli, 'lun_-list_-all_t1.txt', count)])
+    curr.timestamp = prev.timestamp + timedelta(seconds=60)
+    cli.add_metric_record(prev)
+    cli.add_metric_record(curr)
+    return cli
+
+
+def dump_csv(lun_list, use_frame, list_ops=False):
+    calculators.use_frame = use_frame
+    # evaluate from the counters every time
+    calculators._frames.clear()
+    try:
+        if not list_ops:
+            return lun_list.get_metrics_csv()
+        with patch('storops.vnx.calculator.get_column_ops', new=_ListOps):
+            return lun_list.get_metrics_csv()
+    finally:
+        calculators.use_frame = True
+
+
+def main(count=4000):
+    start = time.time()
+    cli = get_cli(count)
+    lun_list = cli.curr_counter.get_rsc_list(
+        VNXLunList.get_resource_class())
+    print('{} luns x {} metrics prepared in {:.1f} s'.format(
+        len(lun_list), len(lun_list.metric_names()), time.time() - start))
+
+    expected = dump_csv(lun_list, False)
+    rows = [('one by one', measure(lambda: dump_csv(lun_list, False),
+                                   number=1, repeat=1))]
+    if dump_csv(lun_list, True, list_ops=True) != expected:
+        raise ValueError('csv of the frame with lists is different.')
+    rows.append(('frame, python lists',
+                 measure(lambda: dump_csv(lun_list, True, list_ops=True),
+                         number=1)))
+    if np is not None:
+        if dump_csv(lun_list, True) != expected:
+            raise ValueError('csv of the frame with numpy is different.')
+        rows.append(('frame, numpy', measure(
+            lambda: dump_csv(lun_list, True), number=1)))
+    report('get_metrics_csv of {} luns'.format(len(lun_list)), rows, 'ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of parsing the naviseccli output.
+
+The output of `lun -list -all` is parsed by searching the pattern of each
+property in the output of each LUN, and by scanning the lines once.  The
+output of more LUNs is made up by renumbering the LUNs in the test data.
+
+The values are converted when they are read.  Reading the id, name and
+size of the LUNs is compared with reading all the properties.
+
+Run with `python -m storops_bench.vnx_parse`.
+"""
+from __future__ import print_function, unicode_literals
+
+import codecs
+import re
+from os.path import join
+
+from storops.vnx.parsers import VNXCliParser, get_vnx_parser
+from storops_bench.utils import measure, report, test_data_folder
+
+__author__ = 'Cedric Zhuang'
+
+LUN_COUNTS = (500, 1000, 2000, 4000)
+
+FEW_KEYS = ('lun_id', 'name', 'total_capacity_gb')
+
+
+def get_lun_output(count):
+    filename = join(test_data_folder('vnx', 'testdata', 'block_output'),
+                    'lun_-list_-all.txt')
+    with codecs.open(filename, 'r', 'utf-8') as f:
+        output = f.read()
+    luns = [lun for lun in re.split(r'\n(?=LOGICAL UNIT NUMBER)', output)
+            if lun.strip()]
+    ret = []
+    for i in range(count):
+        lun = luns[i % len(luns)]
+        ret.append(re.sub(r'^LOGICAL UNIT NUMBER \d+',
+                          'LOGICAL UNIT NUMBER {}'.format(i), lun))
+    return '\n'.join(ret)
+
+
+def parse(parser, output, single_scan):
+    VNXCliParser.single_scan = single_scan
+    try:
+        return parser.parse_all(output)
+    finally:
+        VNXCliParser.single_scan = True
+
+
+def read(parser, output, keys):
+    for lun in parser.parse_all(output):
+        if keys is None:
+            lun.evaluate_all()
+        else:
+            for key in keys:
+                lun.get(key)
+
+
+def main():
+    parser = get_vnx_parser('VNXLun')
+    for count in LUN_COUNTS:
+        output = get_lun_output(count)
+        assert (len(parse(parser, output, True)) ==
+                len(parse(parser, output, False)) == count)
+        rows = [(name, measure(lambda: parse(parser, output, single_scan),
+                               number=1, repeat=3))
+                for name, single_scan in (('pattern search', False),
+                                          ('single scan', True))]
+        rows.append(('single scan, read 3 properties',
+                     measure(lambda: read(parser, output, FEW_KEYS),
+                             number=1, repeat=3)))
+        rows.append(('single scan, read all',
+                     measure(lambda: read(parser, output, None),
+                             number=1, repeat=3)))
+        report('parse lun -list -all of {} luns'.format(count), rows, 'ms')
+
+
+if __name__ == '__main__':
+    main()
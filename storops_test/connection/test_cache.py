@@ -0,0 +1,219 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import pickle
+import time
+import unittest
+
+from hamcrest import assert_that, equal_to, none, not_none
+
+from storops.connection.cache import ResponseCache, get_resource_key, \
+    is_type_action
+
+
+class FakeResponse(object):
+    def __init__(self, text='', status_code=200):
+        self.text = text
+        self.status_code = status_code
+
+
+def _result(text='', status_code=200):
+    return FakeResponse(text, status_code), text
+
+
+class GetResourceKeyTest(unittest.TestCase):
+    def test_instance(self):
+        assert_that(get_resource_key('/api/instances/lun/sv_1?compact=True'),
+                    equal_to(('lun', 'sv_1')))
+
+    def test_instance_action(self):
+        key = get_resource_key('/api/instances/lun/sv_1/action/modify')
+        assert_that(key, equal_to(('lun', 'sv_1')))
+
+    def test_instance_list(self):
+        key = get_resource_key('/api/types/lun/instances?fields=id')
+        assert_that(key, equal_to(('lun', None)))
+
+    def test_type_action(self):
+        key = get_resource_key('/api/types/lun/action/createLun')
+        assert_that(key, equal_to(('lun', None)))
+
+    def test_is_type_action(self):
+        assert_that(is_type_action('/api/types/lun/action/createLun'),
+                    equal_to(True))
+        assert_that(is_type_action('/api/types/lun/instances'),
+                    equal_to(False))
+        assert_that(is_type_action('/api/instances/lun/sv_1/action/modify'),
+                    equal_to(False))
+
+    def test_type(self):
+        assert_that(get_resource_key('/api/types/lun?compact=True'), none())
+
+    def test_other(self):
+        assert_that(get_resource_key('/api/other'), none())
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_get_put(self):
+        cache = ResponseCache(ttl=10)
+        result = _result('abc')
+        cache.put('/a', result)
+        assert_that(cache.get('/a'), equal_to(result))
+        assert_that(cache.get('/b'), none())
+        assert_that(cache.stats['hits'], equal_to(1))
+        assert_that(cache.stats['misses'], equal_to(1))
+
+    def test_disabled(self):
+        cache = ResponseCache(ttl=0)
+        assert_that(cache.put('/a', _result()), equal_to(False))
+        assert_that(len(cache), equal_to(0))
+
+    def test_expired(self):
+        cache = ResponseCache(ttl=0.01)
+        cache.put('/a', _result())
+        time.sleep(0.02)
+        assert_that(cache.get('/a'), none())
+        assert_that(cache.stats['expirations'], equal_to(1))
+        assert_that(len(cache), equal_to(0))
+
+    def test_ttl_rules(self):
+        cache = ResponseCache(ttl=5, ttl_rules=[
+            ('*/metricRealTimeQuery/*', 1),
+            ('/api/types/*/instances', 0),
+            ('/api/types/*', 3600)])
+        assert_that(cache.get_ttl('/api/types/lun?compact=True'),
+                    equal_to(3600))
+        assert_that(cache.get_ttl('/api/types/lun/instances?compact=True'),
+                    equal_to(0))
+        assert_that(cache.get_ttl(
+            '/api/types/metricRealTimeQuery/instances'), equal_to(1))
+        assert_that(cache.get_ttl(
+            '/api/instances/metricRealTimeQuery/5?compact=True'),
+            equal_to(1))
+        assert_that(cache.get_ttl('/api/instances/lun/sv_1'), equal_to(5))
+
+    def test_lru_max_entries(self):
+        cache = ResponseCache(ttl=10, max_entries=2)
+        cache.put('/a', _result())
+        cache.put('/b', _result())
+        cache.get('/a')
+        cache.put('/c', _result())
+        assert_that(cache.get('/b'), none())
+        assert_that(cache.get('/a')[0].text, equal_to(''))
+        assert_that(len(cache), equal_to(2))
+        assert_that(cache.stats['evictions'], equal_to(1))
+
+    def test_lru_max_bytes(self):
+        cache = ResponseCache(ttl=10, max_bytes=10)
+        cache.put('/a', _result('12345'))
+        cache.put('/b', _result('12345'))
+        assert_that(cache.size, equal_to(10))
+        cache.put('/c', _result('1'))
+        assert_that(cache.get('/a'), none())
+        assert_that(cache.size, equal_to(6))
+
+    def test_too_large_not_cached(self):
+        cache = ResponseCache(ttl=10, max_bytes=3)
+        assert_that(cache.put('/a', _result('12345')), equal_to(False))
+        assert_that(len(cache), equal_to(0))
+
+    def test_replace(self):
+        cache = ResponseCache(ttl=10)
+        cache.put('/a', _result('123'))
+        cache.put('/a', _result('12'))
+        assert_that(len(cache), equal_to(1))
+        assert_that(cache.size, equal_to(2))
+
+    def test_invalidate_instance(self):
+        cache = ResponseCache(ttl=10)
+        cache.put('/api/instances/lun/sv_1?fields=id', _result())
+        cache.put('/api/instances/lun/sv_1?fields=name', _result())
+        cache.put('/api/instances/lun/sv_2?fields=id', _result())
+        cache.put('/api/types/lun/instances?fields=id', _result())
+        cache.put('/api/types/lun?compact=True', _result())
+        cache.put('/api/types/pool/instances?fields=id', _result())
+
+        count = cache.invalidate('/api/instances/lun/sv_1/action/modify')
+        assert_that(count, equal_to(3))
+        assert_that(cache.get('/api/instances/lun/sv_2?fields=id')[1],
+                    equal_to(''))
+        assert_that(cache.get('/api/types/lun?compact=True')[1],
+                    equal_to(''))
+        assert_that(len(cache), equal_to(3))
+        assert_that(cache.stats['invalidations'], equal_to(3))
+
+    def test_invalidate_create(self):
+        cache = ResponseCache(ttl=10)
+        cache.put('/api/instances/lun/sv_1?fields=id', _result())
+        cache.put('/api/types/lun/instances?fields=id', _result())
+        count = cache.invalidate('/api/types/lun/instances?compact=True')
+        assert_that(count, equal_to(1))
+        assert_that(len(cache), equal_to(1))
+
+    def test_invalidate_related_types(self):
+        cache = ResponseCache(ttl=10)
+        cache.put('/api/instances/lun/sv_1?fields=id', _result())
+        cache.put('/api/types/lun/instances?fields=id', _result())
+        cache.put('/api/instances/storageResource/res_1', _result())
+        cache.put('/api/instances/storageResource/res_2', _result())
+        cache.put('/api/instances/pool/pool_1', _result())
+        count = cache.invalidate(
+            '/api/instances/storageResource/res_1/action/modifyLun')
+        assert_that(count, equal_to(3))
+        assert_that(cache.get('/api/instances/storageResource/res_2'),
+                    not_none())
+        assert_that(cache.get('/api/instances/pool/pool_1'), not_none())
+
+    def test_invalidate_type_action(self):
+        cache = ResponseCache(ttl=10)
+        cache.put('/api/instances/lun/sv_1?fields=id', _result())
+        cache.put('/api/instances/pool/pool_1', _result())
+        cache.put('/api/types/lun?compact=True', _result())
+        generation = cache.generation
+        count = cache.invalidate(
+            '/api/types/storageResource/action/createLun?compact=True')
+        assert_that(count, equal_to(3))
+        assert_that(len(cache), equal_to(0))
+        assert_that(cache.generation, equal_to(generation + 1))
+        assert_that(cache.stats['invalidations'], equal_to(3))
+
+    def test_put_skipped_after_invalidation(self):
+        cache = ResponseCache(ttl=10)
+        generation = cache.generation
+        cache.invalidate('/api/instances/lun/sv_1')
+        assert_that(cache.put('/api/instances/lun/sv_1', _result(),
+                              generation), equal_to(False))
+        assert_that(cache.put('/api/instances/lun/sv_1', _result(),
+                              cache.generation), equal_to(True))
+
+    def test_clear(self):
+        cache = ResponseCache(ttl=10)
+        cache.put('/api/instances/lun/sv_1', _result('abc'))
+        cache.clear()
+        assert_that(len(cache), equal_to(0))
+        assert_that(cache.size, equal_to(0))
+
+    def test_pickle(self):
+        cache = ResponseCache(ttl=10, max_entries=5,
+                              ttl_rules=[('/api/types/*', 100)])
+        cache.put('/api/instances/lun/sv_1', _result('abc'))
+        cache = pickle.loads(pickle.dumps(cache))
+        assert_that(len(cache), equal_to(0))
+        assert_that(cache.max_entries, equal_to(5))
+        assert_that(cache.get_ttl('/api/types/lun'), equal_to(100))
+        assert_that(cache.put('/api/instances/lun/sv_1', _result('abc')),
+                    equal_to(True))
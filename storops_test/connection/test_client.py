@@ -15,6 +15,8 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import pickle
+import socket
 import unittest
 
 from hamcrest import assert_that, calling, equal_to, raises
@@ -211,3 +213,114 @@ class HTTPClientTest(unittest.TestCase):
         mocked_cs_request.assert_called_with(
             '/api/types/instance',
             'DELETE')
+
+    def test_get_cached(self):
+        self.client.session.request = mock.MagicMock(
+            side_effect=_request_side_effect)
+        self.client.base_url = ''
+        self.client.cache_interval = 10
+
+        self.client.get('right_url')
+        resp, body = self.client.get('right_url')
+        assert_that(body, equal_to('OK'))
+        assert_that(self.client.session.request.call_count, equal_to(1))
+
+    def test_get_not_cached_when_disabled(self):
+        self.client.session.request = mock.MagicMock(
+            side_effect=_request_side_effect)
+        self.client.base_url = ''
+
+        self.client.get('right_url')
+        self.client.get('right_url')
+        assert_that(self.client.session.request.call_count, equal_to(2))
+
+    def test_get_error_not_cached(self):
+        self.client.session.request = mock.MagicMock(
+            side_effect=_request_side_effect)
+        self.client.base_url = ''
+        self.client.cache_interval = 10
+
+        self.client.get('bad_url')
+        self.client.get('bad_url')
+        assert_that(self.client.session.request.call_count, equal_to(2))
+
+    @mock.patch(
+        'storops.connection.client.HTTPClient._cs_request')
+    def test_post_invalidate_cache(self, mocked_cs_request):
+        self.client.cache_interval = 10
+        cache = self.client.response_cache
+        cache.put('/api/instances/lun/sv_1?compact=True',
+                  (MockResponse('OK', 200), 'OK'))
+        self.client.post('/api/instances/lun/sv_1/action/modify')
+        assert_that(len(cache), equal_to(0))
+
+    @mock.patch(
+        'storops.connection.client.HTTPClient._cs_request')
+    def test_delete_invalidate_cache(self, mocked_cs_request):
+        self.client.cache_interval = 10
+        cache = self.client.response_cache
+        cache.put('/api/instances/lun/sv_1?compact=True',
+                  (MockResponse('OK', 200), 'OK'))
+        self.client.delete('/api/instances/lun/sv_1?compact=True')
+        assert_that(len(cache), equal_to(0))
+
+    def test_get_bypass_cache(self):
+        self.client.session.request = mock.MagicMock(
+            side_effect=_request_side_effect)
+        self.client.base_url = ''
+        self.client.cache_interval = 10
+
+        self.client.get('right_url')
+        self.client.get('right_url', use_cache=False)
+        assert_that(self.client.session.request.call_count, equal_to(2))
+
+    def test_update_headers_not_in_place(self):
+        headers = {'Accept': 'application/json'}
+        http_client = client.HTTPClient('https://10.10.10.10', headers)
+        http_client.update_headers({'emc-csrf-token': 'token'})
+        assert_that(http_client.headers,
+                    equal_to({'Accept': 'application/json',
+                              'emc-csrf-token': 'token'}))
+        assert_that(headers, equal_to({'Accept': 'application/json'}))
+
+
+class PooledHTTPAdapterTest(unittest.TestCase):
+    def test_default_pool(self):
+        http_client = client.HTTPClient('https://10.10.10.10', {})
+        adapter = http_client.session.get_adapter('https://10.10.10.10')
+        assert_that(adapter, equal_to(http_client.adapter))
+        assert_that(adapter.pool_size, equal_to(10))
+        assert_that(adapter.pool_block, equal_to(False))
+
+    def test_pool_size(self):
+        http_client = client.HTTPClient('https://10.10.10.10', {},
+                                        pool_size=32, pool_block=True)
+        adapter = http_client.session.get_adapter('https://10.10.10.10')
+        assert_that(adapter.pool_size, equal_to(32))
+        assert_that(adapter.pool_block, equal_to(True))
+        pool = adapter.get_connection('https://10.10.10.10')
+        assert_that(pool.pool.maxsize, equal_to(32))
+        assert_that(pool.block, equal_to(True))
+
+    def test_keep_alive_socket_options(self):
+        http_client = client.HTTPClient('https://10.10.10.10', {})
+        pool = http_client.adapter.get_connection('https://10.10.10.10')
+        options = pool.conn_kw['socket_options']
+        assert_that((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options,
+                    equal_to(True))
+
+    def test_keep_alive_disabled(self):
+        http_client = client.HTTPClient('https://10.10.10.10', {},
+                                        keep_alive=False)
+        pool = http_client.adapter.get_connection('https://10.10.10.10')
+        assert_that('socket_options' in pool.conn_kw, equal_to(False))
+
+    def test_pickle(self):
+        http_client = client.HTTPClient('https://10.10.10.10', {},
+                                        pool_size=32)
+        copied = pickle.loads(pickle.dumps(http_client))
+        adapter = copied.session.get_adapter('https://10.10.10.10')
+        assert_that(adapter.pool_size, equal_to(32))
+        pool = adapter.get_connection('https://10.10.10.10')
+        assert_that(pool.pool.maxsize, equal_to(32))
+        assert_that('socket_options' in pool.conn_kw, equal_to(True))
@@ -16,11 +16,16 @@
 
 from __future__ import unicode_literals
 
+import pickle
+import time
 import unittest
+from multiprocessing.pool import ThreadPool
 
 import mock
+from hamcrest import assert_that, equal_to, only_contains
 
 from storops.connection import connector
+from storops.connection.exceptions import HTTPClientError
 
 
 class UnityRESTConnectorTest(unittest.TestCase):
@@ -38,7 +43,10 @@ class UnityRESTConnectorTest(unittest.TestCase):
             insecure=True,
             retries=None,
             ca_cert_path=None,
-            cache_interval=0)
+            cache_interval=0,
+            response_cache=None,
+            pool_size=None,
+            pool_block=False)
 
     @mock.patch('storops.connection.client.HTTPClient')
     def test_new_connector_verify_true(self, mocked_httpclient):
@@ -53,7 +61,10 @@ class UnityRESTConnectorTest(unittest.TestCase):
             insecure=False,
             retries=None,
             ca_cert_path=None,
-            cache_interval=0)
+            cache_interval=0,
+            response_cache=None,
+            pool_size=None,
+            pool_block=False)
 
     @mock.patch('storops.connection.client.HTTPClient')
     def test_new_connector_verify_path(self, mocked_httpclient):
@@ -68,4 +79,63 @@ class UnityRESTConnectorTest(unittest.TestCase):
             insecure=False,
             retries=None,
             ca_cert_path='/tmp/ca_cert.crt',
-            cache_interval=0)
+            cache_interval=0,
+            response_cache=None,
+            pool_size=None,
+            pool_block=False)
+
+
+class UnityRESTConnectorCsrfTokenTest(unittest.TestCase):
+    def setUp(self):
+        self.connector = connector.UnityRESTConnector('10.10.10.10')
+        self.http_client = self.connector.http_client
+        self.tokens = []
+
+        def _get(url, **kwargs):
+            time.sleep(0.05)
+            token = 'token_{}'.format(len(self.tokens))
+            self.tokens.append(token)
+            return mock.Mock(headers={'emc-csrf-token': token}), None
+
+        self.connector.get = mock.Mock(side_effect=_get)
+
+    def _post(self, url, **kwargs):
+        if self.http_client.headers.get('emc-csrf-token') is None:
+            raise HTTPClientError(http_status=401)
+        return 'ok'
+
+    def test_update_csrf_token(self):
+        self.connector._update_csrf_token()
+        assert_that(self.http_client.headers['emc-csrf-token'],
+                    equal_to('token_0'))
+        assert_that(self.connector.csrf_token_version, equal_to(1))
+        self.connector.get.assert_called_once_with(
+            '/api/types/user/instances', use_cache=False)
+
+    def test_update_csrf_token_skip_refreshed(self):
+        self.connector._update_csrf_token()
+        self.connector._update_csrf_token(0)
+        assert_that(len(self.tokens), equal_to(1))
+        self.connector._update_csrf_token(1)
+        assert_that(len(self.tokens), equal_to(2))
+        assert_that(self.connector.csrf_token_version, equal_to(2))
+
+    def test_post_refresh_token_once_in_threads(self):
+        self.http_client.post = mock.Mock(side_effect=self._post)
+        pool = ThreadPool(8)
+        try:
+            ret = pool.map(lambda i: self.connector.post('/api/test'),
+                           range(8))
+        finally:
+            pool.close()
+        assert_that(ret, only_contains('ok'))
+        assert_that(self.tokens, equal_to(['token_0']))
+
+    def test_pickle(self):
+        copied = pickle.loads(pickle.dumps(self.connector.http_client))
+        assert_that(copied.base_url, equal_to('https://10.10.10.10:443'))
+
+        copied = pickle.loads(pickle.dumps(
+            connector.UnityRESTConnector('10.10.10.10')))
+        with copied._csrf_lock:
+            assert_that(copied.csrf_token_version, equal_to(0))
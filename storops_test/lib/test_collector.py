@@ -0,0 +1,231 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+from time import sleep
+
+from hamcrest import assert_that, equal_to, has_length, greater_than, \
+    calling, raises, instance_of, ends_with, has_item, none
+
+from storops.lib.collector import MetricBatch, CallbackSink, QueueSink, \
+    FileSink, MetricCollector
+from storops.lib.metric import PerfManager
+from storops.lib.metric_file import MetricsFileReader
+from storops.vnx.resource.lun import VNXLun
+from storops_test.vnx.cli_mock import t_cli, patch_cli, t_vnx
+
+__author__ = 'Cedric Zhuang'
+
+
+def sample_batch(name='10.0.0.1_VNXLun', timestamp=100, base=0):
+    return MetricBatch(name, timestamp, OrderedDict([
+        ('name', ['a', 'b']), ('read_iops', [base + 1.0, base + 2.0])]))
+
+
+class SampleRscList(object):
+    def __init__(self, name):
+        self.name = name
+        self.updated = 0
+
+    @staticmethod
+    def get_resource_class():
+        return SampleRscList
+
+    def update(self):
+        self.updated += 1
+
+    def get_default_metric_file_prefix(self):
+        return os.path.join('folder', self.name)
+
+    def get_metrics_columns(self):
+        return OrderedDict([('read_iops', [float(self.updated)])])
+
+
+class SampleSystem(object):
+    """ system with the perf stats methods used by the collector.
+    """
+
+    def __init__(self, name):
+        self._cli = PerfManager()
+        self.rsc_list = SampleRscList(name)
+
+    def enable_perf_stats(self, rsc_clz_list=None, interval=None, **kwargs):
+        self._cli.enable_perf_metric(interval, lambda: 1, rsc_clz_list,
+                                     phase=0, **kwargs)
+
+    def disable_perf_stats(self):
+        self._cli.disable_perf_metric()
+
+    def enable_persist_perf_stats(self, fmt=None, **kwargs):
+        self._cli.persist_perf_stats([self.rsc_list], fmt, **kwargs)
+
+    def disable_persist_perf_stats(self):
+        self._cli.persist_perf_stats(None)
+
+
+class MetricBatchTest(unittest.TestCase):
+    def test_from_rsc_list(self):
+        batch = MetricBatch.from_rsc_list(SampleRscList('lun'), 10)
+        assert_that(batch.name, equal_to('lun'))
+        assert_that(batch.timestamp, equal_to(10))
+        assert_that(batch, has_length(1))
+
+    @patch_cli
+    def test_from_vnx_lun_list(self):
+        lun_list = t_cli().curr_counter.get_rsc_list(VNXLun)
+        batch = MetricBatch.from_rsc_list(lun_list)
+        assert_that(batch.name, ends_with('_VNXLun'))
+        assert_that(batch.columns['read_iops'], has_length(len(lun_list)))
+
+
+class MetricSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(suffix='storops')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_callback_sink(self):
+        batches = []
+        CallbackSink(batches.append).publish([sample_batch()] * 2)
+        assert_that(batches, has_length(2))
+
+    def test_queue_sink(self):
+        sink = QueueSink()
+        sink.publish([sample_batch()])
+        assert_that(sink.queue.get_nowait(), instance_of(MetricBatch))
+
+    def test_file_sink_block(self):
+        sink = FileSink(self.folder)
+        sink.publish([sample_batch(), sample_batch(name='other'),
+                      sample_batch(timestamp=200, base=10)])
+        columns = MetricsFileReader(
+            os.path.join(self.folder, '10.0.0.1_VNXLun')).read()
+        assert_that(list(columns['read_iops']),
+                    equal_to([1.0, 2.0, 11.0, 12.0]))
+        assert_that(list(columns['sample_time']),
+                    equal_to([100, 100, 200, 200]))
+
+    def test_file_sink_csv(self):
+        sink = FileSink(self.folder, 'csv')
+        sink.publish([sample_batch()])
+        sink.publish([sample_batch(base=10)])
+        filename = os.path.join(self.folder, '10.0.0.1_VNXLun.csv')
+        with io.open(filename, newline='') as f:
+            rows = list(csv.reader(f))
+        assert_that(rows, equal_to([['name', 'read_iops'],
+                                    ['a', '1.0'], ['b', '2.0'],
+                                    ['a', '11.0'], ['b', '12.0']]))
+
+    def test_file_sink_format_not_supported(self):
+        assert_that(calling(FileSink).with_args(self.folder, 'parquet'),
+                    raises(ValueError))
+
+
+class MetricCollectorTest(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.collector = MetricCollector(
+            [CallbackSink(self.batches.append)], max_workers=2,
+            flush_interval=0.01)
+
+    def tearDown(self):
+        self.collector.close()
+
+    def test_collect_systems(self):
+        systems = [SampleSystem('s{}'.format(i)) for i in range(3)]
+        for system in systems:
+            self.collector.register(system, interval=0.05)
+        sleep(0.3)
+        self.collector.flush()
+
+        names = set(batch.name for batch in self.batches)
+        assert_that(names, equal_to({'s0', 's1', 's2'}))
+        assert_that(self.collector.get_stats(), has_length(3))
+        for system in systems:
+            assert_that(system.rsc_list.updated, greater_than(1))
+
+    def test_unregister(self):
+        system = SampleSystem('s')
+        self.collector.register(system, interval=0.05)
+        self.collector.unregister(system)
+        assert_that(self.collector.systems, has_length(0))
+        assert_that(self.collector.get_stats(), has_length(0))
+        assert_that(system._cli.is_perf_metric_enabled(), equal_to(False))
+
+    def test_close_publish_held_batches(self):
+        events = []
+
+        class RecordSink(CallbackSink):
+            def close(self):
+                events.append('closed')
+
+        collector = MetricCollector(
+            [RecordSink(lambda batch: events.append(batch.name))],
+            flush_interval=10)
+        system = SampleSystem('s')
+        collector.register(system, interval=1000)
+        collector.unregister(system)
+        collector._put(sample_batch('b1'))
+        # the publisher holds the batch and waits for more
+        sleep(0.1)
+        assert_that(collector._queue.qsize(), equal_to(0))
+        publisher = collector._publisher
+        collector.close()
+        assert_that(events, equal_to(['b1', 'closed']))
+        assert_that(publisher.is_alive(), equal_to(False))
+        assert_that(collector._publisher, none())
+
+    def test_sink_error(self):
+        def f(_):
+            raise ValueError('sink failed.')
+
+        self.collector.add_sink(CallbackSink(f))
+        self.collector._put(sample_batch())
+        self.collector.flush()
+        assert_that(self.collector.errors, equal_to(1))
+        assert_that(self.batches, has_length(1))
+
+    @patch_cli
+    def test_register_vnx(self):
+        vnx = t_vnx()
+        self.collector.register(vnx, interval=1000)
+        stats = vnx.get_perf_collection_stats()
+        assert_that(stats['name'], equal_to('vnx 10.244.211.30'))
+        assert_that(self.collector.get_stats(), has_item(stats))
+        assert_that(vnx.is_perf_stats_persisted(), equal_to(True))
+        self.collector.unregister(vnx)
+        assert_that(vnx.get_perf_collection_stats(), equal_to(None))
+
+
+class PerfManagerSinkTest(unittest.TestCase):
+    @patch_cli
+    def test_persist_to_sink(self):
+        cli = t_cli()
+        batches = []
+        cli.persist_perf_stats([], sink=batches.append)
+        # the vnx client persists the lists of the current record
+        cli.persist_rsc_list_metrics()
+        assert_that(batches, has_length(len(cli.get_persist_rsc_list())))
+        assert_that([batch.name for batch in batches],
+                    has_item('10.244.212.182_VNXLun'))
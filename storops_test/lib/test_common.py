@@ -17,19 +17,21 @@ from __future__ import unicode_literals
 
 import bitmath
 import logging
+import pickle
 from multiprocessing.pool import ThreadPool
 from time import sleep
-from unittest import TestCase
+from unittest import TestCase, skipIf, skipUnless
 
+import six
 from hamcrest import assert_that, equal_to, close_to, only_contains, raises, \
-    contains_string, has_items, not_none, none
+    contains_string, has_items, not_none, none, is_not
 
 from storops.exception import EnumValueNotFoundError
 from storops.lib import common
 from storops.lib.common import Dict, Enum, WeightedAverage, synchronized, \
     text_var, int_var, enum_var, yes_no_var, list_var, JsonPrinter, \
     get_lock_file, EnumList, round_3, RepeatedTimer, supplement_filesystem, \
-    try_import
+    try_import, LazyDict
 from storops.vnx.enums import VNXRaidType
 
 log = logging.getLogger(__name__)
@@ -50,6 +52,55 @@ class DictTest(TestCase):
         assert_that(f, raises(AttributeError))
 
 
+class LazyDictTest(TestCase):
+    @staticmethod
+    def get_dict(calls):
+        def to_int(value):
+            calls.append(value)
+            return int(value)
+
+        ret = LazyDict()
+        ret.set_lazy('a', to_int, '1')
+        ret.set_lazy('b', to_int, '2')
+        ret['c'] = None
+        return ret
+
+    def test_convert_on_first_access(self):
+        calls = []
+        result = self.get_dict(calls)
+        assert_that(calls, equal_to([]))
+        assert_that(result.a, equal_to(1))
+        assert_that(result.get('a'), equal_to(1))
+        assert_that(calls, equal_to(['1']))
+        assert_that(result.is_evaluated('b'), equal_to(False))
+        assert_that(len(result), equal_to(3))
+        assert_that('b' in result, equal_to(True))
+        assert_that(result.get('d', 4), equal_to(4))
+
+    def test_all_values(self):
+        calls = []
+        result = self.get_dict(calls)
+        assert_that(result, equal_to({'a': 1, 'b': 2, 'c': None}))
+        assert_that(dict(self.get_dict([]).evaluate_all()),
+                    equal_to(result))
+        assert_that(sorted(calls), equal_to(['1', '2']))
+
+    @skipIf(six.PY2, 'dict() does not call the methods of LazyDict.')
+    def test_dict_copy(self):
+        assert_that(dict(self.get_dict([])),
+                    equal_to({'a': 1, 'b': 2, 'c': None}))
+
+    @skipUnless(six.PY2, 'limitation of python 2 only.')
+    def test_dict_copy_py2(self):
+        result = self.get_dict([])
+        assert_that(dict(result)['a'], is_not(equal_to(1)))
+        assert_that(dict(result.evaluate_all())['a'], equal_to(1))
+
+    def test_pickle(self):
+        result = pickle.loads(pickle.dumps(self.get_dict([])))
+        assert_that(result, equal_to({'a': 1, 'b': 2, 'c': None}))
+
+
 class SampleEnum(Enum):
     TYPE_A = 'type a'
     TYPE_B = 'type b'
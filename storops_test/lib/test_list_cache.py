@@ -0,0 +1,162 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import threading
+import unittest
+from time import sleep
+
+from hamcrest import assert_that, equal_to, raises, has_entries, calling
+
+from storops.lib.list_cache import ListCache
+
+__author__ = 'Cedric Zhuang'
+
+
+class Fetcher(object):
+    def __init__(self, wait=None):
+        self.count = 0
+        self.wait = wait
+
+    def __call__(self):
+        self.count += 1
+        if self.wait is not None:
+            self.wait()
+        return 'output {}'.format(self.count)
+
+
+class ListCacheTest(unittest.TestCase):
+    def test_disabled(self):
+        cache = ListCache()
+        fetch = Fetcher()
+        cache.get('lun', 'a', fetch)
+        assert_that(cache.get('lun', 'a', fetch), equal_to('output 2'))
+
+    def test_reuse_output(self):
+        cache = ListCache(max_age=60)
+        fetch = Fetcher()
+        cache.get('lun', 'a', fetch)
+        assert_that(cache.get('lun', 'a', fetch), equal_to('output 1'))
+        assert_that(cache.get('lun', 'b', fetch), equal_to('output 2'))
+        assert_that(cache.get_stats(),
+                    has_entries(hits=1, misses=2, entries=2))
+
+    def test_expired(self):
+        cache = ListCache(max_age=0.01)
+        fetch = Fetcher()
+        cache.get('lun', 'a', fetch)
+        sleep(0.02)
+        assert_that(cache.get('lun', 'a', fetch), equal_to('output 2'))
+
+    def test_invalidate_group(self):
+        cache = ListCache(max_age=60)
+        fetch = Fetcher()
+        cache.get('lun', 'a', fetch)
+        cache.get('sg', 'a', fetch)
+        cache.invalidate('lun')
+        assert_that(cache.get_version('lun'), equal_to(1))
+        assert_that(cache.get('lun', 'a', fetch), equal_to('output 3'))
+        assert_that(cache.get('sg', 'a', fetch), equal_to('output 2'))
+
+    def test_invalidate_all(self):
+        cache = ListCache(max_age=60)
+        fetch = Fetcher()
+        cache.get('lun', 'a', fetch)
+        cache.get('sg', 'a', fetch)
+        cache.invalidate()
+        assert_that(cache.get_stats()['entries'], equal_to(0))
+        assert_that(cache.get_version('sg'), equal_to(1))
+
+    def test_invalidated_while_fetching(self):
+        cache = ListCache(max_age=60)
+        fetch = Fetcher(lambda: cache.invalidate('lun'))
+        assert_that(cache.get('lun', 'a', fetch), equal_to('output 1'))
+        # the output fetched before the change is not reused
+        assert_that(cache.get('lun', 'a', fetch), equal_to('output 2'))
+
+    def test_error_not_cached(self):
+        cache = ListCache(max_age=60)
+
+        def f():
+            raise ValueError('failed')
+
+        assert_that(calling(cache.get).with_args('lun', 'a', f),
+                    raises(ValueError, 'failed'))
+        assert_that(cache.get('lun', 'a', Fetcher()), equal_to('output 1'))
+
+    def test_fresh(self):
+        cache = ListCache(max_age=60)
+        fetch = Fetcher()
+        cache.get('lun', 'a', fetch)
+        with cache.fresh():
+            assert_that(cache.get('lun', 'a', fetch), equal_to('output 2'))
+        assert_that(cache.get('lun', 'a', fetch), equal_to('output 2'))
+
+    def test_single_flight(self):
+        cache = ListCache(max_age=60)
+        started = threading.Event()
+        release = threading.Event()
+
+        def wait():
+            started.set()
+            release.wait(5)
+
+        fetch = Fetcher(wait)
+        results = []
+
+        def get():
+            results.append(cache.get('lun', 'a', fetch))
+
+        threads = [threading.Thread(target=get) for _ in range(5)]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join(5)
+        assert_that(fetch.count, equal_to(1))
+        assert_that(results, equal_to(['output 1'] * 5))
+        assert_that(cache.get_stats()['shared'], equal_to(4))
+
+    def test_single_flight_error(self):
+        cache = ListCache(max_age=60)
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def f():
+            started.set()
+            release.wait(5)
+            raise ValueError('failed')
+
+        def get():
+            try:
+                cache.get('lun', 'a', f)
+            except ValueError as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=get) for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join(5)
+        assert_that(len(errors), equal_to(3))
@@ -16,16 +16,24 @@
 from __future__ import unicode_literals
 
 import os
+import pickle
+import shutil
+import tempfile
 import unittest
+from datetime import datetime, timedelta
 from time import sleep
 
 from hamcrest import assert_that, less_than, greater_than, none, equal_to, \
-    has_items, contains_string
+    has_items, contains_string, calling, raises, close_to
+from mock import patch, MagicMock
 
 from storops.lib.common import get_data_file
-from storops.lib.metric import PerfManager, MetricCounterRecords, MetricsDumper
+from storops.lib.metric import PerfManager, MetricCounterRecords, \
+    MetricsDumper, CounterHistory
+from storops.lib.metric_file import MetricsFileReader
 from storops.unity.resource.disk import UnityDiskList, UnityDisk
 from storops.unity.resource.lun import UnityLun, UnityLunList
+from storops_test.utils import is_nan
 
 __author__ = 'Cedric Zhuang'
 
@@ -57,6 +65,34 @@ class PerfManagerTest(unittest.TestCase):
         assert_that(cli.curr_counter, none())
         assert_that(cli.is_perf_metric_enabled(), equal_to(False))
 
+    def test_collection_not_overlapped(self):
+        cli = self.perf_mon()
+        running = []
+        overlapped = []
+
+        def collect():
+            if running:
+                overlapped.append(1)
+            running.append(1)
+            sleep(0.25)
+            running.pop()
+
+        cli.enable_perf_metric(0.1, collect)
+        sleep(0.7)
+        cli.disable_perf_metric()
+        assert_that(overlapped, equal_to([]))
+
+    def test_get_perf_collection_stats(self):
+        cli = self.perf_mon()
+        assert_that(cli.get_perf_collection_stats(), none())
+        cli.enable_perf_metric(0.05, lambda: 1, name='test', phase=0)
+        sleep(0.12)
+        stats = cli.get_perf_collection_stats()
+        cli.disable_perf_metric()
+        assert_that(stats['name'], equal_to('test'))
+        assert_that(stats['runs'], greater_than(0))
+        assert_that(cli.get_perf_collection_stats(), none())
+
     def test_is_perf_metric_enabled_rsc_default(self):
         cli = self.perf_mon()
         cli.enable_perf_metric(0, lambda: 1)
@@ -100,6 +136,45 @@ class PerfManagerTest(unittest.TestCase):
                     equal_to(False))
 
 
+class PerfManagerPersistTest(unittest.TestCase):
+    @staticmethod
+    def get_perf_mon(*args, **kwargs):
+        rsc_list = MagicMock()
+        perf_mon = PerfManager()
+        perf_mon.persist_perf_stats([rsc_list], *args, **kwargs)
+        perf_mon.add_metric_record(sample_records()[0])
+        perf_mon.add_metric_record(sample_records()[1])
+        perf_mon.persist_rsc_list_metrics()
+        return rsc_list
+
+    def test_persist_block_by_default(self):
+        rsc_list = self.get_perf_mon(max_files=3)
+        rsc_list.persist_metric_block.assert_called_once_with(max_files=3)
+        assert_that(rsc_list.persist_metric_data.called, equal_to(False))
+
+    def test_persist_csv(self):
+        rsc_list = self.get_perf_mon('csv')
+        rsc_list.persist_metric_data.assert_called_once_with()
+        assert_that(rsc_list.persist_metric_block.called, equal_to(False))
+
+    def test_no_new_record_not_persisted(self):
+        rsc_list = MagicMock()
+        perf_mon = PerfManager()
+        perf_mon.enable_counter_history(depth=5)
+        perf_mon.persist_perf_stats([rsc_list])
+        records = sample_records()[:2] + [None]
+        callback = MagicMock(side_effect=records)
+        for _ in records:
+            perf_mon._collect(callback)
+        assert_that(rsc_list.persist_metric_block.call_count, equal_to(1))
+        assert_that(perf_mon.curr_counter, equal_to(records[1]))
+        assert_that(len(perf_mon.counter_history), equal_to(2))
+
+    def test_persist_format_not_supported(self):
+        assert_that(calling(PerfManager().persist_perf_stats).with_args(
+            [], 'parquet'), raises(ValueError, 'parquet'))
+
+
 class MetricCounterRecordsTest(unittest.TestCase):
     def test_max_count(self):
         records = MetricCounterRecords()
@@ -148,6 +223,158 @@ class MetricCounterRecordsTest(unittest.TestCase):
         assert_that(records.prev, none())
 
 
+class SampleRecord(object):
+    def __init__(self, seconds, counters):
+        self.timestamp = datetime(2017, 1, 1) + timedelta(seconds=seconds)
+        self.counters = counters
+
+    def get_counters(self):
+        return self.counters
+
+
+def sample_records():
+    return [SampleRecord(0, {'reads': {'a': 0, 'b': 10}, 'temp': {'a': 1}}),
+            SampleRecord(10, {'reads': {'a': 100, 'b': 10}, 'temp': {}}),
+            SampleRecord(20, {'reads': {'a': 300, 'c': '5'}}),
+            SampleRecord(30, {'reads': {'a': 400, 'b': 20, 'c': 'x'}})]
+
+
+class CounterHistoryTest(unittest.TestCase):
+    def get_history(self, depth=3):
+        history = CounterHistory(depth)
+        for record in sample_records():
+            history.add_record(record)
+        return history
+
+    def test_depth(self):
+        history = self.get_history()
+        assert_that(len(history), equal_to(3))
+        assert_that(history.timestamps(),
+                    equal_to([r.timestamp for r in sample_records()[1:]]))
+        assert_that(history.paths(), equal_to(['reads', 'temp']))
+        assert_that(history.ids('reads'), equal_to(['a', 'b', 'c']))
+
+    def test_depth_too_small(self):
+        assert_that(calling(CounterHistory).with_args(1),
+                    raises(ValueError, 'at least 2'))
+
+    def test_values(self):
+        values = self.get_history().values('reads')
+        assert_that(values['a'], equal_to(400))
+        assert_that(values['b'], equal_to(20))
+        assert_that(values['c'], is_nan())
+
+    def test_rate(self):
+        rate = self.get_history().rate('reads')
+        assert_that(rate['a'], equal_to(15))
+        assert_that(rate['b'], equal_to(0.5))
+        assert_that(rate['c'], is_nan())
+
+    def test_rate_window(self):
+        history = self.get_history()
+        assert_that(history.rate('reads', 1)['a'], equal_to(10))
+        assert_that(history.rate('reads', timedelta(seconds=10))['a'],
+                    equal_to(10))
+        assert_that(history.rate('reads', 5)['a'], equal_to(15))
+
+    def test_rate_not_enough_records(self):
+        history = CounterHistory()
+        assert_that(history.rate('reads'), equal_to({}))
+        history.add_record(sample_records()[0])
+        assert_that(history.rate('reads'), equal_to({}))
+        assert_that(history.rate('not_found'), equal_to({}))
+
+    def test_rate_stats(self):
+        stats = self.get_history(4).stats('reads')
+        assert_that(stats['a']['min'], equal_to(10))
+        assert_that(stats['a']['max'], equal_to(20))
+        assert_that(stats['a']['avg'], close_to(13.333, 0.001))
+        assert_that(stats['a']['p95'], close_to(19, 0.001))
+        assert_that(stats['b']['avg'], equal_to(0))
+        assert_that(stats['c']['max'], is_nan())
+
+    def test_value_stats(self):
+        stats = self.get_history(4).stats('reads', rate=False)
+        assert_that(stats['a']['min'], equal_to(0))
+        assert_that(stats['a']['max'], equal_to(400))
+        assert_that(stats['a']['avg'], equal_to(200))
+        assert_that(stats['c']['p95'], equal_to(5))
+
+    def test_path_missing_in_record(self):
+        history = self.get_history(4)
+        assert_that(history.stats('temp', rate=False)['a']['max'],
+                    equal_to(1))
+        assert_that(history.rate('temp')['a'], is_nan())
+
+    def test_nbytes(self):
+        history = self.get_history()
+        # temp.a is only in the overwritten record
+        assert_that(history.nbytes, equal_to(8 * 3 * 3))
+        assert_that(history.ids('temp'), equal_to([]))
+
+    def test_churn_bounded(self):
+        history = CounterHistory(5)
+        for i in range(100):
+            ids = ['lun_{}'.format(i * 10 + j) for j in range(10)]
+            counters = {'reads': {_id: i for _id in ids + ['pool']},
+                        'path_{}'.format(i): {'a': i}}
+            history.add_record(SampleRecord(i, counters))
+        # ids of the latest 5 records, and the pool id seen in all of them
+        assert_that(len(history.ids('reads')), equal_to(51))
+        assert_that(history.nbytes,
+                    equal_to(8 * 5 * 51 + 8 * 5 * 5))
+        assert_that(history.paths(), equal_to(
+            ['path_95', 'path_96', 'path_97', 'path_98', 'path_99',
+             'reads']))
+        assert_that(history.values('reads')['lun_999'], equal_to(99))
+        assert_that(history.rate('reads')['pool'], equal_to(1))
+        assert_that(history.rate('reads')['lun_999'], is_nan())
+
+    def test_reset(self):
+        history = self.get_history()
+        history.reset()
+        assert_that(len(history), equal_to(0))
+        assert_that(history.nbytes, equal_to(0))
+
+    def test_pickle(self):
+        history = pickle.loads(pickle.dumps(self.get_history()))
+        assert_that(history.rate('reads')['a'], equal_to(15))
+        history.add_record(SampleRecord(40, {'reads': {'a': 500}}))
+        assert_that(history.rate('reads')['a'], equal_to(10))
+
+
+class CounterHistoryWithoutNumpyTest(CounterHistoryTest):
+    def setUp(self):
+        patcher = patch('storops.lib.metric.np', new=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class PerfManagerCounterHistoryTest(unittest.TestCase):
+    def test_add_metric_record(self):
+        perf_mon = PerfManager()
+        perf_mon.add_metric_record(sample_records()[0])
+        assert_that(perf_mon.counter_history, none())
+
+        history = perf_mon.enable_counter_history(5)
+        for record in sample_records():
+            perf_mon.add_metric_record(record)
+        perf_mon.add_metric_record(None)
+        perf_mon.add_metric_record('no counters')
+        assert_that(len(history), equal_to(4))
+        assert_that(perf_mon.counter_history.rate('reads', 1)['a'],
+                    equal_to(10))
+
+    def test_disable(self):
+        perf_mon = PerfManager()
+        history = perf_mon.enable_counter_history()
+        perf_mon.add_metric_record(sample_records()[0])
+        perf_mon.disable_perf_metric()
+        assert_that(len(history), equal_to(0))
+        perf_mon.disable_counter_history()
+        assert_that(perf_mon.counter_history, none())
+
+
 class SampleRscList(object):
     def __init__(self):
         self.list = [{'time': 1, 'name': 'a', 'ma': 1, 'mb': 2.0, 'mc': 'aaa'},
@@ -199,3 +426,25 @@ class MetricsDumperTest(unittest.TestCase):
         self.dumper.persist_metric_data(filename)
         exists = os.path.exists(filename)
         assert_that(exists, equal_to(True), '{} not found.'.format(filename))
+
+    def test_get_metrics_columns(self):
+        columns = self.dumper.get_metrics_columns()
+        assert_that(list(columns.keys()),
+                    equal_to(['time', 'name', 'ma', 'mb', 'mc']))
+        assert_that(columns['name'], equal_to(['a', 'b']))
+        assert_that(columns['mb'], equal_to([2.0, 5.0]))
+
+    def test_persist_metric_block(self):
+        folder = tempfile.mkdtemp(suffix='storops')
+        self.addCleanup(shutil.rmtree, folder, ignore_errors=True)
+        prefix = os.path.join(folder, 'sample')
+        self.dumper.persist_metric_block(prefix)
+        self.dumper.persist_metric_block(prefix)
+
+        columns = MetricsFileReader(prefix).read()
+        assert_that(list(columns['ma']), equal_to([1, 4, 1, 4]))
+        assert_that(columns['mc'], equal_to(['aaa', 'bbb'] * 2))
+
+    def test_persist_metric_block_no_prefix(self):
+        assert_that(calling(self.dumper.persist_metric_block),
+                    raises(ValueError))
@@ -0,0 +1,196 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from hamcrest import assert_that, equal_to, has_length, calling, raises, \
+    contains_string, only_contains, less_than
+from mock import patch
+
+from storops.lib.metric_file import MetricsFileWriter, MetricsFileReader, \
+    SAMPLE_TIME, encode_block, list_files
+from storops_test.utils import is_nan
+
+__author__ = 'Cedric Zhuang'
+
+HOUR = 3600
+T0 = 1475000000 - 1475000000 % HOUR
+
+
+def sample_columns(base=0):
+    return OrderedDict([('name', ['a', 'b', 'c']),
+                        ('reads', [base + 1, base + 2.5, None]),
+                        ('writes', [base + 4, base + 5, base + 6])])
+
+
+class MetricsFileTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp(suffix='storops')
+        self.prefix = os.path.join(self.path, '10.0.0.1_VNXLun')
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def get_writer(self, **kwargs):
+        kwargs.setdefault('rotation', timedelta(hours=1))
+        return MetricsFileWriter(self.prefix, **kwargs)
+
+    def get_reader(self):
+        return MetricsFileReader(self.prefix)
+
+    def test_write_read(self):
+        writer = self.get_writer()
+        writer.write(sample_columns(), T0 + 10)
+        writer.write(sample_columns(10), T0 + 20)
+
+        ret = self.get_reader().read()
+        assert_that(list(ret.keys()),
+                    equal_to([SAMPLE_TIME, 'name', 'reads', 'writes']))
+        assert_that(list(ret[SAMPLE_TIME]),
+                    equal_to([T0 + 10] * 3 + [T0 + 20] * 3))
+        assert_that(ret['name'], equal_to(['a', 'b', 'c'] * 2))
+        assert_that(list(ret['writes']),
+                    equal_to([4, 5, 6, 14, 15, 16]))
+        assert_that(ret['reads'][4], equal_to(12.5))
+        assert_that(ret['reads'][5], is_nan())
+
+    def test_rotation(self):
+        writer = self.get_writer()
+        for i in range(4):
+            writer.write(sample_columns(i), T0 + i * HOUR / 2)
+        files = list_files(self.prefix)
+        assert_that(files, has_length(2))
+        assert_that(files[0], contains_string('10.0.0.1_VNXLun_'))
+
+    def test_max_files(self):
+        writer = self.get_writer(max_files=2)
+        for i in range(5):
+            writer.write(sample_columns(i), T0 + i * HOUR)
+        assert_that(list_files(self.prefix), has_length(2))
+        ret = self.get_reader().read()
+        assert_that(list(ret['writes']), equal_to([7, 8, 9, 8, 9, 10]))
+
+    def test_read_time_range(self):
+        writer = self.get_writer()
+        for i in range(6):
+            writer.write(sample_columns(i), T0 + i * HOUR / 2)
+        reader = self.get_reader()
+        assert_that(reader.files(T0 + HOUR, T0 + 2 * HOUR), has_length(1))
+
+        ret = reader.read(T0 + HOUR / 2, T0 + 2 * HOUR)
+        assert_that(sorted(set(ret[SAMPLE_TIME])),
+                    equal_to([T0 + HOUR / 2, T0 + HOUR, T0 + 3 * HOUR / 2]))
+
+    def test_read_datetime_range(self):
+        writer = self.get_writer()
+        start = datetime(2016, 10, 1, 8)
+        for i in range(3):
+            writer.write(sample_columns(i), start + timedelta(minutes=i))
+        ret = self.get_reader().read(start + timedelta(minutes=1))
+        assert_that(list(ret['writes']), equal_to([5, 6, 7, 6, 7, 8]))
+
+    def test_read_names(self):
+        self.get_writer().write(sample_columns(), T0)
+        ret = self.get_reader().read(names=['writes', 'not_found'])
+        assert_that(list(ret.keys()), equal_to([SAMPLE_TIME, 'writes']))
+
+    def test_read_new_column(self):
+        writer = self.get_writer()
+        writer.write(sample_columns(), T0)
+        columns = sample_columns()
+        columns['busy'] = [1, 2, 3]
+        writer.write(columns, T0 + 1)
+
+        ret = self.get_reader().read()
+        assert_that(ret['busy'][0], is_nan())
+        assert_that(list(ret['busy'][3:]), equal_to([1, 2, 3]))
+
+    def test_read_empty(self):
+        ret = self.get_reader().read()
+        assert_that(list(ret.keys()), equal_to([SAMPLE_TIME]))
+        assert_that(ret[SAMPLE_TIME], has_length(0))
+
+    def test_text_column(self):
+        columns = OrderedDict([('state', ['ok', 1])])
+        self.get_writer().write(columns, T0)
+        assert_that(self.get_reader().read()['state'],
+                    equal_to(['ok', '1']))
+
+    def test_column_length_mismatch(self):
+        columns = OrderedDict([('a', [1, 2]), ('b', [1])])
+        assert_that(calling(encode_block).with_args(columns, T0),
+                    raises(ValueError, 'column b'))
+
+    def test_truncated_block(self):
+        writer = self.get_writer()
+        writer.write(sample_columns(), T0)
+        filename = writer.write(sample_columns(10), T0 + 1)
+        size = os.path.getsize(filename)
+        with open(filename, 'r+b') as f:
+            f.truncate(size - 3)
+        ret = self.get_reader().read()
+        assert_that(list(ret['writes']), equal_to([4, 5, 6]))
+
+    def test_compression(self):
+        columns = OrderedDict([('reads', [0.0] * 1000)])
+        compressed = encode_block(columns, T0)
+        raw = encode_block(columns, T0, compress_level=0)
+        assert_that(len(compressed), less_than(len(raw) // 10))
+
+        self.get_writer(compress_level=0).write(columns, T0)
+        assert_that(list(self.get_reader().read()['reads']),
+                    only_contains(0.0))
+
+    def test_export_csv(self):
+        self.get_writer().write(sample_columns(), T0)
+        filename = os.path.join(self.path, 'export.csv')
+        count = self.get_reader().export_csv(filename, names=['name',
+                                                              'writes'])
+        assert_that(count, equal_to(3))
+        with io.open(filename, newline='') as f:
+            rows = list(csv.reader(f))
+        assert_that(rows[0], equal_to([SAMPLE_TIME, 'name', 'writes']))
+        assert_that(rows[1][1:], equal_to(['a', '4.0']))
+
+    def test_write_all(self):
+        writer = self.get_writer()
+        files = writer.write_all([(sample_columns(), T0),
+                                  (sample_columns(1), T0 + 1),
+                                  (sample_columns(2), T0 + HOUR)])
+        assert_that(files, has_length(2))
+        ret = self.get_reader().read()
+        assert_that(list(ret['writes']),
+                    equal_to([4, 5, 6, 5, 6, 7, 6, 7, 8]))
+
+    def test_rotation_not_positive(self):
+        assert_that(calling(MetricsFileWriter).with_args(self.prefix, 0),
+                    raises(ValueError))
+
+
+class MetricsFileWithoutNumpyTest(MetricsFileTest):
+    def setUp(self):
+        super(MetricsFileWithoutNumpyTest, self).setUp()
+        patcher = patch('storops.lib.metric_file.np', new=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
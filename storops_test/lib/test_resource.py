@@ -18,14 +18,14 @@ from __future__ import unicode_literals
 import unittest
 
 from hamcrest import assert_that, instance_of, has_items, equal_to, raises, \
-    is_not
+    is_not, has_key, greater_than_or_equal_to
 
 from storops.lib.common import instance_cache
 from storops.lib.resource import ResourceListCollection
 from storops.unity.resource.lun import UnityLun
 from storops.unity.resource.sp import UnityStorageProcessor, \
     UnityStorageProcessorList
-from storops_test.unity.rest_mock import t_unity, patch_rest
+from storops_test.unity.rest_mock import t_unity, patch_rest, t_rest
 
 __author__ = 'Cedric Zhuang'
 
@@ -65,6 +65,27 @@ class ResourceListCollectionTest(unittest.TestCase):
         rlc.update()
         assert_that(t0, is_not(equal_to(rlc.timestamp)))
 
+    @patch_rest
+    def test_update_timings(self):
+        rlc = ResourceListCollection(
+            (t_unity().get_sp(), t_unity().get_lun()))
+        rlc.update(max_workers=2)
+        assert_that(rlc.timings, has_key(UnityStorageProcessor))
+        assert_that(rlc.timings[UnityLun], greater_than_or_equal_to(0))
+
+
+class ResourceTest(unittest.TestCase):
+    @patch_rest
+    def test_parsed_resource_evaluated(self):
+        lun = UnityLun(_id='sv_2', cli=t_rest())
+        lun.update()
+        assert_that(lun._parsed_resource.is_evaluated('name'),
+                    equal_to(False))
+        parsed = lun.parsed_resource
+        assert_that(all(parsed.is_evaluated(key) for key in parsed),
+                    equal_to(True))
+        assert_that(dict(parsed)['name'], equal_to('openstack_lun'))
+
 
 class ResourceListTest(unittest.TestCase):
     @patch_rest
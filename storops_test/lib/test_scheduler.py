@@ -0,0 +1,209 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import unittest
+from time import sleep, time
+
+from hamcrest import assert_that, equal_to, greater_than, less_than, \
+    calling, raises, close_to, has_entries, has_length, instance_of, \
+    same_instance
+
+from storops.lib.scheduler import CollectionScheduler, CollectionJob, \
+    get_scheduler
+
+__author__ = 'Cedric Zhuang'
+
+
+class CollectionJobTest(unittest.TestCase):
+    @staticmethod
+    def get_job(**kwargs):
+        return CollectionJob(CollectionScheduler(), 'job', lambda: None, 10,
+                             **kwargs)
+
+    def test_default_bounds(self):
+        job = self.get_job()
+        assert_that(job.min_interval, equal_to(10))
+        assert_that(job.max_interval, equal_to(40))
+
+    def test_interval_out_of_bounds(self):
+        assert_that(calling(self.get_job).with_args(min_interval=20),
+                    raises(ValueError, 'out of the bounds'))
+
+    def test_interval_not_positive(self):
+        assert_that(calling(CollectionJob).with_args(
+            CollectionScheduler(), 'job', None, 0), raises(ValueError))
+
+    def test_get_next_run(self):
+        job = self.get_job()
+        assert_that(job.get_next_run(100, 105), equal_to(110))
+        assert_that(job.skipped, equal_to(0))
+
+    def test_get_next_run_skip_ticks(self):
+        job = self.get_job()
+        assert_that(job.get_next_run(100, 125), equal_to(130))
+        assert_that(job.skipped, equal_to(2))
+        assert_that(job.get_next_run(100, 110), equal_to(120))
+        assert_that(job.skipped, equal_to(3))
+
+    def test_adapt_to_slow_run(self):
+        job = self.get_job()
+        job.avg_duration = 16
+        job._adapt()
+        assert_that(job.interval, equal_to(20))
+
+    def test_adapt_max_interval(self):
+        job = self.get_job(max_interval=15)
+        job.avg_duration = 100
+        job._adapt()
+        assert_that(job.interval, equal_to(15))
+
+    def test_adapt_back_to_base(self):
+        job = self.get_job()
+        job.interval = 30
+        job.avg_duration = 1
+        job._adapt()
+        assert_that(job.interval, equal_to(10))
+
+    def test_adapt_below_base(self):
+        job = self.get_job(min_interval=2)
+        job.avg_duration = 2
+        job._adapt()
+        assert_that(job.interval, equal_to(2.5))
+        job.avg_duration = 1
+        job._adapt()
+        assert_that(job.interval, equal_to(2))
+
+    def test_adapt_fast_run(self):
+        job = self.get_job(min_interval=2, smoothing=1)
+        job._on_finished(0, 16)
+        assert_that(job.interval, equal_to(20))
+        job._on_finished(0, 4)
+        assert_that(job.interval, equal_to(5))
+
+    def test_not_adaptive(self):
+        job = self.get_job(adaptive=False)
+        job._on_finished(0, 100)
+        assert_that(job.interval, equal_to(10))
+        assert_that(job.max_duration, equal_to(100))
+
+    def test_avg_duration(self):
+        job = self.get_job(smoothing=0.5)
+        job._on_finished(0, 4)
+        job._on_finished(0, 8)
+        assert_that(job.avg_duration, equal_to(6))
+        assert_that(job.runs, equal_to(2))
+
+
+class CollectionSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = CollectionScheduler()
+
+    def tearDown(self):
+        for job in self.scheduler.jobs:
+            job.stop()
+
+    def test_run_periodically(self):
+        count = []
+        job = self.scheduler.add('a', lambda: count.append(1), 0.05, phase=0)
+        sleep(0.33)
+        job.stop()
+        assert_that(len(count), greater_than(3))
+        assert_that(len(count), less_than(9))
+        assert_that(self.scheduler.jobs, has_length(0))
+
+    def test_no_overlap(self):
+        running = []
+        overlapped = []
+
+        def f():
+            if running:
+                overlapped.append(1)
+            running.append(1)
+            sleep(0.12)
+            running.pop()
+
+        job = self.scheduler.add('slow', f, 0.05, phase=0, adaptive=False)
+        sleep(0.5)
+        job.stop()
+        assert_that(overlapped, equal_to([]))
+        assert_that(job.skipped, greater_than(0))
+
+    def test_adaptive_interval(self):
+        job = self.scheduler.add('slow', lambda: sleep(0.1), 0.05, phase=0,
+                                 max_interval=0.1)
+        sleep(0.4)
+        job.stop()
+        assert_that(job.interval, equal_to(0.1))
+
+    def test_error_in_job(self):
+        def f():
+            raise ValueError('collect failed.')
+
+        job = self.scheduler.add('error', f, 0.05, phase=0)
+        sleep(0.12)
+        job.stop()
+        assert_that(job.errors, greater_than(0))
+        assert_that(job.last_error, instance_of(ValueError))
+
+    def test_phases_spread(self):
+        start = time()
+        jobs = [self.scheduler.add(str(i), lambda: None, 100)
+                for i in range(5)]
+        phases = sorted(job.next_run - start for job in jobs)
+        for p0, p1 in zip(phases[:-1], phases[1:]):
+            assert_that(p1 - p0, greater_than(10))
+
+    def test_get_stats(self):
+        job = self.scheduler.add('a', lambda: sleep(0.01), 0.05, phase=0)
+        sleep(0.08)
+        stats = self.scheduler.get_stats()
+        job.stop()
+        assert_that(stats, has_length(1))
+        assert_that(stats[0], has_entries(
+            name='a', base_interval=0.05, skipped=0, errors=0,
+            last_duration=close_to(0.01, 0.05)))
+        assert_that(stats[0]['runs'], greater_than(0))
+
+    def test_restart_after_all_stopped(self):
+        self.scheduler.add('a', lambda: None, 0.05, phase=0).stop()
+        sleep(0.05)
+        count = []
+        job = self.scheduler.add('b', lambda: count.append(1), 0.05, phase=0)
+        sleep(0.12)
+        job.stop()
+        assert_that(len(count), greater_than(0))
+
+    def test_max_workers(self):
+        scheduler = CollectionScheduler(max_workers=2)
+        running = []
+        concurrency = []
+
+        def f():
+            running.append(1)
+            concurrency.append(len(running))
+            sleep(0.05)
+            running.pop()
+
+        jobs = [scheduler.add(str(i), f, 0.05, phase=0) for i in range(4)]
+        sleep(0.3)
+        for job in jobs:
+            job.stop()
+        assert_that(max(concurrency), equal_to(2))
+        assert_that(scheduler._workers, has_length(2))
+
+    def test_get_scheduler(self):
+        assert_that(get_scheduler(), same_instance(get_scheduler()))
@@ -15,12 +15,21 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import codecs
+import os
+from os.path import join, dirname, abspath
 from unittest import TestCase
 
+import six
 from hamcrest import assert_that, equal_to, raises
 
 from storops.exception import StoropsException, check_error, \
-    VNXSpNotAvailableError, VNXNotSupportedError, UnityNameNotUniqueError
+    VNXSpNotAvailableError, VNXNotSupportedError, UnityNameNotUniqueError, \
+    VNXException, VNXPingNodeSuccess, VNXMoverInterfaceNotExistsError
+from storops.exception import _cli_exception_factory
+from storops.lib import ex_decorator_factory
+from storops.lib.ex_decorator_factory import ExceptionListDecoratorFactory, \
+    ExceptionClassifier, get_regex_guard
 from storops.unity.resource.host import UnityHost
 
 __author__ = 'Cedric Zhuang'
@@ -89,3 +98,103 @@ class ExceptionTest(TestCase):
         ex = UnityNameNotUniqueError("Multipath hosts found.", objects=host)
         assert_that(str(ex), equal_to('Multipath hosts found.'))
         assert_that(ex.objects, equal_to(host))
+
+
+class DemoErrorA(VNXException):
+    error_message = 'error a'
+
+
+class DemoErrorB(VNXException):
+    error_message = ['error b', 'error a']
+
+
+class DemoErrorC(VNXException):
+    error_code = 0x716d8021
+
+
+class DemoErrorD(VNXException):
+    error_regex = 'Error D.*happened'
+
+
+def linear_scan(output, exception_list):
+    for clz in exception_list:
+        msg = clz.get_error_message()
+        if isinstance(msg, (tuple, list, set)):
+            found = any(m in output for m in msg)
+        elif isinstance(msg, six.string_types):
+            found = msg in output
+        else:
+            found = msg.search(output) is not None
+        if found:
+            return clz
+    return None
+
+
+class ExceptionClassifierTest(TestCase):
+    @staticmethod
+    def get_factory(*clz_list):
+        factory = ExceptionListDecoratorFactory(VNXException)
+        decorator = factory.clz_decorator()
+        for clz in clz_list:
+            decorator(clz)
+        return factory
+
+    def check_priority(self):
+        factory = self.get_factory(DemoErrorD, DemoErrorB, DemoErrorA,
+                                   DemoErrorC)
+        get = factory.get_exception
+        assert_that(get('error a'), equal_to(DemoErrorB))
+        assert_that(get('some error a, ERROR d has happened'),
+                    equal_to(DemoErrorD))
+        assert_that(get('0x716d8021 error a'), equal_to(DemoErrorB))
+        assert_that(get('0x716d8021'), equal_to(DemoErrorC))
+        assert_that(get('all good'), equal_to(VNXException))
+        assert_that(get(''), equal_to(VNXException))
+        assert_that(get('all good', VNXSpNotAvailableError),
+                    equal_to(VNXSpNotAvailableError))
+
+    def test_priority_scan(self):
+        saved = ex_decorator_factory.ahocorasick
+        try:
+            ex_decorator_factory.ahocorasick = None
+            self.check_priority()
+        finally:
+            ex_decorator_factory.ahocorasick = saved
+
+    def test_priority_automaton(self):
+        if ex_decorator_factory.ahocorasick is None:
+            self.skipTest('pyahocorasick is not installed.')
+        self.check_priority()
+
+    def test_classifier_rebuilt_after_register(self):
+        factory = self.get_factory(DemoErrorA)
+        assert_that(factory.get_exception('error b'), equal_to(VNXException))
+        factory.clz_decorator()(DemoErrorB)
+        assert_that(len(factory.classifier), equal_to(2))
+        assert_that(factory.get_exception('error b'), equal_to(DemoErrorB))
+
+    def test_classifier_not_rebuilt(self):
+        factory = self.get_factory(DemoErrorA)
+        classifier = factory.classifier
+        factory.get_exception('error a')
+        assert_that(factory.classifier, equal_to(classifier))
+
+    def test_regex_guard(self):
+        assert_that(get_regex_guard(VNXPingNodeSuccess.get_error_message()),
+                    equal_to('ttl='))
+        assert_that(get_regex_guard(
+            VNXMoverInterfaceNotExistsError.get_error_message()),
+            equal_to('network interface '))
+        assert_that(get_regex_guard(DemoErrorD.get_error_message()),
+                    equal_to('error d'))
+
+    def test_same_as_linear_scan(self):
+        folder = join(dirname(abspath(__file__)), 'vnx', 'testdata',
+                      'block_output')
+        exception_list = _cli_exception_factory.exception_list
+        classifier = ExceptionClassifier(exception_list)
+        for name in os.listdir(folder):
+            with codecs.open(join(folder, name), 'r', 'utf-8') as f:
+                output = f.read()
+            assert_that(classifier.classify(output),
+                        equal_to(linear_scan(output, exception_list)), name)
@@ -162,6 +162,13 @@ class UnityCifsShareTest(TestCase):
         ace = ace_list[0]
         assert_that(ace.access_type, equal_to(ACEAccessTypeEnum.GRANT))
 
+    @patch_rest
+    def test_ace_list_stream(self):
+        share = UnityCifsShare(cli=t_rest(), _id='SMBShare_5')
+        aces = list(share.get_ace_list().stream())
+        assert_that(len(aces), equal_to(2))
+        assert_that(aces[0].access_type, equal_to(ACEAccessTypeEnum.GRANT))
+
     @patch_rest
     def test_ace_clear_access_success(self):
         share = UnityCifsShare(cli=t_rest(), _id='SMBShare_5')
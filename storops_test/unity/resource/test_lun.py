@@ -227,6 +227,17 @@ class UnityLunTest(TestCase):
         lun_list = UnityLunList.get(cli=t_rest())
         assert_that(len(lun_list), equal_to(5))
 
+    @patch_rest
+    def test_get_lun_stream(self):
+        luns = UnityLunList.get(cli=t_rest()).stream()
+        lun = next(luns)
+        assert_that(lun, instance_of(UnityLun))
+        assert_that(lun._cli, equal_to(t_rest()))
+        assert_that(lun.id, equal_to('sv_2'))
+        assert_that(lun.pool.id, equal_to('pool_1'))
+        assert_that(lun.pool._cli, equal_to(t_rest()))
+        assert_that(len(list(luns)), equal_to(4))
+
     @patch_rest
     def test_get_lun_doc(self):
         lun = UnityLun(_id='sv_2', cli=t_rest())
@@ -17,13 +17,15 @@ from __future__ import unicode_literals
 
 from unittest import TestCase
 
-from hamcrest import assert_that, equal_to, has_items, raises, instance_of
+from hamcrest import assert_that, equal_to, has_items, raises, \
+    instance_of, none, not_none
 
 from storops import MetricTypeEnum
 from storops.exception import UnityMetricQueryNotFoundError
 from storops.unity.calculator import IdValues
 from storops.unity.resource.metric import UnityMetric, UnityMetricList, \
-    UnityMetricRealTimeQuery, UnityMetricRealTimeQueryList
+    UnityMetricRealTimeQuery, UnityMetricRealTimeQueryList, \
+    UnityMetricQueryManager
 from storops_test.unity.rest_mock import t_rest, patch_rest
 
 __author__ = 'Cedric Zhuang'
@@ -78,6 +80,21 @@ class UnityMetricTest(TestCase):
         self.verify_metric_14732(*filter(lambda m: m.id == 14732, metrics))
         self.verify_metric_10234(*filter(lambda m: m.id == 10234, metrics))
 
+    @patch_rest
+    def test_iter_pages(self):
+        pages = list(UnityMetricList(cli=t_rest()).iter_pages())
+        assert_that(len(pages), equal_to(2))
+        assert_that(sum(len(page) for page in pages), equal_to(2411))
+        assert_that(pages[0][0], instance_of(UnityMetric))
+
+    @patch_rest
+    def test_stream(self):
+        metrics = UnityMetricList(cli=t_rest())
+        streamed = list(metrics.stream())
+        assert_that([m.id for m in streamed],
+                    equal_to([m.id for m in metrics]))
+        self.verify_metric_14732(*filter(lambda m: m.id == 14732, streamed))
+
 
 class UnityMetricRealTimeQueryTest(TestCase):
     @patch_rest
@@ -175,6 +192,94 @@ class UnityMetricRealTimeQueryTest(TestCase):
         assert_that(len(queries.get_query_result(paths)), equal_to(3))
 
 
+class UnityMetricQueryManagerTest(TestCase):
+    @patch_rest
+    def test_get_query_list_minimal_cover(self):
+        manager = UnityMetricQueryManager(t_rest(), 300)
+        paths = ['sp.*.storage.lun.*.reads',
+                 'sp.*.blockCache.global.summary.dirtyBytes']
+        queries = manager.get_query_list(paths)
+        assert_that(queries, instance_of(UnityMetricRealTimeQueryList))
+        assert_that(queries.id, equal_to([3]))
+
+    @patch_rest
+    def test_get_query_result_cached(self):
+        manager = UnityMetricQueryManager(t_rest(), 300)
+        paths = ['sp.*.blockCache.global.summary.dirtyBytes',
+                 'sp.*.physical.coreCount']
+        manager.get_query_result(paths)
+        ret = manager.get_query_result(paths)
+        assert_that(len(ret), equal_to(2))
+        assert_that(manager.list_count, equal_to(1))
+        assert_that(manager.create_count, equal_to(0))
+
+    @patch_rest
+    def test_get_query_result_refresh_on_failure(self):
+        manager = UnityMetricQueryManager(t_rest(), 300)
+        paths = ['sp.*.blockCache.global.summary.dirtyBytes']
+        manager.get_query_list(paths)
+        manager._queries = [UnityMetricRealTimeQuery(_id=99, cli=t_rest())]
+        ret = manager.get_query_result(paths)
+        assert_that(len(ret), equal_to(1))
+        assert_that(manager.query_ids, equal_to([3]))
+        assert_that(manager.list_count, equal_to(2))
+
+    @patch_rest
+    def test_merge_missing_paths_with_own_query(self):
+        manager = UnityMetricQueryManager(t_rest(), 300)
+        manager._owned.add(2)
+        paths = ['sp.*.physical.disk.*.reads',
+                 'sp.*.store.scsiBusDevice.*.calls']
+        queries = manager.get_query_list(paths)
+        assert_that(queries.id, equal_to([16]))
+        assert_that(manager.get_stats(), equal_to(
+            {'queries': [16], 'lists': 1, 'creates': 1, 'deletes': 1}))
+
+    @patch_rest
+    def test_delete_stale_own_query(self):
+        manager = UnityMetricQueryManager(t_rest(), 300)
+        manager._owned.add(2)
+        manager.get_query_list(['sp.*.blockCache.global.summary.dirtyBytes'])
+        assert_that(manager.query_ids, equal_to([3]))
+        assert_that(manager.delete_count, equal_to(1))
+
+    @patch_rest
+    def test_get_query_result_incremental(self):
+        manager = UnityMetricQueryManager(t_rest(), 300)
+        paths = ['sp.*.blockCache.global.summary.dirtyBytes',
+                 'sp.*.physical.coreCount']
+        r1 = manager.get_query_result(paths)
+        assert_that(r1.timestamp.minute, equal_to(45))
+
+        r2 = manager.get_query_result(paths)
+        assert_that(len(r2), equal_to(2))
+        assert_that(r2.timestamp.minute, equal_to(55))
+        dirty_bytes = r2.by_path('sp.*.blockCache.global.summary.dirtyBytes')
+        assert_that(dirty_bytes.sp_values['spa'], equal_to(72))
+
+        assert_that(manager.get_query_result(paths), none())
+        assert_that(manager.list_count, equal_to(1))
+
+    @patch_rest
+    def test_get_query_result_idle_refresh(self):
+        manager = UnityMetricQueryManager(t_rest(), 300, max_idle=1)
+        paths = ['sp.*.blockCache.global.summary.dirtyBytes']
+        manager.get_query_result(paths)
+        manager.get_query_result(paths)
+        assert_that(manager.get_query_result(paths), none())
+        manager.get_query_result(paths)
+        assert_that(manager.list_count, equal_to(2))
+
+    @patch_rest
+    def test_paths_changed(self):
+        manager = UnityMetricQueryManager(t_rest(), 300)
+        manager.get_query_list(['sp.*.storage.lun.*.reads'])
+        manager.get_query_list(['sp.*.storage.lun.*.reads'])
+        assert_that(manager.list_count, equal_to(1))
+        manager.get_query_list(['sp.*.blockCache.global.summary.dirtyBytes'])
+        assert_that(manager.list_count, equal_to(2))
+
+
 class UnityMetricQueryResultTest(TestCase):
     def verify_disk_reads_value(self, result):
         assert_that(result.path, equal_to('sp.*.physical.disk.*.reads'))
@@ -210,6 +315,18 @@ class UnityMetricQueryResultTest(TestCase):
         assert_that(sum_sp['dpe_disk_8'], equal_to(122362))
         assert_that(sum_sp['dpe_disk_1'], equal_to(839944))
 
+    @patch_rest
+    def test_get_counters(self):
+        counters = qr_6.get_counters()
+        reads = counters['sp.*.physical.disk.*.reads']
+        assert_that(reads['dpe_disk_8'], equal_to(122362))
+        assert_that(qr_6.timestamp, equal_to(qr_6[0].timestamp))
+
+    @patch_rest
+    def test_get_counters_sp_level(self):
+        result = qr_34.by_path('sp.*.cifs.smb1.basic.writes')
+        assert_that(result.get_counters()['spa'], equal_to(500))
+
     @patch_rest
     def test_diff_seconds(self):
         assert_that(qr_14.diff_seconds(qr_6), equal_to(163800.0))
@@ -222,6 +339,15 @@ class UnityMetricQueryResultTest(TestCase):
         assert_that(len(r2), equal_to(3))
         r1.merge(r2)
         assert_that(len(r1), equal_to(6))
+        for r in r2:
+            assert_that(r1.by_path(r.path), not_none())
+
+    @patch_rest
+    def test_filtered_by_path_reindexed(self):
+        results = get_query_result(3)
+        results.filtered_by_path(['sp.*.fibreChannel.blockSize'])
+        assert_that(len(results), equal_to(1))
+        assert_that(results.by_path('sp.*.physical.coreCount'), none())
 
     @patch_rest
     def test_sp_values(self):
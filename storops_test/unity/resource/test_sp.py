@@ -20,9 +20,11 @@ from os import path
 from unittest import TestCase
 
 from hamcrest import assert_that, equal_to, instance_of, only_contains, \
-    raises, contains_string, greater_than, is_not
+    raises, contains_string, greater_than, is_not, ends_with
 
+from storops.exception import UnityPerfMonNotEnabledError
 from storops.lib.common import get_file_size, get_local_folder
+from storops.lib.metric_file import list_files
 from storops.unity.enums import NodeEnum
 from storops.unity.resource.health import UnityHealth
 from storops.unity.resource.sp import UnityStorageProcessor, \
@@ -208,13 +210,39 @@ class UnityStorageProcessorTest(TestCase):
         assert_that(csv, contains_string('spa,SP A,89,87.0,89.0'))
         assert_that(csv, contains_string('spb,SP B,78,88.0,90.0'))
 
+    @patch_rest
+    def test_get_metrics(self):
+        metrics = self.sp_list.get_metrics()
+        assert_that(metrics['spa']['utilization'], equal_to(22))
+        assert_that(metrics['spb']['nfs_write_mbps'], equal_to(4.1))
+        assert_that(metrics['spb']['block_cache_read_hit_ratio'],
+                    equal_to(88.0))
+
+    @patch_rest
+    def test_get_metrics_frame(self):
+        sp_list = self.sp_list
+        frame = sp_list.get_metrics_frame(['net_in_mbps', 'utilization'])
+        assert_that(frame.names, equal_to(['net_in_mbps', 'utilization']))
+        assert_that(frame['net_in_mbps'], equal_to([1.1, 1.2]))
+        assert_that(frame.index, equal_to(list(sp_list)))
+
+    @patch_rest
+    def test_get_metrics_perf_not_enabled(self):
+        sp_list = UnityStorageProcessorList(cli=t_rest())
+        assert_that(sp_list.get_metrics,
+                    raises(UnityPerfMonNotEnabledError))
+
     FILENAME = path.join(get_local_folder(),
                          'unittest_sp_metric_persist_csv_file.csv')
 
+    PREFIX = path.join(get_local_folder(), 'unittest_sp_metric_persist')
+
     @classmethod
     def tearDownClass(cls):
         if os.path.exists(cls.FILENAME):
             os.remove(cls.FILENAME)
+        for filename in list_files(cls.PREFIX):
+            os.remove(filename)
 
     @patch_rest
     def test_persist_csv(self):
@@ -226,6 +254,22 @@ class UnityStorageProcessorTest(TestCase):
         new_file_size = get_file_size(self.FILENAME)
         assert_that(new_file_size, greater_than(file_size))
 
+    @patch_rest
+    def test_persist_metric_block(self):
+        self.sp_list.persist_metric_block(self.PREFIX)
+        self.sp_list.persist_metric_block(self.PREFIX)
+        columns = self.sp_list.read_persisted_metrics(prefix=self.PREFIX)
+        assert_that(columns['id'], equal_to(['spa', 'spb'] * 2))
+        assert_that(list(columns['net_in_mbps']),
+                    equal_to([1.1, 1.2] * 2))
+
+    @patch_rest
+    def test_default_metric_file_prefix(self):
+        sp_list = UnitySystem('10.244.223.61').get_sp()
+        prefix = sp_list.get_default_metric_file_prefix()
+        assert_that(prefix, contains_string('.storops'))
+        assert_that(prefix, ends_with('10.244.223.61_storageProcessor'))
+
     @patch_rest
     def test_repr_with_metric(self):
         spa, _ = self.sp_list
@@ -0,0 +1,280 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import asyncio
+import json
+import unittest
+
+from hamcrest import assert_that, equal_to, instance_of, raises, calling
+
+from storops.connection.exceptions import HTTPClientError
+from storops.lib.common import try_import
+from storops.unity.async_client import AsyncUnityClient
+from storops.unity.enums import HealthEnum
+from storops.unity.resource.lun import UnityLun, UnityLunList
+from storops_test.utils import read_test_file
+
+aiohttp = try_import('aiohttp')
+if aiohttp is not None:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+__author__ = 'Cedric Zhuang'
+
+
+class FakeUnity(object):
+    """ a tiny unity rest server for the async client. """
+
+    def __init__(self, lun_count=5, latency=0):
+        self.lun_count = lun_count
+        self.latency = latency
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.token_requests = 0
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_get('/api/types/user/instances', self.get_token)
+        app.router.add_get('/api/types/{type}', self.get_type)
+        app.router.add_get('/api/types/{type}/instances', self.get_all)
+        app.router.add_get('/api/instances/{type}/{id}', self.get)
+        app.router.add_post('/api/instances/{type}/{id}/action/{action}',
+                            self.action)
+        app.router.add_post('/api/types/{type}/instances', self.action)
+        app.router.add_post('/api/types/{type}/action/{action}',
+                            self.action)
+        app.router.add_delete('/api/instances/{type}/{id}', self.delete)
+        return app
+
+    @staticmethod
+    def json_response(text, status=200):
+        return web.Response(text=text, status=status,
+                            content_type='application/json')
+
+    async def track(self, request):
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.in_flight, self.max_in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+
+    async def get_token(self, request):
+        self.token_requests += 1
+        await self.track(request)
+        return web.Response(
+            headers={'emc-csrf-token': 'token_{}'.format(
+                self.token_requests)})
+
+    async def get_type(self, request):
+        await self.track(request)
+        name = request.match_info['type']
+        if name == 'not_supported':
+            return self.json_response(
+                read_test_file('unity/rest_data/error', '404.json'),
+                status=404)
+        return self.json_response(
+            read_test_file('unity/rest_data/{}'.format(name), 'type.json'))
+
+    async def get_all(self, request):
+        await self.track(request)
+        page = int(request.query.get('page', 1))
+        per_page = int(request.query.get('per_page', 2))
+        start = (page - 1) * per_page
+        end = min(start + per_page, self.lun_count)
+        body = {'entries': [{'content': {'id': 'sv_{}'.format(i)}}
+                            for i in range(start, end)],
+                'links': [{'rel': 'self', 'href': '&page={}'.format(page)}]}
+        if end < self.lun_count:
+            body['links'].append(
+                {'rel': 'next', 'href': '&page={}'.format(page + 1)})
+        if 'with_entrycount' in request.query:
+            body['entryCount'] = self.lun_count
+        return self.json_response(json.dumps(body))
+
+    async def get(self, request):
+        await self.track(request)
+        return self.json_response(read_test_file(
+            'unity/rest_data/{}'.format(request.match_info['type']),
+            '{}.json'.format(request.match_info['id'])))
+
+    def check_token(self, request):
+        return request.headers.get('emc-csrf-token') is not None
+
+    async def action(self, request):
+        await self.track(request)
+        if not self.check_token(request):
+            return web.Response(status=401)
+        body = await request.json()
+        return self.json_response(json.dumps({'content': body}))
+
+    async def delete(self, request):
+        await self.track(request)
+        if not self.check_token(request):
+            return web.Response(status=401)
+        return web.Response(status=204)
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp is not installed.')
+class AsyncUnityClientTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.unity = FakeUnity()
+        self.server = TestServer(self.unity.create_app(), loop=self.loop)
+        self.run_async(self.server.start_server(loop=self.loop))
+
+    def tearDown(self):
+        self.run_async(self.server.close())
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def call(self, func, *args, **kwargs):
+        async def _call():
+            async with self.get_client() as cli:
+                return await func(cli, *args, **kwargs)
+
+        return self.run_async(_call())
+
+    def get_client(self, **kwargs):
+        cli = AsyncUnityClient('127.0.0.1', 'admin', 'Password123!',
+                               **kwargs)
+        cli.base_url = str(self.server.make_url('')).rstrip('/')
+        return cli
+
+    def test_get_all(self):
+        resp = self.call(AsyncUnityClient.get_all, 'lun',
+                         base_fields=('id',))
+        ids = [e['content']['id'] for e in resp.entries]
+        assert_that(ids, equal_to(['sv_{}'.format(i) for i in range(5)]))
+        assert_that(len(self.unity.requests), equal_to(3))
+        first = self.unity.requests[0]
+        assert_that(first.query['with_entrycount'], equal_to('true'))
+        assert_that(first.query['fields'], equal_to('id'))
+
+    def test_get_all_filter_and_per_page(self):
+        self.call(AsyncUnityClient.get_all, 'lun', base_fields=('id',),
+                  the_filter={'name': 'abc'}, per_page=10)
+        assert_that(len(self.unity.requests), equal_to(1))
+        query = self.unity.requests[0].query
+        assert_that(query['filter'], equal_to('name eq "abc"'))
+        assert_that(query['per_page'], equal_to('10'))
+
+    def test_get_all_fields_from_type(self):
+        self.call(AsyncUnityClient.get_all, 'lun', nested_fields='pool.name')
+        query = self.unity.requests[1].query
+        assert_that(query['fields'].split(','), instance_of(list))
+        assert_that('pool.name' in query['fields'], equal_to(True))
+        assert_that('sizeTotal' in query['fields'], equal_to(True))
+
+    def test_get_all_not_supported(self):
+        resp = self.call(AsyncUnityClient.get_all, 'not_supported')
+        assert_that(resp.entries, equal_to([]))
+
+    def test_get_all_bounded_concurrency(self):
+        self.unity.lun_count = 20
+        self.unity.latency = 0.02
+
+        async def _get_all():
+            async with self.get_client(max_concurrency=2) as cli:
+                return await cli.get_all('lun', base_fields=('id',))
+
+        resp = self.run_async(_get_all())
+        assert_that(len(resp.entries), equal_to(20))
+        assert_that(self.unity.max_in_flight, equal_to(2))
+
+    def test_get_clients_concurrently(self):
+        self.unity.latency = 0.02
+
+        async def _get_all(cli):
+            async with cli:
+                return await cli.get_all('lun', base_fields=('id',))
+
+        async def _get_all_clients():
+            clients = [self.get_client(max_concurrency=1) for _ in range(4)]
+            return await asyncio.gather(*map(_get_all, clients))
+
+        responses = self.run_async(_get_all_clients())
+        assert_that([len(r.entries) for r in responses],
+                    equal_to([5] * 4))
+        assert_that(self.unity.max_in_flight, equal_to(4))
+
+    def test_get(self):
+        resp = self.call(AsyncUnityClient.get, 'lun', 'sv_2',
+                         base_fields=('id', 'name'))
+        assert_that(resp.first_content['name'], equal_to('openstack_lun'))
+
+    def test_update_resource(self):
+        lun = self.call(AsyncUnityClient.update, UnityLun(_id='sv_2'))
+        assert_that(lun.name, equal_to('openstack_lun'))
+        assert_that(lun.health.value, equal_to(HealthEnum.OK))
+
+    def test_update_resource_list(self):
+        luns = self.call(AsyncUnityClient.update,
+                         UnityLunList(per_page=2, name='abc'))
+        assert_that(len(luns), equal_to(5))
+        assert_that(luns[0], instance_of(UnityLun))
+        query = self.unity.requests[-1].query
+        assert_that(query['filter'], equal_to('name eq "abc"'))
+
+    def test_action_refresh_csrf_token(self):
+        resp = self.call(AsyncUnityClient.action, 'lun', 'sv_2', 'modify',
+                         name='new', description=None)
+        assert_that(resp.first_content, equal_to({'name': 'new'}))
+        assert_that(self.unity.token_requests, equal_to(1))
+
+    def test_action_refresh_csrf_token_once(self):
+        async def _modify():
+            async with self.get_client() as cli:
+                return await asyncio.gather(
+                    *[cli.modify('lun', 'sv_2', name='lun_{}'.format(i))
+                      for i in range(5)])
+
+        responses = self.run_async(_modify())
+        assert_that(len(responses), equal_to(5))
+        assert_that(self.unity.token_requests, equal_to(1))
+
+    def test_delete_async(self):
+        kwargs = {'async': True}
+        self.call(AsyncUnityClient.delete, 'lun', 'sv_2', **kwargs)
+        query = self.unity.requests[-1].query
+        assert_that(query['timeout'], equal_to('0'))
+        assert_that(query['compact'], equal_to('True'))
+
+    def test_post_async(self):
+        kwargs = {'async': True}
+        resp = self.call(AsyncUnityClient.post, 'lun', name='l1', **kwargs)
+        assert_that(resp.first_content, equal_to({'name': 'l1'}))
+        query = self.unity.requests[-1].query
+        assert_that(query['timeout'], equal_to('0'))
+
+    def test_type_action_async(self):
+        kwargs = {'async': True}
+        resp = self.call(AsyncUnityClient.type_action, 'storageResource',
+                         'createLun', name='l1', **kwargs)
+        assert_that(resp.first_content, equal_to({'name': 'l1'}))
+        query = self.unity.requests[-1].query
+        assert_that(query['timeout'], equal_to('0'))
+
+    def test_unauthorized(self):
+        self.unity.check_token = lambda request: False
+
+        def _f():
+            self.call(AsyncUnityClient.delete, 'lun', 'sv_2')
+
+        assert_that(calling(_f), raises(HTTPClientError))
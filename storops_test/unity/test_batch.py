@@ -0,0 +1,175 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import unicode_literals
+
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+
+from hamcrest import assert_that, equal_to, raises, only_contains, \
+    less_than_or_equal_to, instance_of, calling
+from mock import patch
+
+from storops.exception import UnityResourceNotFoundError
+from storops.unity.batch import UnityBatch
+from storops.unity.resp import RestResponse
+from storops_test.unity.rest_mock import patch_rest, t_rest
+
+__author__ = 'Cedric Zhuang'
+
+
+class FakeCli(object):
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def _call(self, *args, **kwargs):
+        with self.lock:
+            self.calls.append((args, kwargs))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            if args[-1] == 'not_found':
+                raise UnityResourceNotFoundError(
+                    '{} not found.'.format(args[-2]))
+            return RestResponse({'args': list(args)})
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def post(self, type_name, **kwargs):
+        return self._call('post', type_name, **kwargs)
+
+    def action(self, type_name, obj_id, action, **kwargs):
+        return self._call('action', type_name, obj_id, action, **kwargs)
+
+    def type_action(self, type_name, action, **kwargs):
+        return self._call('type_action', type_name, action, **kwargs)
+
+    def delete(self, type_name, _id, **kwargs):
+        return self._call('delete', type_name, _id, **kwargs)
+
+
+class UnityBatchTest(unittest.TestCase):
+    def test_execute_on_exit(self):
+        cli = FakeCli()
+        with UnityBatch(cli) as b:
+            f1 = b.post('lun', name='l1')
+            f2 = b.modify('lun', 'sv_1', size=3)
+            f3 = b.type_action('lun', 'createLun', name='l2')
+            f4 = b.delete('lun', 'sv_2')
+            assert_that(len(b), equal_to(4))
+            assert_that(f1.done(), equal_to(False))
+        assert_that(len(b), equal_to(0))
+        assert_that(f1.result().body['args'], equal_to(['post', 'lun']))
+        assert_that(f2.result().body['args'],
+                    equal_to(['action', 'lun', 'sv_1', 'modify']))
+        assert_that(f3.result().body['args'],
+                    equal_to(['type_action', 'lun', 'createLun']))
+        assert_that(f4.result().body['args'],
+                    equal_to(['delete', 'lun', 'sv_2']))
+
+    def test_bounded_parallelism(self):
+        cli = FakeCli()
+        b = UnityBatch(cli, max_workers=3)
+        futures = [b.delete('lun', 'sv_{}'.format(i)) for i in range(10)]
+        ret = b.execute()
+        assert_that(ret, equal_to(futures))
+        assert_that(cli.max_running, less_than_or_equal_to(3))
+        assert_that(cli.max_running > 1, equal_to(True))
+        assert_that([f.done() for f in futures], only_contains(True))
+
+    def test_error_of_one_operation(self):
+        cli = FakeCli(delay=0)
+        with UnityBatch(cli) as b:
+            f1 = b.delete('lun', 'not_found')
+            f2 = b.delete('lun', 'sv_2')
+
+        def f():
+            f1.result()
+
+        assert_that(f, raises(UnityResourceNotFoundError))
+        assert_that(f2.result(), instance_of(RestResponse))
+
+    def test_cancel_on_exception(self):
+        cli = FakeCli(delay=0)
+
+        def f():
+            with UnityBatch(cli) as b:
+                futures.append(b.delete('lun', 'sv_1'))
+                raise ValueError('abort')
+
+        futures = []
+        assert_that(f, raises(ValueError))
+        assert_that(futures[0].cancelled(), equal_to(True))
+        assert_that(cli.calls, equal_to([]))
+
+    def test_submit_callable(self):
+        with UnityBatch(FakeCli()) as b:
+            f = b.submit(lambda x, y: x + y, 1, y=2)
+        assert_that(f.result(), equal_to(3))
+
+    def test_job_mode_workers_not_held(self):
+        class FakeTracker(object):
+            def __init__(self):
+                self.futures = []
+
+            def track(self, resp, **kwargs):
+                future = Future()
+                self.futures.append(future)
+                return future
+
+        cli = FakeCli(delay=0)
+        cli.job_tracker = FakeTracker()
+        cli.delete = lambda type_name, _id, **kwargs: RestResponse(
+            {'id': 'N-{}'.format(_id)})
+        b = UnityBatch(cli, max_workers=1, use_job=True)
+        futures = [b.delete('lun', i) for i in range(3)]
+        thread = threading.Thread(target=b.execute)
+        thread.start()
+        for _ in range(100):
+            if len(cli.job_tracker.futures) == 3:
+                break
+            time.sleep(0.01)
+        # all the jobs are submitted by one worker before any completes
+        assert_that(len(cli.job_tracker.futures), equal_to(3))
+        assert_that(futures[0].done(), equal_to(False))
+        cli.job_tracker.futures[0].set_exception(ValueError('job failed.'))
+        for f in cli.job_tracker.futures[1:]:
+            f.set_result(None)
+        thread.join(5)
+        assert_that(thread.is_alive(), equal_to(False))
+        assert_that(calling(futures[0].result), raises(ValueError))
+        assert_that(futures[2].result().job_id, equal_to('N-2'))
+
+    @patch_rest
+    def test_job_mode(self):
+        cli = t_rest()
+        tracker = cli.job_tracker
+        tracker.min_interval = 0.01
+        with patch.object(tracker, 'poll', wraps=tracker.poll) as poll:
+            with cli.batch(use_job=True, timeout=1) as b:
+                f = b.delete('storageResource', 'res_30',
+                             forceSnapDeletion=False, forceVvolDeletion=False)
+            resp = f.result()
+        assert_that(resp.job_id, equal_to('N-345'))
+        assert_that(poll.call_count, equal_to(1))
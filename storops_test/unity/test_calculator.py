@@ -15,10 +15,13 @@
 #    under the License.
 from __future__ import unicode_literals, division
 
-from unittest import TestCase
+import gc
+import pickle
+from unittest import TestCase, SkipTest
 
 from hamcrest import assert_that, has_items, equal_to, raises, has_item, \
-    close_to, is_not
+    close_to, is_not, instance_of, none, same_instance, has_length
+from mock import patch
 
 from storops.unity import calculator
 from storops.unity.calculator import calculators, IdValues, \
@@ -32,6 +35,7 @@ from storops.unity.calculator import calculators, IdValues, \
     sp_total_byte_rate, system_byte_rate, system_total_byte_rate
 from storops.unity.resource.disk import UnityDisk
 from storops.unity.resource.filesystem import UnityFileSystem
+from storops.unity.resource.metric import UnityMetricQueryResultList
 from storops_test.unity.resource.test_metric import qr_6, qr_14, qr_17, \
     qr_34, qr_128, qr_130
 from storops_test.unity.rest_mock import patch_rest
@@ -83,6 +87,64 @@ class CalculatorMetaInfoTest(TestCase):
         expected = ((4158667 + 5) - (2966780 + 5)) / 163800.0
         assert_that(value, equal_to(expected))
 
+    @patch_rest
+    def test_get_metric_values_cached(self):
+        values = calculators.get_metric_values(
+            UnityDisk, 'read_iops', MockCli(qr_6, qr_14))
+        assert_that(calculators.get_metric_values(
+            'UnityDisk', 'read_iops', MockCli(qr_6, qr_14)),
+            same_instance(values))
+        assert_that(calculators.get_metric_values(
+            UnityDisk, 'read_iops', MockCli(qr_14, qr_6)),
+            is_not(same_instance(values)))
+
+    @patch_rest
+    def test_get_metric_values_cached_per_record(self):
+        calc = calculator.UnityCalculatorMetaInfo()
+        values_1 = calc.get_metric_values(
+            UnityDisk, 'read_iops', MockCli(qr_6, qr_14))
+        # another system with its own records
+        values_2 = calc.get_metric_values(
+            UnityDisk, 'read_iops', MockCli(qr_14, qr_6))
+        assert_that(calc.get_metric_values(
+            UnityDisk, 'read_iops', MockCli(qr_6, qr_14)),
+            same_instance(values_1))
+        assert_that(calc.get_metric_values(
+            UnityDisk, 'read_iops', MockCli(qr_14, qr_6)),
+            same_instance(values_2))
+
+    def test_values_cache_released_with_record(self):
+        calc = calculator.UnityCalculatorMetaInfo()
+        prev = UnityMetricQueryResultList()
+        curr = UnityMetricQueryResultList()
+        calc._get_values_cache(prev, curr)
+        assert_that(calc._values_cache, has_length(1))
+        del curr
+        gc.collect()
+        assert_that(calc._values_cache, has_length(0))
+
+    @patch_rest
+    def test_get_metric_values_not_cached(self):
+        calc = calculator.UnityCalculatorMetaInfo(use_cache=False)
+        values = calc.get_metric_values(
+            UnityDisk, 'read_iops', MockCli(qr_6, qr_14))
+        assert_that(calc.get_metric_values(
+            UnityDisk, 'read_iops', MockCli(qr_6, qr_14)),
+            is_not(same_instance(values)))
+        expected = ((4158667 + 5) - (2966780 + 5)) / 163800.0
+        assert_that(values['dae_0_1_disk_2'], equal_to(expected))
+
+    @patch_rest
+    def test_get_metric_value_returns_copy(self):
+        disk_counters = MockCli(qr_6, qr_14)
+        value = calculators.get_metric_value(
+            UnityDisk, 'read_iops', disk_counters)
+        value.set('dae_0_1_disk_2', 0)
+        expected = ((4158667 + 5) - (2966780 + 5)) / 163800.0
+        assert_that(calculators.get_metric_value(
+            UnityDisk, 'read_iops', disk_counters, 'dae_0_1_disk_2'),
+            equal_to(expected))
+
     @patch_rest
     def test_get_metric_value_no_prev_data(self):
         disk_counters = MockCli(None, qr_6)
@@ -228,6 +290,14 @@ class IdValuesTest(TestCase):
         assert_that(r['a'], is_nan())
         assert_that(r['b'], is_nan())
 
+    def test_values_in_array(self):
+        if calculator.np is None:
+            raise SkipTest('numpy is not installed.')
+        assert_that(self.o1._values, instance_of(calculator.np.ndarray))
+        assert_that(self.o3._values, instance_of(list))
+        assert_that((self.o1 / self.o2)._values,
+                    instance_of(calculator.np.ndarray))
+
     def test_mul_none(self):
         r = self.o1 * None
         assert_that(r['a'], equal_to(2))
@@ -259,6 +329,57 @@ class IdValuesTest(TestCase):
         assert_that(r['a'], equal_to(2))
         assert_that(r['b'], equal_to(51))
 
+    def test_same_ids_share_index(self):
+        r = IdValues({'b': 5, 'a': 1})
+        assert_that(r._index, same_instance(self.o1._index))
+        assert_that((r - self.o1)._index, same_instance(self.o1._index))
+        assert_that(list(r.keys()), equal_to(['a', 'b']))
+
+    def test_int_values_kept(self):
+        r = self.o1 + self.o2
+        assert_that(r['a'], instance_of(int))
+        assert_that(r.to_dict(), equal_to({'a': 9, 'b': 3, 'c': 13}))
+
+    def test_none_value(self):
+        assert_that(self.o3['a'], none())
+        assert_that(self.o3.get('a', 0), none())
+        assert_that(self.o3.get('c', 0), equal_to(0))
+        r = self.o3 + self.o3
+        assert_that(r['a'], none())
+        assert_that(r['b'], equal_to(34))
+
+    def test_set(self):
+        r = self.o1.copy()
+        r.set('c', 7)
+        r.set('a', 1.5)
+        assert_that(r.to_dict(), equal_to({'a': 1.5, 'b': 3, 'c': 7}))
+        assert_that(self.o1.to_dict(), equal_to({'a': 2, 'b': 3}))
+
+    def test_pickle(self):
+        r = pickle.loads(pickle.dumps(self.o1))
+        assert_that(r.to_dict(), equal_to({'a': 2, 'b': 3}))
+        r = r + self.o1
+        assert_that(r.to_dict(), equal_to({'a': 4, 'b': 6}))
+
+    def test_pickle_empty(self):
+        r = pickle.loads(pickle.dumps(IdValues()))
+        assert_that(len(r + self.o1), equal_to(2))
+
+    def test_str(self):
+        assert_that(str(IdValues({'a': 2})), equal_to("IdValues({'a': 2})"))
+
+
+class IdValuesWithoutNumpyTest(IdValuesTest):
+    def setUp(self):
+        patcher = patch('storops.unity.calculator.np', new=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super(IdValuesWithoutNumpyTest, self).setUp()
+
+    def test_values_in_list(self):
+        assert_that(self.o1._values, instance_of(list))
+        assert_that((self.o1 / self.o2)._values, instance_of(list))
+
 
 class CalculatorTest(TestCase):
     @patch_rest
@@ -374,6 +495,13 @@ class CalculatorTest(TestCase):
         assert_that(ret['spa'], equal_to(27))
         assert_that(ret['spb'], equal_to(28))
 
+    @patch_rest
+    def test_sp_fact_not_modify_cache(self):
+        path = 'sp.*.platform.storageProcessorTemperature'
+        ret = sp_fact(path, qr_17, qr_34)
+        ret.set('spa', 0)
+        assert_that(sp_fact(path, qr_17, qr_34)['spa'], equal_to(27))
+
     def test_only_one_path_set(self):
         assert_that(only_one_path({'abc'}), equal_to('abc'))
 
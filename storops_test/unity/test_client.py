@@ -16,11 +16,15 @@
 
 from __future__ import unicode_literals
 
+import threading
 import unittest
 
 from hamcrest import assert_that, equal_to, only_contains, none, any_of, \
-    contains_string, raises
+    contains_string, raises, has_item, not_
+from mock import patch
+from six.moves.urllib.parse import urlparse, parse_qs
 
+from storops.exception import UnityResourceNotSupportedError
 from storops.unity.client import UnityClient, UnityDoc
 from storops.unity.enums import RaidTypeEnum, HealthEnum, RaidTypeEnumList, \
     ServiceLevelEnum, ServiceLevelEnumList
@@ -142,6 +146,10 @@ class UnityClientTest(unittest.TestCase):
         ret = UnityClient.dict_to_filter_string({'a': 1, 'b': 'c'})
         assert_that(ret, equal_to('a eq 1 and b eq "c"'))
 
+    def test_dict_to_filter_string_as_is(self):
+        ret = UnityClient.dict_to_filter_string('a eq 1 and b gt "c"')
+        assert_that(ret, equal_to('a eq 1 and b gt "c"'))
+
     def test_dict_to_filter_unity_resource(self):
         ret = UnityClient.dict_to_filter_string(
             {'c': 1, 'b': UnityLun(_id='lun_1')})
@@ -178,6 +186,162 @@ class UnityClientTest(unittest.TestCase):
         assert_that(t_rest().system_version, equal_to('4.1.0'))
 
 
+class FakePagedRest(object):
+    """ fake rest connector returns `count` entries page by page. """
+
+    def __init__(self, count, default_per_page=3):
+        self.count = count
+        self.default_per_page = default_per_page
+        self.urls = []
+        self.use_cache = set()
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def get(self, url, use_cache=True):
+        with self._lock:
+            self.urls.append(url)
+            self.use_cache.add(use_cache)
+            self.threads.add(threading.current_thread().ident)
+        params = parse_qs(urlparse(url).query)
+        page = int(params.get('page', [1])[0])
+        per_page = int(params.get('per_page', [self.default_per_page])[0])
+        start = (page - 1) * per_page
+        end = min(start + per_page, self.count)
+        body = {'entries': [{'content': {'id': 'sv_{}'.format(i)}}
+                            for i in range(start, end)],
+                'links': [{'rel': 'self', 'href': '&page={}'.format(page)}]}
+        if end < self.count:
+            body['links'].append(
+                {'rel': 'next', 'href': '&page={}'.format(page + 1)})
+        if 'with_entrycount' in params:
+            body['entryCount'] = self.count
+        return body
+
+
+class UnityClientPagingTest(unittest.TestCase):
+    def get_ids(self, resp):
+        return [entry['content']['id'] for entry in resp.entries]
+
+    def get_all(self, rest, **kwargs):
+        cli = UnityClient('10.244.223.61', 'admin', 'Password123!',
+                          verify=False, page_workers=kwargs.pop(
+                              'client_workers', 1))
+        with patch.object(cli._rest, 'get', new=rest.get):
+            return cli.get_all('lun', base_fields=('id',), **kwargs)
+
+    def test_get_all_sequential(self):
+        rest = FakePagedRest(10)
+        ret = self.get_all(rest)
+        assert_that(self.get_ids(ret),
+                    equal_to(['sv_{}'.format(i) for i in range(10)]))
+        assert_that(len(rest.urls), equal_to(4))
+        assert_that(rest.urls[0], not_(contains_string('with_entrycount')))
+
+    def test_get_all_per_page(self):
+        rest = FakePagedRest(10)
+        ret = self.get_all(rest, per_page=5)
+        assert_that(len(ret.entries), equal_to(10))
+        assert_that(len(rest.urls), equal_to(2))
+        assert_that(rest.urls[1], contains_string('per_page=5'))
+
+    def test_get_all_parallel(self):
+        rest = FakePagedRest(100)
+        ret = self.get_all(rest, page_workers=4)
+        assert_that(self.get_ids(ret),
+                    equal_to(['sv_{}'.format(i) for i in range(100)]))
+        assert_that(len(rest.urls), equal_to(34))
+        assert_that(rest.urls[0], contains_string('with_entrycount=true'))
+        main_thread = threading.current_thread().ident
+        assert_that(rest.threads, has_item(not_(main_thread)))
+
+    def test_get_all_parallel_client_default(self):
+        rest = FakePagedRest(7)
+        ret = self.get_all(rest, client_workers=4)
+        assert_that(len(ret.entries), equal_to(7))
+        assert_that(rest.urls[0], contains_string('with_entrycount=true'))
+
+    def test_get_all_parallel_one_page(self):
+        rest = FakePagedRest(2)
+        ret = self.get_all(rest, page_workers=4)
+        assert_that(self.get_ids(ret), equal_to(['sv_0', 'sv_1']))
+        assert_that(len(rest.urls), equal_to(1))
+
+    def test_get_all_parallel_new_entries_after_count(self):
+        rest = FakePagedRest(9)
+        origin_get = rest.get
+
+        def _get(url, **kwargs):
+            ret = origin_get(url, **kwargs)
+            rest.count = 11
+            return ret
+
+        rest.get = _get
+        ret = self.get_all(rest, page_workers=4)
+        assert_that(self.get_ids(ret),
+                    equal_to(['sv_{}'.format(i) for i in range(11)]))
+
+    def test_get_all_parallel_no_entry_count(self):
+        rest = FakePagedRest(10)
+        origin_get = rest.get
+
+        def _get(url, **kwargs):
+            ret = origin_get(url, **kwargs)
+            ret.pop('entryCount', None)
+            return ret
+
+        rest.get = _get
+        ret = self.get_all(rest, page_workers=4)
+        assert_that(self.get_ids(ret),
+                    equal_to(['sv_{}'.format(i) for i in range(10)]))
+        assert_that(len(rest.urls), equal_to(4))
+
+    def test_get_all_without_cache(self):
+        rest = FakePagedRest(10)
+        self.get_all(rest, use_cache=False)
+        assert_that(len(rest.urls), equal_to(4))
+        assert_that(rest.use_cache, equal_to({False}))
+
+    def test_get_all_parallel_without_cache(self):
+        rest = FakePagedRest(10)
+        self.get_all(rest, page_workers=4, use_cache=False)
+        assert_that(rest.use_cache, equal_to({False}))
+
+    def test_iter_pages(self):
+        rest = FakePagedRest(10)
+        cli = UnityClient('10.244.223.61', 'admin', 'Password123!',
+                          verify=False)
+        with patch.object(cli._rest, 'get', new=rest.get):
+            pages = cli.iter_pages('lun', base_fields=('id',), per_page=4)
+            assert_that(len(rest.urls), equal_to(0))
+            first = next(pages)
+            assert_that(self.get_ids(first),
+                        equal_to(['sv_0', 'sv_1', 'sv_2', 'sv_3']))
+            assert_that(len(rest.urls), equal_to(1))
+            rest_ids = [self.get_ids(page) for page in pages]
+        assert_that(rest_ids, equal_to([['sv_4', 'sv_5', 'sv_6', 'sv_7'],
+                                        ['sv_8', 'sv_9']]))
+        assert_that(len(rest.urls), equal_to(3))
+
+    def test_iter_pages_not_supported(self):
+        cli = UnityClient('10.244.223.61', 'admin', 'Password123!',
+                          verify=False)
+        with patch.object(cli, 'get_fields',
+                          side_effect=UnityResourceNotSupportedError()):
+            pages = list(cli.iter_pages('lun'))
+        assert_that(pages, equal_to([]))
+
+    def test_resource_list_per_page(self):
+        rest = FakePagedRest(10)
+        cli = UnityClient('10.244.223.61', 'admin', 'Password123!',
+                          verify=False)
+        with patch.object(cli._rest, 'get', new=rest.get):
+            with patch.object(cli, 'get_fields', return_value=('id',)):
+                luns = UnityLunList.get(cli, per_page=4)
+                assert_that(len(luns), equal_to(10))
+        assert_that(rest.urls, has_item(contains_string('per_page=4')))
+        assert_that(len(rest.urls), equal_to(3))
+
+
 class UnityDocTest(unittest.TestCase):
     @patch_rest
     def test_get_doc_of_field(self):
@@ -0,0 +1,176 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import unicode_literals
+
+import pickle
+import threading
+import time
+import unittest
+
+from hamcrest import assert_that, equal_to, raises, instance_of, \
+    has_length, less_than_or_equal_to
+
+from storops.exception import JobStateError, JobTimeoutException
+from storops.unity.enums import JobStateEnum
+from storops.unity.job_tracker import UnityJobTracker
+from storops.unity.resource.job import UnityJob
+from storops.unity.resp import RestResponse
+from storops_test.unity.rest_mock import patch_rest, t_rest
+
+__author__ = 'Cedric Zhuang'
+
+
+class FakeJobCli(object):
+    ip = '10.0.0.1'
+
+    def __init__(self):
+        self.states = {}
+        self.queries = []
+        self.use_cache = set()
+
+    def get_all(self, type_name, the_filter=None, use_cache=True):
+        ids = the_filter['id']
+        self.queries.append(ids)
+        self.use_cache.add(use_cache)
+        entries = [{'content': {'id': _id, 'state': self.states[_id]}}
+                   for _id in ids if _id in self.states]
+        return RestResponse({'entries': entries})
+
+    @staticmethod
+    def is_perf_metric_enabled(rsc):
+        return False
+
+    def set_state(self, job_id, state):
+        self.states[job_id] = state.value[0]
+
+
+def result_of(future):
+    return future.result(timeout=5)
+
+
+class UnityJobTrackerTest(unittest.TestCase):
+    @patch_rest
+    def test_track_jobs_with_one_query(self):
+        cli = t_rest()
+        tracker = UnityJobTracker(cli, min_interval=0.01)
+        f1 = tracker.track('B-3')
+        f2 = tracker.track(UnityJob(_id='N-345', cli=cli))
+
+        assert_that(result_of(f2).state, equal_to(JobStateEnum.COMPLETED))
+        assert_that(lambda: result_of(f1), raises(JobStateError))
+        assert_that(tracker, has_length(0))
+
+    @patch_rest
+    def test_track_response_of_async_request(self):
+        cli = t_rest()
+        cli.job_tracker.min_interval = 0.01
+        resp = cli.delete('storageResource', 'res_30', async=True,
+                          forceSnapDeletion=False, forceVvolDeletion=False)
+        job = result_of(cli.job_tracker.track(resp))
+        assert_that(job, instance_of(UnityJob))
+        assert_that(job.get_id(), equal_to('N-345'))
+
+    def test_same_job_tracked_once(self):
+        cli = FakeJobCli()
+        tracker = UnityJobTracker(cli, min_interval=0.01)
+        f1 = tracker.track('N-1')
+        f2 = tracker.track('N-1')
+        assert_that(f1, equal_to(f2))
+        assert_that(f1.cancel(), equal_to(False))
+        cli.set_state('N-1', JobStateEnum.COMPLETED)
+        assert_that(result_of(f1).get_id(), equal_to('N-1'))
+
+    def test_query_without_cache(self):
+        cli = FakeJobCli()
+        tracker = UnityJobTracker(cli, min_interval=0.01)
+        cli.set_state('N-1', JobStateEnum.RUNNING)
+        f = tracker.track('N-1')
+        time.sleep(0.05)
+        cli.set_state('N-1', JobStateEnum.COMPLETED)
+        assert_that(result_of(f).get_id(), equal_to('N-1'))
+        assert_that(cli.use_cache, equal_to({False}))
+
+    def test_poll_all_outstanding_jobs_per_tick(self):
+        cli = FakeJobCli()
+        tracker = UnityJobTracker(cli, min_interval=0.01,
+                                  max_ids_per_query=3)
+        for i in range(5):
+            cli.set_state('N-{}'.format(i), JobStateEnum.RUNNING)
+        futures = [tracker.track('N-{}'.format(i)) for i in range(5)]
+        for i in range(5):
+            cli.set_state('N-{}'.format(i), JobStateEnum.COMPLETED)
+        for f in futures:
+            result_of(f)
+        assert_that(cli.queries[0], equal_to(['N-0', 'N-1', 'N-2']))
+        assert_that(cli.queries[1], equal_to(['N-3', 'N-4']))
+        assert_that(len(cli.queries), less_than_or_equal_to(4))
+
+    def test_adaptive_backoff(self):
+        cli = FakeJobCli()
+        tracker = UnityJobTracker(cli, min_interval=0.02, max_interval=0.08,
+                                  backoff=2)
+        cli.set_state('N-1', JobStateEnum.RUNNING)
+        f = tracker.track('N-1')
+        for _ in range(100):
+            if len(cli.queries) >= 4:
+                break
+            time.sleep(0.02)
+        assert_that(tracker.interval, equal_to(0.08))
+
+        cli.set_state('N-1', JobStateEnum.COMPLETED)
+        result_of(f)
+        assert_that(tracker.interval, equal_to(0.02))
+
+    def test_callback(self):
+        cli = FakeJobCli()
+        tracker = UnityJobTracker(cli, min_interval=0.01)
+        done = threading.Event()
+        called = []
+
+        def callback(f):
+            called.append(f.result().get_id())
+            done.set()
+
+        cli.set_state('N-1', JobStateEnum.COMPLETED)
+        tracker.track('N-1', callback=callback)
+        done.wait(5)
+        assert_that(called, equal_to(['N-1']))
+
+    def test_timeout(self):
+        cli = FakeJobCli()
+        tracker = UnityJobTracker(cli, min_interval=0.01)
+        cli.set_state('N-1', JobStateEnum.RUNNING)
+        f = tracker.track('N-1', timeout=0.05)
+        assert_that(lambda: result_of(f), raises(JobTimeoutException))
+
+    def test_wait(self):
+        cli = FakeJobCli()
+        tracker = UnityJobTracker(cli, min_interval=0.01)
+        cli.set_state('N-1', JobStateEnum.COMPLETED)
+        cli.set_state('N-2', JobStateEnum.FAILED)
+        tracker.track('N-1')
+        tracker.track('N-2')
+        done, not_done = tracker.wait(timeout=5)
+        assert_that(done, has_length(2))
+        assert_that(not_done, has_length(0))
+
+    def test_pickle(self):
+        tracker = UnityJobTracker(FakeJobCli(), min_interval=0.01)
+        tracker.track('N-1')
+        tracker = pickle.loads(pickle.dumps(tracker))
+        assert_that(tracker, has_length(0))
+        assert_that(tracker.min_interval, equal_to(0.01))
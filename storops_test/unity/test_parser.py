@@ -19,7 +19,8 @@ from unittest import TestCase
 
 from hamcrest import assert_that, equal_to, only_contains
 
-from storops.unity.parser import NestedProperties
+from storops.unity.enums import LUNTypeEnum
+from storops.unity.parser import NestedProperties, get_unity_parser
 
 
 class NestedPropertiesTest(TestCase):
@@ -55,3 +56,14 @@ class NestedPropertiesTest(TestCase):
         assert_that(sub1sub.get_properties(), only_contains('c', 'd'))
         sub2 = nested_props.get_child_subtree('aaa_bb')
         assert_that(sub2.get_properties(), only_contains('ccc_dd', 'ee_ff'))
+
+
+class UnityRestParserTest(TestCase):
+    def test_convert_on_read(self):
+        parsed = get_unity_parser('UnityLun').parse(
+            {'id': 'sv_1', 'name': 'l1', 'type': 2})
+        assert_that(parsed.is_evaluated('type'), equal_to(False))
+        assert_that(parsed['type'], equal_to(LUNTypeEnum.STANDALONE))
+        assert_that(parsed.is_evaluated('type'), equal_to(True))
+        assert_that(parsed, equal_to({'id': 'sv_1', 'name': 'l1',
+                                      'type': LUNTypeEnum.STANDALONE}))
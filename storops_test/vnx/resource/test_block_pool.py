@@ -263,6 +263,16 @@ class VNXPoolListTest(TestCase):
         for pool in pools:
             assert_that(pool.lun_list.timestamp, equal_to(lun_list.timestamp))
 
+    @patch_cli
+    def test_pool_list_fields(self):
+        pools = VNXPoolList(t_cli(), fields=['state', 'user_capacity_gbs'])
+        assert_that(len(pools), equal_to(5))
+        pool = pools[0]
+        assert_that(pool.name, equal_to('Pool 1'))
+        assert_that(pool.state, equal_to('Ready'))
+        assert_that(pool.user_capacity_gbs, equal_to(2146.434))
+        assert_that(pool.luns, none())
+
 
 class VNXPoolTierTest(TestCase):
     @patch_cli
@@ -31,8 +31,9 @@ from storops.exception import VNXCompressionError, \
     EnumValueNotFoundError, VNXLunHasSnapMountPointError, \
     VNXLunUsedByFeatureError, VNXNameInUseError
 from storops.lib.common import instance_cache, cache
+from storops.vnx.block_cli import CliClient
 from storops.vnx.enums import VNXProvisionEnum, VNXTieringEnum, \
-    VNXCompressionRate, VNXSPEnum, VNXPoolRaidType
+    VNXCompressionRate, VNXSPEnum, VNXPoolRaidType, VNXLunType
 from storops.vnx.resource.lun import VNXLun, VNXLunList
 from storops.vnx.resource.snap import VNXSnap
 from storops_test.vnx.cli_mock import t_cli, patch_cli
@@ -811,3 +812,57 @@ class VNXLunListTest(TestCase):
         # verify the original list is not touched
         assert_that(len(self.lun_list), equal_to(183))
         assert_that(ret.timestamp, equal_to(self.lun_list.timestamp))
+
+    @patch_cli
+    def test_lun_list_fields(self):
+        luns = VNXLunList(t_cli(), fields=['name', 'total_capacity_gb'])
+        assert_that(len(luns), equal_to(183))
+        lun = luns.get(148)
+        assert_that(lun.name, equal_to('lun_cl_95'))
+        assert_that(lun.total_capacity_gb, equal_to(10.0))
+        assert_that(lun.current_owner, none())
+
+    def test_lun_list_fields_of_pool_filter(self):
+        luns = VNXLunList(t_cli(), pool='Pool4File', fields=['name'])
+        assert_that(luns._get_options(), equal_to(['-poolName']))
+
+    def test_lun_list_fields_not_selectable(self):
+        luns = VNXLunList(t_cli(), fields=['name', 'read_requests'])
+        assert_that(luns._get_options(), none())
+
+    @patch_cli
+    def test_lun_list_targeted(self):
+        luns = VNXLunList(t_cli(), lun_ids=[19, 0, 1, 19])
+        luns.targeted_threshold = 3
+        # lun 19 is not in the output of "lun -list -all"
+        assert_that(sorted(luns.lun_id), equal_to([0, 1, 19]))
+
+    @patch_cli
+    def test_lun_list_targeted_empty(self):
+        luns = VNXLunList(t_cli(), lun_ids=[])
+        assert_that(len(luns), equal_to(0))
+
+    @patch_cli
+    def test_lun_list_over_targeted_threshold(self):
+        luns = VNXLunList(t_cli(), lun_ids=[0, 1, 19])
+        luns.targeted_threshold = 2
+        assert_that(sorted(luns.lun_id), equal_to([0, 1]))
+
+    def test_lun_list_of_type_not_targeted(self):
+        luns = VNXLunList(t_cli(), lun_ids=[0],
+                          lun_type=VNXLunType.SNAP_MOUNT_POINT)
+        assert_that(luns._is_targeted(), equal_to(False))
+
+    def test_targeted_threshold_default(self):
+        cli = CliClient('10.244.212.182', heartbeat_interval=0)
+        luns = VNXLunList(cli, lun_ids=[0])
+        assert_that(luns.get_targeted_threshold(),
+                    equal_to(VNXLunList.default_targeted_threshold))
+
+    def test_targeted_threshold_from_latency(self):
+        cli = CliClient('10.244.212.182', heartbeat_interval=0)
+        cli.add_latency('lun_list', 12.0)
+        cli.add_latency('lun_list_one', 1.5)
+        luns = VNXLunList(cli, lun_ids=[0])
+        assert_that(luns.get_targeted_threshold(),
+                    equal_to(8 * luns._get_workers()))
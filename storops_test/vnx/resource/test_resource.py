@@ -15,11 +15,16 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import threading
+import time
 from unittest import TestCase
 
-from hamcrest import assert_that, equal_to, raises
+from hamcrest import assert_that, equal_to, raises, has_length, \
+    less_than_or_equal_to, contains_inanyorder
 
-from storops.vnx.resource import VNXCliResource
+from storops.vnx.block_cli import CliClient
+from storops.vnx.enums import VNXSPEnum
+from storops.vnx.resource import VNXCliResource, VNXResourceListCollection
 
 __author__ = 'Cedric Zhuang'
 
@@ -59,3 +64,94 @@ class VNXCliResourceTest(TestCase):
             with r.with_no_poll():
                 r.do()
         assert_that(f, raises(ValueError, 'test error'))
+
+
+class SlowList(object):
+    active = {}
+    lock = threading.Lock()
+
+    def __init__(self, cli, name, seconds=0.05):
+        self._cli = cli
+        self.clz = type(str(name), (object,), {})
+        self.seconds = seconds
+        self.ip = None
+
+    def get_resource_class(self):
+        return self.clz
+
+    def update(self):
+        self.ip = self._cli.ip
+        with self.lock:
+            count = self.active.get(self.ip, 0) + 1
+            self.active[self.ip] = count
+            SlowList.max_active = max(SlowList.max_active, count)
+        time.sleep(self.seconds)
+        with self.lock:
+            self.active[self.ip] -= 1
+
+
+class VNXResourceListCollectionTest(TestCase):
+    def setUp(self):
+        SlowList.max_active = 0
+
+    @staticmethod
+    def get_cli(spb_alive=True):
+        cli = CliClient('1.1.1.1', heartbeat_interval=0)
+        cli._heart_beat.update_by_ip('1.1.1.1', available=True)
+        cli._heart_beat.add(VNXSPEnum.SP_B, '1.1.1.2', available=spb_alive)
+        return cli
+
+    def test_update_spread_on_sps(self):
+        cli = self.get_cli()
+        rsc_lists = [SlowList(cli, 'list{}'.format(i)) for i in range(6)]
+        rlc = VNXResourceListCollection(rsc_lists, cli=cli, max_per_sp=2)
+        rlc.update()
+        ips = [rsc_list.ip for rsc_list in rsc_lists]
+        assert_that(ips, contains_inanyorder(*(['1.1.1.1', '1.1.1.2'] * 3)))
+        assert_that(SlowList.max_active, less_than_or_equal_to(2))
+        assert_that(rlc.timings, has_length(6))
+
+    def test_update_balanced_by_estimates(self):
+        cli = self.get_cli()
+        rsc_lists = [SlowList(cli, 'list{}'.format(i), 0.01)
+                     for i in range(3)]
+        estimates = {rsc_lists[0].clz: 10, rsc_lists[1].clz: 3,
+                     rsc_lists[2].clz: 4}
+        VNXResourceListCollection(rsc_lists, cli=cli,
+                                  estimates=estimates).update()
+        assert_that([rsc_list.ip for rsc_list in rsc_lists],
+                    equal_to(['1.1.1.1', '1.1.1.2', '1.1.1.2']))
+
+    def test_update_one_sp_alive(self):
+        cli = self.get_cli(spb_alive=False)
+        rsc_lists = [SlowList(cli, 'list{}'.format(i), 0.01)
+                     for i in range(3)]
+        VNXResourceListCollection(rsc_lists, cli=cli, max_per_sp=1).update()
+        assert_that(set(rsc_list.ip for rsc_list in rsc_lists),
+                    equal_to({'1.1.1.1'}))
+        assert_that(SlowList.max_active, equal_to(1))
+
+    def test_prefer_sp_ip(self):
+        cli = self.get_cli()
+        assert_that(cli.ip, equal_to('1.1.1.1'))
+        with cli.prefer_sp_ip('1.1.1.2'):
+            assert_that(cli.ip, equal_to('1.1.1.2'))
+            cli._heart_beat.update_by_ip('1.1.1.2', available=False)
+            assert_that(cli.ip, equal_to('1.1.1.1'))
+        assert_that(cli._preferred_ip, equal_to({}))
+
+    def test_update_fresh_lists(self):
+        cli = self.get_cli()
+        cli.list_cache.max_age = 60
+        outputs = iter(['old', 'new'])
+
+        class CachedList(SlowList):
+            def update(self):
+                self.output = self._cli.list_cache.get(
+                    'lun', 'a', lambda: next(outputs))
+
+        rsc_list = CachedList(cli, 'list')
+        rsc_list.update()
+        VNXResourceListCollection([rsc_list], cli=cli).update()
+        assert_that(rsc_list.output, equal_to('new'))
+        assert_that(cli.list_cache.get('lun', 'a', None), equal_to('new'))
@@ -87,6 +87,16 @@ class VNXStorageGroupListTest(TestCase):
         assert_that(len(self.sg_list), equal_to(4))
         assert_that(filtered_sgs.timestamp, equal_to(self.sg_list.timestamp))
 
+    @patch_cli
+    def test_sg_list_fields(self):
+        sgs = VNXStorageGroupList(t_cli(), fields=['wwn', 'alu_hlu_map'],
+                                  attached_lun=15)
+        assert_that(len(sgs), equal_to(1))
+        sg = sgs[0]
+        assert_that(sg.name, equal_to('ubuntu14'))
+        assert_that(sg.get_hlu(15), equal_to(154))
+        assert_that(sg.hba_sp_pairs, equal_to(tuple()))
+
 
 def get_sg(name='server7'):
     sg = VNXStorageGroup(name=name, cli=t_cli())
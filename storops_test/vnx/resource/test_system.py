@@ -19,7 +19,7 @@ import logging
 from unittest import TestCase
 
 from hamcrest import assert_that, equal_to, none, instance_of, raises,\
-    is_not
+    is_not, has_item, calling
 
 from storops import VNXSystem
 from storops.exception import VNXDeleteHbaNotFoundError, VNXCredentialError, \
@@ -78,6 +78,34 @@ class VNXSystemTest(TestCase):
         pool = self.vnx.get_pool(pool_id=0)
         verify_pool_0(pool)
 
+    @patch_cli
+    def test_list_cache(self):
+        vnx = VNXSystem('10.244.211.30', heartbeat_interval=0)
+        vnx.enable_list_cache(max_age=60)
+        assert_that(len(vnx.get_lun()), equal_to(183))
+        assert_that(len(vnx.get_lun()), equal_to(183))
+        stats = vnx.get_list_cache_stats()
+        assert_that(stats['hits'], equal_to(1))
+        assert_that(stats['misses'], equal_to(1))
+
+        vnx.invalidate_list_cache('lun')
+        vnx.get_lun().update()
+        assert_that(vnx.get_list_cache_stats()['misses'], equal_to(2))
+
+        vnx.disable_list_cache()
+        assert_that(vnx.get_list_cache_stats()['entries'], equal_to(0))
+
+    def test_enable_list_cache_invalid_max_age(self):
+        assert_that(calling(self.vnx.enable_list_cache).with_args(0),
+                    raises(ValueError, 'greater than 0'))
+
+    @patch_cli
+    def test_get_lun_list_fields(self):
+        luns = self.vnx.get_lun(fields=['name', 'lun_id',
+                                        'total_capacity_gb'])
+        assert_that(len(luns), equal_to(183))
+        assert_that(luns.get(148).total_capacity_gb, equal_to(10.0))
+
     @patch_cli
     def test_member_ips(self):
         vnx = VNXSystem('10.244.211.30', heartbeat_interval=0)
@@ -518,6 +546,17 @@ class VNXSystemTest(TestCase):
         assert_that(len(clz_list), equal_to(2))
         vnx.disable_perf_stats()
 
+    @patch_cli
+    def test_counter_history(self):
+        vnx = VNXSystem('10.244.211.30', heartbeat_interval=0)
+        history = vnx.enable_counter_history(10)
+        vnx._cli.add_metric_record(vnx.collect_perf_record([VNXLun]))
+        assert_that(vnx.counter_history, equal_to(history))
+        assert_that(len(history), equal_to(1))
+        assert_that(history.paths(), has_item('VNXLun.read_requests'))
+        vnx.disable_counter_history()
+        assert_that(vnx.counter_history, none())
+
     @patch_cli
     def test_get_rsc_list_2_returns_different_instances(self):
         ret1 = self.vnx.get_rsc_list_2()
@@ -18,7 +18,7 @@ from __future__ import unicode_literals
 from unittest import TestCase
 
 from hamcrest import assert_that, equal_to, contains_string, is_not, none, \
-    has_item, close_to
+    has_item, close_to, ends_with
 
 from storops.lib.common import instance_cache
 from storops_test.vnx.cli_mock import t_cli, patch_cli, t_vnx
@@ -51,6 +51,13 @@ class VNXStorageProcessorTest(TestCase):
         assert_that(filename,
                     contains_string('_VNXStorageProcessor.csv'))
 
+    @patch_cli
+    def test_default_metric_file_prefix(self):
+        sp_list = self.get_sp_list()
+        prefix = sp_list.get_default_metric_file_prefix()
+        assert_that(prefix, contains_string('.storops'))
+        assert_that(prefix, ends_with('_VNXStorageProcessor'))
+
     @patch_cli
     def test_sp_properties(self):
         sp = VNXStorageProcessor(t_cli(), VNXSPEnum.SP_A, '1.1.1.2')
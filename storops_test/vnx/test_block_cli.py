@@ -18,7 +18,8 @@ from __future__ import unicode_literals
 from unittest import TestCase
 
 from hamcrest import assert_that, contains_string, equal_to, calling, raises, \
-    greater_than, has_items
+    greater_than, has_items, none, close_to
+from mock import MagicMock, patch
 
 from storops.exception import VNXSystemDownError, VNXCredentialError
 from storops.vnx.block_cli import CliClient
@@ -117,6 +118,45 @@ class CliClientTest(TestCase):
         cmd = self.client.get_pool()
         assert_that(cmd, equal_to('storagepool -list -all'))
 
+    def test_latency_not_measured(self):
+        assert_that(self.client.get_latency('lun_list'), none())
+
+    def test_latency_weighted_average(self):
+        self.client.add_latency('lun_list', 2.0)
+        self.client.add_latency('lun_list', 5.0)
+        # the latest one has more weight
+        assert_that(self.client.get_latency('lun_list'),
+                    close_to(3.667, 0.001))
+
+    def test_list_cache_reuse_output(self):
+        self.client.list_cache.max_age = 60
+        with patch.object(self.client, 'execute', return_value='out') as m:
+            self.client.get_lun()
+            assert_that(self.client.get_lun(), equal_to('out'))
+            self.client.get_lun(poll=False)
+            assert_that(m.call_count, equal_to(2))
+
+    def test_list_cache_invalidated(self):
+        self.client.list_cache.max_age = 60
+        with patch.object(self.client, 'execute', return_value='out') as m:
+            self.client.get_sg()
+            self.client.get_lun()
+            self.client.sg_add_hlu('sg0', 1, 2)
+            self.client.get_sg()
+            self.client.get_lun()
+            assert_that(m.call_count, equal_to(4))
+
+    def test_list_cache_invalidated_on_error(self):
+        self.client.list_cache.max_age = 60
+        with patch.object(self.client, 'execute', return_value='out'):
+            self.client.get_pool()
+        with patch.object(self.client, 'execute',
+                          side_effect=VNXSystemDownError):
+            assert_that(calling(self.client.delete_pool).with_args(
+                pool_id=1), raises(VNXSystemDownError))
+        assert_that(self.client.list_cache.get_version('pool'),
+                    equal_to(1))
+
     @extract_command
     def test_get_pool_two_option(self):
         cmd = self.client.get_pool(name='p0', pool_id=1)
@@ -875,6 +915,21 @@ class CliClientTest(TestCase):
         assert_that(t_cli().curr_counter.get_rsc_list_collection(),
                     has_items(*persist_rsc_list_2))
 
+    @patch_cli
+    def test_persist_rsc_list_metrics(self):
+        cli = t_cli()
+        rsc_list = MagicMock()
+        with patch.object(cli, 'get_persist_rsc_list',
+                          return_value=[rsc_list]):
+            cli.persist_perf_stats([rsc_list], rotation=60)
+            cli.persist_rsc_list_metrics()
+            rsc_list.persist_metric_block.assert_called_once_with(
+                rotation=60)
+
+            cli.persist_perf_stats([rsc_list], 'csv')
+            cli.persist_rsc_list_metrics()
+            rsc_list.persist_metric_data.assert_called_once_with()
+
     @patch_cli
     def test_get_rsc_perf_csv_data(self):
         lun_list = t_cli().curr_counter.get_rsc_list(VNXLun)
@@ -14,13 +14,22 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import math
+import os
+import shutil
+import tempfile
 from unittest import TestCase
 
-from hamcrest import assert_that, instance_of, equal_to, close_to
+from hamcrest import assert_that, instance_of, equal_to, close_to, \
+    has_length, same_instance, has_key, is_not
+from mock import patch
 
+from storops.lib.metric import MetricsFrame
 from storops.vnx.calculator import VNXMetricConfigParser, VNXMetricConfig, \
-    VNXMetricConfigList, minus, div, round_60, add, aggregated_sum
+    VNXMetricConfigList, minus, div, round_60, add, aggregated_sum, \
+    calculators, VNXMetricFrame, get_column_ops, np, _ListOps, _NumpyOps
 from storops.vnx.resource.lun import VNXLun, VNXLunList
+from storops.vnx.resource.sg import VNXStorageGroupList
 from storops_test.utils import is_nan
 from storops_test.vnx.cli_mock import t_cli, patch_cli
 
@@ -107,8 +116,140 @@ class VNXMetricConfigCalculatorTest(TestCase):
         config = VNXMetricConfigParser.get_config(VNXLun)
         assert_that(config, instance_of(VNXMetricConfigList))
 
+    def test_get_config_shared(self):
+        config = VNXMetricConfigParser.get_config(VNXLun)
+        assert_that(VNXMetricConfigParser.get_config('VNXLun'),
+                    same_instance(config))
+
     def test_get_metric_config(self):
         config = VNXMetricConfigParser.get_config(VNXLun)
         metric_config = config.get_metric_config('read_iops')
         assert_that(metric_config, instance_of(VNXMetricConfig))
         assert_that(metric_config.name, equal_to('read_iops'))
+
+
+def assert_same_value(actual, expected):
+    if math.isnan(expected):
+        assert_that(actual, is_nan())
+    else:
+        assert_that(actual, close_to(expected, 1e-9 * max(1, abs(expected))))
+
+
+class VNXMetricFrameTest(TestCase):
+    @staticmethod
+    def get_ops_list():
+        ret = [_ListOps()]
+        if np is not None:
+            ret.append(_NumpyOps())
+        return ret
+
+    @patch_cli
+    def test_frame_same_as_scalar_calculators(self):
+        cli = t_cli()
+        prev, curr = cli.prev_counter, cli.curr_counter
+        calculators.use_frame = False
+        try:
+            for rsc_list in curr.get_rsc_list_collection():
+                clz = rsc_list.resource_class_name()
+                config_list = calculators.get_config(clz)
+                frames = [VNXMetricFrame.build(config_list, prev, curr,
+                                               rsc_list.get_resource_class(),
+                                               ops=ops)
+                          for ops in self.get_ops_list()]
+                for name in config_list.metric_names():
+                    config = config_list.get_metric_config(name)
+                    for item in rsc_list:
+                        expected = calculators._get_calculated_stats(
+                            cli, config, item)
+                        for frame in frames:
+                            assert_same_value(frame.get(item, name),
+                                              expected)
+        finally:
+            calculators.use_frame = True
+
+    @patch_cli
+    def test_frame_cached_for_records(self):
+        cli = t_cli()
+        frame = calculators.get_frame('VNXLun', cli, VNXLun)
+        assert_that(frame, has_length(
+            len(cli.curr_counter.get_rsc_list(VNXLun))))
+        assert_that(calculators.get_frame('VNXLun', cli, VNXLun),
+                    equal_to(frame))
+
+    @patch_cli
+    def test_resource_not_in_prev_record(self):
+        cli = t_cli()
+        curr_list = cli.curr_counter.get_rsc_list(VNXLun)
+        frame = VNXMetricFrame(calculators.get_config('VNXLun'), None,
+                               curr_list, 60)
+        lun = curr_list[0]
+        assert_that(frame.get(lun, 'read_iops'), is_nan())
+        assert_that(frame.get(lun, 'total_iops'), is_nan())
+
+    @patch_cli
+    def test_resource_not_in_curr_record(self):
+        cli = t_cli()
+        frame = calculators.get_frame('VNXLun', cli, VNXLun)
+        assert_that(frame.get(VNXLun(lun_id=99999, cli=cli), 'read_iops'),
+                    is_nan())
+
+    def test_column_ops_without_numpy(self):
+        with patch('storops.vnx.calculator.np', new=None):
+            assert_that(get_column_ops(), instance_of(_ListOps))
+
+    def test_column_ops_div(self):
+        for ops in self.get_ops_list():
+            ret = ops.to_list(ops.div(ops.column([0, 6, 3, None, NaN]),
+                                      ops.column([0, 2, 0, 1, 1])))
+            assert_that(ret[:2], equal_to([0.0, 3.0]))
+            for value in ret[2:]:
+                assert_that(value, is_nan())
+
+    @patch_cli
+    def test_get_metrics_frame(self):
+        cli = t_cli()
+        lun_list = VNXLunList(cli=cli)
+        frame = lun_list.get_metrics_frame()
+        assert_that(frame, instance_of(MetricsFrame))
+        assert_that(frame.names, equal_to(lun_list.metric_names()))
+        assert_that(frame, has_length(len(lun_list)))
+        for lun, values in frame.rows():
+            for name, value in zip(frame.names, values):
+                assert_same_value(value, getattr(lun, name))
+
+    @patch_cli
+    def test_persist_metric_block(self):
+        folder = tempfile.mkdtemp(suffix='storops')
+        self.addCleanup(shutil.rmtree, folder, ignore_errors=True)
+        prefix = os.path.join(folder, 'lun')
+        lun_list = VNXLunList(cli=t_cli())
+        lun_list.persist_metric_block(prefix)
+
+        columns = lun_list.read_persisted_metrics(prefix=prefix)
+        assert_that(list(columns.keys())[:3],
+                    equal_to(['sample_time', 'timestamp', 'name']))
+        assert_that(columns['name'], has_length(len(lun_list)))
+        for lun, value in zip(lun_list, columns['read_iops']):
+            assert_same_value(value, lun.read_iops)
+
+    @patch_cli
+    def test_get_counters(self):
+        cli = t_cli()
+        lun_list = cli.curr_counter.get_rsc_list(VNXLun)
+        counters = lun_list.get_counters()
+        assert_that(counters, has_key('VNXLun.read_requests'))
+        assert_that(counters, is_not(has_key('VNXLun.read_iops')))
+        for lun in lun_list:
+            assert_that(counters['VNXLun.read_requests'][lun.lun_id],
+                        equal_to(lun.read_requests))
+        assert_that(cli.curr_counter.get_counters(),
+                    has_key('VNXStorageProcessor.blocks_read'))
+
+    @patch_cli
+    def test_get_metrics_frame_aggregated(self):
+        sg_list = VNXStorageGroupList(cli=t_cli())
+        frame = sg_list.get_metrics_frame(['read_iops', 'write_size_kb'])
+        assert_that(frame.names, equal_to(['read_iops', 'write_size_kb']))
+        for sg, (read_iops, write_size_kb) in frame.rows():
+            assert_same_value(read_iops, sg.read_iops)
+            assert_same_value(write_size_kb, sg.write_size_kb)
@@ -15,13 +15,22 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import os
+import shutil
+import sys
+import tempfile
+import threading
 import time
+from multiprocessing.pool import ThreadPool
 from unittest import TestCase
 
-from hamcrest import equal_to, assert_that, raises, less_than
+from hamcrest import equal_to, assert_that, raises, less_than, none, \
+    calling, instance_of
 
-from storops.exception import VNXCredentialError
-from storops.vnx.navi_command import NaviCommand
+from storops.exception import VNXCredentialError, NaviseccliNotAvailableError
+from storops.vnx.heart_beat import NodeHeartBeat
+from storops.vnx.navi_command import NaviCommand, NaviTransport, \
+    NaviWorkerPoolTransport
 from storops_test.vnx.cli_mock import patch_cli
 
 __author__ = 'Cedric Zhuang'
@@ -89,3 +98,187 @@ class NaviCommandTest(TestCase):
         cmd.execute('python'.split(), timeout=0.1)
         dt = time.time() - start
         assert_that(dt, less_than(1))
+
+    def test_execute_with_transport(self):
+        transport = FakeTransport()
+        out = NaviCommand.execute_naviseccli(['naviseccli', 'getagent'],
+                                             transport=transport)
+        assert_that(out, equal_to('naviseccli getagent'))
+        assert_that(transport.commands,
+                    equal_to([['naviseccli', 'getagent']]))
+
+    def test_heart_beat_transport(self):
+        transport = FakeTransport()
+        hb = NodeHeartBeat(interval=0, transport=transport)
+        hb.add('spa', '1.1.1.1')
+        hb.execute_cmd('1.1.1.1', ['naviseccli', '-h', '1.1.1.1', 'getagent'])
+        assert_that(hb.transport, equal_to(transport))
+        assert_that(transport.commands, equal_to(
+            [['naviseccli', '-h', '1.1.1.1', 'getagent']]))
+
+
+class FakeTransport(NaviTransport):
+    def __init__(self, max_per_sp=None, delay=0):
+        super(FakeTransport, self).__init__(max_per_sp)
+        self.delay = delay
+        self.commands = []
+        self.running = {}
+        self.max_running = {}
+
+    def _run(self, cmd, timeout):
+        target = self.get_target(cmd)
+        with self._lock:
+            self.commands.append(cmd)
+            self.running[target] = self.running.get(target, 0) + 1
+            self.max_running[target] = max(self.max_running.get(target, 0),
+                                           self.running[target])
+        time.sleep(self.delay)
+        with self._lock:
+            self.running[target] -= 1
+        return ' '.join(cmd)
+
+
+def python_cmd(script):
+    return [sys.executable, '-c', script]
+
+
+class NaviTransportTest(TestCase):
+    def test_get_target(self):
+        assert_that(NaviTransport.get_target(
+            ['naviseccli', '-h', '1.1.1.1', 'getagent']),
+            equal_to('1.1.1.1'))
+        assert_that(NaviTransport.get_target(['naviseccli', 'getagent']),
+                    none())
+        assert_that(NaviTransport.get_target(['naviseccli', '-h']), none())
+
+    def test_max_per_sp(self):
+        transport = FakeTransport(max_per_sp=2, delay=0.05)
+        commands = [['naviseccli', '-h', ip, 'getagent']
+                    for ip in ('a', 'b') * 5]
+        pool = ThreadPool(10)
+        try:
+            pool.map(lambda cmd: transport.execute(cmd, 10), commands)
+        finally:
+            pool.close()
+        assert_that(transport.max_running, equal_to({'a': 2, 'b': 2}))
+
+    def test_execute(self):
+        out = NaviTransport().execute(python_cmd('print(" abc ")'), 10)
+        assert_that(out, equal_to('abc'))
+
+
+class NaviWorkerPoolTransportTest(TestCase):
+    def setUp(self):
+        self.transport = NaviWorkerPoolTransport(size=2)
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_execute(self):
+        out = self.transport.execute(python_cmd('print(" abc ")'), 10)
+        assert_that(out, equal_to('abc'))
+
+    def test_reuse_worker(self):
+        cmd = python_cmd('import os; print(os.getppid())')
+        pids = set(self.transport.execute(cmd, 10) for _ in range(3))
+        assert_that(len(pids), equal_to(1))
+        assert_that(self.transport._spawned, equal_to(1))
+
+    def test_start(self):
+        self.transport.start()
+        assert_that(self.transport._spawned, equal_to(2))
+        assert_that(len(self.transport._idle), equal_to(2))
+
+    def test_concurrent(self):
+        cmd = python_cmd('import time; time.sleep(0.2); print(1)')
+        pool = ThreadPool(4)
+        try:
+            out = pool.map(lambda _: self.transport.execute(cmd, 10),
+                           range(4))
+        finally:
+            pool.close()
+        assert_that(out, equal_to(['1'] * 4))
+        assert_that(self.transport._spawned, equal_to(2))
+
+    def test_binary_not_found(self):
+        def f():
+            NaviCommand.execute_naviseccli(['not_exists_naviseccli'],
+                                           transport=self.transport)
+
+        assert_that(f, raises(NaviseccliNotAvailableError))
+        assert_that(self.transport._spawned, equal_to(1))
+
+    def test_timeout(self):
+        start = time.time()
+        self.transport.execute(python_cmd('import time; time.sleep(10)'),
+                               0.2)
+        assert_that(time.time() - start, less_than(5))
+
+    def test_worker_exited(self):
+        cmd = python_cmd('print(1)')
+        self.transport.execute(cmd, 10)
+        worker = self.transport._idle[-1]
+        worker._process.kill()
+        worker._process.wait()
+        assert_that(self.transport.execute(cmd, 10), equal_to('1'))
+        assert_that(self.transport._spawned, equal_to(1))
+
+    def test_worker_exited_while_running(self):
+        folder = tempfile.mkdtemp()
+        try:
+            runs = os.path.join(folder, 'runs')
+            cmd = python_cmd(
+                'import os; open({!r}, "a").write("1"); '
+                'os.kill(os.getppid(), 9)'.format(runs))
+            assert_that(calling(self.transport.execute).with_args(cmd, 10),
+                        raises(EOFError))
+            with open(runs) as f:
+                assert_that(f.read(), equal_to('1'))
+            assert_that(self.transport._spawned, equal_to(0))
+        finally:
+            shutil.rmtree(folder)
+
+    def test_close(self):
+        self.transport.start()
+        self.transport.close()
+        assert_that(self.transport._spawned, equal_to(0))
+        assert_that(calling(self.transport.execute).with_args(
+            python_cmd('print(1)'), 10), raises(RuntimeError, 'closed'))
+
+    def execute_in_thread(self, cmd):
+        out = []
+
+        def _execute():
+            try:
+                out.append(self.transport.execute(cmd, 10))
+            except (RuntimeError, EOFError) as e:
+                out.append(e)
+
+        thread = threading.Thread(target=_execute)
+        thread.start()
+        for _ in range(100):
+            if self.transport._workers:
+                break
+            time.sleep(0.05)
+        return thread, out
+
+    def test_close_wait_running(self):
+        thread, out = self.execute_in_thread(
+            python_cmd('import time; time.sleep(0.5); print(1)'))
+        self.transport.close()
+        thread.join(5)
+        assert_that(out, equal_to(['1']))
+        assert_that(self.transport._spawned, equal_to(0))
+
+    def test_close_terminate_busy(self):
+        thread, out = self.execute_in_thread(
+            python_cmd('import time; time.sleep(10)'))
+        worker = list(self.transport._workers)[0]
+        start = time.time()
+        self.transport.close(timeout=0.2)
+        assert_that(time.time() - start, less_than(5))
+        assert_that(worker.is_alive(), equal_to(False))
+        assert_that(self.transport._spawned, equal_to(0))
+        thread.join(5)
+        # the interrupted command is not retried
+        assert_that(out[0], instance_of(EOFError))
@@ -16,16 +16,25 @@
 from __future__ import unicode_literals
 
 import logging
+import os
+import shutil
+import tempfile
 from unittest import TestCase
 
-from hamcrest import equal_to, assert_that, not_none, none, raises
+from hamcrest import equal_to, assert_that, not_none, none, raises, \
+    has_item, same_instance, is_not
+from mock import patch
 
+from storops.lib.common import EnumList
+from storops.lib.parser import ParserConfigFactory, ParserPickleCache
+from storops.lib.resource import Resource
 from storops.vnx.enums import VNXSPEnum
 from storops.vnx.parsers import VNXCliParser, VNXPropDescriptor, \
     VNXParserConfigFactory
 from storops.vnx.resource import get_vnx_parser
 from storops_test.vnx.cli_mock import MockCli
 from storops_test.vnx.resource.fakes import STORAGE_GROUP_HBA
+from storops_test.utils import read_test_file
 
 log = logging.getLogger(__name__)
 
@@ -319,3 +328,192 @@ class VNXParserConfigFactoryTest(TestCase):
     def test_get_rsc_pkg_name(self):
         name = VNXParserConfigFactory.get_rsc_pkg_name()
         assert_that(name, equal_to('storops.vnx.resource'))
+
+    def test_parser_reused(self):
+        factory = VNXParserConfigFactory()
+        parser = factory.get('VNXLun')
+        assert_that(factory.get('VNXLun'), equal_to(parser))
+
+    def test_config_read_once(self):
+        configs = VNXParserConfigFactory()._read_configs()
+        assert_that(VNXParserConfigFactory()._read_configs() is configs,
+                    equal_to(True))
+
+    def test_config_not_changed_by_parser_config(self):
+        config = VNXParserConfigFactory().get_config('VNXLun')
+        count = len(config.properties)
+        config.add_property({'label': 'Dummy:'})
+        config = VNXParserConfigFactory().get_config('VNXLun')
+        assert_that(len(config.properties), equal_to(count))
+
+
+class ParserPickleCacheTest(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        ParserConfigFactory.enable_pickle_cache(self.folder)
+
+    def tearDown(self):
+        ParserConfigFactory.disable_pickle_cache()
+        shutil.rmtree(self.folder)
+
+    @staticmethod
+    def parse_pool(factory):
+        output = MockCli.read_file('storagepool_-list_-all_-id_1.txt')
+        return factory.get('VNXPool').parse(output)
+
+    def test_cache_created(self):
+        factory = VNXParserConfigFactory()
+        factory.get('VNXLun')
+        filename = ParserPickleCache(self.folder).get_filename(factory)
+        assert_that(os.path.exists(filename), equal_to(True))
+
+    def test_load_from_cache(self):
+        expected = self.parse_pool(VNXParserConfigFactory())
+
+        factory = VNXParserConfigFactory()
+        pool = self.parse_pool(factory)
+        assert_that(sorted(pool.keys()), equal_to(sorted(expected.keys())))
+        assert_that(pool.state, equal_to('Ready'))
+        assert_that(pool.user_capacity_gbs, equal_to(2329.792))
+        parser = factory.get('VNXLun')
+        assert_that(parser.resource_class_name, equal_to('VNXLun'))
+        assert_that(parser.CURRENT_OWNER.converter('SP A'),
+                    equal_to(VNXSPEnum.SP_A))
+
+    def test_cache_key_of_sources(self):
+        factory = VNXParserConfigFactory()
+        cache = ParserPickleCache(self.folder)
+        filename = cache.get_filename(factory)
+        assert_that(cache.get_module_names(factory),
+                    has_item('storops.vnx.parsers'))
+        with patch.object(ParserPickleCache, 'get_source_digest',
+                          return_value='changed'):
+            assert_that(cache.get_filename(factory),
+                        is_not(equal_to(filename)))
+
+    def test_broken_cache_ignored(self):
+        factory = VNXParserConfigFactory()
+        filename = ParserPickleCache(self.folder).get_filename(factory)
+        with open(filename, 'wb') as f:
+            f.write(b'broken')
+        pool = self.parse_pool(factory)
+        assert_that(pool.pool_id, equal_to(1))
+        assert_that(os.path.getsize(filename) > 100, equal_to(True))
+
+
+def _normalize(value):
+    if isinstance(value, Resource):
+        ret = (type(value).__name__, _normalize(value.parsed_resource))
+    elif isinstance(value, EnumList):
+        ret = [_normalize(v) for v in value]
+    elif isinstance(value, dict):
+        ret = {k: _normalize(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple)):
+        ret = [_normalize(v) for v in value]
+    else:
+        ret = value
+    return ret
+
+
+def _parse_all(parser, output, single_scan):
+    VNXCliParser.single_scan = single_scan
+    try:
+        ret = _normalize(parser.parse_all(output))
+    except Exception as ex:
+        ret = (type(ex).__name__, str(ex))
+    finally:
+        VNXCliParser.single_scan = True
+    return ret
+
+
+class VNXCliParserLazyConvertTest(TestCase):
+    def test_convert_on_read(self):
+        output = MockCli.read_file('lun_-list_-all.txt')
+        luns = get_vnx_parser('VNXLun').parse_all(output)
+        lun = luns[0]
+        assert_that(lun.is_evaluated('total_capacity_gb'), equal_to(False))
+        assert_that(lun.total_capacity_gb, equal_to(10.0))
+        assert_that(lun.is_evaluated('total_capacity_gb'), equal_to(True))
+        assert_that(lun.is_evaluated('current_owner'), equal_to(False))
+
+
+class VNXCliParserSingleScanTest(TestCase):
+    def test_parse_empty_value(self):
+        output = 'ID: 1\nProp A (name):\nProp B:    b  \n'
+        assert_that(DemoParser().parse(output),
+                    equal_to({'id': '1', 'prop_a': '', 'prop_b': 'b',
+                              'prop_c': None}))
+
+    def test_parse_label_case_and_indent(self):
+        output = 'ID: 1\n  \tprop b: b\nPROP B: x\nID: 2\n'
+        parsed = DemoParser().parse_all(output)
+        assert_that(len(parsed), equal_to(2))
+        assert_that(parsed[0].prop_b, equal_to('b'))
+        assert_that(parsed[1].prop_b, none())
+
+    def test_same_as_pattern_search(self):
+        folder = os.path.join(os.path.dirname(__file__), 'testdata')
+        names = [name for name, config in
+                 VNXParserConfigFactory()._read_configs().items()
+                 if config.get('data_src') == 'cli']
+        # the output of the parsers with regex index is not scanned.
+        parsers = [get_vnx_parser(name) for name in names
+                   if get_vnx_parser(name)._can_scan()]
+        for sub_folder, _, files in os.walk(folder):
+            for filename in files:
+                output = read_test_file(sub_folder, filename)
+                for parser in parsers:
+                    expected = _parse_all(parser, output, False)
+                    actual = _parse_all(parser, output, True)
+                    assert_that(actual, equal_to(expected),
+                                '{} of {}'.format(parser.resource_class_name,
+                                                  filename))
+
+
+class VNXCliParserProjectionTest(TestCase):
+    def test_lun_projection(self):
+        parser = get_vnx_parser('VNXLun')
+        properties, options = parser.get_projection(
+            ['name', 'lun_id', 'total_capacity_gb'])
+        assert_that([p.key for p in properties],
+                    equal_to(['total_capacity_gb', 'name', 'lun_id']))
+        assert_that(options, equal_to(['-userCap']))
+
+    def test_projection_always_has_index(self):
+        parser = get_vnx_parser('VNXLun')
+        properties, options = parser.get_projection(['state', 'wwn'])
+        assert_that(properties, has_item(parser.index_property))
+        assert_that(options, equal_to(['-state', '-uid']))
+
+    def test_projection_cached(self):
+        parser = get_vnx_parser('VNXLun')
+        assert_that(parser.get_projection(['wwn', 'name']),
+                    same_instance(parser.get_projection(['name', 'wwn'])))
+
+    def test_projection_without_option(self):
+        parser = get_vnx_parser('VNXLun')
+        _, options = parser.get_projection(['name', 'read_requests'])
+        assert_that(options, none())
+
+    def test_projection_shown_keys(self):
+        parser = get_vnx_parser('VNXStorageGroup')
+        _, options = parser.get_projection(['wwn', 'alu_hlu_map'])
+        assert_that(options, equal_to([]))
+        _, options = parser.get_projection(['hba_sp_pairs'])
+        assert_that(options, equal_to(['-host', '-iscsiAttributes']))
+
+    def test_projection_unknown_field(self):
+        def f():
+            get_vnx_parser('VNXLun').get_projection(['not_a_field'])
+
+        assert_that(f, raises(ValueError, 'not_a_field'))
+
+    def test_parse_projection(self):
+        parser = get_vnx_parser('VNXLun')
+        properties, _ = parser.get_projection(['name', 'total_capacity_gb'])
+        output = MockCli.read_file('lun_-list_-userCap.txt')
+        luns = parser.parse_all(output, properties)
+        assert_that(len(luns), equal_to(183))
+        assert_that(sorted(luns[0].keys()),
+                    equal_to(['lun_id', 'name', 'total_capacity_gb']))
+        assert_that(luns[0].total_capacity_gb, equal_to(10.0))